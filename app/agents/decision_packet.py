@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 from datetime import datetime, timezone
 from typing import List, Optional
 from zoneinfo import ZoneInfo
@@ -8,17 +7,21 @@ from zoneinfo import ZoneInfo
 from app.config import get_settings
 from app.models import Bias, DecisionPacket
 from app.agents.context_agent import get_context_summary
+from app.infra.clock import Clock, get_clock
 from app.infra.db import get_recent_signals
 from app.agents.news_agent import get_lock
 from app.agents.news_impact_agent import build_news_impact_summary
 from app.engines.news_timing import compute_news_timing
 import logging
 
-from app.engines.setup_engine import detect_setups, SetupResult, _compute_atr
-from app.engines.scorer import score_packet
+from app.engines.candle_frame import Candles, as_frame
+from app.engines.setup_engine import detect_setups_both, SetupResult, _compute_atr
+from app.engines.scorer import ScoreInput, score_trace
 from app.engines.entry_timing_engine import get_m5_trend
 from app.engines.impulse_memory_engine import compute_impulse_memory
+from app.engines.indicator_state import get_indicator_tracker
 from app.engines.range_engine import evaluate_range_indicators
+from app.providers.market_snapshot import MarketSnapshot, fetch_market_snapshot
 
 log = logging.getLogger(__name__)
 
@@ -29,14 +32,12 @@ SESSION_WINDOWS = [
 ]
 
 
-def _recent_m15_trend(candles_m15: list, min_pts: float = 5.0, bars: int = 8) -> str:
+def _recent_m15_trend(candles_m15: Candles, min_pts: float = 5.0, bars: int = 8) -> str:
     """Trend sur les N dernières barres M15 (ex. 8 = 2h). Évite SELL quand la courbe monte, BUY quand elle descend."""
     if not candles_m15 or len(candles_m15) < bars:
         return "neutral"
-    closes = [float(c.get("close")) for c in candles_m15 if c.get("close") is not None]
-    if len(closes) < bars:
-        return "neutral"
-    diff = closes[-1] - closes[-bars]
+    closes = as_frame(candles_m15).close
+    diff = float(closes[-1] - closes[-bars])
     if diff > min_pts:
         return "up"
     if diff < -min_pts:
@@ -99,15 +100,31 @@ def _parse_timestamp(value: object) -> Optional[datetime]:
     return None
 
 
-def build_decision_packet(provider, symbol: str) -> DecisionPacket:
+def _session_clock(provider) -> Clock:
+    """Horloge de session par défaut : heure serveur du provider simulé (MockDataProvider), sinon get_clock()."""
+    server_clock = getattr(provider, "server_clock", None)
+    return server_clock() if callable(server_clock) else get_clock()
+
+
+def build_decision_packet(
+    provider,
+    symbol: str,
+    snapshot: Optional[MarketSnapshot] = None,
+    clock: Optional[Clock] = None,
+) -> DecisionPacket:
+    """
+    Construit le DecisionPacket (meilleure direction BUY/SELL).
+    snapshot : données marché du cycle déjà lues (sinon lues ici via fetch_market_snapshot).
+    clock : horloge de la session (défaut : celle du provider simulé, sinon get_clock() ; simulée en replay).
+    """
     settings = get_settings()
-    now_utc = provider.get_server_time()
+    if snapshot is None:
+        snapshot = fetch_market_snapshot(provider, symbol)
+    now_utc = snapshot.server_time
     now_paris = now_utc.astimezone(ZoneInfo("Europe/Paris"))
 
-    # Session : utiliser l'heure système (pas le tick MT5) pour éviter décalage broker.
-    # MOCK_SERVER_TIME_UTC : utilisé par les tests pour forcer une heure.
-    forced = os.environ.get("MOCK_SERVER_TIME_UTC")
-    now_for_session = datetime.fromisoformat(forced) if forced else datetime.now(timezone.utc)
+    # Session : utiliser l'horloge (pas le tick MT5) pour éviter décalage broker.
+    now_for_session = (clock or _session_clock(provider)).now()
     now_paris_session = now_for_session.astimezone(ZoneInfo("Europe/Paris"))
     session_ok = settings.always_in_session or _is_in_session(
         now_paris_session,
@@ -115,19 +132,20 @@ def build_decision_packet(provider, symbol: str) -> DecisionPacket:
         settings.market_close_start,
         settings.market_close_end,
     )
-    spread = provider.get_spread(symbol)
-    m15_bars = getattr(settings, "m15_fetch_bars", 80)
-    candles_m15 = provider.get_candles(symbol, settings.tf_signal, m15_bars)
-    log.info("M15 candles fetched = %d", len(candles_m15))
-    candles_h1 = provider.get_candles(symbol, settings.tf_context, 100)
-    try:
-        candles_m5 = provider.get_candles(symbol, "M5", 48) if hasattr(provider, "get_candles") else []
-    except Exception:
-        candles_m5 = []
-    tick = provider.get_tick(symbol) if hasattr(provider, "get_tick") else None
-    current_price = float(tick[0]) if tick else None
-    setup_buy = detect_setups(candles_m15, candles_h1, current_price, direction_override="BUY", candles_m5=candles_m5 or [])
-    setup_sell = detect_setups(candles_m15, candles_h1, current_price, direction_override="SELL", candles_m5=candles_m5 or [])
+    spread = snapshot.spread
+    # CandleFrame construits une fois par snapshot, partagés par tous les moteurs du cycle
+    candles_m15 = snapshot.frame_m15
+    candles_h1 = snapshot.frame_h1
+    candles_m5 = snapshot.frame_m5
+    current_price = snapshot.bid
+    # Indicateurs incrémentaux (IndicatorState par symbole/TF) : seules les barres nouvellement clôturées
+    # sont intégrées ; la structure M15/H1 du cycle est ensuite servie par le StructureCache
+    impulse_atr_mult = getattr(settings, "impulse_atr_mult", 1.8)
+    tracker = get_indicator_tracker()
+    live_m15 = tracker.sync(candles_m15, impulse_atr_mult) if candles_m15 else None
+    if candles_h1:
+        tracker.sync(candles_h1, impulse_atr_mult)
+    setup_buy, setup_sell = detect_setups_both(candles_m15, candles_h1, current_price, candles_m5=candles_m5)
     recent_m15_trend = _recent_m15_trend(candles_m15, min_pts=5.0, bars=8)
     bias_map = {"BULLISH": Bias.up, "BEARISH": Bias.down, "RANGE": Bias.range}
     news_lock, next_event, provider_ok, raw_count, lock_window = get_lock(
@@ -164,13 +182,18 @@ def build_decision_packet(provider, symbol: str) -> DecisionPacket:
     if not provider_ok:
         sources_used.append("NEWS_PROVIDER_DOWN")
 
-    atr = _compute_atr(candles_m15) if candles_m15 else 1.1
-    impulse_atr_mult = getattr(settings, "impulse_atr_mult", 1.8)
-    impulse_memory = (
-        compute_impulse_memory(candles_m15, impulse_atr_mult=impulse_atr_mult)
-        if candles_m15 and len(candles_m15) >= 15
-        else None
-    )
+    if live_m15 is not None:
+        atr = live_m15.atr
+        impulse_memory, impulse_new = live_m15.impulse, live_m15.impulse_new
+    else:
+        # Série non identifiée (bougies sans time) : calcul batch ; impulsion sur les barres clôturées
+        atr = _compute_atr(candles_m15) if candles_m15 else 1.1
+        impulse_memory = (
+            compute_impulse_memory(candles_m15[:-1], impulse_atr_mult)
+            if candles_m15 and len(candles_m15) >= 15
+            else None
+        )
+        impulse_new = impulse_memory is not None
     data_latency_ms = 9999
     if candles_m15:
         last = candles_m15[-1]
@@ -180,8 +203,7 @@ def build_decision_packet(provider, symbol: str) -> DecisionPacket:
             if data_latency_ms < 0:
                 data_latency_ms = 0
 
-    def _make_packet(s: SetupResult, candles_m15: Optional[list] = None, candles_m5: Optional[list] = None) -> DecisionPacket:
-        bias = bias_map.get(s.structure_h1, Bias.up)
+    def _make_state(s: SetupResult) -> dict:
         base_state = {
             "daily_budget_used": 0.0,
             "cooldown_ok": True,
@@ -209,6 +231,8 @@ def build_decision_packet(provider, symbol: str) -> DecisionPacket:
                 if impulse_memory
                 else None
             ),
+            # Impulsion apparue à ce cycle : enregistrée par /analyze (table impulse_memory)
+            "impulse_memory_new": impulse_new,
         }
         if s.structure_h1 == "RANGE" and candles_m15:
             range_indicators = evaluate_range_indicators(
@@ -223,6 +247,10 @@ def build_decision_packet(provider, symbol: str) -> DecisionPacket:
                 candles_m5=candles_m5,
             )
             base_state.update(range_indicators)
+        return base_state
+
+    def _make_packet(s: SetupResult, base_state: dict) -> DecisionPacket:
+        bias = bias_map.get(s.structure_h1, Bias.up)
         return DecisionPacket(
             session_ok=session_ok,
             news_lock=news_lock,
@@ -297,26 +325,38 @@ def build_decision_packet(provider, symbol: str) -> DecisionPacket:
             data_latency_ms=data_latency_ms,
         )
 
-    packet_buy = _make_packet(setup_buy, candles_m15=candles_m15, candles_m5=candles_m5)
-    packet_sell = _make_packet(setup_sell, candles_m15=candles_m15, candles_m5=candles_m5)
-    score_buy, _ = score_packet(packet_buy)
-    score_sell, _ = score_packet(packet_sell)
+    def _score_input(s: SetupResult, base_state: dict) -> ScoreInput:
+        return ScoreInput(
+            state=base_state,
+            bias_h1=bias_map.get(s.structure_h1, Bias.up),
+            setups_detected=s.setups,
+            proposed_entry=s.entry,
+            sl=s.sl,
+            rr_tp1=s.rr_tp1,
+            atr=atr,
+            atr_max=settings.atr_max,
+            spread=spread,
+            spread_max=settings.spread_max,
+        )
+
+    # Comparaison BUY/SELL sur des ScoreInput ; seul le gagnant devient un DecisionPacket
+    state_buy = _make_state(setup_buy)
+    state_sell = _make_state(setup_sell)
+    score_buy = score_trace(_score_input(setup_buy, state_buy)).total
+    score_sell = score_trace(_score_input(setup_sell, state_sell)).total
     if score_buy > score_sell:
-        return packet_buy
+        return _make_packet(setup_buy, state_buy)
     if score_sell > score_buy:
-        return packet_sell
+        return _make_packet(setup_sell, state_sell)
     # Égalité : suivre la tendance H1 (BULLISH → BUY, BEARISH → SELL, RANGE → BUY par défaut)
-    structure_h1 = setup_buy.structure_h1
-    if structure_h1 == "BULLISH":
-        return packet_buy
-    if structure_h1 == "BEARISH":
-        return packet_sell
-    return packet_buy
+    if setup_buy.structure_h1 == "BEARISH":
+        return _make_packet(setup_sell, state_sell)
+    return _make_packet(setup_buy, state_buy)
 
 
 def build_fallback_packet(symbol: str, now_utc: Optional[datetime] = None) -> DecisionPacket:
     settings = get_settings()
-    safe_now = now_utc or datetime.now(timezone.utc)
+    safe_now = now_utc or get_clock().now()
     now_paris = safe_now.astimezone(ZoneInfo("Europe/Paris"))
     session_ok = settings.always_in_session or _is_in_session(
         now_paris,
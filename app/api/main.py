@@ -11,13 +11,14 @@ if _env_local.exists():
         pass
 
 from contextlib import asynccontextmanager
+from dataclasses import replace
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from hashlib import sha1
 import logging
+import threading
 import time
 
-import httpx
 from fastapi import FastAPI, Header, HTTPException, Query
 from pydantic import BaseModel
 
@@ -26,22 +27,19 @@ from app.agents import build_decision_packet, build_fallback_packet
 from app.agents.analyst_agent import run_analyst
 from app.ai_client import mock_ai_decision
 from app.agents.coach_agent import build_coach_output, build_prompt, can_call_ai
-from app.config import get_settings, get_pullback_zone_for_phase
+from app.config import get_settings
+from app.engines.candle_frame import as_frame
+from app.engines.decision_engine import decide_cycle, go_send_allowed, setup_confirmation
 from app.engines.hard_rules import evaluate_hard_rules
-from app.engines.market_phase_engine import get_market_phase
+from app.engines.indicator_state import get_indicator_tracker
 from app.engines.news_timing import compute_news_timing
-from app.engines.structure_engine import analyze_structure, detect_strong_trend_m15
-from app.engines.trade_state_engine import (
-    check_extension_blocked,
-    evaluate_trade_state,
-    is_pullback_confirmed,
-)
-from app.engines.room_to_target_engine import evaluate_room_to_target
+from app.engines.structure_engine import get_structure_cache
 from app.agents.news_agent import get_lock
 from app.engines.suivi_engine import (
     build_suivi_situation_message,
     compute_suivi_situation_signature,
     evaluate_suivi,
+    price_with_touches,
 )
 from app.infra.db import (
     add_ai_usage,
@@ -51,9 +49,11 @@ from app.infra.db import (
     get_conn,
     get_active_trade,
     get_last_analyze_ts,
+    get_recent_impulses,
     get_last_trade_closed_ts,
     get_last_suivi_sortie_active_started_ts,
     get_trade_outcomes_today,
+    record_impulse,
     record_trade_outcome,
     get_last_go_sent_today,
     get_last_suivi_alerte_ts,
@@ -79,6 +79,9 @@ from app.infra.db import (
     was_suivi_maintien_sent,
     was_telegram_sent,
 )
+from app.infra.bridge_http import bridge_timeout, get_bridge_client
+from app.infra.clock import get_clock
+from app.infra.indicator_store import load_indicator_state, save_indicator_state
 from app.infra.mt5_be_client import mt5_modify_sl_to_be, mt5_close_partial_at_tp1
 from app.infra.telegram_sender import TelegramSender
 from app.models import (
@@ -90,10 +93,10 @@ from app.models import (
     DecisionStatus,
     Quality,
 )
-from app.providers import get_provider
-from app.engines.scorer import score_packet
+from app.providers import close_provider, fetch_cycle_snapshot, get_provider
+from app.providers.tick_stream import get_tick_subscriber, start_tick_stream, stop_tick_streams
+from app.engines.scorer import score_packet, score_trace
 from app.state_repo import (
-    get_effective_cooldown_minutes,
     get_today_state,
     is_cooldown_ok,
     update_on_decision,
@@ -107,17 +110,84 @@ log = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
+    # IndicatorState du cycle repris / sauvegardés en SQLite (partagés avec le recorder)
+    get_indicator_tracker().use_store(load_indicator_state, save_indicator_state)
     settings = get_settings()
     logging.info("MARKET_PROVIDER=%s (prix = MT5 live si remote_mt5, sinon mock)", settings.market_provider)
     if settings.market_provider == "remote_mt5" and settings.mt5_bridge_url:
         url = settings.mt5_bridge_url.rstrip("/") + "/health"
         try:
-            resp = httpx.get(url, timeout=3.0)
+            resp = get_bridge_client().get(url, timeout=bridge_timeout("/health"))
             if resp.status_code != 200:
                 logging.warning("DATA_OFF bridge unreachable: status %s", resp.status_code)
         except Exception:  # noqa: BLE001
             logging.warning("DATA_OFF bridge unreachable")
+        if getattr(settings, "tick_stream_enabled", False):
+            start_tick_stream(settings.symbol_default, on_tick=_on_stream_tick)
+            logging.info("Tick stream démarré (%s)", settings.symbol_default)
     yield
+    stop_tick_streams()
+    close_provider()
+
+
+# Flux de ticks : niveaux du trade actif relus au plus toutes les 5s, suivi déclenché sur touche
+_STREAM_LEVELS_TTL_SEC = 5.0
+_STREAM_TRIGGER_MIN_INTERVAL_SEC = 10.0
+_stream_levels: dict = {"at": 0.0, "levels": None, "triggered_at": 0.0}
+_stream_analyze_lock = threading.Lock()
+# Un seul cycle /analyze à la fois dans le process (POST du runner et suivi déclenché par le flux) :
+# le bloc de sortie (SORTIE Telegram, record_trade_outcome, clear_active_trade) n'est pas idempotent.
+_analyze_lock = threading.Lock()
+
+
+def _stream_active_levels():
+    now = time.monotonic()
+    if now - _stream_levels["at"] > _STREAM_LEVELS_TTL_SEC:
+        day_paris = get_clock().now().astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+        active = get_active_trade(day_paris)
+        levels = None
+        if active and active.get("active_sl") is not None:
+            levels = (
+                (active.get("active_direction") or "BUY").upper(),
+                float(active["active_sl"]),
+                float(active["active_tp1"]),
+                float(active["active_tp2"]),
+                bool(active.get("active_be_applied")),
+            )
+        _stream_levels.update(at=now, levels=levels)
+    return _stream_levels["levels"]
+
+
+def _stream_level_touched(levels, bid: float, ask: float) -> bool:
+    direction, sl, tp1, tp2, be_applied = levels
+    target = tp2 if be_applied else tp1
+    if direction == "BUY":
+        return bid <= sl or bid >= target
+    return ask >= sl or ask <= target
+
+
+def _run_stream_analyze(symbol: str) -> None:
+    try:
+        analyze(AnalyzeRequest(symbol=symbol))
+    except Exception:  # noqa: BLE001
+        log.exception("Suivi déclenché par le flux de ticks")
+    finally:
+        _stream_levels["at"] = 0.0
+        _stream_analyze_lock.release()
+
+
+def _on_stream_tick(symbol: str, bid: float, ask: float) -> None:
+    """TP/SL touché sur le flux : lance le cycle /analyze (suivi) sans attendre le poll du runner."""
+    levels = _stream_active_levels()
+    if not levels or not _stream_level_touched(levels, bid, ask):
+        return
+    if time.monotonic() - _stream_levels["triggered_at"] < _STREAM_TRIGGER_MIN_INTERVAL_SEC:
+        return
+    if not _stream_analyze_lock.acquire(blocking=False):
+        return
+    _stream_levels["triggered_at"] = time.monotonic()
+    log.info("Tick stream: niveau touché (bid=%.2f ask=%.2f) → suivi immédiat", bid, ask)
+    threading.Thread(target=_run_stream_analyze, args=(symbol,), daemon=True).start()
 
 
 app = FastAPI(title="Trader Assistant API", version="0.1.0", lifespan=lifespan)
@@ -170,6 +240,18 @@ def runner_status() -> dict:
     }
 
 
+@app.get("/engines/cache/stats")
+def engines_cache_stats() -> dict:
+    """Compteurs du cache StructureResult (taille, hits, misses, hit rate)."""
+    return {"structure": get_structure_cache().stats()}
+
+
+@app.get("/impulses/recent")
+def impulses_recent(symbol: str | None = None, limit: int = 20) -> dict:
+    """Dernières bougies d'impulsion enregistrées (direction, ancre, key levels), sans recalcul."""
+    return {"impulses": get_recent_impulses(symbol, max(1, min(limit, 200)))}
+
+
 @app.get("/data-status")
 def data_status() -> dict:
     """
@@ -186,7 +268,7 @@ def data_status() -> dict:
         if settings.market_provider == "remote_mt5" and settings.mt5_bridge_url:
             url = settings.mt5_bridge_url.rstrip("/") + "/health"
             try:
-                resp = httpx.get(url, timeout=3.0)
+                resp = get_bridge_client().get(url, timeout=bridge_timeout("/health"))
                 bridge_reachable = resp.status_code == 200
                 if not bridge_reachable:
                     data_ok = False
@@ -214,26 +296,67 @@ def data_status() -> dict:
     }
 
 
+def _record_new_impulse(symbol: str, packet) -> None:
+    """Impulsion M15 apparue à ce cycle (IndicatorTracker) → table impulse_memory (GET /impulses/recent)."""
+    impulse = packet.state.get("impulse_memory")
+    if not impulse or not packet.state.get("impulse_memory_new") or not impulse.get("last_impulse_ts_utc"):
+        return
+    try:
+        record_impulse(
+            symbol,
+            "M15",
+            impulse["last_impulse_ts_utc"],
+            impulse["last_impulse_dir"],
+            impulse["impulse_range_pts"],
+            impulse["impulse_anchor_price"],
+            impulse["key_levels"],
+        )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("impulse_memory: enregistrement impossible: %s", exc)
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
 def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
+    with _analyze_lock:
+        return _analyze(payload)
+
+
+def _analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
     settings = get_settings()
     provider = get_provider()
     symbol = payload.symbol or settings.symbol_default
     # Suivi en priorité : si trade actif, fetch tick+candles M15 et exécuter suivi AVANT le build packet.
     # Évite que timeout/erreur M5 ou autre bloque l'envoi "Bravo TP1/SL" sur Telegram.
-    now_utc = datetime.now(timezone.utc)
+    clock = get_clock()
+    now_utc = clock.now()
     day_paris = now_utc.astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
     active = get_active_trade(day_paris)
+    # Flux de ticks (si actif) : dernier bid/ask + extrêmes depuis le cycle précédent (TP/SL touchés entre deux polls)
+    tick_stream = get_tick_subscriber(symbol)
+    tick_range = tick_stream.take_range() if tick_stream is not None else None
+    # Snapshot marché unique du cycle (tick, spread, M5/M15/H1) : toutes les étapes voient les mêmes barres.
+    snapshot = None
+    snapshot_exc: Exception | None = None
+    try:
+        snapshot = fetch_cycle_snapshot(provider, symbol)
+    except Exception as e:  # noqa: BLE001 - DATA_OFF traité au build packet
+        snapshot_exc = e
+        log.warning("Snapshot marché: %s", e)
     tick_bid, tick_ask = None, None
     candles_for_suivi = None
     if active:
         try:
-            if hasattr(provider, "get_tick"):
-                tick = provider.get_tick(symbol)
-                if tick:
-                    tick_bid = float(tick[0])
-                    tick_ask = float(tick[1]) if len(tick) > 1 else tick_bid
-            candles_for_suivi = provider.get_candles(symbol, settings.tf_signal, 80)
+            stream_tick = tick_stream.latest() if tick_stream is not None else None
+            if snapshot is not None:
+                tick = stream_tick or snapshot.tick
+                candles_for_suivi = snapshot.frame_m15
+            else:
+                # Snapshot KO (ex. H1/M5) : tick + M15 seuls suffisent pour détecter TP/SL
+                tick = stream_tick or (provider.get_tick(symbol) if hasattr(provider, "get_tick") else None)
+                candles_for_suivi = provider.get_candles(symbol, settings.tf_signal, 80)
+            if tick:
+                tick_bid = float(tick[0])
+                tick_ask = float(tick[1]) if len(tick) > 1 else tick_bid
         except Exception as e:  # noqa: BLE001
             log.warning("Suivi préalable (tick/candles): %s", e)
         if tick_bid is not None and candles_for_suivi:
@@ -242,6 +365,15 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
             be_enabled = getattr(settings, "be_enabled", False)
             be_applied = bool(active.get("active_be_applied"))
             be_offset = getattr(settings, "be_offset_pts", 0.0)
+            price_for_suivi = price_with_touches(
+                price_for_suivi,
+                dir_suivi,
+                float(active["active_sl"]),
+                float(active["active_tp1"]),
+                float(active["active_tp2"]),
+                tick_range,
+                be_applied=be_applied,
+            )
             tp1_close_pct_pre = getattr(settings, "tp1_close_percent", 0.0)
             suivi_pre = evaluate_suivi(
                 price_for_suivi,
@@ -306,32 +438,37 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
     data_off = False
     data_off_reason = None
     try:
-        packet = build_decision_packet(provider, symbol)
+        if snapshot is None:
+            raise snapshot_exc
+        packet = build_decision_packet(provider, symbol, snapshot=snapshot)
     except Exception as exc:  # noqa: BLE001 - on veut marquer DATA_OFF
         err_str = str(exc).lower()
         if any(x in err_str for x in ("bridge", "connection", "timeout", "mt5", "refused", "unreachable")):
             for _ in range(2):
-                time.sleep(2)
+                clock.sleep(2)
                 try:
-                    packet = build_decision_packet(provider, symbol)
+                    snapshot = fetch_cycle_snapshot(provider, symbol)
+                    packet = build_decision_packet(provider, symbol, snapshot=snapshot)
                     break
                 except Exception as exc2:  # noqa: BLE001
                     exc = exc2
             else:
-                packet = build_fallback_packet(symbol)
+                packet = build_fallback_packet(symbol, clock.now())
                 data_off = True
                 data_off_reason = str(exc)
         else:
-            packet = build_fallback_packet(symbol)
+            packet = build_fallback_packet(symbol, clock.now())
             data_off = True
             data_off_reason = str(exc)
+    if not data_off:
+        _record_new_impulse(symbol, packet)
     now_utc = datetime.fromisoformat(packet.timestamps["ts_utc"])
     day_paris = packet.timestamps["ts_paris"].split("T")[0]
     current_price = None
     if tick_bid is not None and tick_ask is not None:
         current_price = tick_bid
-    elif hasattr(provider, "get_tick"):
-        tick = provider.get_tick(symbol)
+    elif snapshot is not None or hasattr(provider, "get_tick"):
+        tick = snapshot.tick if snapshot is not None else provider.get_tick(symbol)
         if tick:
             tick_bid = float(tick[0])
             tick_ask = float(tick[1]) if len(tick) > 1 else tick_bid
@@ -340,12 +477,8 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
 
     # Suivi : soit données OK, soit retry si data_off et trade actif (on a déjà traité SORTIE en préalable si actif)
     candles = candles_for_suivi
-    if candles is None and not data_off:
-        try:
-            m15_bars = getattr(settings, "m15_fetch_bars", 80)
-            candles = provider.get_candles(symbol, settings.tf_signal, m15_bars)
-        except Exception:  # noqa: BLE001
-            pass
+    if candles is None and not data_off and snapshot is not None:
+        candles = snapshot.frame_m15
     elif candles is None and data_off and active:
         try:
             tick_retry = provider.get_tick(symbol) if hasattr(provider, "get_tick") else None
@@ -360,6 +493,11 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
         except Exception:  # noqa: BLE001
             pass
 
+    # Bougies du cycle pour state machine / room to target (snapshot, ou bougies du retry suivi)
+    # En CandleFrame : phase marché, structure et room to target lisent les mêmes colonnes
+    candles_m15_cycle = snapshot.frame_m15 if snapshot is not None else as_frame(candles)
+    candles_h1_cycle = snapshot.frame_h1 if snapshot is not None else as_frame(None)
+
     if not active:
         pass  # pas de trade actif
     elif current_price is None:
@@ -548,7 +686,7 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
                     pass
             if send_situation and duration_min >= 1:
                 structure_m15_ok = suivi.status == "MAINTIEN"
-                score_sit, _ = score_packet(packet)
+                score_sit = score_trace(packet).total
                 if suivi.status == "MAINTIEN":
                     analysis_summary = "On est dans le bon sens."
                     recommendation = ""
@@ -592,13 +730,10 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
     if not data_off and packet.data_latency_ms > settings.data_max_age_sec * 1000:
         data_off = True
         data_off_reason = "Data trop ancienne"
-    score_total, reasons = score_packet(packet)
-    packet.score_rules = score_total
-    packet.reasons_rules = reasons
+    # Score provisoire sans rendu des raisons : le score final (room / extension / phase) est recalculé
+    # incrémentalement plus bas et seules ses raisons sont rendues.
+    packet.score_rules = score_trace(packet).total
 
-    status = DecisionStatus.go
-    blocked_by = None
-    why = reasons[:3]
     state = get_today_state(day_paris)
     cooldown_ok = is_cooldown_ok(state, now_utc)
     packet.state = {
@@ -611,211 +746,46 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
 
     signal_key = sha1(f"{symbol}:{packet.timestamps['ts_utc']}".encode("utf-8")).hexdigest()
 
-    setup_confirm_count = 1
-    if not data_off and packet.proposed_entry and packet.proposed_entry > 0:
-        setup_dir = packet.state.get("setup_direction") or "BUY"
-        setup_entry = packet.proposed_entry
-        setup_bar_ts = packet.state.get("setup_bar_ts")
-        tolerance = settings.setup_entry_tolerance_pts
-        min_bars = settings.setup_confirm_min_bars
-        last_bar = state.last_setup_bar_ts
-        same_setup = (
-            state.last_setup_direction == setup_dir
-            and state.last_setup_entry is not None
-            and abs(setup_entry - state.last_setup_entry) <= tolerance
+    setup_confirm_count, new_setup_bar = setup_confirmation(packet, state, data_off)
+    if new_setup_bar:
+        update_setup_context(
+            day_paris,
+            packet.state.get("setup_direction") or "BUY",
+            packet.proposed_entry,
+            packet.state.get("setup_bar_ts"),
+            setup_confirm_count,
         )
-        if setup_bar_ts != last_bar:
-            if same_setup:
-                setup_confirm_count = min(state.setup_confirm_count + 1, min_bars)
-            else:
-                setup_confirm_count = 1
-            update_setup_context(day_paris, setup_dir, setup_entry, setup_bar_ts, setup_confirm_count)
-        else:
-            setup_confirm_count = state.setup_confirm_count
-
-    # Système intelligent (state machine, phase marché, anti-extension) — uniquement si activé
-    market_phase = None
-    trade_state = None
-    extension_distance_pts = None
-    scoring_reference_level = None
-    scoring_current_price = current_price
-    rtt = None
-    if getattr(settings, "state_machine_enabled", False) and not data_off:
+
+    # Décision GO / NO_GO partagée avec le replay : système intelligent, room to target, score final,
+    # hard rules, seuils et confirmation du setup (app/engines/decision_engine.py)
+    cycle = decide_cycle(
+        packet,
+        state,
+        signal_key,
+        now_utc,
+        setup_confirm_count,
+        candles_m15_cycle,
+        candles_h1_cycle,
+        current_price,
+        data_off=data_off,
+        data_off_reason=data_off_reason,
+    )
+    status, blocked_by, why = cycle.status, cycle.blocked_by, list(cycle.why)
+    score_total = cycle.score_total
+    market_phase = cycle.market_phase
+    if cycle.smart is not None:
         try:
-            m15_bars = getattr(settings, "m15_fetch_bars", 80)
-            candles_m15_sm = provider.get_candles(symbol, settings.tf_signal, m15_bars)
-            log.info("M15 candles fetched = %d", len(candles_m15_sm))
-            candles_h1_sm = provider.get_candles(symbol, settings.tf_context, 100)
-            market_phase_result = get_market_phase(candles_m15_sm, candles_h1_sm)
-            market_phase = market_phase_result.phase
-            trade_state_result = evaluate_trade_state(
-                packet.setups_detected or [],
-                packet.state.get("timing_ready", False),
-                packet.state.get("structure_h1", "RANGE"),
-                packet.state.get("setup_type", "ZONE_CONFIRMATION"),
-                packet.state.get("setup_direction", "BUY"),
-            )
-            trade_state = trade_state_result.state
-            struct = analyze_structure(candles_m15_sm)
-            dir_sm = (packet.state.get("setup_direction") or "BUY").upper()
-            structure_level = struct.last_swing_low if dir_sm == "BUY" else struct.last_swing_high
-            impulse_mem = packet.state.get("impulse_memory")
-            setup_type_sm = packet.state.get("setup_type", "ZONE_CONFIRMATION")
-            timing_ready_sm = packet.state.get("timing_ready", False)
-            strong_trend = detect_strong_trend_m15(candles_m15_sm)
-            strong_trend_detected = (
-                strong_trend.trend_direction == dir_sm
-                and strong_trend.last_trend_pivot_price is not None
-            )
-            timing_m5_ok = bool(packet.state.get("timing_step_m5_ok"))
-            if getattr(settings, "entry_timing_mode", "classic") != "pullback_m5":
-                timing_m5_ok = timing_m5_ok or timing_ready_sm
-            pb_min, pb_max = get_pullback_zone_for_phase(market_phase, settings)
-            pullback_confirmed = is_pullback_confirmed(
-                dir_sm,
-                packet.proposed_entry or 0.0,
-                struct.last_swing_low,
-                struct.last_swing_high,
-                timing_ready_sm,
-                timing_m5_ok,
-                setup_type_sm,
-                min_ratio=pb_min,
-                max_ratio=pb_max,
-                buffer_pts=getattr(settings, "invalidation_buffer_pts", 1.5),
-            )
-            if structure_level is not None and current_price is not None:
-                ext_check = check_extension_blocked(
-                    current_price,
-                    structure_level,
-                    packet.atr,
-                    dir_sm,
-                    impulse_memory=impulse_mem,
-                    setup_type=setup_type_sm,
-                    timing_ready=timing_ready_sm,
-                    strong_trend_detected=strong_trend_detected,
-                    strong_trend_pivot_price=strong_trend.last_trend_pivot_price,
-                    pullback_confirmed=pullback_confirmed,
-                )
-                extension_distance_pts = ext_check.distance_pts
-                scoring_reference_level = ext_check.reference_level
-                if ext_check.blocked:
-                    status = DecisionStatus.no_go
-                    blocked_by = BlockedBy.extension_move
-                    why = [ext_check.reason]
-                    log.info(
-                        "EXTENSION_MOVE blocked: current_price=%.2f reference_level=%s distance_pts=%.1f atr=%.1f "
-                        "strong_trend_detected=%s pullback_confirmed=%s final_decision=%s",
-                        current_price,
-                        ext_check.reference_level,
-                        ext_check.distance_pts,
-                        packet.atr,
-                        ext_check.strong_trend_detected,
-                        ext_check.pullback_confirmed,
-                        ext_check.final_decision,
-                    )
-            if status == DecisionStatus.go and trade_state != "READY":
-                status = DecisionStatus.no_go
-                blocked_by = BlockedBy.state_machine_not_ready
-                why = [f"State machine: {trade_state} — {trade_state_result.reason}"]
             update_smart_context(
                 day_paris,
-                trade_state_machine=trade_state,
+                trade_state_machine=cycle.smart.trade_state,
                 market_phase=market_phase,
-                last_breakout_level=structure_level,
+                last_breakout_level=cycle.smart.structure_level,
                 trade_state_since_ts=packet.timestamps["ts_utc"],
                 market_phase_since_ts=packet.timestamps["ts_utc"],
             )
         except Exception as e:  # noqa: BLE001
             log.warning("Système intelligent: %s", e)
 
-    # Contexte pour scoring (room_to_target si activé)
-    room_to_target_ok = True
-    if getattr(settings, "room_to_target_enabled", False) and not data_off:
-        try:
-            m15_bars_rt = getattr(settings, "m15_fetch_bars", 80)
-            candles_rt = provider.get_candles(symbol, settings.tf_signal, m15_bars_rt)
-            struct_rt = analyze_structure(candles_rt)
-            dir_rt = (packet.state.get("setup_direction") or "BUY").upper()
-            rtt = evaluate_room_to_target(
-                dir_rt,
-                packet.proposed_entry or 0,
-                packet.tp1 or 0,
-                struct_rt.sr_levels or [],
-                packet.atr,
-                mult=getattr(settings, "room_to_target_mult", 1.3),
-                buffer_pts=getattr(settings, "room_to_target_buffer_pts", 2.0),
-            )
-            room_to_target_ok = rtt.ok
-        except Exception:  # noqa: BLE001
-            room_to_target_ok = True
-
-    score_total, reasons = score_packet(
-        packet,
-        market_phase=market_phase,
-        room_to_target_ok=room_to_target_ok,
-        extension_distance_pts=extension_distance_pts,
-        _debug_current_price=scoring_current_price,
-        _debug_reference_level=scoring_reference_level,
-    )
-    packet.score_rules = score_total
-    packet.reasons_rules = reasons
-    why = reasons[:3] if reasons else []
-
-    if data_off:
-        status = DecisionStatus.no_go
-        blocked_by = BlockedBy.data_off
-        reason_text = data_off_reason or "Données marché indisponibles"
-        packet.reasons_rules = [reason_text]
-        why = [reason_text]
-    else:
-        hard_rule = evaluate_hard_rules(packet, state, signal_key, now_utc, setup_confirm_count)
-        if hard_rule.blocked_by:
-            status = DecisionStatus.no_go
-            blocked_by = hard_rule.blocked_by
-            why = [hard_rule.reason] if hard_rule.reason else ["Hard rule KO"]
-        elif score_total < settings.go_min_score:
-            status = DecisionStatus.no_go
-            blocked_by = BlockedBy.no_setup
-            why = ["Score insuffisant"]
-        elif getattr(settings, "room_to_target_enabled", False):
-            if rtt is None:
-                m15_bars_rt = getattr(settings, "m15_fetch_bars", 80)
-                candles_rt = provider.get_candles(symbol, settings.tf_signal, m15_bars_rt)
-                struct_rt = analyze_structure(candles_rt)
-                dir_rt = (packet.state.get("setup_direction") or "BUY").upper()
-                rtt = evaluate_room_to_target(
-                    dir_rt,
-                    packet.proposed_entry or 0,
-                    packet.tp1 or 0,
-                    struct_rt.sr_levels or [],
-                    packet.atr,
-                    mult=getattr(settings, "room_to_target_mult", 1.3),
-                    buffer_pts=getattr(settings, "room_to_target_buffer_pts", 2.0),
-                )
-            if not rtt.ok:
-                status = DecisionStatus.no_go
-                blocked_by = BlockedBy.room_to_target
-                mult_rt = getattr(settings, "room_to_target_mult", 1.3)
-                why = [f"Room to target insuffisant: {rtt.room_pts:.1f} < {rtt.tp1_distance_pts * mult_rt:.1f}"]
-                log.info(
-                    "ROOM_TO_TARGET: entry=%.2f tp1=%.2f next_level=%s room_pts=%.1f tp1_pts=%.1f mult=%.2f",
-                    packet.proposed_entry or 0, packet.tp1 or 0, rtt.next_level, rtt.room_pts, rtt.tp1_distance_pts, mult_rt,
-                )
-            else:
-                timing_ready = packet.state.get("timing_ready", False)
-                min_bars = settings.setup_confirm_min_bars
-                if not timing_ready and setup_confirm_count < min_bars:
-                    status = DecisionStatus.no_go
-                    blocked_by = BlockedBy.setup_not_confirmed
-                    why = [f"En attente du bon moment (zone/pullback) — {setup_confirm_count}/{min_bars} barres"]
-        else:
-            timing_ready = packet.state.get("timing_ready", False)
-            min_bars = settings.setup_confirm_min_bars
-            if not timing_ready and setup_confirm_count < min_bars:
-                status = DecisionStatus.no_go
-                blocked_by = BlockedBy.setup_not_confirmed
-                why = [f"En attente du bon moment (zone/pullback) — {setup_confirm_count}/{min_bars} barres"]
-
     # Données de retour après un DATA_OFF : notifier sur Telegram pour reprendre en temps réel
     if not data_off and settings.telegram_enabled and was_data_off_alert_sent_today(day_paris):
         try:
@@ -859,7 +829,9 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
     )
     now_utc_str = packet.timestamps["ts_utc"]
     current_price = None
-    if hasattr(provider, "get_tick"):
+    if snapshot is not None:
+        current_price = snapshot.bid
+    elif hasattr(provider, "get_tick"):
         tick = provider.get_tick(symbol)
         if tick:
             current_price = float(tick[0])
@@ -882,40 +854,15 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
         should_send = False
         heartbeat_triggered = False
         if status == DecisionStatus.go:
-            # Ne jamais envoyer sur Telegram un GO qui n'est pas A+ (safeguard prod)
-            should_send = score_total >= settings.a_plus_min_score
-            # Après un trade clôturé (TP/SL), attendre le bon moment : pas de nouveau GO tout de suite
-            last_closed = get_last_trade_closed_ts(day_paris)
-            if last_closed:
-                try:
-                    closed_dt = datetime.fromisoformat(last_closed)
-                    if closed_dt.tzinfo is None:
-                        closed_dt = closed_dt.replace(tzinfo=timezone.utc)
-                    nw = now_utc.replace(tzinfo=timezone.utc) if now_utc.tzinfo is None else now_utc
-                    cooldown_min = get_effective_cooldown_minutes(state, market_phase, nw)
-                    if (nw - closed_dt) < timedelta(minutes=cooldown_min):
-                        should_send = False
-                except (TypeError, ValueError):
-                    pass
-            # Ne pas renvoyer le même GO (mêmes niveaux) déjà envoyé récemment
-            if should_send:
-                last_go = get_last_go_sent_today(day_paris)
-                if last_go:
-                    try:
-                        last_dt = datetime.fromisoformat(last_go["ts_utc"])
-                        if last_dt.tzinfo is None:
-                            last_dt = last_dt.replace(tzinfo=timezone.utc)
-                        nw = now_utc.replace(tzinfo=timezone.utc) if now_utc.tzinfo is None else now_utc
-                        if (nw - last_dt) < timedelta(minutes=60):
-                            e, s, t1, t2 = packet.proposed_entry, packet.sl, packet.tp1, packet.tp2
-                            le, ls, lt1, lt2 = last_go["entry"], last_go["sl"], last_go["tp1"], last_go["tp2"]
-                            if all(
-                                x is not None and y is not None and abs(float(x) - float(y)) < 0.02
-                                for x, y in [(e, le), (s, ls), (t1, lt1), (t2, lt2)]
-                            ):
-                                should_send = False
-                    except (TypeError, ValueError, KeyError):
-                        pass
+            # A+ seulement, pas pendant le cooldown après un trade clôturé, pas le même GO dans l'heure
+            should_send = go_send_allowed(
+                packet,
+                score_total,
+                replace(state, last_trade_closed_ts=get_last_trade_closed_ts(day_paris)),
+                market_phase,
+                now_utc,
+                last_go=get_last_go_sent_today(day_paris),
+            )
         elif (
             status == DecisionStatus.no_go
             and blocked_by
@@ -1275,7 +1222,7 @@ def admin_reset_active_trade(
     if not settings.admin_token or x_admin_token != settings.admin_token:
         raise HTTPException(status_code=401, detail="Unauthorized")
     from app.infra.db import clear_all_active_trades
-    now_utc = datetime.now(timezone.utc)
+    now_utc = get_clock().now()
     day_paris = now_utc.astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
     active = get_active_trade(day_paris)
     outcome_val: float | None = None
@@ -1357,7 +1304,7 @@ def trade_manual_close(
     settings = get_settings()
     if not settings.admin_token or x_admin_token != settings.admin_token:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    now_utc = datetime.now(timezone.utc)
+    now_utc = get_clock().now()
     day_paris = now_utc.astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
     active = get_active_trade(day_paris)
     if not active:
@@ -1482,7 +1429,7 @@ def stats_trades_analysis(
     if not settings.admin_token or x_admin_token != settings.admin_token:
         raise HTTPException(status_code=401, detail="Unauthorized")
     from app.scripts.analyze_trades_today import analyze_today
-    day = date or datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+    day = date or get_clock().now().astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
     return analyze_today(day)
 
 
@@ -1498,7 +1445,7 @@ def stats_summary(
     if date:
         day_paris = date
     else:
-        day_paris = datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+        day_paris = get_clock().now().astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
     return get_stats_summary(day_paris)
 
 
@@ -1521,7 +1468,7 @@ def ai_cost_stats(date: str, x_admin_token: str | None = Header(default=None, al
 @app.get("/news/next")
 def news_next() -> dict:
     settings = get_settings()
-    now = datetime.now(timezone.utc)
+    now = get_clock().now()
     locked, next_event, provider_ok, raw_count, lock_window = get_lock(
         now,
         settings.news_lock_high_pre_min,
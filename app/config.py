@@ -94,6 +94,27 @@ class Settings(BaseModel):
     context_api_base_url: str = Field(default="", validation_alias="CONTEXT_API_BASE_URL")
     context_api_key: str = Field(default="", validation_alias="CONTEXT_API_KEY")
     mt5_bridge_url: str = Field(default="", validation_alias="MT5_BRIDGE_URL")
+    # MT5_BRIDGE_POOL_SIZE: connexions keep-alive max vers le bridge (pool httpx partagé).
+    mt5_bridge_pool_size: int = Field(default=8, validation_alias="MT5_BRIDGE_POOL_SIZE")
+    # MT5_CANDLES_FORMAT: format fil des bougies bridge — json (défaut), columnar (colonnes) ou npy (binaire).
+    mt5_candles_format: str = Field(default="json", validation_alias="MT5_CANDLES_FORMAT")
+    # MT5_ASYNC_FETCH: lectures du cycle en parallèle (httpx.AsyncClient + asyncio.gather) au lieu d'en série.
+    mt5_async_fetch: bool = Field(default=False, validation_alias="MT5_ASYNC_FETCH")
+    # MARKET_RESAMPLE_BASE_TF: TF unique lu au bridge (ex. M5) ; M15/H1... en sont dérivés localement (sync et MT5_ASYNC_FETCH). Vide = désactivé.
+    market_resample_base_tf: str = Field(default="", validation_alias="MARKET_RESAMPLE_BASE_TF")
+    # TICK_STREAM_ENABLED: abonnement au flux /ticks/stream du bridge (suivi TP/SL sur touches réelles entre deux polls).
+    tick_stream_enabled: bool = Field(default=False, validation_alias="TICK_STREAM_ENABLED")
+    tick_stream_interval_ms: int = Field(default=100, validation_alias="TICK_STREAM_INTERVAL_MS")
+    # STRUCTURE_CACHE_SIZE: nb max de StructureResult mémorisés (LRU par symbole/TF/empreinte des barres), 0 = désactivé.
+    structure_cache_size: int = Field(default=64, validation_alias="STRUCTURE_CACHE_SIZE")
+    # CANDLE_STORE_PATH: archive binaire des bougies clôturées (app/scripts/market_recorder.py), lue par CandleStore.
+    candle_store_path: str = Field(default="/data/candles", validation_alias="CANDLE_STORE_PATH")
+    # RECORDER_*: symboles / TF archivés par le recorder, ticks en option (flux /ticks/stream).
+    recorder_symbols: str = Field(default="XAUUSD", validation_alias="RECORDER_SYMBOLS")
+    recorder_timeframes: str = Field(default="M1,M5,M15,H1", validation_alias="RECORDER_TIMEFRAMES")
+    recorder_ticks: bool = Field(default=False, validation_alias="RECORDER_TICKS")
+    # REPLAY_RESULTS_DB_PATH: base SQLite des runs de replay (décisions + trades simulés), jamais la base de production.
+    replay_results_db_path: str = Field(default="/data/replay_results.db", validation_alias="REPLAY_RESULTS_DB_PATH")
     # MT5_POSITION_SYMBOL: symbole exact MT5 pour les positions (ex. XAUUSDm, GOLD). Vide = SYMBOL_DEFAULT.
     mt5_position_symbol: str = Field(default="", validation_alias="MT5_POSITION_SYMBOL")
     # DATA_MAX_AGE_SEC: âge max (sec) de la dernière bougie pour considérer les données OK. M15 = bougie 15 min → min 900.
@@ -211,6 +232,19 @@ def get_settings() -> Settings:
     return Settings(**values)
 
 
+def settings_env_key(name: str) -> str:
+    """
+    Variable d'environnement d'un paramètre Settings, donné par nom de champ (go_min_score)
+    ou par alias (GO_MIN_SCORE). AliasChoices : premier alias (prioritaire à la validation).
+    """
+    for field_name, field in Settings.model_fields.items():
+        alias = field.validation_alias
+        choices = [str(c) for c in alias.choices] if isinstance(alias, AliasChoices) else [str(alias or field_name.upper())]
+        if name.lower() == field_name or name.upper() in choices:
+            return choices[0]
+    raise ValueError(f"Paramètre Settings inconnu: {name}")
+
+
 def get_pullback_zone_for_phase(market_phase: Optional[str], settings: Settings) -> Tuple[float, float]:
     """
     Zone de pullback selon market_phase :
@@ -1,5 +1,5 @@
 from app.engines.hard_rules import evaluate_hard_rules
-from app.engines.scorer import score_packet
+from app.engines.scorer import ScoreTrace, score_packet, score_trace
 from app.engines.setup_engine import detect_setups
 
-__all__ = ["evaluate_hard_rules", "score_packet", "detect_setups"]
+__all__ = ["evaluate_hard_rules", "score_packet", "score_trace", "ScoreTrace", "detect_setups"]
@@ -0,0 +1,196 @@
+"""
+CandleFrame — bougies en colonnes (tableaux numpy contigus) pour les moteurs.
+Construit une fois par lecture marché (snapshot) puis partagé : les moteurs lisent frame.close,
+frame.high... au lieu de reparcourir la liste de dicts et de refaire float() à chaque étape.
+L'API dict reste disponible (frame[-1], itération) pour le code qui manipule encore des bougies unitaires.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.engines.candle_patterns import PatternMasks, compute_patterns
+
+PRICE_KEYS = ("open", "high", "low", "close")
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _candle_time(candle: Mapping) -> int:
+    """time (s) de la bougie : time, sinon time_msc, sinon ts ISO ; 0 si absent."""
+    v = candle.get("time")
+    if v is None:
+        v = candle.get("time_msc")
+    if v is None:
+        v = candle.get("ts")
+    if v is None:
+        return 0
+    if isinstance(v, str):
+        try:
+            dt = datetime.fromisoformat(v.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return 0
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp())
+    try:
+        ts = float(v)
+    except (TypeError, ValueError):
+        return 0
+    return int(ts / 1000) if ts > 1_000_000_000_000 else int(ts)
+
+
+@dataclass(frozen=True, eq=False)
+class CandleFrame:
+    time: np.ndarray  # int64, secondes
+    open: np.ndarray  # float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray  # volume, sinon tick_volume (0 si absent)
+    # Bougies d'origine (API dict) quand le frame vient d'une liste de dicts
+    source: Optional[Sequence[Mapping]] = field(default=None, repr=False)
+    # Identité de la série (snapshot) : sans elle, pas d'empreinte ni de cache moteur
+    symbol: Optional[str] = None
+    timeframe: Optional[str] = None
+
+    @classmethod
+    def from_candles(
+        cls, candles: Sequence[Mapping], symbol: Optional[str] = None, timeframe: Optional[str] = None
+    ) -> "CandleFrame":
+        """Liste de dicts (providers) → colonnes. Valeur absente ou invalide = NaN."""
+        n = len(candles)
+        cols = {k: np.empty(n, dtype=np.float64) for k in PRICE_KEYS}
+        volume = np.zeros(n, dtype=np.float64)
+        time = np.zeros(n, dtype=np.int64)
+        for i, c in enumerate(candles):
+            for k in PRICE_KEYS:
+                cols[k][i] = _to_float(c.get(k))
+            vol = c.get("volume")
+            if vol is None:
+                vol = c.get("tick_volume")
+            if vol is not None:
+                volume[i] = _to_float(vol)
+            time[i] = _candle_time(c)
+        return cls(time=time, volume=volume, source=candles, symbol=symbol, timeframe=timeframe, **cols)
+
+    @classmethod
+    def from_columns(
+        cls, columns: Mapping[str, np.ndarray], symbol: Optional[str] = None, timeframe: Optional[str] = None
+    ) -> "CandleFrame":
+        """Colonnes décodées (candle_codec, CandleStore) → frame, sans copie si déjà float64/int64."""
+        n = len(columns["close"])
+        vol = columns.get("volume")
+        if vol is None:
+            vol = columns.get("tick_volume")
+        return cls(
+            time=np.asarray(columns["time"], dtype=np.int64) if "time" in columns else np.zeros(n, dtype=np.int64),
+            open=np.asarray(columns["open"], dtype=np.float64),
+            high=np.asarray(columns["high"], dtype=np.float64),
+            low=np.asarray(columns["low"], dtype=np.float64),
+            close=np.asarray(columns["close"], dtype=np.float64),
+            volume=np.asarray(vol, dtype=np.float64) if vol is not None else np.zeros(n, dtype=np.float64),
+            symbol=symbol,
+            timeframe=timeframe,
+        )
+
+    # --- API dict (compatibilité) ---
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def candle(self, i: int) -> Mapping:
+        """Bougie i en dict (celle d'origine si disponible)."""
+        if self.source is not None:
+            return self.source[i]
+        return {
+            "time": int(self.time[i]),
+            "open": float(self.open[i]),
+            "high": float(self.high[i]),
+            "low": float(self.low[i]),
+            "close": float(self.close[i]),
+            "volume": float(self.volume[i]),
+        }
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return CandleFrame(
+                time=self.time[key],
+                open=self.open[key],
+                high=self.high[key],
+                low=self.low[key],
+                close=self.close[key],
+                volume=self.volume[key],
+                source=self.source[key] if self.source is not None else None,
+                symbol=self.symbol,
+                timeframe=self.timeframe,
+            )
+        return self.candle(key)
+
+    def __iter__(self) -> Iterator[Mapping]:
+        for i in range(len(self)):
+            yield self.candle(i)
+
+    def to_candles(self) -> list:
+        return list(self)
+
+    def fingerprint(self) -> Optional[Tuple]:
+        """
+        Empreinte bon marché de la série : (symbole, TF, nb barres, time première/dernière barre,
+        close/high/low de la dernière). None si la série n'est pas identifiée (symbole/TF inconnus, pas de time).
+        """
+        n = len(self)
+        if self.symbol is None or self.timeframe is None or n == 0 or not self.time[-1]:
+            return None
+        return (
+            self.symbol,
+            self.timeframe,
+            n,
+            int(self.time[0]),
+            int(self.time[-1]),
+            float(self.close[-1]),
+            float(self.high[-1]),
+            float(self.low[-1]),
+        )
+
+    # --- indicateurs partagés ---
+
+    @cached_property
+    def patterns(self) -> PatternMasks:
+        """Masques rejet / engulfing de toutes les barres, calculés une fois par frame."""
+        return compute_patterns(self.open, self.high, self.low, self.close)
+
+    def atr(self, period: int = 14) -> float:
+        """ATR simple (moyenne des true ranges) ; repli range/5 ou 20.0 si historique trop court."""
+        n = len(self)
+        if n < period + 1:
+            if n >= 5:
+                return float((self.high[-5:].max() - self.low[-5:].min()) / 5)
+            return 20.0
+        prev_close = self.close[:-1]
+        tr = np.maximum(
+            self.high[1:] - self.low[1:],
+            np.maximum(np.abs(self.high[1:] - prev_close), np.abs(self.low[1:] - prev_close)),
+        )
+        return sum(tr[-period:].tolist()) / period
+
+
+Candles = Union[CandleFrame, Sequence[Dict]]
+
+
+def as_frame(candles: Optional[Candles]) -> CandleFrame:
+    """Frame tel quel, ou construit depuis une liste de dicts (None → frame vide)."""
+    if isinstance(candles, CandleFrame):
+        return candles
+    return CandleFrame.from_candles(candles or ())
@@ -0,0 +1,87 @@
+"""
+Patterns de bougies vectorisés sur un CandleFrame : rejet (pin bar) haussier/baissier, engulfing.
+Un seul passage numpy par frame (CandleFrame.patterns, mémoïsé) ; entry timing, suivi et range
+interrogent ensuite les masques par index au lieu de réévaluer chaque bougie dict.
+Les patterns dépendant d'un niveau (sweep, rejet dans une zone) sont aussi calculés en une passe.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True, eq=False)
+class PatternMasks:
+    # Mèche basse longue (> 1.5 x corps et > 40 % du range) = rejet haussier / pin bar acheteuse
+    rejection_bullish: np.ndarray
+    # Mèche haute longue = rejet baissier / pin bar vendeuse
+    rejection_bearish: np.ndarray
+    # Barre i haussière qui englobe le corps de la barre i-1 baissière (False en 0)
+    engulfing_bullish: np.ndarray
+    # Barre i baissière qui englobe le corps de la barre i-1 haussière (False en 0)
+    engulfing_bearish: np.ndarray
+
+    def rejection(self, direction: str) -> np.ndarray:
+        """Rejets dans le sens de direction (BUY → haussiers, SELL → baissiers)."""
+        d = direction.upper()
+        if d == "BUY":
+            return self.rejection_bullish
+        if d == "SELL":
+            return self.rejection_bearish
+        return np.zeros(len(self.rejection_bullish), dtype=bool)
+
+    def engulfing(self, direction: str) -> np.ndarray:
+        d = direction.upper()
+        if d == "BUY":
+            return self.engulfing_bullish
+        if d == "SELL":
+            return self.engulfing_bearish
+        return np.zeros(len(self.engulfing_bullish), dtype=bool)
+
+
+def compute_patterns(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> PatternMasks:
+    """Masques de tous les patterns en une passe (NaN → False)."""
+    body = np.abs(c - o)
+    total = h - l
+    valid = total > 0
+    lower_wick = np.minimum(o, c) - l
+    upper_wick = h - np.maximum(o, c)
+    rejection_bullish = valid & (lower_wick > body * 1.5) & (lower_wick > total * 0.4)
+    rejection_bearish = valid & (upper_wick > body * 1.5) & (upper_wick > total * 0.4)
+
+    engulfing_bullish = np.zeros(len(c), dtype=bool)
+    engulfing_bearish = np.zeros(len(c), dtype=bool)
+    if len(c) >= 2:
+        po, pc, co, cc = o[:-1], c[:-1], o[1:], c[1:]
+        engulfing_bullish[1:] = (po >= pc) & (co <= cc) & (co <= pc) & (cc >= po)
+        engulfing_bearish[1:] = (po <= pc) & (co >= cc) & (co >= pc) & (cc <= po)
+    return PatternMasks(
+        rejection_bullish=rejection_bullish,
+        rejection_bearish=rejection_bearish,
+        engulfing_bullish=engulfing_bullish,
+        engulfing_bearish=engulfing_bearish,
+    )
+
+
+def sweep_mask(high: np.ndarray, low: np.ndarray, close: np.ndarray, direction: str, level: float, margin: float) -> np.ndarray:
+    """
+    Sweep de liquidité : SELL → high > level + margin et close repassé sous level ;
+    BUY → low < level - margin et close repassé au-dessus.
+    """
+    if direction.upper() == "SELL":
+        return (high > level + margin) & (close < level)
+    return (low < level - margin) & (close > level)
+
+
+def zone_rejection_mask(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, direction: str, zone_lo: float, zone_hi: float, touch_pts: float = 2.0
+) -> np.ndarray:
+    """
+    Rejet dans une zone : BUY → low touché sous zone_lo (+ touch_pts), SELL → high au-dessus de zone_hi (- touch_pts),
+    ET close dans [zone_lo, zone_hi].
+    """
+    in_zone = (close >= zone_lo) & (close <= zone_hi)
+    if direction.upper() == "BUY":
+        return in_zone & (low <= zone_lo + touch_pts)
+    return in_zone & (high >= zone_hi - touch_pts)
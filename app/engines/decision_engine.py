@@ -0,0 +1,222 @@
+"""
+Décision GO / NO_GO d'un cycle, partagée par /analyze et le replay (ReplayRunner) : confirmation du
+setup, système intelligent (anti-extension, state machine), room to target, score final, hard rules
+et seuils ; puis garde-fous d'un GO envoyé (A+, cooldown après trade clôturé, même GO récent).
+L'état du jour (StateRow) est lu et persisté par l'appelant (table state ou mémoire en replay).
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Mapping, Optional, Tuple
+
+from app.config import get_settings
+from app.engines.candle_frame import Candles
+from app.engines.hard_rules import evaluate_hard_rules
+from app.engines.room_to_target_engine import RoomToTargetResult, evaluate_room_to_target
+from app.engines.scorer import score_trace
+from app.engines.structure_engine import analyze_structure
+from app.engines.trade_state_engine import SmartContext, evaluate_smart_context
+from app.models import BlockedBy, DecisionPacket, DecisionStatus
+from app.state_repo import StateRow, get_effective_cooldown_minutes
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CycleDecision:
+    status: DecisionStatus
+    blocked_by: Optional[BlockedBy]
+    why: Tuple[str, ...]
+    score_total: int
+    smart: Optional[SmartContext] = None
+    room_to_target: Optional[RoomToTargetResult] = None
+
+    @property
+    def market_phase(self) -> Optional[str]:
+        return self.smart.market_phase if self.smart is not None else None
+
+
+def setup_confirmation(packet: DecisionPacket, state: StateRow, data_off: bool = False) -> Tuple[int, bool]:
+    """
+    Nombre de barres confirmant le setup du packet (même direction, entrée dans la tolérance).
+    Le booléen indique une nouvelle barre de setup : l'appelant enregistre alors le contexte de setup.
+    """
+    if data_off or not packet.proposed_entry or packet.proposed_entry <= 0:
+        return 1, False
+    settings = get_settings()
+    setup_dir = packet.state.get("setup_direction") or "BUY"
+    if packet.state.get("setup_bar_ts") == state.last_setup_bar_ts:
+        return state.setup_confirm_count, False
+    same_setup = (
+        state.last_setup_direction == setup_dir
+        and state.last_setup_entry is not None
+        and abs(packet.proposed_entry - state.last_setup_entry) <= settings.setup_entry_tolerance_pts
+    )
+    if same_setup:
+        return min(state.setup_confirm_count + 1, settings.setup_confirm_min_bars), True
+    return 1, True
+
+
+def _room_to_target(packet: DecisionPacket, candles_m15: Candles) -> RoomToTargetResult:
+    settings = get_settings()
+    return evaluate_room_to_target(
+        (packet.state.get("setup_direction") or "BUY").upper(),
+        packet.proposed_entry or 0,
+        packet.tp1 or 0,
+        analyze_structure(candles_m15).sr_index,
+        packet.atr,
+        mult=getattr(settings, "room_to_target_mult", 1.3),
+        buffer_pts=getattr(settings, "room_to_target_buffer_pts", 2.0),
+    )
+
+
+def decide_cycle(
+    packet: DecisionPacket,
+    state: StateRow,
+    signal_key: str,
+    now_utc: datetime,
+    setup_confirm_count: int,
+    candles_m15: Candles,
+    candles_h1: Candles,
+    current_price: Optional[float],
+    data_off: bool = False,
+    data_off_reason: Optional[str] = None,
+) -> CycleDecision:
+    """
+    GO / NO_GO du cycle. Le score final et ses raisons sont rendus sur le packet (score_rules,
+    reasons_rules). Le contexte intelligent (smart) est retourné pour être persisté par l'appelant.
+    """
+    settings = get_settings()
+    status, blocked_by, why = DecisionStatus.go, None, []
+
+    smart = None
+    extension_distance_pts = None
+    if getattr(settings, "state_machine_enabled", False) and not data_off:
+        try:
+            smart = evaluate_smart_context(packet, candles_m15, candles_h1, current_price)
+        except Exception as e:  # noqa: BLE001
+            log.warning("Système intelligent: %s", e)
+    if smart is not None:
+        ext_check = smart.extension
+        if ext_check is not None:
+            extension_distance_pts = ext_check.distance_pts
+            if ext_check.blocked:
+                status, blocked_by, why = DecisionStatus.no_go, BlockedBy.extension_move, [ext_check.reason]
+                log.info(
+                    "EXTENSION_MOVE blocked: current_price=%.2f reference_level=%s distance_pts=%.1f atr=%.1f "
+                    "strong_trend_detected=%s pullback_confirmed=%s final_decision=%s",
+                    current_price,
+                    ext_check.reference_level,
+                    ext_check.distance_pts,
+                    packet.atr,
+                    ext_check.strong_trend_detected,
+                    ext_check.pullback_confirmed,
+                    ext_check.final_decision,
+                )
+        if status == DecisionStatus.go and smart.trade_state != "READY":
+            status, blocked_by = DecisionStatus.no_go, BlockedBy.state_machine_not_ready
+            why = [f"State machine: {smart.trade_state} — {smart.trade_state_reason}"]
+
+    rtt = None
+    room_enabled = getattr(settings, "room_to_target_enabled", False)
+    if room_enabled and not data_off:
+        try:
+            rtt = _room_to_target(packet, candles_m15)
+        except Exception:  # noqa: BLE001
+            rtt = None
+
+    trace = score_trace(
+        packet,
+        market_phase=smart.market_phase if smart is not None else None,
+        room_to_target_ok=rtt.ok if rtt is not None else True,
+        extension_distance_pts=extension_distance_pts,
+    )
+    score_total = trace.total
+    packet.score_rules = score_total
+    # Raisons rendues une seule fois par cycle, sur le score final
+    packet.reasons_rules = list(trace.reasons)
+    if status == DecisionStatus.go:
+        why = trace.reasons[:3]
+
+    min_bars = settings.setup_confirm_min_bars
+    not_confirmed = not packet.state.get("timing_ready", False) and setup_confirm_count < min_bars
+    if data_off:
+        reason_text = data_off_reason or "Données marché indisponibles"
+        status, blocked_by, why = DecisionStatus.no_go, BlockedBy.data_off, [reason_text]
+        packet.reasons_rules = [reason_text]
+    else:
+        hard_rule = evaluate_hard_rules(packet, state, signal_key, now_utc, setup_confirm_count)
+        if hard_rule.blocked_by:
+            status, blocked_by = DecisionStatus.no_go, hard_rule.blocked_by
+            why = [hard_rule.reason] if hard_rule.reason else ["Hard rule KO"]
+        elif score_total < settings.go_min_score:
+            status, blocked_by, why = DecisionStatus.no_go, BlockedBy.no_setup, ["Score insuffisant"]
+        elif rtt is not None and not rtt.ok:
+            mult_rt = getattr(settings, "room_to_target_mult", 1.3)
+            status, blocked_by = DecisionStatus.no_go, BlockedBy.room_to_target
+            why = [f"Room to target insuffisant: {rtt.room_pts:.1f} < {rtt.tp1_distance_pts * mult_rt:.1f}"]
+            log.info(
+                "ROOM_TO_TARGET: entry=%.2f tp1=%.2f next_level=%s room_pts=%.1f tp1_pts=%.1f mult=%.2f",
+                packet.proposed_entry or 0, packet.tp1 or 0, rtt.next_level, rtt.room_pts, rtt.tp1_distance_pts, mult_rt,
+            )
+        elif not_confirmed:
+            status, blocked_by = DecisionStatus.no_go, BlockedBy.setup_not_confirmed
+            why = [f"En attente du bon moment (zone/pullback) — {setup_confirm_count}/{min_bars} barres"]
+
+    return CycleDecision(
+        status=status,
+        blocked_by=blocked_by,
+        why=tuple(why),
+        score_total=score_total,
+        smart=smart,
+        room_to_target=rtt,
+    )
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def go_send_allowed(
+    packet: DecisionPacket,
+    score_total: int,
+    state: StateRow,
+    market_phase: Optional[str],
+    now_utc: datetime,
+    last_go: Optional[Mapping[str, Any]] = None,
+) -> bool:
+    """
+    GO envoyé (trade pris) : A+ seulement, pas pendant le cooldown qui suit un trade clôturé
+    (state.last_trade_closed_ts), pas le même GO (mêmes niveaux) que last_go dans l'heure.
+    last_go : dernier GO envoyé (ts_utc, entry, sl, tp1, tp2), comme get_last_go_sent_today.
+    """
+    settings = get_settings()
+    # Ne jamais envoyer un GO qui n'est pas A+ (safeguard prod)
+    if score_total < settings.a_plus_min_score:
+        return False
+    now = _aware(now_utc)
+    # Après un trade clôturé (TP/SL), attendre le bon moment : pas de nouveau GO tout de suite
+    if state.last_trade_closed_ts:
+        try:
+            closed_dt = _aware(datetime.fromisoformat(state.last_trade_closed_ts))
+            if now - closed_dt < timedelta(minutes=get_effective_cooldown_minutes(state, market_phase, now)):
+                return False
+        except (TypeError, ValueError):
+            pass
+    # Ne pas renvoyer le même GO (mêmes niveaux) déjà envoyé récemment
+    if last_go:
+        try:
+            if now - _aware(datetime.fromisoformat(last_go["ts_utc"])) < timedelta(minutes=60):
+                levels = (packet.proposed_entry, packet.sl, packet.tp1, packet.tp2)
+                previous = (last_go["entry"], last_go["sl"], last_go["tp1"], last_go["tp2"])
+                if all(
+                    x is not None and y is not None and abs(float(x) - float(y)) < 0.02
+                    for x, y in zip(levels, previous)
+                ):
+                    return False
+        except (TypeError, ValueError, KeyError):
+            pass
+    return True
+
@@ -8,6 +8,9 @@ import logging
 from dataclasses import dataclass
 from typing import List, Optional
 
+from app.engines.candle_frame import CandleFrame, Candles, as_frame
+from app.engines.candle_patterns import zone_rejection_mask
+
 log = logging.getLogger(__name__)
 
 
@@ -25,60 +28,20 @@ class EntryTimingResult:
     timing_step_m5_ok: Optional[bool] = None
 
 
-def _extract_series(candles: List[dict], key: str) -> List[float]:
-    out: List[float] = []
-    for c in candles:
-        v = c.get(key)
-        if v is None:
-            continue
-        try:
-            out.append(float(v))
-        except (TypeError, ValueError):
-            continue
-    return out
-
-
-def _is_rejection_candle_bullish(candle: dict) -> bool:
-    """Mèche basse longue = rejet haussier (acheteurs ont repoussé)."""
-    o, h, l, c = (
-        float(candle.get("open", 0)),
-        float(candle.get("high", 0)),
-        float(candle.get("low", 0)),
-        float(candle.get("close", 0)),
-    )
-    body = abs(c - o)
-    lower_wick = min(o, c) - l
-    total = h - l
-    if total <= 0:
-        return False
-    return lower_wick > body * 1.5 and lower_wick > total * 0.4
-
-
-def _is_rejection_candle_bearish(candle: dict) -> bool:
-    """Mèche haute longue = rejet baissier."""
-    o, h, l, c = (
-        float(candle.get("open", 0)),
-        float(candle.get("high", 0)),
-        float(candle.get("low", 0)),
-        float(candle.get("close", 0)),
-    )
-    body = abs(c - o)
-    upper_wick = h - max(o, c)
-    total = h - l
-    if total <= 0:
-        return False
-    return upper_wick > body * 1.5 and upper_wick > total * 0.4
+def _rejection_count(frame: CandleFrame, direction: str, last: int = 3) -> int:
+    """Nombre de rejets dans la direction parmi les `last` dernières barres du frame."""
+    return int(frame.patterns.rejection(direction)[-last:].sum())
 
 
 def _price_in_zone(price: float, zone_lo: float, zone_hi: float) -> bool:
     return zone_lo <= price <= zone_hi
 
 
-def get_m5_trend(candles_m5: List[dict], direction: str, min_bars: int = 3) -> str:
+def get_m5_trend(candles_m5: Optional[Candles], direction: str, min_bars: int = 3) -> str:
     """Retourne 'aligned' | 'against' | 'neutral' selon la tendance M5 vs direction."""
     if not candles_m5 or len(candles_m5) < min_bars:
         return "neutral"
-    closes = _extract_series(candles_m5, "close")
+    closes = as_frame(candles_m5).close.tolist()
     if len(closes) < min_bars:
         return "neutral"
     recent = closes[-min_bars:]
@@ -101,31 +64,22 @@ def get_m5_trend(candles_m5: List[dict], direction: str, min_bars: int = 3) -> s
     return "neutral"
 
 
-def _m5_rejection_count(candles_m5: List[dict], direction: str) -> int:
+def _m5_rejection_count(candles_m5: Candles, direction: str) -> int:
     """Nombre de barres M5 (dernières 3) qui sont des rejets dans notre direction."""
     if not candles_m5:
         return 0
-    last_3 = candles_m5[-3:] if len(candles_m5) >= 3 else candles_m5
-    count = 0
-    for c in last_3:
-        if direction.upper() == "BUY" and _is_rejection_candle_bullish(c):
-            count += 1
-        elif direction.upper() == "SELL" and _is_rejection_candle_bearish(c):
-            count += 1
-    return count
+    return _rejection_count(as_frame(candles_m5), direction, last=3)
 
 
-def _find_impulse_candle(candles: List[dict], direction: str, atr: float = 20.0) -> Optional[tuple]:
+def _find_impulse_candle(candles: Candles, direction: str, atr: float = 20.0) -> Optional[tuple]:
     """Bougie impulsive M15 (range max parmi les dernières). Retourne (impulse_low, impulse_high, impulse_range)."""
     if not candles or len(candles) < 3:
         return None
-    lookback = min(8, len(candles))
+    frame = as_frame(candles)
+    lookback = min(8, len(frame))
     best = None
     best_range = 0.0
-    for i in range(-lookback, 0):
-        c = candles[i]
-        h = float(c.get("high", 0) or 0)
-        l = float(c.get("low", 0) or 0)
+    for h, l in zip(frame.high[-lookback:].tolist(), frame.low[-lookback:].tolist()):
         rng = h - l
         if rng >= atr * 0.3 and rng > best_range:
             best_range = rng
@@ -146,7 +100,7 @@ def _pullback_zone(impulse: tuple, direction: str, min_ratio: float, max_ratio:
 
 
 def _m5_rejection_in_pullback_zone(
-    candles_m5: List[dict],
+    candles_m5: Candles,
     direction: str,
     pb_min: float,
     pb_max: float,
@@ -158,29 +112,20 @@ def _m5_rejection_in_pullback_zone(
     """
     if not candles_m5:
         return False
-    bars = candles_m5[-lookback:] if len(candles_m5) >= lookback else candles_m5
-    for c in bars:
-        l = float(c.get("low", 0) or 0)
-        h = float(c.get("high", 0) or 0)
-        close = float(c.get("close", 0) or 0)
-        if direction.upper() == "BUY":
-            if l <= pb_min + 2.0 and close >= pb_min and close <= pb_max:
-                return True
-        else:
-            if h >= pb_max - 2.0 and close <= pb_max and close >= pb_min:
-                return True
-    return False
+    frame = as_frame(candles_m5)
+    hits = zone_rejection_mask(frame.high[-lookback:], frame.low[-lookback:], frame.close[-lookback:], direction, pb_min, pb_max)
+    return bool(hits.any())
 
 
 def evaluate_entry_timing(
-    candles: List[dict],
+    candles: Candles,
     direction: str,
     entry_nominal: float,
     swing_low: Optional[float],
     swing_high: Optional[float],
     current_price: Optional[float],
     zone_pts: Optional[float] = None,
-    candles_m5: Optional[List[dict]] = None,
+    candles_m5: Optional[Candles] = None,
     atr: Optional[float] = None,
     min_confirm_bars: int = 2,
     entry_timing_mode: str = "classic",
@@ -213,14 +158,16 @@ def evaluate_entry_timing(
             reason="Pas de données",
             confirmation_bars=0,
         )
-    last = candles[-1]
-    close = float(last.get("close", entry_nominal))
+    frame = as_frame(candles)
+    frame_m5 = as_frame(candles_m5)
+    close = float(frame.close[-1])
+    if close != close:  # close absent (NaN)
+        close = entry_nominal
     zone_lo = entry_nominal - zone_pts
     zone_hi = entry_nominal + zone_pts
     # Prix de référence : tick obligatoire pour valider l'entrée (pas seulement close M15)
     price_ref = current_price if current_price is not None else close
     in_zone = _price_in_zone(price_ref, zone_lo, zone_hi)
-    last_3 = candles[-3:] if len(candles) >= 3 else candles
     confirmation_count = 0
     setup_type = "ZONE_CONFIRMATION"
     reason = "En attente de confirmation"
@@ -228,18 +175,16 @@ def evaluate_entry_timing(
     if direction == "BUY":
         if swing_low is not None and close > swing_low + zone_pts:
             setup_type = "BREAKOUT_RETEST"
-            for c in last_3:
-                if _is_rejection_candle_bullish(c):
-                    confirmation_count += 1
-            m5_count = _m5_rejection_count(candles_m5 or [], direction)
+            confirmation_count = _rejection_count(frame, direction)
+            m5_count = _m5_rejection_count(frame_m5, direction)
             has_confirm = confirmation_count >= min_confirm_bars or m5_count >= min_confirm_bars
             timing_ready = in_zone and has_confirm
             if entry_timing_mode == "pullback_m5" and setup_type in (pullback_require_setups or ["BREAKOUT_RETEST", "PULLBACK_SR"]):
-                impulse = _find_impulse_candle(candles, direction, atr or 20.0)
+                impulse = _find_impulse_candle(frame, direction, atr or 20.0)
                 if impulse and (price_ref := (current_price if current_price is not None else close)):
                     pb_min, pb_max = _pullback_zone(impulse, direction, pullback_min_ratio, pullback_max_ratio)
                     in_pb = _price_in_zone(price_ref, pb_min, pb_max)
-                    m5_rej = _m5_rejection_in_pullback_zone(candles_m5 or [], direction, pb_min, pb_max, m5_rejection_lookback)
+                    m5_rej = _m5_rejection_in_pullback_zone(frame_m5, direction, pb_min, pb_max, m5_rejection_lookback)
                     step_zone, step_pb, step_m5 = in_zone, in_pb, m5_rej
                     if in_pb and m5_rej:
                         timing_ready = True
@@ -254,19 +199,17 @@ def evaluate_entry_timing(
             else:
                 reason = "Breakout retest - en attente rejets" if in_zone else "En attente du pullback"
         else:
-            for c in last_3:
-                if _is_rejection_candle_bullish(c):
-                    confirmation_count += 1
-            m5_count = _m5_rejection_count(candles_m5 or [], direction)
+            confirmation_count = _rejection_count(frame, direction)
+            m5_count = _m5_rejection_count(frame_m5, direction)
             has_confirm = confirmation_count >= min_confirm_bars or m5_count >= min_confirm_bars
             timing_ready = in_zone and has_confirm
             setup_type = "PULLBACK_SR"
             if entry_timing_mode == "pullback_m5" and setup_type in (pullback_require_setups or ["BREAKOUT_RETEST", "PULLBACK_SR"]):
-                impulse = _find_impulse_candle(candles, direction, atr or 20.0)
+                impulse = _find_impulse_candle(frame, direction, atr or 20.0)
                 if impulse and (price_ref := (current_price if current_price is not None else close)):
                     pb_min, pb_max = _pullback_zone(impulse, direction, pullback_min_ratio, pullback_max_ratio)
                     in_pb = _price_in_zone(price_ref, pb_min, pb_max)
-                    m5_rej = _m5_rejection_in_pullback_zone(candles_m5 or [], direction, pb_min, pb_max, m5_rejection_lookback)
+                    m5_rej = _m5_rejection_in_pullback_zone(frame_m5, direction, pb_min, pb_max, m5_rejection_lookback)
                     timing_ready = in_zone and in_pb and m5_rej
                     reason = f"PULLBACK_REJECTION_M5" if timing_ready else f"Rejet S/R x{confirmation_count} - attente pullback M5"
                     log.info(
@@ -281,18 +224,16 @@ def evaluate_entry_timing(
     else:
         if swing_high is not None and close < swing_high - zone_pts:
             setup_type = "BREAKOUT_RETEST"
-            for c in last_3:
-                if _is_rejection_candle_bearish(c):
-                    confirmation_count += 1
-            m5_count = _m5_rejection_count(candles_m5 or [], direction)
+            confirmation_count = _rejection_count(frame, direction)
+            m5_count = _m5_rejection_count(frame_m5, direction)
             has_confirm = confirmation_count >= min_confirm_bars or m5_count >= min_confirm_bars
             timing_ready = in_zone and has_confirm
             if entry_timing_mode == "pullback_m5" and setup_type in (pullback_require_setups or ["BREAKOUT_RETEST", "PULLBACK_SR"]):
-                impulse = _find_impulse_candle(candles, direction, atr or 20.0)
+                impulse = _find_impulse_candle(frame, direction, atr or 20.0)
                 if impulse and (price_ref := (current_price if current_price is not None else close)):
                     pb_min, pb_max = _pullback_zone(impulse, direction, pullback_min_ratio, pullback_max_ratio)
                     in_pb = _price_in_zone(price_ref, pb_min, pb_max)
-                    m5_rej = _m5_rejection_in_pullback_zone(candles_m5 or [], direction, pb_min, pb_max, m5_rejection_lookback)
+                    m5_rej = _m5_rejection_in_pullback_zone(frame_m5, direction, pb_min, pb_max, m5_rejection_lookback)
                     step_zone, step_pb, step_m5 = in_zone, in_pb, m5_rej
                     timing_ready = in_pb and m5_rej
                     reason = f"PULLBACK_REJECTION_M5 zone=[{pb_min:.1f},{pb_max:.1f}]" if timing_ready else "Pullback M5 - en attente zone + rejet"
@@ -309,19 +250,17 @@ def evaluate_entry_timing(
             else:
                 reason = "Breakout retest - en attente rejets" if in_zone else "En attente du pullback"
         else:
-            for c in last_3:
-                if _is_rejection_candle_bearish(c):
-                    confirmation_count += 1
-            m5_count = _m5_rejection_count(candles_m5 or [], direction)
+            confirmation_count = _rejection_count(frame, direction)
+            m5_count = _m5_rejection_count(frame_m5, direction)
             has_confirm = confirmation_count >= min_confirm_bars or m5_count >= min_confirm_bars
             timing_ready = in_zone and has_confirm
             setup_type = "PULLBACK_SR"
             if entry_timing_mode == "pullback_m5" and setup_type in (pullback_require_setups or ["BREAKOUT_RETEST", "PULLBACK_SR"]):
-                impulse = _find_impulse_candle(candles, direction, atr or 20.0)
+                impulse = _find_impulse_candle(frame, direction, atr or 20.0)
                 if impulse and (price_ref := (current_price if current_price is not None else close)):
                     pb_min, pb_max = _pullback_zone(impulse, direction, pullback_min_ratio, pullback_max_ratio)
                     in_pb = _price_in_zone(price_ref, pb_min, pb_max)
-                    m5_rej = _m5_rejection_in_pullback_zone(candles_m5 or [], direction, pb_min, pb_max, m5_rejection_lookback)
+                    m5_rej = _m5_rejection_in_pullback_zone(frame_m5, direction, pb_min, pb_max, m5_rejection_lookback)
                     timing_ready = in_zone and in_pb and m5_rej
                     reason = f"PULLBACK_REJECTION_M5" if timing_ready else f"Rejet S/R x{confirmation_count} - attente pullback M5"
                     log.info(
@@ -9,6 +9,10 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import List, Optional
 
+import numpy as np
+
+from app.engines.candle_frame import Candles, as_frame
+
 
 @dataclass(frozen=True)
 class ImpulseMemory:
@@ -19,37 +23,9 @@ class ImpulseMemory:
     key_levels: List[float]
 
 
-def _compute_atr(candles: List[dict], period: int = 14) -> float:
+def _compute_atr(candles: Candles, period: int = 14) -> float:
     """ATR(14) sur les bougies."""
-    highs = _extract_series(candles, "high")
-    lows = _extract_series(candles, "low")
-    closes = _extract_series(candles, "close")
-    if len(highs) < period + 1 or len(lows) < period + 1 or len(closes) < period + 1:
-        return (max(highs[-5:]) - min(lows[-5:])) / 5 if len(highs) >= 5 else 20.0
-    tr_list: list = []
-    for i in range(1, min(len(highs), len(lows), len(closes))):
-        tr = max(
-            highs[i] - lows[i],
-            abs(highs[i] - closes[i - 1]),
-            abs(lows[i] - closes[i - 1]),
-        )
-        tr_list.append(tr)
-    if len(tr_list) < period:
-        return tr_list[-1] if tr_list else 20.0
-    return sum(tr_list[-period:]) / period
-
-
-def _extract_series(candles: List[dict], key: str) -> List[float]:
-    out: List[float] = []
-    for c in candles:
-        v = c.get(key)
-        if v is None:
-            continue
-        try:
-            out.append(float(v))
-        except (TypeError, ValueError):
-            continue
-    return out
+    return as_frame(candles).atr(period)
 
 
 def _parse_bar_ts(candle: dict) -> Optional[str]:
@@ -67,7 +43,7 @@ def _parse_bar_ts(candle: dict) -> Optional[str]:
 
 
 def compute_impulse_memory(
-    candles_m15: List[dict],
+    candles_m15: Candles,
     impulse_atr_mult: float = 1.8,
 ) -> Optional[ImpulseMemory]:
     """
@@ -77,42 +53,40 @@ def compute_impulse_memory(
     if not candles_m15 or len(candles_m15) < 15:
         return None
 
-    atr = _compute_atr(candles_m15)
+    frame = as_frame(candles_m15)
+    atr = _compute_atr(frame)
     threshold = atr * impulse_atr_mult
 
-    # Parcourir de la plus récente vers la plus ancienne
-    for i in range(len(candles_m15) - 1, -1, -1):
-        c = candles_m15[i]
-        high = c.get("high")
-        low = c.get("low")
-        open_ = c.get("open")
-        close = c.get("close")
-        if high is None or low is None:
-            continue
-        try:
-            h, l_ = float(high), float(low)
-        except (TypeError, ValueError):
-            continue
-        range_pts = h - l_
-        if range_pts < threshold:
-            continue
-
-        # Bougie d'impulsion trouvée — direction = sens du mouvement (bullish → BUY, bearish → SELL)
-        o = float(open_) if open_ is not None else l_
-        cl = float(close) if close is not None else h
-        direction = "BUY" if cl >= o else "SELL"
-        anchor = l_ if direction == "BUY" else h  # niveau d'origine du move
-        ts_utc = _parse_bar_ts(c)
-
-        # Key levels: anchor + niveau opposé de la bougie
-        key_levels = [anchor, h if direction == "BUY" else l_]
-
-        return ImpulseMemory(
-            last_impulse_dir=direction,
-            last_impulse_ts_utc=ts_utc,
-            impulse_range_pts=round(range_pts, 1),
-            impulse_anchor_price=anchor,
-            key_levels=key_levels,
-        )
-
-    return None
+    # Dernière bougie (la plus récente) dont le range atteint le seuil ; high/low manquants (NaN) exclus
+    hits = np.flatnonzero(frame.high - frame.low >= threshold)
+    if not len(hits):
+        return None
+    i = int(hits[-1])
+    return impulse_from_bar(
+        float(frame.open[i]), float(frame.high[i]), float(frame.low[i]), float(frame.close[i]),
+        _parse_bar_ts(frame.candle(i)),
+    )
+
+
+def impulse_from_bar(o: float, h: float, l_: float, cl: float, ts_utc: Optional[str]) -> ImpulseMemory:
+    """ImpulseMemory d'une bougie d'impulsion déjà identifiée (batch ou IndicatorState incrémental)."""
+    range_pts = h - l_
+
+    # Bougie d'impulsion trouvée — direction = sens du mouvement (bullish → BUY, bearish → SELL)
+    if np.isnan(o):
+        o = l_
+    if np.isnan(cl):
+        cl = h
+    direction = "BUY" if cl >= o else "SELL"
+    anchor = l_ if direction == "BUY" else h  # niveau d'origine du move
+
+    # Key levels: anchor + niveau opposé de la bougie
+    key_levels = [anchor, h if direction == "BUY" else l_]
+
+    return ImpulseMemory(
+        last_impulse_dir=direction,
+        last_impulse_ts_utc=ts_utc,
+        impulse_range_pts=round(range_pts, 1),
+        impulse_anchor_price=anchor,
+        key_levels=key_levels,
+    )
@@ -0,0 +1,403 @@
+"""
+État incrémental des indicateurs par (symbole, TF) : ATR, swings fractals, S/R et dernière impulsion
+mis à jour à chaque clôture de barre en O(1) amorti, au lieu de recalculer toute la fenêtre à chaque cycle.
+Fenêtre glissante de `window` barres : les résultats sont identiques aux fonctions batch
+(detect_swings, analyze_structure, compute_impulse_memory, CandleFrame.atr) appliquées à cette fenêtre.
+IndicatorTracker : un état par (symbole, TF) prolongé à chaque cycle /analyze par les barres clôturées
+du snapshot, barre en formation ajoutée sur une copie (ATR, structure) ; persistance SQLite (table
+indicator_state, app.infra.indicator_store) branchée par l'appelant, partagée avec le recorder.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.engines.candle_frame import CandleFrame, Candles, as_frame
+from app.engines.impulse_memory_engine import ImpulseMemory, _parse_bar_ts, impulse_from_bar
+from app.engines.structure_engine import StructureResult, SwingPoint, get_structure_cache, structure_from_swings
+
+log = logging.getLogger(__name__)
+
+# Fenêtre par défaut (≥ historiques M15/H1 analysés par le pipeline)
+DEFAULT_WINDOW = 200
+
+_STATE_VERSION = 1
+
+# (time, open, high, low, close, volume)
+Bar = Tuple[int, float, float, float, float, float]
+
+
+class IndicatorState:
+    """
+    Indicateurs d'une série (symbole, TF) sur les `window` dernières barres clôturées.
+    - ATR : deque des `atr_period` derniers true ranges (somme recalculée sur période fixe → O(1)).
+    - Swings : la barre t - lookback est tranchée à la clôture de t (fenêtre de 2*lookback+1 barres).
+    - S/R / structure : dérivés des swings maintenus (pas de re-détection), à la lecture seulement.
+    - Impulsion : pile des maxima suffixes des ranges ; la dernière barre avec range >= seuil y est toujours.
+    Les indices (SwingPoint.idx) sont relatifs à la fenêtre, comme en batch.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        timeframe: str,
+        window: int = DEFAULT_WINDOW,
+        lookback: int = 2,
+        atr_period: int = 14,
+        impulse_atr_mult: float = 1.8,
+    ) -> None:
+        self.symbol = symbol
+        self.timeframe = timeframe.upper()
+        self.window = window
+        self.lookback = lookback
+        self.atr_period = atr_period
+        self.impulse_atr_mult = impulse_atr_mult
+        self.count = 0  # barres reçues depuis la création (indice absolu de la prochaine barre)
+        self._bars: Deque[Bar] = deque(maxlen=window)
+        self._trs: Deque[float] = deque(maxlen=atr_period)
+        self._swings: Deque[Tuple[int, str, float]] = deque()  # (indice absolu, typ, prix)
+        self._impulse_stack: Deque[Tuple[int, float]] = deque()  # (indice absolu, range) strictement décroissants
+        self._structure: Optional[StructureResult] = None
+
+    # --- Mise à jour ---
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return self._bars[-1][0] if self._bars else None
+
+    @property
+    def _start(self) -> int:
+        return self.count - len(self._bars)
+
+    def update(self, time: int, open_: float, high: float, low: float, close: float, volume: float = 0.0) -> bool:
+        """Intègre une barre clôturée. Ignore les barres déjà vues (time <= last_time). Retourne True si intégrée."""
+        last = self.last_time
+        if last is not None and time <= last:
+            return False
+        if self._bars:
+            pc = self._bars[-1][4]
+            self._trs.append(max(high - low, max(abs(high - pc), abs(low - pc))))
+        self._bars.append((int(time), float(open_), float(high), float(low), float(close), float(volume)))
+        self.count += 1
+        start = self._start
+
+        # Barres sorties de la fenêtre : swings sans lookback barres à gauche, impulsions hors fenêtre
+        while self._swings and self._swings[0][0] - start < self.lookback:
+            self._swings.popleft()
+        while self._impulse_stack and self._impulse_stack[0][0] < start:
+            self._impulse_stack.popleft()
+
+        # Swing tranché : centre = t - lookback, s'il a lookback barres à gauche dans la fenêtre
+        lb = self.lookback
+        center = self.count - 1 - lb
+        if center - start >= lb:
+            bars = [self._bars[k] for k in range(len(self._bars) - 2 * lb - 1, len(self._bars))]
+            mid = bars[lb]
+            others = bars[:lb] + bars[lb + 1:]
+            if all(b[2] <= mid[2] for b in others):
+                self._swings.append((center, "high", mid[2]))
+            if all(b[3] >= mid[3] for b in others):
+                self._swings.append((center, "low", mid[3]))
+
+        rng = high - low
+        if not math.isnan(rng):
+            while self._impulse_stack and self._impulse_stack[-1][1] <= rng:
+                self._impulse_stack.pop()
+            self._impulse_stack.append((self.count - 1, rng))
+
+        # last_close change à chaque barre (pullback_to_level) : structure recalculée à la prochaine lecture
+        self._structure = None
+        return True
+
+    def update_candles(self, candles: Candles) -> int:
+        """Intègre les barres clôturées d'une série (les déjà vues sont ignorées). Retourne le nombre intégré."""
+        frame = as_frame(candles)
+        last = self.last_time
+        n = 0
+        for t, o, h, l, c, v in zip(
+            frame.time.tolist(), frame.open.tolist(), frame.high.tolist(),
+            frame.low.tolist(), frame.close.tolist(), frame.volume.tolist(),
+        ):
+            if t <= 0 or (last is not None and t <= last):
+                continue
+            if self.update(int(t), o, h, l, c, v):
+                n += 1
+        return n
+
+    def copy(self) -> "IndicatorState":
+        clone = IndicatorState(
+            self.symbol, self.timeframe, self.window, self.lookback, self.atr_period, self.impulse_atr_mult
+        )
+        clone.count = self.count
+        clone._bars = deque(self._bars, maxlen=self.window)
+        clone._trs = deque(self._trs, maxlen=self.atr_period)
+        clone._swings = deque(self._swings)
+        clone._impulse_stack = deque(self._impulse_stack)
+        clone._structure = self._structure
+        return clone
+
+    def preview(self, time: int, open_: float, high: float, low: float, close: float, volume: float = 0.0) -> Optional["IndicatorState"]:
+        """Copie avec la barre en formation intégrée (l'état lui-même reste sur les barres clôturées)."""
+        clone = self.copy()
+        return clone if clone.update(time, open_, high, low, close, volume) else None
+
+    def covers(self, candles: Candles) -> bool:
+        """
+        True si les dernières barres de la fenêtre sont exactement ces barres (time, high, low, close) :
+        un état bâti sur d'autres prix aux mêmes heures (historique broker révisé, autre série, replay)
+        n'est pas aligné.
+        """
+        frame = as_frame(candles)
+        k = len(frame)
+        if k == 0 or k > len(self._bars):
+            return k == 0
+        bars = self._bars
+        offset = len(bars) - k
+        return all(
+            bars[offset + j][0] == int(t) and bars[offset + j][2] == h and bars[offset + j][3] == l and bars[offset + j][4] == c
+            for j, (t, h, l, c) in enumerate(
+                zip(frame.time.tolist(), frame.high.tolist(), frame.low.tolist(), frame.close.tolist())
+            )
+        )
+
+    # --- Lectures ---
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    @property
+    def atr(self) -> float:
+        """ATR(atr_period) sur la fenêtre, même définition (et repli) que CandleFrame.atr."""
+        n = len(self._bars)
+        if n >= self.atr_period + 1:
+            return sum(self._trs) / self.atr_period
+        if n >= 5:
+            recent = list(self._bars)[-5:]
+            return (max(b[2] for b in recent) - min(b[3] for b in recent)) / 5
+        return 20.0
+
+    @property
+    def swings(self) -> List[SwingPoint]:
+        start = self._start
+        return [SwingPoint(idx=i - start, typ=typ, price=price) for i, typ, price in self._swings]
+
+    def structure(self) -> StructureResult:
+        """Équivalent de analyze_structure(fenêtre), recalculé seulement après une nouvelle barre."""
+        if self._structure is None:
+            if not self._bars:
+                self._structure = structure_from_swings([], 0.0)
+            else:
+                self._structure = structure_from_swings(
+                    self.swings, self._bars[-1][4], [b[0] for b in self._bars]
+                )
+        return self._structure
+
+    @property
+    def sr_levels(self) -> List[float]:
+        return self.structure().sr_levels
+
+    def impulse(self, last: Optional[int] = None) -> Optional[ImpulseMemory]:
+        """
+        Équivalent de compute_impulse_memory(fenêtre, impulse_atr_mult) ; last : limité aux `last`
+        dernières barres de la fenêtre (même ATR tant qu'elles sont au moins 15).
+        """
+        bar = self._impulse_bar(last)
+        if bar is None:
+            return None
+        t, o, h, l, c, _ = bar
+        return impulse_from_bar(o, h, l, c, _parse_bar_ts({"time": t}))
+
+    def _impulse_bar(self, last: Optional[int] = None) -> Optional[Bar]:
+        n = len(self._bars) if last is None else min(last, len(self._bars))
+        if n < 15:
+            return None
+        threshold = self.atr * self.impulse_atr_mult
+        start = self.count - n
+        # Pile décroissante : les dernières entrées sont les plus petites, on remonte jusqu'au seuil
+        for idx, rng in reversed(self._impulse_stack):
+            if idx < start:
+                return None
+            if rng >= threshold:
+                return self._bars[idx - self._start]
+        return None
+
+    def frame(self) -> CandleFrame:
+        """La fenêtre courante en CandleFrame (pour les moteurs batch)."""
+        keys = ("time", "open", "high", "low", "close", "volume")
+        columns = {k: [b[i] for b in self._bars] for i, k in enumerate(keys)}
+        return CandleFrame.from_columns(columns, self.symbol, self.timeframe)
+
+    # --- Persistance ---
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": _STATE_VERSION,
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "window": self.window,
+            "lookback": self.lookback,
+            "atr_period": self.atr_period,
+            "impulse_atr_mult": self.impulse_atr_mult,
+            "count": self.count,
+            "bars": [list(b) for b in self._bars],
+            "trs": list(self._trs),
+            "swings": [list(s) for s in self._swings],
+            "impulse_stack": [list(e) for e in self._impulse_stack],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls(
+            data["symbol"],
+            data["timeframe"],
+            window=int(data["window"]),
+            lookback=int(data["lookback"]),
+            atr_period=int(data["atr_period"]),
+            impulse_atr_mult=float(data["impulse_atr_mult"]),
+        )
+        state.count = int(data["count"])
+        state._bars.extend((int(b[0]), *map(float, b[1:])) for b in data["bars"])
+        state._trs.extend(float(v) for v in data["trs"])
+        state._swings.extend((int(i), str(typ), float(p)) for i, typ, p in data["swings"])
+        state._impulse_stack.extend((int(i), float(r)) for i, r in data["impulse_stack"])
+        return state
+
+    def _same_params(self, data: Dict[str, Any]) -> bool:
+        return (
+            data.get("version") == _STATE_VERSION
+            and data.get("window") == self.window
+            and data.get("lookback") == self.lookback
+            and data.get("atr_period") == self.atr_period
+            and data.get("impulse_atr_mult") == self.impulse_atr_mult
+        )
+
+
+@dataclass(frozen=True)
+class LiveIndicators:
+    """
+    Indicateurs d'un cycle sur la série du snapshot (barre en formation comprise) :
+    atr = CandleFrame.atr, structure = analyze_structure (déjà placée dans le StructureCache) ;
+    impulse = compute_impulse_memory sur les barres clôturées, impulse_new si autre barre qu'au cycle précédent.
+    """
+
+    atr: float
+    structure: StructureResult
+    impulse: Optional[ImpulseMemory]
+    impulse_new: bool
+    bars_added: int
+    rebuilt: bool
+
+
+StateLoader = Callable[..., IndicatorState]
+StateSaver = Callable[[IndicatorState], None]
+
+
+class IndicatorTracker:
+    """
+    Un IndicatorState par (symbole, TF), fenêtre = longueur de la série du cycle. Chaque cycle n'intègre
+    que les barres clôturées nouvelles ; état reconstruit sur la série si elle ne le prolonge pas
+    (historique antérieur, prix différents aux mêmes heures, paramètres changés). Persistance optionnelle (loader / saver) : sans elle
+    (replay, sweeps), l'état vit dans le process.
+    """
+
+    def __init__(self, loader: Optional[StateLoader] = None, saver: Optional[StateSaver] = None) -> None:
+        self.loader = loader
+        self.saver = saver
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._impulse_ts: Dict[Tuple[str, str], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def use_store(self, loader: Optional[StateLoader], saver: Optional[StateSaver]) -> None:
+        self.loader, self.saver = loader, saver
+
+    def _load(self, symbol: str, timeframe: str, params: Dict[str, Any]) -> IndicatorState:
+        if self.loader is not None:
+            state = self.loader(symbol, timeframe, **params)
+            if state is not None:
+                return state
+        return IndicatorState(symbol, timeframe, **params)
+
+    def sync(self, candles: Candles, impulse_atr_mult: float = 1.8) -> Optional[LiveIndicators]:
+        """
+        Prolonge l'état avec les barres clôturées (toutes sauf la dernière) et lit les indicateurs du cycle.
+        None si la série n'est pas identifiée (symbole, TF, time) : l'appelant calcule en batch.
+        """
+        frame = as_frame(candles)
+        key = frame.fingerprint()
+        if key is None or len(frame) < 2:
+            return None
+        ident = (frame.symbol, frame.timeframe)
+        closed = frame[:-1]
+        params = {"window": len(frame), "impulse_atr_mult": float(impulse_atr_mult)}
+        with self._lock:
+            state = self._states.get(ident)
+            if state is None or state.window != len(frame) or state.impulse_atr_mult != params["impulse_atr_mult"]:
+                state = self._load(frame.symbol, frame.timeframe, params)
+            added = state.update_candles(closed)
+            rebuilt = False
+            if not state.covers(closed):
+                state = IndicatorState(frame.symbol, frame.timeframe, **params)
+                added = state.update_candles(closed)
+                rebuilt = True
+                if not state.covers(closed):
+                    return None
+            self._states[ident] = state
+            live = state.preview(
+                int(frame.time[-1]), float(frame.open[-1]), float(frame.high[-1]),
+                float(frame.low[-1]), float(frame.close[-1]), float(frame.volume[-1]),
+            )
+            if live is None:
+                return None
+            impulse = _closed_impulse(state, closed)
+            previous = self._impulse_ts.get(ident, _UNSET)
+            impulse_ts = impulse.last_impulse_ts_utc if impulse else None
+            self._impulse_ts[ident] = impulse_ts
+        structure = live.structure()
+        get_structure_cache().put(key, structure)
+        if added and self.saver is not None:
+            try:
+                self.saver(state)
+            except Exception as exc:  # noqa: BLE001 - l'état reste en mémoire, resauvé à la prochaine barre
+                log.warning("IndicatorState %s %s: sauvegarde impossible: %s", frame.symbol, frame.timeframe, exc)
+        return LiveIndicators(
+            atr=live.atr,
+            structure=structure,
+            impulse=impulse,
+            impulse_new=impulse is not None and impulse_ts != previous,
+            bars_added=added,
+            rebuilt=rebuilt,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._impulse_ts.clear()
+
+
+_UNSET = object()
+
+
+def _closed_impulse(state: IndicatorState, closed: CandleFrame) -> Optional[ImpulseMemory]:
+    """Impulsion sur les barres clôturées de la série ; horodatage lu sur la bougie d'origine (comme en batch)."""
+    bar = state._impulse_bar(last=len(closed))
+    if bar is None:
+        return None
+    t, o, h, l, c, _ = bar
+    k = int(np.searchsorted(closed.time, t, side="left"))
+    return impulse_from_bar(o, h, l, c, _parse_bar_ts(closed.candle(k)))
+
+
+_indicator_tracker: Optional[IndicatorTracker] = None
+
+
+def get_indicator_tracker() -> IndicatorTracker:
+    global _indicator_tracker
+    if _indicator_tracker is None:
+        _indicator_tracker = IndicatorTracker()
+    return _indicator_tracker
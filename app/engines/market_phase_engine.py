@@ -6,24 +6,12 @@ Renforce la décision sans modifier les règles existantes.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Optional
 
+from app.engines.candle_frame import Candles, as_frame
 from app.engines.structure_engine import analyze_structure, StructureResult
 
 
-def _extract_series(candles: List[dict], key: str) -> List[float]:
-    out: List[float] = []
-    for c in candles:
-        v = c.get(key)
-        if v is None:
-            continue
-        try:
-            out.append(float(v))
-        except (TypeError, ValueError):
-            continue
-    return out
-
-
 @dataclass(frozen=True)
 class MarketPhaseResult:
     phase: str  # IMPULSE | PULLBACK | CONSOLIDATION | REVERSAL
@@ -31,8 +19,8 @@ class MarketPhaseResult:
 
 
 def get_market_phase(
-    candles_m15: List[dict],
-    candles_h1: Optional[List[dict]] = None,
+    candles_m15: Candles,
+    candles_h1: Optional[Candles] = None,
     struct_m15: Optional[StructureResult] = None,
 ) -> MarketPhaseResult:
     """
@@ -42,27 +30,28 @@ def get_market_phase(
     - CONSOLIDATION: range, pas de direction claire
     - REVERSAL: potentiel retournement (structure H1 vs M15 divergente ou momentum inverse)
     """
-    if not candles_m15:
+    frame = as_frame(candles_m15)
+    if not frame:
         return MarketPhaseResult("CONSOLIDATION", "Pas de données")
 
-    struct = struct_m15 or analyze_structure(candles_m15)
+    struct = struct_m15 or analyze_structure(frame)
     struct_h1 = analyze_structure(candles_h1) if candles_h1 else struct
 
-    closes = _extract_series(candles_m15, "close")
-    highs = _extract_series(candles_m15, "high")
-    lows = _extract_series(candles_m15, "low")
+    closes = frame.close
+    highs = frame.high
+    lows = frame.low
 
     if len(closes) < 10:
         return MarketPhaseResult("CONSOLIDATION", "Historique insuffisant")
 
-    last_close = closes[-1]
-    recent_range = max(highs[-8:]) - min(lows[-8:]) if len(highs) >= 8 and len(lows) >= 8 else 0
-    older_range = max(highs[-16:-8]) - min(lows[-16:-8]) if len(highs) >= 16 and len(lows) >= 16 else recent_range
+    last_close = float(closes[-1])
+    recent_range = float(highs[-8:].max() - lows[-8:].min())
+    older_range = float(highs[-16:-8].max() - lows[-16:-8].min()) if len(highs) >= 16 else recent_range
     avg_range = (recent_range + older_range) / 2 if older_range > 0 else recent_range
 
     # Momentum court (4 barres) vs moyen (12 barres)
-    mom_short = closes[-1] - closes[-5] if len(closes) >= 5 else 0
-    mom_medium = closes[-1] - closes[-13] if len(closes) >= 13 else 0
+    mom_short = float(closes[-1] - closes[-5])
+    mom_medium = float(closes[-1] - closes[-13]) if len(closes) >= 13 else 0
 
     # Structure H1 vs M15 divergente = potentiel REVERSAL
     if struct_h1.structure != struct.structure:
@@ -0,0 +1,105 @@
+"""
+Étiquetage vectorisé des résultats de signaux (SL / TP1 / TP2) sur une plage de bougies en colonnes.
+Tous les signaux d'un symbole en une passe : index de départ par searchsorted (première barre ouverte
+à ts du signal ou après), fenêtres de barres suivantes en matrice (signaux × barres, par blocs),
+première barre touchant un niveau par argmax. Sur une même barre : SL, puis TP2, puis TP1
+(mêmes priorités que l'évaluation barre par barre de signal_outcome_agent).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+SL_HIT = "SL_HIT"
+TP1_HIT = "TP1_HIT"
+TP2_HIT = "TP2_HIT"
+OPEN = "OPEN"
+UNKNOWN = "UNKNOWN"
+
+# Taille max d'un bloc signaux × barres (cellules de chaque matrice booléenne)
+CHUNK_CELLS = 4_000_000
+
+
+@dataclass(frozen=True)
+class OutcomeLabels:
+    """Par signal : outcome, PnL en points (NaN sans touche) et time de la barre de touche (-1 sinon)."""
+
+    outcome: np.ndarray
+    pnl_pts: np.ndarray
+    hit_time: np.ndarray
+
+
+def label_outcomes(
+    bar_time: np.ndarray,
+    bar_high: np.ndarray,
+    bar_low: np.ndarray,
+    signal_time: np.ndarray,
+    is_buy: np.ndarray,
+    entry: np.ndarray,
+    sl: np.ndarray,
+    tp1: np.ndarray,
+    tp2: np.ndarray,
+    max_bars: Optional[int] = None,
+) -> OutcomeLabels:
+    """
+    bar_* : barres triées par time ; signal_* : un élément par signal (time epoch s).
+    max_bars : horizon de barres examinées après le signal (défaut : jusqu'à la fin de la plage).
+    Aucune barre après le signal → UNKNOWN ; aucun niveau touché → OPEN. TP ≤ 0 : niveau absent.
+    PnL signé : TP positif, SL négatif.
+    """
+    bar_time = np.asarray(bar_time, dtype=np.int64)
+    high = np.asarray(bar_high, dtype=np.float64)
+    low = np.asarray(bar_low, dtype=np.float64)
+    n = len(signal_time)
+    m = len(bar_time)
+    outcome = np.full(n, UNKNOWN, dtype=object)
+    pnl = np.full(n, np.nan)
+    hit_time = np.full(n, -1, dtype=np.int64)
+    if n == 0 or m == 0:
+        return OutcomeLabels(outcome, pnl, hit_time)
+
+    start = np.searchsorted(bar_time, np.asarray(signal_time, dtype=np.int64), side="left")
+    has_bars = start < m
+    horizon = int(m - start[has_bars].min()) if has_bars.any() else 0
+    if max_bars is not None:
+        horizon = min(horizon, int(max_bars))
+    if horizon <= 0:
+        return OutcomeLabels(outcome, pnl, hit_time)
+
+    buy = np.asarray(is_buy, dtype=bool)
+    entry = np.asarray(entry, dtype=np.float64)
+    sl = np.asarray(sl, dtype=np.float64)
+    tp1 = np.asarray(tp1, dtype=np.float64)
+    tp2 = np.asarray(tp2, dtype=np.float64)
+    offsets = np.arange(horizon)
+    rows_per_chunk = max(1, CHUNK_CELLS // horizon)
+
+    for lo in range(0, n, rows_per_chunk):
+        sel = slice(lo, min(n, lo + rows_per_chunk))
+        idx = start[sel, None] + offsets
+        valid = idx < m
+        idx = np.minimum(idx, m - 1)
+        h, l_ = high[idx], low[idx]
+        b = buy[sel, None]
+        sl_hit = valid & np.where(b, l_ <= sl[sel, None], h >= sl[sel, None])
+        tp2_hit = valid & (tp2[sel, None] > 0) & np.where(b, h >= tp2[sel, None], l_ <= tp2[sel, None])
+        tp1_hit = valid & (tp1[sel, None] > 0) & np.where(b, h >= tp1[sel, None], l_ <= tp1[sel, None])
+        any_hit = sl_hit | tp1_hit | tp2_hit
+
+        rows = np.arange(idx.shape[0])
+        first = any_hit.argmax(axis=1)
+        hit = any_hit[rows, first]
+        sl_first = sl_hit[rows, first]
+        tp2_first = tp2_hit[rows, first] & ~sl_first
+        level = np.where(sl_first, sl[sel], np.where(tp2_first, tp2[sel], tp1[sel]))
+        signed = np.where(buy[sel], level - entry[sel], entry[sel] - level)
+
+        labels = np.where(sl_first, SL_HIT, np.where(tp2_first, TP2_HIT, TP1_HIT)).astype(object)
+        labels[~hit] = OPEN
+        labels[~has_bars[sel]] = UNKNOWN
+        outcome[sel] = labels
+        pnl[sel] = np.where(hit, signed, np.nan)
+        hit_time[sel] = np.where(hit, bar_time[idx[rows, first]], -1)
+    return OutcomeLabels(outcome, pnl, hit_time)
@@ -4,24 +4,14 @@ Alimente le state avec: range_rejet_borne, range_sweep, range_break_structure, r
 """
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Optional
 
-
-def _extract_series(candles: List[dict], key: str) -> List[float]:
-    out: List[float] = []
-    for c in candles:
-        v = c.get(key)
-        if v is None:
-            continue
-        try:
-            out.append(float(v))
-        except (TypeError, ValueError):
-            continue
-    return out
+from app.engines.candle_frame import Candles, as_frame
+from app.engines.candle_patterns import sweep_mask
 
 
 def evaluate_range_indicators(
-    candles_m15: List[dict],
+    candles_m15: Candles,
     direction: str,
     entry: float,
     last_swing_low: Optional[float],
@@ -29,7 +19,7 @@ def evaluate_range_indicators(
     atr: float,
     timing_ready: bool,
     setup_type: str,
-    candles_m5: Optional[List[dict]] = None,
+    candles_m5: Optional[Candles] = None,
 ) -> dict:
     """
     Calcule les 4 indicateurs range pour le scoring Mode RANGE.
@@ -44,11 +34,10 @@ def evaluate_range_indicators(
     if not candles_m15 or len(candles_m15) < 6:
         return out
 
-    highs = _extract_series(candles_m15, "high")
-    lows = _extract_series(candles_m15, "low")
-    closes = _extract_series(candles_m15, "close")
-    if len(highs) < 6 or len(lows) < 6 or len(closes) < 6:
-        return out
+    frame = as_frame(candles_m15)
+    highs = frame.high.tolist()
+    lows = frame.low.tolist()
+    closes = frame.close.tolist()
 
     atr_tol = max(2.0, atr * 0.35) if atr and atr > 0 else 5.0
 
@@ -65,20 +54,11 @@ def evaluate_range_indicators(
 
     # --- Sweep high/low : une barre récente a dépassé le swing puis refermé dedans (liquidity grab) ---
     lookback = min(6, len(highs) - 1)
-    for i in range(-lookback, 0):
-        idx = len(highs) + i
-        if idx < 0:
-            continue
-        h, l, c = highs[idx], lows[idx], closes[idx]
-        if direction == "SELL" and last_swing_high is not None:
-            # Sweep du high : high > niveau, close < niveau
-            if h > last_swing_high + (atr * 0.1) and c < last_swing_high:
-                out["range_sweep"] = True
-                break
-        if direction == "BUY" and last_swing_low is not None:
-            if l < last_swing_low - (atr * 0.1) and c > last_swing_low:
-                out["range_sweep"] = True
-                break
+    level = last_swing_high if direction == "SELL" else last_swing_low if direction == "BUY" else None
+    if level is not None:
+        recent = slice(len(highs) - lookback, None)
+        swept = sweep_mask(frame.high[recent], frame.low[recent], frame.close[recent], direction, level, atr * 0.1)
+        out["range_sweep"] = bool(swept.any())
 
     # --- Break structure interne : type breakout/retest ou cassure d'un niveau interne récent ---
     if setup_type in ("BREAKOUT_RETEST", "PULLBACK_SR"):
@@ -99,9 +79,7 @@ def evaluate_range_indicators(
                     out["range_break_structure"] = True
 
     # --- Volume spike : dernier bar volume > 1.4 x moyenne(20) si volume dispo ---
-    vols = _extract_series(candles_m15, "volume")
-    if not vols:
-        vols = _extract_series(candles_m15, "tick_volume")
+    vols = frame.volume.tolist()
     if len(vols) >= 5:
         last_vol = vols[-1]
         avg_vol = sum(vols[-21:-1]) / 20 if len(vols) >= 21 else (sum(vols[:-1]) / (len(vols) - 1) if len(vols) > 1 else last_vol)
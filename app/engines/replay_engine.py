@@ -0,0 +1,397 @@
+"""
+Replay / backtest hors ligne : rejoue un historique barre par barre (ReplayProvider) à travers le même
+pipeline que /analyze — build_decision_packet, decide_cycle et go_send_allowed (app/engines/decision_engine.py),
+puis evaluate_suivi pour le trade simulé — sans Telegram, IA ni écriture dans la base de production.
+
+Écarts assumés avec la production :
+- un cycle par barre de base (à l'ouverture de la barre), pas un cycle toutes les N secondes ;
+- trade ouvert au prix proposé du GO « envoyé » (A+, hors cooldown après trade, pas de doublon) ;
+- suivi sur la barre clôturée : extrême défavorable, puis favorable, puis close (ordre pessimiste,
+  comme les extrêmes de ticks entre deux cycles en production).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timedelta, timezone
+from hashlib import sha1
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Protocol, Tuple
+from zoneinfo import ZoneInfo
+
+from app.agents.decision_packet import build_decision_packet
+from app.config import get_settings, settings_env_key
+from app.engines.decision_engine import decide_cycle, go_send_allowed, setup_confirmation
+from app.engines.suivi_engine import evaluate_suivi
+from app.infra.clock import SimulatedClock
+from app.infra.db import init_db
+from app.models import DecisionStatus
+from app.providers.market_snapshot import MarketSnapshot, fetch_market_snapshot
+from app.providers.replay import ReplayProvider
+from app.state_repo import StateRow
+
+log = logging.getLogger(__name__)
+
+SETUP_TYPES = ("BREAKOUT_RETEST", "PULLBACK_SR", "ZONE_CONFIRMATION")
+
+# Historique chargé avant le début du replay : 100 barres H1 (~5 jours de marché) + week-end
+DEFAULT_WARMUP_DAYS = 8
+
+
+@dataclass(frozen=True)
+class ReplayDecision:
+    ts_utc: str
+    status: str
+    blocked_by: Optional[str]
+    direction: str
+    setup_type: Optional[str]
+    entry: float
+    sl: float
+    tp1: float
+    tp2: float
+    score_total: int
+    why: Tuple[str, ...] = ()
+    taken: bool = False
+
+
+@dataclass
+class SimulatedTrade:
+    direction: str
+    setup_type: Optional[str]
+    entry: float
+    sl: float
+    tp1: float
+    tp2: float
+    opened_ts_utc: str
+    initial_sl: float = 0.0
+    be_applied: bool = False
+    bars: int = 0
+    closed_ts_utc: Optional[str] = None
+    exit_status: Optional[str] = None  # SL | TP1 | TP2 | BE | OPEN
+    outcome_pts: Optional[float] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.closed_ts_utc is not None
+
+
+@dataclass(frozen=True)
+class ReplaySummary:
+    decisions: int = 0
+    go: int = 0
+    trades: int = 0
+    wins: int = 0
+    losses: int = 0
+    points: float = 0.0
+    max_drawdown: float = 0.0
+    points_by_setup: Dict[str, float] = field(default_factory=dict)
+    trades_by_setup: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades if self.trades else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "decisions": self.decisions,
+            "go": self.go,
+            "trades": self.trades,
+            "wins": self.wins,
+            "losses": self.losses,
+            "win_rate": round(self.win_rate, 4),
+            "points": round(self.points, 2),
+            "max_drawdown": round(self.max_drawdown, 2),
+            "points_by_setup": {k: round(v, 2) for k, v in self.points_by_setup.items()},
+            "trades_by_setup": dict(self.trades_by_setup),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ReplaySummary":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+def summarize_trades(trades: Iterable[SimulatedTrade], decisions: int = 0, go: int = 0) -> ReplaySummary:
+    """Win rate, points cumulés, drawdown max (pic → creux de la courbe de points) et points par setup."""
+    closed = [t for t in trades if t.outcome_pts is not None]
+    equity = peak = max_dd = 0.0
+    by_setup: Dict[str, float] = {}
+    count_by_setup: Dict[str, int] = {}
+    for t in closed:
+        equity += t.outcome_pts
+        peak = max(peak, equity)
+        max_dd = max(max_dd, peak - equity)
+        key = t.setup_type or "UNKNOWN"
+        by_setup[key] = by_setup.get(key, 0.0) + t.outcome_pts
+        count_by_setup[key] = count_by_setup.get(key, 0) + 1
+    return ReplaySummary(
+        decisions=decisions,
+        go=go,
+        trades=len(closed),
+        wins=sum(1 for t in closed if t.outcome_pts > 0),
+        losses=sum(1 for t in closed if t.outcome_pts < 0),
+        points=equity,
+        max_drawdown=max_dd,
+        points_by_setup=by_setup,
+        trades_by_setup=count_by_setup,
+    )
+
+
+class ReplaySink(Protocol):
+    """Destination des résultats (ex. ReplayResultsDB) ; None = résumé seul (sweeps)."""
+
+    def add_decision(self, decision: ReplayDecision) -> None:
+        ...
+
+    def add_trade(self, trade: SimulatedTrade) -> None:
+        ...
+
+
+def _env_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+@contextmanager
+def replay_environment(overrides: Optional[Mapping[str, Any]] = None) -> Iterator[str]:
+    """
+    Isole le replay de la production : DATABASE_PATH pointé vers une base de travail temporaire
+    (lectures get_recent_signals, impulsions enregistrées ; distincte de la base de résultats pour ne
+    pas se bloquer sur ses écritures groupées), news lues dans le calendrier local (NEWS_PROVIDER=mock :
+    pas d'appel HTTP par barre, et une API live ne connaît pas le passé), settings rechargés à
+    l'entrée et à la sortie. overrides : paramètres Settings du run (nom de champ ou alias → valeur),
+    appliqués par leur variable d'environnement. Renvoie le chemin de la base de travail.
+    """
+    env = {settings_env_key(name): _env_value(value) for name, value in (overrides or {}).items()}
+    saved = {key: os.environ.get(key) for key in ("DATABASE_PATH", "NEWS_PROVIDER", *env)}
+    with tempfile.TemporaryDirectory(prefix="replay_") as workdir:
+        database_path = os.path.join(workdir, "replay_state.db")
+        os.environ.update(env)
+        os.environ["DATABASE_PATH"] = database_path
+        os.environ["NEWS_PROVIDER"] = "mock"
+        get_settings.cache_clear()
+        try:
+            init_db()
+            yield database_path
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            get_settings.cache_clear()
+
+
+def replay_bounds(
+    provider: ReplayProvider,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    warmup_days: int = DEFAULT_WARMUP_DAYS,
+) -> Tuple[int, int]:
+    """Index [start, stop[ du replay ; start par défaut : première barre + warmup_days."""
+    if start is None and len(provider):
+        start = datetime.fromtimestamp(int(provider.time[0]), tz=timezone.utc) + timedelta(days=warmup_days)
+    start_idx = provider.index_at(start) if start else 0
+    stop_idx = provider.index_at(end) if end else len(provider)
+    return start_idx, stop_idx
+
+
+def _new_state(day_paris: str) -> StateRow:
+    return StateRow(
+        day_paris=day_paris,
+        daily_loss_amount=0.0,
+        daily_budget_amount=get_settings().daily_budget_amount,
+        last_signal_key=None,
+        last_ts=None,
+        consecutive_losses=0,
+        last_setup_direction=None,
+        last_setup_entry=None,
+        last_setup_bar_ts=None,
+        setup_confirm_count=0,
+    )
+
+
+class ReplayRunner:
+    """
+    Boucle de replay : un cycle par barre de base. L'état journalier (StateRow) et le trade actif
+    sont tenus en mémoire, à la manière de la table state et de l'active trade de /analyze.
+    L'horloge simulée suit le curseur du provider (heure de session de build_decision_packet).
+    """
+
+    def __init__(self, provider: ReplayProvider, symbol: Optional[str] = None, sink: Optional[ReplaySink] = None) -> None:
+        self.provider = provider
+        self.symbol = symbol or provider.symbol
+        self.sink = sink
+        self.clock = SimulatedClock(datetime.fromtimestamp(0, tz=timezone.utc))  # réglée à chaque barre par run()
+        self.trades: List[SimulatedTrade] = []
+        self.decisions = 0
+        self.go = 0
+        self._states: Dict[str, StateRow] = {}
+        self._active: Optional[SimulatedTrade] = None
+        self._last_closed_ts: Optional[str] = None
+        self._last_go: Optional[Dict[str, Any]] = None
+
+    def _state(self, day_paris: str) -> StateRow:
+        state = self._states.get(day_paris)
+        if state is None:
+            state = self._states[day_paris] = _new_state(day_paris)
+        return state
+
+    # --- suivi simulé ---
+
+    def _follow(self, snapshot: MarketSnapshot, bar: Dict[str, float], now_utc: datetime) -> None:
+        """Trade actif sur la barre qui vient de clôturer : défavorable, favorable, close."""
+        settings = get_settings()
+        trade = self._active
+        trade.bars += 1
+        spread_price = float(bar.get("spread", 0) or 0) * self.provider.specs.get("tick_size", 0.01)
+        if trade.direction == "BUY":
+            # BID pour clôturer un BUY
+            path = (bar["low"], bar["high"], bar["close"])
+        else:
+            # ASK pour clôturer un SELL
+            path = (bar["high"] + spread_price, bar["low"] + spread_price, bar["close"] + spread_price)
+        be_enabled = getattr(settings, "be_enabled", False)
+        be_offset = getattr(settings, "be_offset_pts", 0.0)
+        for price in path:
+            suivi = evaluate_suivi(
+                price,
+                trade.direction,
+                trade.entry,
+                trade.sl,
+                trade.tp1,
+                trade.tp2,
+                "RANGE",
+                snapshot.frame_m15,
+                news_state={},
+                sr_buffer_points=settings.sr_buffer_points,
+                be_enabled=be_enabled,
+                be_applied=trade.be_applied,
+                be_offset_pts=be_offset,
+            )
+            if suivi.status == "TP1_BE" and be_enabled:
+                trade.be_applied = True
+                trade.sl = trade.entry + be_offset if trade.direction == "BUY" else trade.entry - be_offset
+                continue
+            if suivi.closed:
+                self._close(trade, suivi.outcome_pips or 0.0, now_utc)
+                return
+
+    def _close(self, trade: SimulatedTrade, outcome_pts: float, now_utc: datetime) -> None:
+        trade.outcome_pts = round(float(outcome_pts), 2)
+        trade.closed_ts_utc = now_utc.isoformat()
+        if trade.be_applied:
+            trade.exit_status = "TP2" if trade.outcome_pts > abs(trade.tp1 - trade.entry) else "BE"
+        elif trade.outcome_pts > 0:
+            trade.exit_status = "TP1"
+        else:
+            trade.exit_status = "SL"
+        self._last_closed_ts = trade.closed_ts_utc
+        self._active = None
+        if self.sink is not None:
+            self.sink.add_trade(trade)
+
+    # --- décision ---
+
+    def _decide(self, snapshot: MarketSnapshot, now_utc: datetime, day_paris: str) -> ReplayDecision:
+        """Décision de /analyze (decide_cycle) puis garde-fous d'un GO envoyé (go_send_allowed)."""
+        settings = get_settings()
+        packet = build_decision_packet(self.provider, self.symbol, snapshot=snapshot, clock=self.clock)
+        data_off = packet.data_latency_ms > settings.data_max_age_sec * 1000
+        state = self._state(day_paris)
+        signal_key = sha1(f"{self.symbol}:{packet.timestamps['ts_utc']}".encode("utf-8")).hexdigest()
+
+        setup_confirm_count, new_setup_bar = setup_confirmation(packet, state, data_off)
+        if new_setup_bar:
+            state = self._states[day_paris] = replace(
+                state,
+                last_setup_direction=packet.state.get("setup_direction") or "BUY",
+                last_setup_entry=packet.proposed_entry,
+                last_setup_bar_ts=packet.state.get("setup_bar_ts"),
+                setup_confirm_count=setup_confirm_count,
+            )
+
+        cycle = decide_cycle(
+            packet,
+            state,
+            signal_key,
+            now_utc,
+            setup_confirm_count,
+            snapshot.frame_m15,
+            snapshot.frame_h1,
+            snapshot.bid,
+            data_off=data_off,
+            data_off_reason="Data trop ancienne",
+        )
+        taken = cycle.status == DecisionStatus.go and go_send_allowed(
+            packet,
+            cycle.score_total,
+            replace(state, last_trade_closed_ts=self._last_closed_ts),
+            cycle.market_phase,
+            now_utc,
+            last_go=self._last_go,
+        )
+        if taken:
+            self._states[day_paris] = replace(self._states[day_paris], last_signal_key=signal_key, last_ts=now_utc.isoformat())
+            self._last_go = {
+                "ts_utc": now_utc.isoformat(),
+                "entry": packet.proposed_entry,
+                "sl": packet.sl,
+                "tp1": packet.tp1,
+                "tp2": packet.tp2,
+            }
+        return ReplayDecision(
+            ts_utc=packet.timestamps["ts_utc"],
+            status=cycle.status.value,
+            blocked_by=cycle.blocked_by.value if cycle.blocked_by else None,
+            direction=(packet.state.get("setup_direction") or "BUY").upper(),
+            setup_type=packet.state.get("setup_type"),
+            entry=float(packet.proposed_entry or 0),
+            sl=float(packet.sl or 0),
+            tp1=float(packet.tp1 or 0),
+            tp2=float(packet.tp2 or 0),
+            score_total=cycle.score_total,
+            why=cycle.why,
+            taken=taken,
+        )
+
+    # --- boucle ---
+
+    def run(self, start: int = 0, stop: Optional[int] = None) -> ReplaySummary:
+        for i in self.provider.steps(start, stop):
+            now_utc = self.provider.get_server_time()
+            self.clock.set(now_utc)
+            day_paris = now_utc.astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+            try:
+                snapshot = fetch_market_snapshot(self.provider, self.symbol)
+            except Exception as e:  # noqa: BLE001
+                log.warning("Replay snapshot %s: %s", now_utc.isoformat(), e)
+                continue
+            if self._active is not None and i > 0:
+                self._follow(snapshot, self.provider.bar(i - 1), now_utc)
+            if self._active is not None:
+                # Un seul trade actif : GO/NO_GO suspendus jusqu'à la clôture, comme en production
+                continue
+            decision = self._decide(snapshot, now_utc, day_paris)
+            self.decisions += 1
+            if decision.status == DecisionStatus.go.value:
+                self.go += 1
+            if self.sink is not None:
+                self.sink.add_decision(decision)
+            if decision.taken:
+                trade = SimulatedTrade(
+                    direction=decision.direction,
+                    setup_type=decision.setup_type,
+                    entry=decision.entry,
+                    sl=decision.sl,
+                    tp1=decision.tp1,
+                    tp2=decision.tp2,
+                    opened_ts_utc=decision.ts_utc,
+                    initial_sl=decision.sl,
+                )
+                self.trades.append(trade)
+                self._active = trade
+        return summarize_trades(self.trades, self.decisions, self.go)
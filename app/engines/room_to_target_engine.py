@@ -6,7 +6,9 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Union
+
+from app.engines.structure_engine import SRLevelIndex
 
 log = logging.getLogger(__name__)
 
@@ -25,7 +27,7 @@ def evaluate_room_to_target(
     direction: str,
     entry_price: float,
     tp1_price: float,
-    sr_levels: List[float],
+    sr_levels: Union[SRLevelIndex, List[float]],
     atr_pts: float,
     mult: float = 1.3,
     buffer_pts: float = 2.0,
@@ -35,6 +37,7 @@ def evaluate_room_to_target(
     BUY: next_resistance = plus proche SR au-dessus de entry
     SELL: next_support = plus proche SR en-dessous de entry
     Condition: room_pts >= tp1_distance_pts * mult
+    sr_levels : StructureResult.sr_index (bisection) ou simple liste de niveaux.
     """
     dir_upper = (direction or "BUY").upper()
     tp1_pts = abs(tp1_price - entry_price)
@@ -48,10 +51,10 @@ def evaluate_room_to_target(
             reason="TP1 distance nulle",
         )
 
+    index = sr_levels if isinstance(sr_levels, SRLevelIndex) else SRLevelIndex.from_levels(sr_levels)
     next_level: Optional[float] = None
     if dir_upper == "BUY":
-        above = [l for l in sr_levels if l > entry_price + buffer_pts]
-        next_level = min(above) if above else None
+        next_level = index.next_above(entry_price + buffer_pts)
         if next_level is None:
             return RoomToTargetResult(
                 ok=True,
@@ -63,8 +66,7 @@ def evaluate_room_to_target(
             )
         room_pts = next_level - entry_price - buffer_pts
     else:
-        below = [l for l in sr_levels if l < entry_price - buffer_pts]
-        next_level = max(below) if below else None
+        next_level = index.next_below(entry_price - buffer_pts)
         if next_level is None:
             return RoomToTargetResult(
                 ok=True,
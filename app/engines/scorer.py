@@ -2,214 +2,328 @@
 Scoring en 3 blocs : Edge structurel (40), Qualité entrée (30), Risk & Execution (30).
 Deux modes : Trend (H1 BULLISH/BEARISH) et Range Strategy (H1 RANGE).
 Règle critique : si Edge < 28 → score_total plafonné à 85.
+
+Le score est calculé sous forme de ScoreTrace (règles touchées par bloc, points, paramètres) ;
+les lignes Telegram ne sont rendues qu'à la lecture de ScoreTrace.reasons. Le dernier trace d'un
+DecisionPacket est mémoïsé : re-scorer avec un autre room_to_target_ok / extension_distance_pts /
+market_phase ne réévalue que les règles concernées (pas de Fibo, pas de relecture des blocs).
 """
 from __future__ import annotations
 
 import logging
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from app.config import get_settings
-from app.models import DecisionPacket
+from app.models import Bias, DecisionPacket
 from app.engines.fibo_engine import evaluate_fibo
 
 log = logging.getLogger(__name__)
 
+# Libellés des règles (rendus seulement à l'envoi) ; {pts} et les autres champs viennent de RuleHit.params
+RULE_LABELS: Dict[str, str] = {
+    "EDGE_PHASE_ALIGNED": "• Market Phase alignée (+10)",
+    "EDGE_PHASE_NOT_ALIGNED": "• Market Phase non alignée (0 pt)",
+    "EDGE_PHASE_CONSOLIDATION": "• Market Phase CONSOLIDATION (0 pt)",
+    "EDGE_PHASE_UNKNOWN": "• Market Phase non évaluée (+5)",
+    "EDGE_H1_CLEAR": "• Structure H1 claire (+10)",
+    "EDGE_H1_RANGE": "• Structure H1 RANGE (0 pt)",
+    "EDGE_H1_AGAINST": "• Structure H1 contre tendance (0 pt)",
+    "EDGE_RANGE_MODE": "• Mode RANGE (H1 range)",
+    "EDGE_RANGE_REJET": "• Rejet borne extrême (+10)",
+    "EDGE_RANGE_NO_REJET": "• Rejet borne extrême (0 pt)",
+    "EDGE_RANGE_SWEEP": "• Sweep high/low (+8)",
+    "EDGE_RANGE_NO_SWEEP": "• Sweep high/low (0 pt)",
+    "EDGE_RANGE_BREAK": "• Break structure interne (+8)",
+    "EDGE_RANGE_NO_BREAK": "• Break structure interne (0 pt)",
+    "EDGE_RANGE_VOLUME": "• Volume spike (+6)",
+    "EDGE_RANGE_NO_VOLUME": "• Volume spike (0 pt)",
+    "EDGE_BREAKOUT": "• Breakout validé (+{pts})",
+    "EDGE_NO_BREAKOUT": "• Breakout non validé (0 pt)",
+    "EDGE_ROOM_OK": "• Room to target valide (+{pts})",
+    "EDGE_ROOM_KO": "• Room to target insuffisant (0 pt)",
+    "EDGE_MOMENTUM": "• Momentum M15 confirmé (+4)",
+    "EDGE_MOMENTUM_NEUTRAL": "• Momentum M15 neutre (0 pt)",
+    "EDGE_MOMENTUM_AGAINST": "• Momentum M15 non aligné (0 pt)",
+    "EDGE_FIBO": "• Fibo confluence ✓ (+{pts})",
+    "EDGE_FIBO_OUT": "• Fibo hors zone 38-62% (0 pt)",
+    "EDGE_FIBO_OFF": "• Fibo non évalué (0 pt)",
+    "ENTRY_PULLBACK_OK": "• Pullback ratio propre (+10)",
+    "ENTRY_PULLBACK_OUT": "• Pullback hors zone {min_r:.0%}-{max_r:.0%} (0 pt)",
+    "ENTRY_PULLBACK_NA": "• Pullback non évalué (0 pt)",
+    "ENTRY_M5_OK": "• Rejet M5 clair (+8)",
+    "ENTRY_M5_KO": "• Rejet M5 non confirmé (0 pt)",
+    "ENTRY_TIMING_READY": "• timing_ready (+6)",
+    "ENTRY_TIMING_NOT_READY": "• timing non prêt (0 pt)",
+    "ENTRY_EXTENSION_EXCESSIVE": "• Extension excessive (0 pt)",
+    "ENTRY_NO_EXTENSION": "• Pas d'extension excessive (+6)",
+    "ENTRY_EXTENSION_NEAR": "• Extension proche seuil (0 pt)",
+    "RISK_RR_OK": "• RR TP1 >= {threshold:.2f} (+10)",
+    "RISK_RR_KO": "• RR TP1 insuffisant (0 pt)",
+    "RISK_SPREAD_OK": "• Spread OK (<= {spread_max:.0f}) (+6)",
+    "RISK_SPREAD_KO": "• Spread trop élevé (0 pt)",
+    "RISK_ATR_OK": "• ATR OK (<= {atr_max:.1f}) (+6)",
+    "RISK_ATR_KO": "• Volatilité trop élevée (0 pt)",
+    "RISK_SL_OK": "• SL cohérent (+8)",
+    "RISK_SL_TOO_WIDE": "• SL > SL_MAX (0 pt)",
+    "RISK_SL_OUT": "• SL hors fourchette (0 pt)",
+}
+
+
+@dataclass(frozen=True)
+class ScoreInput:
+    """Champs lus par score_packet : compare BUY et SELL sans construire deux DecisionPacket."""
+    state: Dict[str, Any]
+    bias_h1: Bias
+    setups_detected: List[str]
+    proposed_entry: float
+    sl: float
+    rr_tp1: float
+    atr: float
+    atr_max: float
+    spread: float
+    spread_max: float
+
+
+@dataclass(frozen=True)
+class RuleHit:
+    """Règle évaluée : identifiant stable, points obtenus, paramètres du libellé."""
+    rule_id: str
+    points: int = 0
+    params: Tuple[Tuple[str, Any], ...] = ()
+
+    @property
+    def label(self) -> str:
+        return RULE_LABELS[self.rule_id].format(pts=self.points, **dict(self.params))
+
+
+def _rule(rule_id: str, points: int = 0, **params: Any) -> RuleHit:
+    return RuleHit(rule_id, points, tuple(params.items()))
+
+
+_EXTENSION_RULES = frozenset({"ENTRY_EXTENSION_EXCESSIVE", "ENTRY_NO_EXTENSION", "ENTRY_EXTENSION_NEAR"})
+
+
+def _bullet_icon(line: str) -> str:
+    # Emoji pour lignes : ✅ = points obtenus, 🔴 = manquant (0 pt ou négatif)
+    if "(+" in line or "✓" in line:
+        return f"✅ {line}"
+    return f"🔴 {line}"
+
+
+@dataclass(frozen=True)
+class ScoreTrace:
+    """
+    Résultat structuré du scoring : règles par bloc et totaux plafonnés.
+    Le contexte (direction, bias, atr, timing_ready) permet rescore() sans relire le packet.
+    """
+    edge: Tuple[RuleHit, ...]
+    entry: Tuple[RuleHit, ...]
+    risk: Tuple[RuleHit, ...]
+    direction: str
+    bias: str
+    atr: float
+    timing_ready: bool
+    market_phase: Optional[str] = None
+    room_to_target_ok: bool = True
+    extension_distance_pts: Optional[float] = None
+    edge_pts: int = field(init=False)
+    entry_pts: int = field(init=False)
+    risk_pts: int = field(init=False)
+    total: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        edge_pts = sum(r.points for r in self.edge)
+        if self.bias != "RANGE" and self.market_phase == "CONSOLIDATION":
+            edge_pts = min(edge_pts, 25)
+        edge_pts = min(edge_pts, 40)
+        entry_pts = min(sum(r.points for r in self.entry), 30)
+        risk_pts = max(0, min(sum(r.points for r in self.risk), 30))
+        total = edge_pts + entry_pts + risk_pts
+        # Règle critique : si Edge < 28 → plafonner total à 85
+        if edge_pts < 28:
+            total = min(total, 85)
+        object.__setattr__(self, "edge_pts", edge_pts)
+        object.__setattr__(self, "entry_pts", entry_pts)
+        object.__setattr__(self, "risk_pts", risk_pts)
+        object.__setattr__(self, "total", max(0, min(100, total)))
+
+    @property
+    def rule_ids(self) -> List[str]:
+        return [r.rule_id for r in (*self.edge, *self.entry, *self.risk)]
+
+    @cached_property
+    def reasons(self) -> List[str]:
+        """Lignes Telegram (titres de bloc + règles avec ✅/🔴), rendues une seule fois."""
+        # Titres: emoji collé au texte (1 espace), règle remplacée par structure
+        return [
+            f"🏗️ EDGE STRUCTUREL : {self.edge_pts}/40",
+            *[_bullet_icon(r.label) for r in self.edge],
+            f"🎯 QUALITÉ ENTRÉE : {self.entry_pts}/30",
+            *[_bullet_icon(r.label) for r in self.entry],
+            f"⚠️ RISK & EXECUTION : {self.risk_pts}/30",
+            *[_bullet_icon(r.label) for r in self.risk],
+            f"📊 Score total : {self.total}/100",
+        ]
+
+    def rescore(
+        self,
+        *,
+        market_phase: Optional[str] = None,
+        room_to_target_ok: bool = True,
+        extension_distance_pts: Optional[float] = None,
+    ) -> "ScoreTrace":
+        """Même packet, autre contexte : seules les règles Phase / Room / Extension sont réévaluées."""
+        if (market_phase, room_to_target_ok, extension_distance_pts) == (
+            self.market_phase, self.room_to_target_ok, self.extension_distance_pts
+        ):
+            return self
+        edge = list(self.edge)
+        for i, hit in enumerate(edge):
+            if hit.rule_id.startswith("EDGE_PHASE_"):
+                edge[i] = _phase_rule(market_phase, self.direction, self.bias)
+            elif hit.rule_id.startswith("EDGE_ROOM_"):
+                edge[i] = _room_rule(room_to_target_ok, self.bias == "RANGE")
+        entry = [
+            _extension_rule(extension_distance_pts, self.atr, self.timing_ready)
+            if hit.rule_id in _EXTENSION_RULES else hit
+            for hit in self.entry
+        ]
+        return replace(
+            self,
+            edge=tuple(edge),
+            entry=tuple(entry),
+            market_phase=market_phase,
+            room_to_target_ok=room_to_target_ok,
+            extension_distance_pts=extension_distance_pts,
+        )
+
+
+def _phase_rule(market_phase: Optional[str], direction: str, bias: str) -> RuleHit:
+    if market_phase in ("IMPULSE", "PULLBACK"):
+        phase_aligned = (direction == "BUY" and bias == "UP") or (direction == "SELL" and bias == "DOWN")
+        return _rule("EDGE_PHASE_ALIGNED", 10) if phase_aligned else _rule("EDGE_PHASE_NOT_ALIGNED")
+    if market_phase == "CONSOLIDATION":
+        return _rule("EDGE_PHASE_CONSOLIDATION")
+    return _rule("EDGE_PHASE_UNKNOWN", 5)
+
+
+def _room_rule(room_to_target_ok: bool, range_mode: bool) -> RuleHit:
+    if room_to_target_ok:
+        return _rule("EDGE_ROOM_OK", 4 if range_mode else 6)
+    return _rule("EDGE_ROOM_KO")
+
+
+def _extension_rule(extension_distance_pts: Optional[float], atr: float, timing_ready: bool) -> RuleHit:
+    """+6 Pas d'extension excessive (distance < ATR * 0.8). Si extension > 1.0 ATR : 0 pt sans annuler le bloc."""
+    extension_threshold = atr * 1.0
+    extension_excessive = (
+        extension_distance_pts is not None
+        and atr > 0
+        and extension_distance_pts > extension_threshold
+        and not timing_ready
+    )
+    if extension_excessive:
+        log.info(
+            "Extension excessive (0 pt sur distance): distance_pts=%.2f atr_pts=%.2f seuil=%.2f timing_ready=%s",
+            extension_distance_pts or 0, atr, extension_threshold, timing_ready,
+        )
+        return _rule("ENTRY_EXTENSION_EXCESSIVE")
+    if extension_distance_pts is None or (atr > 0 and extension_distance_pts < atr * 0.8):
+        return _rule("ENTRY_NO_EXTENSION", 6)
+    return _rule("ENTRY_EXTENSION_NEAR")
+
+
+def _has_breakout(packet: Union[DecisionPacket, ScoreInput], state: dict) -> bool:
+    setup_type = state.get("setup_type", "")
+    return bool(setup_type in ("BREAKOUT_RETEST", "PULLBACK_SR") and (packet.setups_detected or []))
+
 
 def _edge_trend(
-    packet: DecisionPacket,
+    packet: Union[DecisionPacket, ScoreInput],
     state: dict,
     direction: str,
     bias: str,
     market_phase: Optional[str],
     room_to_target_ok: bool,
     settings,
-) -> Tuple[int, List[str]]:
+) -> List[RuleHit]:
     """Mode Trend : Market Phase, Structure H1, Breakout, Room, Momentum, Fibo."""
-    edge_pts = 0
-    edge_reasons: List[str] = []
-
-    if market_phase in ("IMPULSE", "PULLBACK"):
-        phase_aligned = (direction == "BUY" and bias == "UP") or (direction == "SELL" and bias == "DOWN")
-        if phase_aligned:
-            edge_pts += 10
-            edge_reasons.append("• Market Phase alignée (+10)")
-        else:
-            edge_reasons.append("• Market Phase non alignée (0 pt)")
-    elif market_phase == "CONSOLIDATION":
-        edge_reasons.append("• Market Phase CONSOLIDATION (0 pt)")
-    else:
-        edge_pts += 5
-        edge_reasons.append("• Market Phase non évaluée (+5)")
+    rules = [_phase_rule(market_phase, direction, bias)]
 
     h1_clear = bias in ("UP", "DOWN") and (
         (direction == "BUY" and bias == "UP") or (direction == "SELL" and bias == "DOWN")
     )
     if h1_clear:
-        edge_pts += 10
-        edge_reasons.append("• Structure H1 claire (+10)")
-    else:
-        if bias == "RANGE":
-            edge_reasons.append("• Structure H1 RANGE (0 pt)")
-        else:
-            edge_reasons.append("• Structure H1 contre tendance (0 pt)")
-
-    setup_type = state.get("setup_type", "")
-    has_breakout = setup_type in ("BREAKOUT_RETEST", "PULLBACK_SR") and (packet.setups_detected or [])
-    if has_breakout:
-        edge_pts += 8
-        edge_reasons.append("• Breakout validé (+8)")
+        rules.append(_rule("EDGE_H1_CLEAR", 10))
+    elif bias == "RANGE":
+        rules.append(_rule("EDGE_H1_RANGE"))
     else:
-        edge_reasons.append("• Breakout non validé (0 pt)")
+        rules.append(_rule("EDGE_H1_AGAINST"))
 
-    if room_to_target_ok:
-        edge_pts += 6
-        edge_reasons.append("• Room to target valide (+6)")
-    else:
-        edge_reasons.append("• Room to target insuffisant (0 pt)")
+    rules.append(_rule("EDGE_BREAKOUT", 8) if _has_breakout(packet, state) else _rule("EDGE_NO_BREAKOUT"))
+    rules.append(_room_rule(room_to_target_ok, range_mode=False))
 
     recent_trend = state.get("recent_m15_trend", "neutral")
     mom_aligned = (direction == "BUY" and recent_trend == "up") or (direction == "SELL" and recent_trend == "down")
     if mom_aligned:
-        edge_pts += 4
-        edge_reasons.append("• Momentum M15 confirmé (+4)")
+        rules.append(_rule("EDGE_MOMENTUM", 4))
+    elif recent_trend == "neutral":
+        rules.append(_rule("EDGE_MOMENTUM_NEUTRAL"))
     else:
-        if recent_trend == "neutral":
-            edge_reasons.append("• Momentum M15 neutre (0 pt)")
-        else:
-            edge_reasons.append("• Momentum M15 non aligné (0 pt)")
-
-    fibo_pts = 0
-    fibo_enabled = getattr(settings, "fibo_enabled", False)
-    if fibo_enabled:
-        entry_price = packet.proposed_entry or 0
-        swing_low = state.get("last_swing_low")
-        swing_high = state.get("last_swing_high")
+        rules.append(_rule("EDGE_MOMENTUM_AGAINST"))
+
+    if getattr(settings, "fibo_enabled", False):
         fibo_signal, _ = evaluate_fibo(
-            entry_price,
+            packet.proposed_entry or 0,
             direction,
-            swing_low,
-            swing_high,
+            state.get("last_swing_low"),
+            state.get("last_swing_high"),
             packet.atr or 20.0,
             zone_min=getattr(settings, "fibo_zone_min", 0.382),
             zone_max=getattr(settings, "fibo_zone_max", 0.618),
             tolerance_atr=getattr(settings, "fibo_tolerance_atr", 0.15),
         )
         if fibo_signal:
-            fibo_pts = min(getattr(settings, "fibo_bonus_points", 3), 3)
-            edge_pts += fibo_pts
-            edge_reasons.append(f"• Fibo confluence ✓ (+{fibo_pts})")
+            rules.append(_rule("EDGE_FIBO", min(getattr(settings, "fibo_bonus_points", 3), 3)))
         else:
-            edge_reasons.append("• Fibo hors zone 38-62% (0 pt)")
+            rules.append(_rule("EDGE_FIBO_OUT"))
     else:
-        edge_reasons.append("• Fibo non évalué (0 pt)")
-
-    if market_phase == "CONSOLIDATION":
-        edge_pts = min(edge_pts, 25)
-    edge_pts = min(edge_pts, 40)
-    return edge_pts, edge_reasons
+        rules.append(_rule("EDGE_FIBO_OFF"))
+    # Plafonds (CONSOLIDATION 25, bloc 40) appliqués par ScoreTrace
+    return rules
 
 
 def _edge_range(
-    packet: DecisionPacket,
+    packet: Union[DecisionPacket, ScoreInput],
     state: dict,
     room_to_target_ok: bool,
-    settings,
-) -> Tuple[int, List[str]]:
+) -> List[RuleHit]:
     """Mode Range Strategy (H1 == RANGE) : pas Market Phase ni Momentum obligatoires.
     Critères : Rejet borne extrême +10, Sweep high/low +8, Break structure interne +8,
     Volume spike +6, Breakout +4, Room +4. Total max 40."""
-    edge_pts = 0
-    edge_reasons: List[str] = []
-    edge_reasons.append("• Mode RANGE (H1 range)")
-
-    if state.get("range_rejet_borne"):
-        edge_pts += 10
-        edge_reasons.append("• Rejet borne extrême (+10)")
-    else:
-        edge_reasons.append("• Rejet borne extrême (0 pt)")
-
-    if state.get("range_sweep"):
-        edge_pts += 8
-        edge_reasons.append("• Sweep high/low (+8)")
-    else:
-        edge_reasons.append("• Sweep high/low (0 pt)")
-
-    if state.get("range_break_structure"):
-        edge_pts += 8
-        edge_reasons.append("• Break structure interne (+8)")
-    else:
-        edge_reasons.append("• Break structure interne (0 pt)")
-
-    if state.get("range_volume_spike"):
-        edge_pts += 6
-        edge_reasons.append("• Volume spike (+6)")
-    else:
-        edge_reasons.append("• Volume spike (0 pt)")
-
-    setup_type = state.get("setup_type", "")
-    has_breakout = setup_type in ("BREAKOUT_RETEST", "PULLBACK_SR") and (packet.setups_detected or [])
-    if has_breakout:
-        edge_pts += 4
-        edge_reasons.append("• Breakout validé (+4)")
-    else:
-        edge_reasons.append("• Breakout non validé (0 pt)")
-
-    if room_to_target_ok:
-        edge_pts += 4
-        edge_reasons.append("• Room to target valide (+4)")
-    else:
-        edge_reasons.append("• Room to target insuffisant (0 pt)")
-
-    edge_pts = min(edge_pts, 40)
-    return edge_pts, edge_reasons
-
-
-def score_packet(
-    packet: DecisionPacket,
-    *,
-    market_phase: Optional[str] = None,
-    room_to_target_ok: bool = True,
-    extension_distance_pts: Optional[float] = None,
-    _debug_current_price: Optional[float] = None,
-    _debug_reference_level: Optional[float] = None,
-) -> Tuple[int, List[str]]:
-    """
-    Score 0-100 en 3 blocs. Mode Trend ou Range selon H1 (bias).
-    Retourne (score_total, reasons) pour affichage Telegram.
-    """
-    settings = get_settings()
-    state = packet.state or {}
-    direction = (state.get("setup_direction") or "BUY").upper()
-    bias = getattr(packet.bias_h1, "value", str(packet.bias_h1)) if packet.bias_h1 else "RANGE"
-    atr = packet.atr or 20.0
-    entry_reasons: List[str] = []
-    risk_reasons: List[str] = []
+    return [
+        _rule("EDGE_RANGE_MODE"),
+        _rule("EDGE_RANGE_REJET", 10) if state.get("range_rejet_borne") else _rule("EDGE_RANGE_NO_REJET"),
+        _rule("EDGE_RANGE_SWEEP", 8) if state.get("range_sweep") else _rule("EDGE_RANGE_NO_SWEEP"),
+        _rule("EDGE_RANGE_BREAK", 8) if state.get("range_break_structure") else _rule("EDGE_RANGE_NO_BREAK"),
+        _rule("EDGE_RANGE_VOLUME", 6) if state.get("range_volume_spike") else _rule("EDGE_RANGE_NO_VOLUME"),
+        _rule("EDGE_BREAKOUT", 4) if _has_breakout(packet, state) else _rule("EDGE_NO_BREAKOUT"),
+        _room_rule(room_to_target_ok, range_mode=True),
+    ]
 
-    # --- BLOC 1 : EDGE STRUCTUREL (max 40) — Mode Trend ou Mode Range ---
-    if bias == "RANGE":
-        edge_pts, edge_reasons = _edge_range(packet, state, room_to_target_ok, settings)
-    else:
-        edge_pts, edge_reasons = _edge_trend(
-            packet, state, direction, bias, market_phase, room_to_target_ok, settings
-        )
-
-    # --- BLOC 2 : QUALITÉ ENTRÉE (max 30) = Pullback ratio (+10) + Rejet M5 (+8) + timing_ready (+6) + distance extension (+6) ---
-    # Extension excessive ne met plus tout le bloc à 0 : seul le critère "distance" prend 0 pt (-6).
-    entry_pts = 0
-    timing_ready = state.get("timing_ready", False)
-    extension_threshold = atr * 1.0
-    extension_excessive = (
-        extension_distance_pts is not None
-        and atr > 0
-        and extension_distance_pts > extension_threshold
-        and not timing_ready
-    )
-    if extension_excessive:
-        log.info(
-            "Extension excessive (0 pt sur distance): distance_pts=%.2f atr_pts=%.2f seuil=%.2f timing_ready=%s",
-            extension_distance_pts or 0, atr, extension_threshold, timing_ready,
-        )
 
+def _entry_rules(
+    packet: Union[DecisionPacket, ScoreInput],
+    state: dict,
+    direction: str,
+    bias: str,
+    atr: float,
+    extension_distance_pts: Optional[float],
+) -> List[RuleHit]:
+    """Pullback ratio (+10) + Rejet M5 (+8) + timing_ready (+6) + distance extension (+6)."""
+    rules: List[RuleHit] = []
     # +10 Pullback ratio propre (zone adaptée au mode : Trend 30-50 %, Range 20-70 %)
     entry_price = packet.proposed_entry or 0
     sl = state.get("last_swing_low")
@@ -219,108 +333,156 @@ def score_packet(
             ratio = (sh - entry_price) / (sh - sl)
         else:
             ratio = (entry_price - sl) / (sh - sl)
-        # En mode RANGE (H1 RANGE) : zone large 20-70 %. En mode Trend : zone stricte 30-50 %.
-        if bias == "RANGE":
-            min_r, max_r = 0.20, 0.70
-        else:
-            min_r, max_r = 0.30, 0.50
+        min_r, max_r = (0.20, 0.70) if bias == "RANGE" else (0.30, 0.50)
         if min_r <= ratio <= max_r:
-            entry_pts += 10
-            entry_reasons.append("• Pullback ratio propre (+10)")
+            rules.append(_rule("ENTRY_PULLBACK_OK", 10))
         else:
-            entry_reasons.append(f"• Pullback hors zone {min_r:.0%}-{max_r:.0%} (0 pt)")
+            rules.append(_rule("ENTRY_PULLBACK_OUT", min_r=min_r, max_r=max_r))
     else:
-        entry_reasons.append("• Pullback non évalué (0 pt)")
+        rules.append(_rule("ENTRY_PULLBACK_NA"))
 
+    timing_ready = bool(state.get("timing_ready", False))
     # +8 Rejet M5 clair
-    timing_m5_ok = bool(state.get("timing_step_m5_ok")) or state.get("timing_ready", False)
-    if timing_m5_ok:
-        entry_pts += 8
-        entry_reasons.append("• Rejet M5 clair (+8)")
+    if bool(state.get("timing_step_m5_ok")) or timing_ready:
+        rules.append(_rule("ENTRY_M5_OK", 8))
     else:
-        entry_reasons.append("• Rejet M5 non confirmé (0 pt)")
-
+        rules.append(_rule("ENTRY_M5_KO"))
     # +6 timing_ready
-    if state.get("timing_ready", False):
-        entry_pts += 6
-        entry_reasons.append("• timing_ready (+6)")
-    else:
-        entry_reasons.append("• timing non prêt (0 pt)")
-
-    # +6 Pas d'extension excessive (distance < ATR * 0.8). Si extension > 1.0 ATR : 0 pt sans annuler le bloc.
-    if extension_excessive:
-        entry_reasons.append("• Extension excessive (0 pt)")
-    elif extension_distance_pts is None or (atr > 0 and extension_distance_pts < atr * 0.8):
-        entry_pts += 6
-        entry_reasons.append("• Pas d'extension excessive (+6)")
-    else:
-        entry_reasons.append("• Extension proche seuil (0 pt)")
-
-    entry_pts = min(entry_pts, 30)
+    rules.append(_rule("ENTRY_TIMING_READY", 6) if timing_ready else _rule("ENTRY_TIMING_NOT_READY"))
+    # Extension excessive ne met plus tout le bloc à 0 : seul le critère "distance" prend 0 pt (-6).
+    rules.append(_extension_rule(extension_distance_pts, atr, timing_ready))
+    return rules
 
-    # --- BLOC 3 : RISK & EXECUTION (max 30) ---
-    risk_pts = 0
 
+def _risk_rules(packet: Union[DecisionPacket, ScoreInput], settings) -> List[RuleHit]:
+    rules: List[RuleHit] = []
     # +10 RR TP1 >= RR_MIN
     rr_threshold = getattr(settings, "rr_hard_min_tp1", 0.25)
     if packet.rr_tp1 >= rr_threshold:
-        risk_pts += 10
-        risk_reasons.append(f"• RR TP1 >= {rr_threshold:.2f} (+10)")
+        rules.append(_rule("RISK_RR_OK", 10, threshold=rr_threshold))
     else:
-        risk_reasons.append("• RR TP1 insuffisant (0 pt)")
-
+        rules.append(_rule("RISK_RR_KO"))
     # +6 Spread <= SPREAD_MAX
     if packet.spread <= packet.spread_max:
-        risk_pts += 6
-        risk_reasons.append(f"• Spread OK (<= {packet.spread_max:.0f}) (+6)")
+        rules.append(_rule("RISK_SPREAD_OK", 6, spread_max=packet.spread_max))
     else:
-        risk_reasons.append("• Spread trop élevé (0 pt)")
-
+        rules.append(_rule("RISK_SPREAD_KO"))
     # +6 ATR <= ATR_MAX
     if packet.atr <= packet.atr_max:
-        risk_pts += 6
-        risk_reasons.append(f"• ATR OK (<= {packet.atr_max:.1f}) (+6)")
+        rules.append(_rule("RISK_ATR_OK", 6, atr_max=packet.atr_max))
     else:
-        risk_reasons.append("• Volatilité trop élevée (0 pt)")
-
+        rules.append(_rule("RISK_ATR_KO"))
     # +8 SL cohérent (entre SL_MIN_PTS et SL_MAX_PTS) — même source que hard_rules (settings.sl_max_pts)
     risk_sl = abs((packet.proposed_entry or 0) - (packet.sl or 0))
     sl_min = getattr(settings, "sl_min_pts", 20.0)
     sl_max = getattr(settings, "sl_max_pts", 25.0)
-    if risk_sl <= sl_max and risk_sl >= sl_min:
-        risk_pts += 8
-        risk_reasons.append("• SL cohérent (+8)")
+    if sl_min <= risk_sl <= sl_max:
+        rules.append(_rule("RISK_SL_OK", 8))
     elif risk_sl > sl_max:
-        risk_reasons.append("• SL > SL_MAX (0 pt)")
+        rules.append(_rule("RISK_SL_TOO_WIDE"))
     else:
-        risk_reasons.append("• SL hors fourchette (0 pt)")
+        rules.append(_rule("RISK_SL_OUT"))
+    return rules
+
+
+# Champs de state lus par le scoring (clé de mémo : les autres clés du state n'invalident pas le trace)
+_STATE_KEYS = (
+    "setup_direction", "setup_type", "recent_m15_trend", "last_swing_low", "last_swing_high",
+    "timing_ready", "timing_step_m5_ok",
+    "range_rejet_borne", "range_sweep", "range_break_structure", "range_volume_spike",
+)
+
+
+def _inputs_key(packet: Union[DecisionPacket, ScoreInput], state: dict) -> Tuple:
+    return (
+        tuple(state.get(k) for k in _STATE_KEYS),
+        packet.bias_h1,
+        bool(packet.setups_detected),
+        packet.proposed_entry,
+        packet.sl,
+        packet.rr_tp1,
+        packet.atr,
+        packet.atr_max,
+        packet.spread,
+        packet.spread_max,
+    )
 
-    risk_pts = max(0, min(risk_pts, 30))
 
-    # --- SCORE TOTAL ---
-    score_total = edge_pts + entry_pts + risk_pts
+def score_trace(
+    packet: Union[DecisionPacket, ScoreInput],
+    *,
+    market_phase: Optional[str] = None,
+    room_to_target_ok: bool = True,
+    extension_distance_pts: Optional[float] = None,
+) -> ScoreTrace:
+    """
+    ScoreTrace du packet. Sur un DecisionPacket, le dernier trace est mémoïsé (mêmes entrées, mêmes
+    settings) : un nouvel appel ne fait que rescore() des règles dépendant du contexte.
+    """
+    settings = get_settings()
+    state = packet.state or {}
+    memo_key = None
+    if isinstance(packet, DecisionPacket):
+        memo_key = (id(settings), _inputs_key(packet, state))
+        memo = packet._score_memo
+        if memo is not None and memo[0] == memo_key:
+            trace = memo[1].rescore(
+                market_phase=market_phase,
+                room_to_target_ok=room_to_target_ok,
+                extension_distance_pts=extension_distance_pts,
+            )
+            packet._score_memo = (memo_key, trace)
+            return trace
 
-    # Règle critique : si Edge < 28 → plafonner total à 85
-    if edge_pts < 28:
-        score_total = min(score_total, 85)
+    direction = (state.get("setup_direction") or "BUY").upper()
+    bias = getattr(packet.bias_h1, "value", str(packet.bias_h1)) if packet.bias_h1 else "RANGE"
+    atr = packet.atr or 20.0
 
-    score_total = max(0, min(100, score_total))
+    # --- BLOC 1 : EDGE STRUCTUREL (max 40) — Mode Trend ou Mode Range ---
+    if bias == "RANGE":
+        edge = _edge_range(packet, state, room_to_target_ok)
+    else:
+        edge = _edge_trend(packet, state, direction, bias, market_phase, room_to_target_ok, settings)
+    # --- BLOC 2 : QUALITÉ ENTRÉE (max 30) ---
+    entry = _entry_rules(packet, state, direction, bias, atr, extension_distance_pts)
+    # --- BLOC 3 : RISK & EXECUTION (max 30) ---
+    risk = _risk_rules(packet, settings)
+
+    trace = ScoreTrace(
+        edge=tuple(edge),
+        entry=tuple(entry),
+        risk=tuple(risk),
+        direction=direction,
+        bias=bias,
+        atr=atr,
+        timing_ready=bool(state.get("timing_ready", False)),
+        market_phase=market_phase,
+        room_to_target_ok=room_to_target_ok,
+        extension_distance_pts=extension_distance_pts,
+    )
+    if memo_key is not None:
+        packet._score_memo = (memo_key, trace)
+    return trace
 
-    # Emoji pour lignes : ✅ = points obtenus, 🔴 = manquant (0 pt ou négatif)
-    def _bullet_icon(line: str) -> str:
-        if "(+" in line or "✓" in line:
-            return f"✅ {line}"
-        return f"🔴 {line}"
-
-    # Titres: emoji collé au texte (1 espace), règle remplacée par structure
-    out_reasons = [
-        f"🏗️ EDGE STRUCTUREL : {edge_pts}/40",
-        *[_bullet_icon(r) for r in edge_reasons],
-        f"🎯 QUALITÉ ENTRÉE : {entry_pts}/30",
-        *[_bullet_icon(r) for r in entry_reasons],
-        f"⚠️ RISK & EXECUTION : {risk_pts}/30",
-        *[_bullet_icon(r) for r in risk_reasons],
-        f"📊 Score total : {score_total}/100",
-    ]
 
-    return score_total, out_reasons
+def score_packet(
+    packet: Union[DecisionPacket, ScoreInput],
+    *,
+    market_phase: Optional[str] = None,
+    room_to_target_ok: bool = True,
+    extension_distance_pts: Optional[float] = None,
+    _debug_current_price: Optional[float] = None,
+    _debug_reference_level: Optional[float] = None,
+) -> Tuple[int, List[str]]:
+    """
+    Score 0-100 en 3 blocs. Mode Trend ou Range selon H1 (bias).
+    Retourne (score_total, reasons) pour affichage Telegram (rend les raisons : préférer
+    score_trace(...).total quand seul le score est utilisé).
+    """
+    trace = score_trace(
+        packet,
+        market_phase=market_phase,
+        room_to_target_ok=room_to_target_ok,
+        extension_distance_pts=extension_distance_pts,
+    )
+    return trace.total, trace.reasons
@@ -5,31 +5,17 @@ Utilise: structure (S/R, swing), timing d'entrée (breakout, pullback), contexte
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.config import get_settings
+from app.engines.candle_frame import CandleFrame, Candles, as_frame
 from app.engines.entry_timing_engine import evaluate_entry_timing
-from app.engines.structure_engine import analyze_structure
+from app.engines.structure_engine import StructureResult, analyze_structure
 
 
-def _compute_atr(candles: list, period: int = 14) -> float:
+def _compute_atr(candles: Candles, period: int = 14) -> float:
     """ATR (Average True Range) sur N périodes."""
-    highs = _extract_series(candles, "high")
-    lows = _extract_series(candles, "low")
-    closes = _extract_series(candles, "close")
-    if len(highs) < period + 1 or len(lows) < period + 1 or len(closes) < period + 1:
-        return (max(highs[-5:]) - min(lows[-5:])) / 5 if len(highs) >= 5 else 20.0
-    tr_list: list = []
-    for i in range(1, min(len(highs), len(lows), len(closes))):
-        tr = max(
-            highs[i] - lows[i],
-            abs(highs[i] - closes[i - 1]),
-            abs(lows[i] - closes[i - 1]),
-        )
-        tr_list.append(tr)
-    if len(tr_list) < period:
-        return tr_list[-1] if tr_list else 20.0
-    return sum(tr_list[-period:]) / period
+    return as_frame(candles).atr(period)
 
 
 @dataclass(frozen=True)
@@ -54,19 +40,6 @@ class SetupResult:
     timing_step_m5_ok: Optional[bool] = None
 
 
-def _extract_series(candles: List[dict], key: str) -> List[float]:
-    out: List[float] = []
-    for c in candles:
-        v = c.get(key)
-        if v is None:
-            continue
-        try:
-            out.append(float(v))
-        except (TypeError, ValueError):
-            continue
-    return out
-
-
 def _parse_bar_ts(candle: dict) -> Optional[str]:
     v = candle.get("ts") or candle.get("time_msc") or candle.get("time")
     if v is None:
@@ -108,12 +81,75 @@ def _infer_direction_from_structure(structure: str, closes: List[float]) -> str:
     return "BUY"
 
 
+def _empty_setup() -> SetupResult:
+    return SetupResult(
+        setups=[],
+        entry=0.0,
+        sl=0.0,
+        tp1=0.0,
+        tp2=0.0,
+        rr_tp1=0.0,
+        rr_tp2=0.0,
+        direction="BUY",
+        bar_ts=None,
+        timing_step_zone_ok=None,
+        timing_step_pullback_ok=None,
+        timing_step_m5_ok=None,
+    )
+
+
+@dataclass(frozen=True)
+class _SetupContext:
+    """Travail indépendant de la direction (ATR, structures M15/H1, swings, dernière barre), calculé une fois."""
+    settings: object
+    frame: CandleFrame
+    candles_m5: Candles
+    atr: float
+    struct_m15: StructureResult
+    struct_h1: StructureResult
+    closes: List[float]
+    close: float
+    bar_ts: Optional[str]
+    swing_low: float
+    swing_high: float
+    buffer: float
+
+
+def _setup_context(
+    candles_m15: Candles,
+    candles_h1: Optional[Candles],
+    candles_m5: Optional[Candles],
+) -> _SetupContext:
+    frame = as_frame(candles_m15)
+    struct_m15 = analyze_structure(frame)
+    closes = frame.close.tolist()
+    highs = frame.high.tolist()
+    lows = frame.low.tolist()
+    close = closes[-1]
+    swing_low = struct_m15.last_swing_low or (min(lows[-5:]) if len(lows) >= 5 else close - 20)
+    swing_high = struct_m15.last_swing_high or (max(highs[-5:]) if len(highs) >= 5 else close + 20)
+    return _SetupContext(
+        settings=get_settings(),
+        frame=frame,
+        candles_m5=candles_m5 or [],
+        atr=_compute_atr(frame),
+        struct_m15=struct_m15,
+        struct_h1=analyze_structure(candles_h1) if candles_h1 else struct_m15,
+        closes=closes,
+        close=close,
+        bar_ts=_parse_bar_ts(frame.candle(-1)),
+        swing_low=swing_low,
+        swing_high=swing_high,
+        buffer=max(2.0, (swing_high - swing_low) * 0.02) if swing_high > swing_low else 5.0,
+    )
+
+
 def detect_setups(
-    candles_m15: List[dict],
-    candles_h1: Optional[List[dict]] = None,
+    candles_m15: Candles,
+    candles_h1: Optional[Candles] = None,
     current_price: Optional[float] = None,
     direction_override: Optional[str] = None,
-    candles_m5: Optional[List[dict]] = None,
+    candles_m5: Optional[Candles] = None,
 ) -> SetupResult:
     """
     Setup détecté M15, confirmation sur M5 (1 barre M5 valide suffit).
@@ -123,36 +159,37 @@ def detect_setups(
     - candles_m5: confirmation M5 (1 rejet = bon moment)
     """
     if not candles_m15:
-        return SetupResult(
-            setups=[],
-            entry=0.0,
-            sl=0.0,
-            tp1=0.0,
-            tp2=0.0,
-            rr_tp1=0.0,
-            rr_tp2=0.0,
-            direction="BUY",
-            bar_ts=None,
-            timing_step_zone_ok=None,
-            timing_step_pullback_ok=None,
-            timing_step_m5_ok=None,
-        )
-    settings = get_settings()
-    atr = _compute_atr(candles_m15)
-    struct_m15 = analyze_structure(candles_m15)
-    struct_h1 = analyze_structure(candles_h1) if candles_h1 else struct_m15
-    closes = _extract_series(candles_m15, "close")
-    highs = _extract_series(candles_m15, "high")
-    lows = _extract_series(candles_m15, "low")
-    last = candles_m15[-1]
-    close = float(last.get("close", 4660.0)) if closes else 4660.0
-    bar_ts = _parse_bar_ts(last)
-    direction = (direction_override or _infer_direction_from_structure(struct_h1.structure, closes)).upper()
+        return _empty_setup()
+    ctx = _setup_context(candles_m15, candles_h1, candles_m5)
+    direction = (direction_override or _infer_direction_from_structure(ctx.struct_h1.structure, ctx.closes)).upper()
     if direction not in ("BUY", "SELL"):
         direction = "BUY"
-    swing_low = struct_m15.last_swing_low or (min(lows[-5:]) if len(lows) >= 5 else close - 20)
-    swing_high = struct_m15.last_swing_high or (max(highs[-5:]) if len(highs) >= 5 else close + 20)
-    buffer = max(2.0, (swing_high - swing_low) * 0.02) if swing_high > swing_low else 5.0
+    return _setup_for_direction(ctx, direction, current_price)
+
+
+def detect_setups_both(
+    candles_m15: Candles,
+    candles_h1: Optional[Candles] = None,
+    current_price: Optional[float] = None,
+    candles_m5: Optional[Candles] = None,
+) -> Tuple[SetupResult, SetupResult]:
+    """
+    (setup BUY, setup SELL) — équivaut à detect_setups(direction_override="BUY"/"SELL"),
+    mais ATR, structures M15/H1 et swings ne sont calculés qu'une fois.
+    """
+    if not candles_m15:
+        empty = _empty_setup()
+        return empty, empty
+    ctx = _setup_context(candles_m15, candles_h1, candles_m5)
+    return _setup_for_direction(ctx, "BUY", current_price), _setup_for_direction(ctx, "SELL", current_price)
+
+
+def _setup_for_direction(ctx: _SetupContext, direction: str, current_price: Optional[float]) -> SetupResult:
+    settings = ctx.settings
+    atr = ctx.atr
+    struct_m15, struct_h1 = ctx.struct_m15, ctx.struct_h1
+    close, bar_ts = ctx.close, ctx.bar_ts
+    swing_low, swing_high, buffer = ctx.swing_low, ctx.swing_high, ctx.buffer
     sl_min = settings.sl_min_pts
     sl_max = settings.sl_max_pts
     tp1_min = settings.tp1_min_pts
@@ -210,14 +247,14 @@ def detect_setups(
     pullback_req = getattr(settings, "pullback_require_for_setups", "BREAKOUT_RETEST,PULLBACK_SR")
     pullback_setups = [s.strip() for s in pullback_req.split(",") if s.strip()] if pullback_req else []
     timing = evaluate_entry_timing(
-        candles_m15,
+        ctx.frame,
         direction,
         entry,
         struct_m15.last_swing_low,
         struct_m15.last_swing_high,
         current_price,
         atr=atr,
-        candles_m5=candles_m5 or [],
+        candles_m5=ctx.candles_m5,
         min_confirm_bars=min_confirm,
         entry_timing_mode=entry_timing_mode,
         pullback_min_ratio=getattr(settings, "pullback_min_ratio", 0.30),
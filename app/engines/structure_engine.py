@@ -4,8 +4,16 @@ Détecte: swing points, S/R, breakout, pullback, structure HH/HL.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.engines.candle_frame import CandleFrame, Candles, as_frame
 
 
 @dataclass(frozen=True)
@@ -15,6 +23,82 @@ class SwingPoint:
     price: float
 
 
+class SRLevelIndex:
+    """
+    Niveaux S/R triés (croissants) + nb de touches (swings dans la tolérance) et dernière touche
+    (indice de barre, time si connu). Requêtes par bisection en O(log n) au lieu de parcourir la liste.
+    """
+
+    __slots__ = ("levels", "touches", "last_touch_idx", "last_touch_time")
+
+    def __init__(
+        self,
+        levels: Sequence[float],
+        touches: Sequence[int],
+        last_touch_idx: Sequence[int],
+        last_touch_time: Sequence[int],
+    ) -> None:
+        self.levels = list(levels)
+        self.touches = list(touches)
+        self.last_touch_idx = list(last_touch_idx)
+        self.last_touch_time = list(last_touch_time)
+
+    @classmethod
+    def from_levels(
+        cls,
+        levels: Sequence[float],
+        swings: Sequence[SwingPoint] = (),
+        times: Optional[Sequence[int]] = None,
+        tolerance_pct: float = 0.003,
+    ) -> "SRLevelIndex":
+        """Index des niveaux ; chaque swing touche le niveau le plus proche s'il est à moins de tolerance_pct."""
+        ordered = sorted(levels)
+        n = len(ordered)
+        touches = [0] * n
+        last_idx = [-1] * n
+        for sw in swings:
+            k = bisect_left(ordered, sw.price)
+            best = None
+            for j in (k - 1, k):
+                if 0 <= j < n and (best is None or abs(ordered[j] - sw.price) < abs(ordered[best] - sw.price)):
+                    best = j
+            if best is None or abs(ordered[best] - sw.price) > abs(ordered[best]) * tolerance_pct:
+                continue
+            touches[best] += 1
+            last_idx[best] = max(last_idx[best], sw.idx)
+        last_time = [
+            int(times[i]) if times is not None and 0 <= i < len(times) else 0 for i in last_idx
+        ]
+        return cls(ordered, touches, last_idx, last_time)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def next_above(self, price: float) -> Optional[float]:
+        """Plus proche niveau strictement au-dessus de price."""
+        k = bisect_right(self.levels, price)
+        return self.levels[k] if k < len(self.levels) else None
+
+    def next_below(self, price: float) -> Optional[float]:
+        """Plus proche niveau strictement en-dessous de price."""
+        k = bisect_left(self.levels, price)
+        return self.levels[k - 1] if k > 0 else None
+
+    def within(self, price: float, tol: float) -> List[float]:
+        """Niveaux dans [price - tol, price + tol] (croissants)."""
+        return self.levels[bisect_left(self.levels, price - tol):bisect_right(self.levels, price + tol)]
+
+    def touch_info(self, level: float) -> Tuple[int, int, int]:
+        """(touches, indice de barre, time) de la dernière touche du niveau ; (0, -1, 0) si inconnu."""
+        k = bisect_left(self.levels, level)
+        if k < len(self.levels) and self.levels[k] == level:
+            return self.touches[k], self.last_touch_idx[k], self.last_touch_time[k]
+        return 0, -1, 0
+
+
+_EMPTY_SR_INDEX = SRLevelIndex((), (), (), ())
+
+
 @dataclass(frozen=True)
 class StructureResult:
     swings: List[SwingPoint]
@@ -24,6 +108,8 @@ class StructureResult:
     last_swing_low: Optional[float]
     breakout_level: Optional[float]
     pullback_to_level: Optional[float]
+    # Index trié des sr_levels, construit une fois avec le résultat (hors égalité / repr)
+    sr_index: SRLevelIndex = field(default=_EMPTY_SR_INDEX, repr=False, compare=False)
 
 
 @dataclass(frozen=True)
@@ -33,38 +119,42 @@ class StrongTrendResult:
     last_trend_pivot_price: Optional[float]  # dernier HL (BUY) ou dernier LH (SELL)
 
 
-def _extract_series(candles: List[dict], key: str) -> List[float]:
-    out: List[float] = []
-    for c in candles:
-        v = c.get(key)
-        if v is None:
-            continue
-        try:
-            out.append(float(v))
-        except (TypeError, ValueError):
-            continue
-    return out
+def swing_masks(highs: np.ndarray, lows: np.ndarray, lookback: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Noyau vectorisé de detect_swings pour les barres lookback..n-lookback-1 :
+    is_high[k] ⇔ highs[k+lookback] est le max (égalités incluses) de sa fenêtre de 2*lookback+1 barres,
+    is_low[k] ⇔ lows[k+lookback] en est le min. Max/min glissants par décalages (pas de boucle Python par barre).
+    """
+    n = len(highs)
+    width = n - 2 * lookback
+    win_max = highs[:width].copy()
+    win_min = lows[:width].copy()
+    for shift in range(1, 2 * lookback + 1):
+        np.maximum(win_max, highs[shift:shift + width], out=win_max)
+        np.minimum(win_min, lows[shift:shift + width], out=win_min)
+    core = slice(lookback, lookback + width)
+    return win_max == highs[core], win_min == lows[core]
 
 
-def detect_swings(candles: List[dict], lookback: int = 2) -> List[SwingPoint]:
+def detect_swings(candles: Candles, lookback: int = 2) -> List[SwingPoint]:
     """
     Détection fractale: un high est un swing high si plus haut que lookback barres
-    à gauche et à droite. Idem pour les lows.
+    à gauche et à droite (égalités acceptées). Idem pour les lows.
     """
-    highs = _extract_series(candles, "high")
-    lows = _extract_series(candles, "low")
+    frame = as_frame(candles)
+    if len(frame) < 2 * lookback + 1:
+        return []
+    is_high, is_low = swing_masks(frame.high, frame.low, lookback)
+    hits = np.flatnonzero(is_high | is_low)
+    idx = hits + lookback
     swings: List[SwingPoint] = []
-    n = len(highs)
-    if n < 2 * lookback + 1:
-        return swings
-    for i in range(lookback, n - lookback):
-        h = highs[i]
-        is_swing_high = all(highs[j] <= h for j in range(i - lookback, i + lookback + 1) if j != i)
-        if is_swing_high:
+    for i, hi, lo, h, l in zip(
+        idx.tolist(), is_high[hits].tolist(), is_low[hits].tolist(),
+        frame.high[idx].tolist(), frame.low[idx].tolist(),
+    ):
+        if hi:
             swings.append(SwingPoint(idx=i, typ="high", price=h))
-        l = lows[i]
-        is_swing_low = all(lows[j] >= l for j in range(i - lookback, i + lookback + 1) if j != i)
-        if is_swing_low:
+        if lo:
             swings.append(SwingPoint(idx=i, typ="low", price=l))
     return swings
 
@@ -119,9 +209,86 @@ def detect_market_structure(swings: List[SwingPoint]) -> str:
     return "RANGE"
 
 
-def analyze_structure(candles: List[dict]) -> StructureResult:
-    """Analyse complète: swings, S/R, structure, breakout/pullback potentiels."""
-    if not candles:
+class StructureCache:
+    """
+    LRU borné de StructureResult par empreinte de série (CandleFrame.fingerprint) :
+    le même M15/H1 analysé par setups BUY/SELL, phase marché, room to target, suivi... ne l'est qu'une fois.
+    Les résultats sont partagés entre appelants : ne pas muter swings/sr_levels.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple, StructureResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[StructureResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Tuple, result: StructureResult) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_structure_cache: Optional[StructureCache] = None
+
+
+def get_structure_cache() -> StructureCache:
+    global _structure_cache
+    if _structure_cache is None:
+        _structure_cache = StructureCache(int(getattr(get_settings(), "structure_cache_size", 64)))
+    return _structure_cache
+
+
+def analyze_structure(candles: Candles) -> StructureResult:
+    """
+    Analyse complète: swings, S/R, structure, breakout/pullback potentiels.
+    Mémoïsée (StructureCache) quand la série est identifiée (CandleFrame du snapshot).
+    """
+    frame = as_frame(candles)
+    key = frame.fingerprint()
+    if key is None:
+        return _analyze_structure(frame)
+    cache = get_structure_cache()
+    result = cache.get(key)
+    if result is None:
+        result = _analyze_structure(frame)
+        cache.put(key, result)
+    return result
+
+
+def _analyze_structure(frame: CandleFrame) -> StructureResult:
+    if not frame:
         return StructureResult(
             swings=[],
             sr_levels=[],
@@ -131,21 +298,23 @@ def analyze_structure(candles: List[dict]) -> StructureResult:
             breakout_level=None,
             pullback_to_level=None,
         )
-    swings = detect_swings(candles, lookback=2)
+    return structure_from_swings(detect_swings(frame, lookback=2), float(frame.close[-1]), frame.time)
+
+
+def structure_from_swings(
+    swings: List[SwingPoint], last_close: float, times: Optional[Sequence[int]] = None
+) -> StructureResult:
+    """StructureResult à partir des swings déjà détectés (batch ou IndicatorState incrémental)."""
     sr_levels = detect_sr_levels(swings)
     structure = detect_market_structure(swings)
     highs = [s for s in swings if s.typ == "high"]
     lows = [s for s in swings if s.typ == "low"]
     last_sh = highs[-1].price if highs else None
     last_sl = lows[-1].price if lows else None
-    closes = _extract_series(candles, "close")
-    last_close = closes[-1] if closes else None
     breakout_level: Optional[float] = None
     pullback_to_level: Optional[float] = None
     zone_tolerance_pct = 0.0015
     for level in sr_levels[-6:]:
-        if last_close is None:
-            break
         dist = abs(last_close - level) / level if level else 0
         if dist <= zone_tolerance_pct:
             pullback_to_level = level
@@ -158,6 +327,7 @@ def analyze_structure(candles: List[dict]) -> StructureResult:
         last_swing_low=last_sl,
         breakout_level=breakout_level,
         pullback_to_level=pullback_to_level,
+        sr_index=SRLevelIndex.from_levels(sr_levels[-10:], swings, times),
     )
 
 
@@ -172,19 +342,20 @@ def _momentum_m15_aligned(closes: List[float], direction: str, n: int = 5) -> bo
     return recent < older
 
 
-def detect_strong_trend_m15(bars_m15: List[dict]) -> StrongTrendResult:
+def detect_strong_trend_m15(bars_m15: Candles) -> StrongTrendResult:
     """
     Détection tendance forte M15 pour EXTENSION_MOVE adaptatif.
     BUY: 2 Higher High consécutifs + 2 Higher Low consécutifs + momentum M15 aligné.
     SELL: 2 Lower Low + 2 Lower High + momentum aligné.
     Retourne last_trend_pivot_price = dernier HL (BUY) ou dernier LH (SELL).
     """
-    if not bars_m15 or len(bars_m15) < 10:
+    frame = as_frame(bars_m15)
+    if len(frame) < 10:
         return StrongTrendResult(trend_direction="NONE", last_trend_pivot_price=None)
-    swings = detect_swings(bars_m15, lookback=2)
+    swings = detect_swings(frame, lookback=2)
     highs = sorted([s for s in swings if s.typ == "high"], key=lambda x: x.idx)
     lows = sorted([s for s in swings if s.typ == "low"], key=lambda x: x.idx)
-    closes = _extract_series(bars_m15, "close")
+    closes = frame.close.tolist()
     if len(highs) < 3 or len(lows) < 3 or len(closes) < 10:
         return StrongTrendResult(trend_direction="NONE", last_trend_pivot_price=None)
     h1, h2, h3 = highs[-3], highs[-2], highs[-1]
@@ -7,13 +7,10 @@ Ordre obligatoire : TP1 d'abord, puis TP2 (TP2 déclaré uniquement si be_applie
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
-from app.engines.entry_timing_engine import (
-    _is_rejection_candle_bearish,
-    _is_rejection_candle_bullish,
-)
-from app.engines.structure_engine import analyze_structure
+from app.engines.candle_frame import Candles, as_frame
+from app.engines.structure_engine import SRLevelIndex, analyze_structure
 
 
 @dataclass(frozen=True)
@@ -96,24 +93,6 @@ def _msg_tp2(entry: float, tp2: float, price_touched: float, direction: str) ->
     )
 
 
-def _is_engulfing_bearish(prev: dict, curr: dict) -> bool:
-    """Engulfing baissier : prev haussier, curr baissier englobe prev."""
-    po, pc = float(prev.get("open", 0)), float(prev.get("close", 0))
-    co, cc = float(curr.get("open", 0)), float(curr.get("close", 0))
-    if po <= pc and co >= cc:  # prev bullish, curr bearish
-        return co >= pc and cc <= po  # curr engulfs prev
-    return False
-
-
-def _is_engulfing_bullish(prev: dict, curr: dict) -> bool:
-    """Engulfing haussier : prev bearish, curr bullish engulfs prev."""
-    po, pc = float(prev.get("open", 0)), float(prev.get("close", 0))
-    co, cc = float(curr.get("open", 0)), float(curr.get("close", 0))
-    if po >= pc and co <= cc:  # prev bearish, curr bullish
-        return co <= pc and cc >= po  # curr engulfs prev
-    return False
-
-
 def _is_news_high_imminent(news_state: Dict[str, Any]) -> bool:
     """News HIGH imminente (fenêtre pré-event)."""
     if not news_state:
@@ -153,61 +132,89 @@ def _check_sr_too_close(
     current_price: float,
     entry: float,
     tp1: float,
-    sr_levels: List[float],
+    sr_levels: Union[SRLevelIndex, List[float]],
     sr_buffer_pts: float,
 ) -> bool:
     """
     BUY : résistance (niveau au-dessus du prix) à moins de sr_buffer_pts.
     SELL : support (niveau en-dessous du prix) à moins de sr_buffer_pts.
     """
-    for level in sr_levels:
-        dist = abs(level - current_price)
-        if dist < sr_buffer_pts:
-            if direction.upper() == "BUY" and level > current_price:
-                return True
-            if direction.upper() == "SELL" and level < current_price:
-                return True
-    return False
+    index = sr_levels if isinstance(sr_levels, SRLevelIndex) else SRLevelIndex.from_levels(sr_levels)
+    if direction.upper() == "BUY":
+        level = index.next_above(current_price)
+    elif direction.upper() == "SELL":
+        level = index.next_below(current_price)
+    else:
+        return False
+    return level is not None and abs(level - current_price) < sr_buffer_pts
 
 
-def _check_pin_bar_against(candles: List[dict], direction: str) -> bool:
+def _check_pin_bar_against(candles: Candles, direction: str) -> bool:
     """Pin bar contre le sens du trade sur les 3 dernières bougies."""
     if not candles or len(candles) < 1:
         return False
-    last_3 = candles[-3:] if len(candles) >= 3 else candles
-    for c in last_3:
-        if direction.upper() == "BUY" and _is_rejection_candle_bearish(c):
-            return True
-        if direction.upper() == "SELL" and _is_rejection_candle_bullish(c):
-            return True
-    return False
+    against = {"BUY": "SELL", "SELL": "BUY"}.get(direction.upper())
+    if against is None:
+        return False
+    return bool(as_frame(candles).patterns.rejection(against)[-3:].any())
 
 
-def _check_engulfing_against(candles: List[dict], direction: str) -> bool:
+def _check_engulfing_against(candles: Candles, direction: str) -> bool:
     """Engulfing contre le sens du trade sur les 2 dernières bougies."""
     if not candles or len(candles) < 2:
         return False
-    prev, curr = candles[-2], candles[-1]
-    if direction.upper() == "BUY" and _is_engulfing_bearish(prev, curr):
-        return True
-    if direction.upper() == "SELL" and _is_engulfing_bullish(prev, curr):
-        return True
-    return False
+    against = {"BUY": "SELL", "SELL": "BUY"}.get(direction.upper())
+    if against is None:
+        return False
+    return bool(as_frame(candles).patterns.engulfing(against)[-1])
 
 
 def _check_stagnation_near_key_zone(
-    candles: List[dict],
+    candles: Candles,
     current_price: float,
-    sr_levels: List[float],
+    sr_levels: Union[SRLevelIndex, List[float]],
     sr_buffer_pts: float,
 ) -> bool:
     """Stagnation près d'une zone clé (prix oscille autour d'un S/R)."""
     if not candles or len(candles) < 3 or not sr_levels:
         return False
-    for level in sr_levels:
-        if abs(level - current_price) <= sr_buffer_pts:
-            return True
-    return False
+    index = sr_levels if isinstance(sr_levels, SRLevelIndex) else SRLevelIndex.from_levels(sr_levels)
+    return bool(index.within(current_price, sr_buffer_pts))
+
+
+def price_with_touches(
+    current_price: float,
+    direction: str,
+    sl: float,
+    tp1: float,
+    tp2: float,
+    tick_range: Optional[Any] = None,
+    be_applied: bool = False,
+) -> float:
+    """
+    Prix à évaluer en tenant compte des extrêmes du flux de ticks depuis le dernier cycle
+    (TickRange : bid_low/bid_high/ask_low/ask_high). BUY = bid, SELL = ask.
+    Même priorité qu'evaluate_suivi : SL, puis TP2 (si BE appliqué), puis TP1.
+    """
+    if tick_range is None:
+        return current_price
+    if direction.upper() == "BUY":
+        low, high = tick_range.bid_low, tick_range.bid_high
+        if low <= sl:
+            return low
+        if be_applied and high >= tp2:
+            return high
+        if not be_applied and high >= tp1:
+            return high
+    else:
+        low, high = tick_range.ask_low, tick_range.ask_high
+        if high >= sl:
+            return high
+        if be_applied and low <= tp2:
+            return low
+        if not be_applied and low <= tp1:
+            return low
+    return current_price
 
 
 def evaluate_suivi(
@@ -218,7 +225,7 @@ def evaluate_suivi(
     tp1: float,
     tp2: float,
     structure_h1: str,
-    candles_m15: List[dict],
+    candles_m15: Candles,
     news_state: Optional[Dict[str, Any]] = None,
     sr_buffer_points: float = 25.0,
     active_started_ts: Optional[str] = None,
@@ -236,10 +243,12 @@ def evaluate_suivi(
       pas de pattern contre, pas de news HIGH imminente)
     """
     news_state = news_state or {}
-    struct_m15 = analyze_structure(candles_m15) if candles_m15 else None
+    # Un seul frame (et un seul calcul de masques de patterns) pour structure, pin bar et engulfing
+    frame_m15 = as_frame(candles_m15)
+    struct_m15 = analyze_structure(frame_m15) if frame_m15 else None
     last_hl = struct_m15.last_swing_low if struct_m15 else None
     last_lh = struct_m15.last_swing_high if struct_m15 else None
-    sr_levels = struct_m15.sr_levels if struct_m15 else []
+    sr_levels = struct_m15.sr_index if struct_m15 else []
 
     # --- SORTIE : SL, puis TP1, puis TP2 (TP2 uniquement si be_applied = TP1 déjà passé) ---
     if direction.upper() == "BUY":
@@ -321,8 +330,8 @@ def evaluate_suivi(
         direction, current_price, entry, tp1, sr_levels, sr_buffer_points
     )
     structure_broken = _check_structure_m15_broken(direction, current_price, last_hl, last_lh)
-    pin_bar_against = _check_pin_bar_against(candles_m15, direction)
-    engulfing_against = _check_engulfing_against(candles_m15, direction)
+    pin_bar_against = _check_pin_bar_against(frame_m15, direction)
+    engulfing_against = _check_engulfing_against(frame_m15, direction)
     stagnation = _check_stagnation_near_key_zone(
         candles_m15, current_price, sr_levels, sr_buffer_points
     )
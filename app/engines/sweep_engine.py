@@ -0,0 +1,269 @@
+"""
+Sweep de paramètres Settings : une grille ou un tirage aléatoire de jeux de paramètres, chacun rejoué
+(ReplayRunner) sur le même historique, répartis sur les cœurs par ProcessPoolExecutor.
+Les colonnes de bougies sont copiées une fois en mémoire partagée : chaque worker les relit en vues
+numpy (ReplayProvider sans copie) au lieu de recevoir l'historique picklé à chaque job.
+Résultat : tableau classé (win rate, points, drawdown, nombre de signaux) par jeu de paramètres.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings_env_key
+from app.engines.indicator_state import get_indicator_tracker
+from app.engines.replay_engine import (
+    DEFAULT_WARMUP_DAYS,
+    ReplayRunner,
+    ReplaySummary,
+    replay_bounds,
+    replay_environment,
+)
+from app.engines.structure_engine import get_structure_cache
+from app.providers.replay import ReplayProvider
+
+log = logging.getLogger(__name__)
+
+RANK_KEYS = ("points", "win_rate", "max_drawdown", "trades")
+
+
+@dataclass(frozen=True)
+class SweepSpec:
+    """
+    mode "grid" : produit cartésien des valeurs ; mode "random" : samples tirages (seed).
+    Valeurs par paramètre : liste, ou {"min", "max", "step"} (grille : bornes incluses ;
+    aléatoire sans step : uniforme, entier si min et max sont entiers).
+    """
+
+    params: Dict[str, Any]
+    mode: str = "grid"
+    samples: int = 20
+    seed: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "SweepSpec":
+        mode = str(data.get("mode", "grid")).lower()
+        if mode not in ("grid", "random"):
+            raise ValueError(f"mode de sweep inconnu: {mode}")
+        params = dict(data.get("params") or {})
+        if not params:
+            raise ValueError("spec de sweep sans paramètres")
+        for name in params:
+            settings_env_key(name)  # ValueError si le paramètre n'existe pas dans Settings
+        return cls(params=params, mode=mode, samples=int(data.get("samples", 20)), seed=int(data.get("seed", 0)))
+
+    def parameter_sets(self) -> List[Dict[str, Any]]:
+        names = list(self.params)
+        if self.mode == "grid":
+            grids = [_grid_values(self.params[name]) for name in names]
+            return [dict(zip(names, combo)) for combo in itertools.product(*grids)]
+        rng = np.random.default_rng(self.seed)
+        return [{name: _sample_value(self.params[name], rng) for name in names} for _ in range(self.samples)]
+
+
+def _python(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _grid_values(values: Any) -> List[Any]:
+    if isinstance(values, Mapping):
+        lo, hi, step = values["min"], values["max"], values.get("step")
+        if not step:
+            raise ValueError("grille {min, max} sans step")
+        count = int(round((hi - lo) / step)) + 1
+        grid = [lo + k * step for k in range(count)]
+        if all(isinstance(v, int) for v in (lo, hi, step)):
+            return grid
+        return [round(v, 10) for v in grid]
+    if isinstance(values, (list, tuple)):
+        return list(values)
+    return [values]
+
+
+def _sample_value(values: Any, rng: np.random.Generator) -> Any:
+    if isinstance(values, Mapping):
+        if values.get("step"):
+            return _python(rng.choice(_grid_values(values)))
+        lo, hi = values["min"], values["max"]
+        if isinstance(lo, int) and isinstance(hi, int):
+            return int(rng.integers(lo, hi + 1))
+        return round(float(rng.uniform(lo, hi)), 6)
+    if isinstance(values, (list, tuple)):
+        return _python(values[int(rng.integers(len(values)))])
+    return values
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    index: int
+    params: Dict[str, Any]
+    summary: ReplaySummary
+    elapsed_sec: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"index": self.index, "params": self.params, **self.summary.to_dict(), "elapsed_sec": self.elapsed_sec}
+
+
+ReplayJob = Tuple[Dict[str, Any], int, int]  # (paramètres, index de début, index de fin exclu)
+
+
+# --- mémoire partagée ---
+
+ColumnRef = Tuple[str, str, str, int]  # (colonne, nom du segment, dtype, longueur)
+
+
+class SharedColumns:
+    """Copie des colonnes en segments SharedMemory (propriétaire : process parent, libérés par close)."""
+
+    def __init__(self, columns: Mapping[str, np.ndarray]) -> None:
+        self._segments: List[shared_memory.SharedMemory] = []
+        refs: List[ColumnRef] = []
+        try:
+            for name, values in columns.items():
+                array = np.ascontiguousarray(values)
+                segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._segments.append(segment)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+                refs.append((name, segment.name, array.dtype.str, len(array)))
+        except Exception:
+            self.close()
+            raise
+        self.refs: Tuple[ColumnRef, ...] = tuple(refs)
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def __enter__(self) -> "SharedColumns":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def attach_columns(refs: Sequence[ColumnRef]) -> Tuple[Dict[str, np.ndarray], List[shared_memory.SharedMemory]]:
+    """Vues numpy (lecture seule) sur les segments ; garder les handles ouverts tant que les vues servent."""
+    columns: Dict[str, np.ndarray] = {}
+    handles: List[shared_memory.SharedMemory] = []
+    for name, segment_name, dtype, length in refs:
+        segment = shared_memory.SharedMemory(name=segment_name)
+        handles.append(segment)
+        view = np.ndarray((length,), dtype=np.dtype(dtype), buffer=segment.buf)
+        view.flags.writeable = False
+        columns[name] = view
+    return columns, handles
+
+
+# --- worker ---
+
+_worker_provider: Optional[ReplayProvider] = None
+_worker_handles: List[shared_memory.SharedMemory] = []
+
+
+def _init_worker(refs: Sequence[ColumnRef], symbol: str, base_tf: str, offset_sec: int) -> None:
+    global _worker_provider, _worker_handles
+    columns, _worker_handles = attach_columns(refs)
+    _worker_provider = ReplayProvider(symbol, columns, base_tf, offset_sec=offset_sec)
+
+
+def _run_job(index: int, params: Dict[str, Any], start_idx: int, stop_idx: int) -> SweepResult:
+    provider = _worker_provider
+    if provider is None:
+        raise RuntimeError("worker de sweep non initialisé")
+    t0 = time.monotonic()
+    # Caches de process (mémoïsation par données, pas par paramètres) : repartir à vide à chaque jeu
+    get_indicator_tracker().clear()
+    get_structure_cache().clear()
+    with replay_environment(params):
+        summary = ReplayRunner(provider).run(start_idx, stop_idx)
+    return SweepResult(index, params, summary, round(time.monotonic() - t0, 2))
+
+
+def run_sweep(
+    provider: ReplayProvider,
+    spec: SweepSpec,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    workers: Optional[int] = None,
+    warmup_days: int = DEFAULT_WARMUP_DAYS,
+) -> List[SweepResult]:
+    """Rejoue [start, end[ pour chaque jeu de paramètres de spec ; résultats dans l'ordre des jeux."""
+    start_idx, stop_idx = replay_bounds(provider, start, end, warmup_days)
+    jobs = [(params, start_idx, stop_idx) for params in spec.parameter_sets()]
+    return list(run_jobs(provider, jobs, workers))
+
+
+def run_jobs(
+    provider: ReplayProvider,
+    jobs: Sequence[ReplayJob],
+    workers: Optional[int] = None,
+    label: str = "Sweep",
+) -> Iterator[SweepResult]:
+    """
+    Exécute les jobs (paramètres, index de début, index de fin) ; SweepResult.index = rang du job.
+    workers=1 : dans le process courant ; sinon pool de process sur les colonnes en mémoire partagée.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    if workers == 1:
+        global _worker_provider
+        _worker_provider = provider
+        try:
+            for index, (params, start_idx, stop_idx) in enumerate(jobs):
+                yield _run_job(index, params, start_idx, stop_idx)
+        finally:
+            _worker_provider = None
+        return
+    results: List[Optional[SweepResult]] = [None] * len(jobs)
+    with SharedColumns(provider.columns) as shared:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shared.refs, provider.symbol, provider.base_tf, provider.offset_sec),
+        ) as pool:
+            futures = {
+                pool.submit(_run_job, index, params, start_idx, stop_idx): index
+                for index, (params, start_idx, stop_idx) in enumerate(jobs)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                results[result.index] = result
+                log.info(
+                    "%s %d/%d : %s → %.1f pts, %d trades",
+                    label, done, len(jobs), result.params, result.summary.points, result.summary.trades,
+                )
+    yield from (r for r in results if r is not None)
+
+
+# --- classement ---
+
+
+def rank_results(results: Sequence[SweepResult], rank_by: str = "points", min_trades: int = 0) -> List[SweepResult]:
+    """Tri décroissant (drawdown : croissant), départage par points ; jeux sous min_trades exclus."""
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"critère de classement inconnu: {rank_by}")
+    kept = [r for r in results if r.summary.trades >= min_trades]
+    sign = 1.0 if rank_by == "max_drawdown" else -1.0
+    return sorted(kept, key=lambda r: (sign * getattr(r.summary, rank_by), -r.summary.points, r.index))
+
+
+def format_table(results: Sequence[SweepResult]) -> str:
+    """Tableau texte : rang, win rate, points, drawdown, signaux (GO) et trades, puis les paramètres."""
+    lines = [f"{'#':>3} {'win%':>6} {'points':>9} {'max_dd':>8} {'go':>5} {'trades':>6}  params"]
+    for rank, r in enumerate(results, start=1):
+        s = r.summary
+        params = " ".join(f"{k}={v}" for k, v in r.params.items())
+        lines.append(
+            f"{rank:>3} {s.win_rate * 100:>6.1f} {s.points:>9.2f} {s.max_drawdown:>8.2f} {s.go:>5} {s.trades:>6}  {params}"
+        )
+    return "\n".join(lines)
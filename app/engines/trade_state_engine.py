@@ -10,7 +10,10 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
-from app.config import get_settings
+from app.config import get_pullback_zone_for_phase, get_settings
+from app.engines.candle_frame import Candles
+from app.engines.market_phase_engine import get_market_phase
+from app.engines.structure_engine import analyze_structure, detect_strong_trend_m15
 
 log = logging.getLogger(__name__)
 
@@ -245,3 +248,81 @@ def check_extension_blocked(
         last_trend_pivot_price=strong_trend_pivot_price,
         final_decision="allowed",
     )
+
+
+@dataclass(frozen=True)
+class SmartContext:
+    """Système intelligent d'un cycle : phase marché, state machine, niveau de structure, anti-extension."""
+    market_phase: Optional[str]
+    trade_state: str
+    trade_state_reason: str
+    structure_level: Optional[float]
+    extension: Optional[ExtensionCheckResult] = None
+
+
+def evaluate_smart_context(
+    packet,
+    candles_m15: Candles,
+    candles_h1: Candles,
+    current_price: Optional[float],
+) -> SmartContext:
+    """
+    Phase marché + state machine + anti-extension pour le packet du cycle (/analyze, replay).
+    extension est None si pas de niveau de structure ou de prix courant.
+    """
+    settings = get_settings()
+    market_phase = get_market_phase(candles_m15, candles_h1).phase
+    trade_state_result = evaluate_trade_state(
+        packet.setups_detected or [],
+        packet.state.get("timing_ready", False),
+        packet.state.get("structure_h1", "RANGE"),
+        packet.state.get("setup_type", "ZONE_CONFIRMATION"),
+        packet.state.get("setup_direction", "BUY"),
+    )
+    struct = analyze_structure(candles_m15)
+    direction = (packet.state.get("setup_direction") or "BUY").upper()
+    structure_level = struct.last_swing_low if direction == "BUY" else struct.last_swing_high
+    setup_type = packet.state.get("setup_type", "ZONE_CONFIRMATION")
+    timing_ready = packet.state.get("timing_ready", False)
+    strong_trend = detect_strong_trend_m15(candles_m15)
+    strong_trend_detected = (
+        strong_trend.trend_direction == direction
+        and strong_trend.last_trend_pivot_price is not None
+    )
+    timing_m5_ok = bool(packet.state.get("timing_step_m5_ok"))
+    if getattr(settings, "entry_timing_mode", "classic") != "pullback_m5":
+        timing_m5_ok = timing_m5_ok or timing_ready
+    pb_min, pb_max = get_pullback_zone_for_phase(market_phase, settings)
+    pullback_confirmed = is_pullback_confirmed(
+        direction,
+        packet.proposed_entry or 0.0,
+        struct.last_swing_low,
+        struct.last_swing_high,
+        timing_ready,
+        timing_m5_ok,
+        setup_type,
+        min_ratio=pb_min,
+        max_ratio=pb_max,
+        buffer_pts=getattr(settings, "invalidation_buffer_pts", 1.5),
+    )
+    extension = None
+    if structure_level is not None and current_price is not None:
+        extension = check_extension_blocked(
+            current_price,
+            structure_level,
+            packet.atr,
+            direction,
+            impulse_memory=packet.state.get("impulse_memory"),
+            setup_type=setup_type,
+            timing_ready=timing_ready,
+            strong_trend_detected=strong_trend_detected,
+            strong_trend_pivot_price=strong_trend.last_trend_pivot_price,
+            pullback_confirmed=pullback_confirmed,
+        )
+    return SmartContext(
+        market_phase=market_phase,
+        trade_state=trade_state_result.state,
+        trade_state_reason=trade_state_result.reason,
+        structure_level=structure_level,
+        extension=extension,
+    )
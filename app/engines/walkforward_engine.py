@@ -0,0 +1,370 @@
+"""
+Walk-forward : l'historique est découpé en fenêtres glissantes in-sample / out-of-sample.
+Sur chaque fenêtre, les jeux de paramètres Settings d'une spec de sweep sont rejoués in-sample,
+le meilleur (rank_by, min_trades) est ensuite rejoué seul sur la période out-of-sample suivante.
+Tous les jobs de toutes les fenêtres passent par le même pool de process que le sweep (run_jobs).
+Fenêtres ancrées sur une origine fixe et complètes uniquement : prolonger l'historique ajoute des
+fenêtres sans changer les anciennes, dont le résultat est relu du cache (clé : bornes, spec, bougies,
+settings) au lieu d'être rejoué.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import statistics
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from hashlib import sha1
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.engines.replay_engine import DEFAULT_WARMUP_DAYS, SETUP_TYPES, ReplaySummary
+from app.engines.sweep_engine import RANK_KEYS, SweepResult, SweepSpec, rank_results, run_jobs
+from app.infra.replay_results import WalkForwardCache
+from app.providers.replay import ReplayProvider
+from app.providers.resampler import tf_seconds
+
+log = logging.getLogger(__name__)
+
+DAY_SEC = 86400
+# À incrémenter si le replay change de façon à invalider les fenêtres en cache
+CACHE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class WalkForwardSpec:
+    """Spec de sweep (params, mode...) + découpage en jours : in-sample, out-of-sample, pas (défaut : OOS)."""
+
+    sweep: SweepSpec
+    in_sample_days: int = 28
+    out_of_sample_days: int = 7
+    step_days: Optional[int] = None
+    rank_by: str = "points"
+    min_trades: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "WalkForwardSpec":
+        spec = cls(
+            sweep=SweepSpec.from_dict(data),
+            in_sample_days=int(data.get("in_sample_days", 28)),
+            out_of_sample_days=int(data.get("out_of_sample_days", 7)),
+            step_days=int(data["step_days"]) if data.get("step_days") else None,
+            rank_by=str(data.get("rank_by", "points")),
+            min_trades=int(data.get("min_trades", 0)),
+        )
+        if spec.rank_by not in RANK_KEYS:
+            raise ValueError(f"critère de classement inconnu: {spec.rank_by}")
+        if min(spec.in_sample_days, spec.out_of_sample_days, spec.step) <= 0:
+            raise ValueError("durées de fenêtre walk-forward en jours > 0 requises")
+        return spec
+
+    @property
+    def step(self) -> int:
+        return self.step_days or self.out_of_sample_days
+
+
+@dataclass(frozen=True)
+class WalkForwardWindow:
+    """Bornes en epoch s : in-sample [is_start, is_end[, out-of-sample [is_end, oos_end[."""
+
+    index: int
+    is_start: int
+    is_end: int
+    oos_end: int
+
+    @property
+    def oos_start(self) -> int:
+        return self.is_end
+
+    def label(self) -> str:
+        def day(ts: int) -> str:
+            return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+        return f"{day(self.is_start)} → {day(self.is_end)} → {day(self.oos_end)}"
+
+
+@dataclass(frozen=True)
+class WindowResult:
+    """Meilleur jeu in-sample (None si aucun n'atteint min_trades) et son résultat out-of-sample."""
+
+    window: WalkForwardWindow
+    best_params: Optional[Dict[str, Any]]
+    in_sample: Optional[ReplaySummary]
+    out_of_sample: Optional[ReplaySummary]
+    candidates: int
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": asdict(self.window),
+            "best_params": self.best_params,
+            "in_sample": asdict(self.in_sample) if self.in_sample else None,
+            "out_of_sample": asdict(self.out_of_sample) if self.out_of_sample else None,
+            "candidates": self.candidates,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], cached: bool = False) -> "WindowResult":
+        return cls(
+            window=WalkForwardWindow(**data["window"]),
+            best_params=data.get("best_params"),
+            in_sample=ReplaySummary.from_dict(data["in_sample"]) if data.get("in_sample") else None,
+            out_of_sample=ReplaySummary.from_dict(data["out_of_sample"]) if data.get("out_of_sample") else None,
+            candidates=int(data.get("candidates", 0)),
+            cached=cached,
+        )
+
+
+def walkforward_windows(
+    provider: ReplayProvider,
+    spec: WalkForwardSpec,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    warmup_days: int = DEFAULT_WARMUP_DAYS,
+) -> List[WalkForwardWindow]:
+    """
+    Fenêtres complètes entre start (défaut : première barre + warmup_days, à minuit UTC) et end
+    (défaut : clôture de la dernière barre). Index = rang depuis l'origine, stable quand end recule.
+    """
+    if not len(provider):
+        return []
+    origin = int(start.timestamp()) if start else int(provider.time[0]) + warmup_days * DAY_SEC
+    origin = origin // DAY_SEC * DAY_SEC
+    limit = int(end.timestamp()) if end else int(provider.time[-1]) + (tf_seconds(provider.base_tf) or 0)
+    windows: List[WalkForwardWindow] = []
+    index = 0
+    while True:
+        is_start = origin + index * spec.step * DAY_SEC
+        is_end = is_start + spec.in_sample_days * DAY_SEC
+        oos_end = is_end + spec.out_of_sample_days * DAY_SEC
+        if oos_end > limit:
+            return windows
+        windows.append(WalkForwardWindow(index, is_start, is_end, oos_end))
+        index += 1
+
+
+def _settings_digest() -> str:
+    dump = get_settings().model_dump(mode="json")
+    return sha1(json.dumps(dump, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def window_cache_key(
+    provider: ReplayProvider,
+    spec: WalkForwardSpec,
+    window: WalkForwardWindow,
+    warmup_days: int = DEFAULT_WARMUP_DAYS,
+    settings_digest: Optional[str] = None,
+) -> str:
+    """Empreinte d'une fenêtre : spec, bornes, settings de base et bougies lues (warmup compris)."""
+    lo = provider.index_at(window.is_start - warmup_days * DAY_SEC)
+    hi = provider.index_at(window.oos_end)
+    meta = {
+        "version": CACHE_VERSION,
+        "symbol": provider.symbol,
+        "base_tf": provider.base_tf,
+        "offset_sec": provider.offset_sec,
+        "warmup_days": warmup_days,
+        "window": asdict(window),
+        "spec": asdict(spec),
+        "settings": settings_digest or _settings_digest(),
+    }
+    digest = sha1(json.dumps(meta, sort_keys=True, default=str).encode("utf-8"))
+    for name in sorted(provider.columns):
+        digest.update(name.encode("utf-8"))
+        digest.update(np.ascontiguousarray(provider.columns[name][lo:hi]).tobytes())
+    return digest.hexdigest()
+
+
+def run_walkforward(
+    provider: ReplayProvider,
+    spec: WalkForwardSpec,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    workers: Optional[int] = None,
+    warmup_days: int = DEFAULT_WARMUP_DAYS,
+    cache: Optional[WalkForwardCache] = None,
+) -> List[WindowResult]:
+    """Optimisation in-sample puis évaluation out-of-sample de chaque fenêtre ; résultats dans l'ordre des fenêtres."""
+    windows = walkforward_windows(provider, spec, start, end, warmup_days)
+    results: Dict[int, WindowResult] = {}
+    keys: Dict[int, str] = {}
+    if cache is not None:
+        settings_digest = _settings_digest()
+        for w in windows:
+            keys[w.index] = window_cache_key(provider, spec, w, warmup_days, settings_digest)
+            hit = cache.get(keys[w.index])
+            if hit is not None:
+                results[w.index] = WindowResult.from_dict(hit, cached=True)
+    pending = [w for w in windows if w.index not in results]
+    log.info("Walk-forward : %d fenêtres, %d en cache, %d à calculer", len(windows), len(results), len(pending))
+    if not pending:
+        return [results[w.index] for w in windows]
+
+    # In-sample : tous les jeux de toutes les fenêtres dans le même pool
+    param_sets = spec.sweep.parameter_sets()
+    is_jobs = [
+        (params, provider.index_at(w.is_start), provider.index_at(w.is_end)) for w in pending for params in param_sets
+    ]
+    by_window: Dict[int, List[SweepResult]] = {}
+    for r in run_jobs(provider, is_jobs, workers, label="In-sample"):
+        by_window.setdefault(pending[r.index // len(param_sets)].index, []).append(r)
+    best: Dict[int, Tuple[Optional[SweepResult], int]] = {}
+    for w in pending:
+        ranked = rank_results(by_window.get(w.index, []), spec.rank_by, spec.min_trades)
+        best[w.index] = (ranked[0] if ranked else None, len(ranked))
+
+    # Out-of-sample : le meilleur jeu de chaque fenêtre, sur la période suivante
+    oos_windows = [w for w in pending if best[w.index][0] is not None]
+    oos_jobs = [
+        (best[w.index][0].params, provider.index_at(w.oos_start), provider.index_at(w.oos_end)) for w in oos_windows
+    ]
+    oos = {oos_windows[r.index].index: r.summary for r in run_jobs(provider, oos_jobs, workers, label="Out-of-sample")}
+
+    for w in pending:
+        top, candidates = best[w.index]
+        result = WindowResult(
+            window=w,
+            best_params=top.params if top else None,
+            in_sample=top.summary if top else None,
+            out_of_sample=oos.get(w.index),
+            candidates=candidates,
+        )
+        results[w.index] = result
+        if cache is not None:
+            cache.put(keys[w.index], provider.symbol, w.is_start, w.oos_end, result.to_dict())
+    return [results[w.index] for w in windows]
+
+
+# --- rapport ---
+
+
+@dataclass(frozen=True)
+class ParamStability:
+    """Valeur retenue par fenêtre optimisée ; mean/std pour les paramètres numériques."""
+
+    name: str
+    values: Tuple[Any, ...]
+    mode: Any
+    mode_share: float
+    distinct: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+
+
+def parameter_stability(results: Sequence[WindowResult]) -> List[ParamStability]:
+    chosen = [r.best_params for r in results if r.best_params]
+    stability: List[ParamStability] = []
+    for name in dict.fromkeys(k for params in chosen for k in params):
+        values = tuple(params.get(name) for params in chosen)
+        mode, count = Counter(values).most_common(1)[0]
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+        stability.append(
+            ParamStability(
+                name=name,
+                values=values,
+                mode=mode,
+                mode_share=count / len(values),
+                distinct=len(set(values)),
+                mean=statistics.fmean(values) if numeric else None,
+                std=statistics.pstdev(values) if numeric else None,
+            )
+        )
+    return stability
+
+
+def combine_summaries(summaries: Sequence[ReplaySummary]) -> ReplaySummary:
+    """
+    Somme des résumés de fenêtres successives. Drawdown : max entre le drawdown intra-fenêtre et celui
+    de la courbe des points fenêtre par fenêtre (borne basse du drawdown trade par trade).
+    """
+    points_by_setup: Dict[str, float] = {}
+    trades_by_setup: Dict[str, int] = {}
+    equity = peak = max_dd = 0.0
+    for s in summaries:
+        max_dd = max(max_dd, s.max_drawdown)
+        equity += s.points
+        peak = max(peak, equity)
+        max_dd = max(max_dd, peak - equity)
+        for key, pts in s.points_by_setup.items():
+            points_by_setup[key] = points_by_setup.get(key, 0.0) + pts
+        for key, count in s.trades_by_setup.items():
+            trades_by_setup[key] = trades_by_setup.get(key, 0) + count
+    return ReplaySummary(
+        decisions=sum(s.decisions for s in summaries),
+        go=sum(s.go for s in summaries),
+        trades=sum(s.trades for s in summaries),
+        wins=sum(s.wins for s in summaries),
+        losses=sum(s.losses for s in summaries),
+        points=equity,
+        max_drawdown=max_dd,
+        points_by_setup=points_by_setup,
+        trades_by_setup=trades_by_setup,
+    )
+
+
+def setup_breakdown(summary: ReplaySummary) -> Dict[str, Tuple[float, int]]:
+    """(points, trades) par setup : les trois setups toujours présents, puis les autres (UNKNOWN...)."""
+    keys = list(SETUP_TYPES) + sorted(set(summary.points_by_setup) - set(SETUP_TYPES))
+    return {k: (summary.points_by_setup.get(k, 0.0), summary.trades_by_setup.get(k, 0)) for k in keys}
+
+
+def walkforward_efficiency(results: Sequence[WindowResult], spec: WalkForwardSpec) -> Optional[float]:
+    """Points par jour out-of-sample / points par jour in-sample (meilleurs jeux) ; None si IS ≤ 0."""
+    evaluated = [r for r in results if r.in_sample is not None and r.out_of_sample is not None]
+    is_points = sum(r.in_sample.points for r in evaluated)
+    if not evaluated or is_points <= 0:
+        return None
+    oos_points = sum(r.out_of_sample.points for r in evaluated)
+    return (oos_points / spec.out_of_sample_days) / (is_points / spec.in_sample_days)
+
+
+def walkforward_report(results: Sequence[WindowResult], spec: WalkForwardSpec) -> Dict[str, Any]:
+    oos = combine_summaries([r.out_of_sample for r in results if r.out_of_sample is not None])
+    return {
+        "spec": asdict(spec),
+        "windows": [r.to_dict() for r in results],
+        "stability": [asdict(s) for s in parameter_stability(results)],
+        "out_of_sample": oos.to_dict(),
+        "out_of_sample_by_setup": {k: {"points": round(p, 2), "trades": n} for k, (p, n) in setup_breakdown(oos).items()},
+        "efficiency": walkforward_efficiency(results, spec),
+    }
+
+
+def format_report(results: Sequence[WindowResult], spec: WalkForwardSpec) -> str:
+    """Tableau par fenêtre, stabilité des paramètres, total et points out-of-sample par setup."""
+    optimized = sum(1 for r in results if r.best_params)
+    cached = sum(1 for r in results if r.cached)
+    lines = [
+        f"Fenêtres : {len(results)} ({optimized} optimisées, {cached} en cache) - "
+        f"IS {spec.in_sample_days}j / OOS {spec.out_of_sample_days}j / pas {spec.step}j, classement {spec.rank_by}",
+        f"{'#':>3}  {'in-sample → out-of-sample':<36} {'is_pts':>8} {'oos_pts':>8} {'oos_tr':>6} {'oos_win%':>8}  params",
+    ]
+    for r in results:
+        is_pts = f"{r.in_sample.points:.2f}" if r.in_sample else "-"
+        oos = r.out_of_sample
+        oos_pts = f"{oos.points:.2f}" if oos else "-"
+        oos_tr = str(oos.trades) if oos else "-"
+        oos_win = f"{oos.win_rate * 100:.1f}" if oos else "-"
+        params = " ".join(f"{k}={v}" for k, v in (r.best_params or {}).items()) or "(aucun jeu retenu)"
+        lines.append(f"{r.window.index:>3}  {r.window.label():<36} {is_pts:>8} {oos_pts:>8} {oos_tr:>6} {oos_win:>8}  {params}")
+
+    lines.append("")
+    lines.append("Stabilité des paramètres :")
+    for s in parameter_stability(results):
+        spread = f"  moyenne={s.mean:.4g} écart-type={s.std:.4g}" if s.mean is not None else ""
+        lines.append(f"  {s.name:<28} mode={s.mode} ({s.mode_share * 100:.0f}%)  distinctes={s.distinct}{spread}")
+
+    oos_total = combine_summaries([r.out_of_sample for r in results if r.out_of_sample is not None])
+    efficiency = walkforward_efficiency(results, spec)
+    lines.append("")
+    lines.append(
+        f"Out-of-sample : {oos_total.points:.2f} pts, {oos_total.trades} trades, win {oos_total.win_rate * 100:.1f}%, "
+        f"max_dd {oos_total.max_drawdown:.2f}, efficacité {'-' if efficiency is None else f'{efficiency:.2f}'}"
+    )
+    lines.append("Out-of-sample par setup :")
+    for setup, (points, trades) in setup_breakdown(oos_total).items():
+        lines.append(f"  {setup:<20} {points:>9.2f} pts {trades:>5} trades")
+    return "\n".join(lines)
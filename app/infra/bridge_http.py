@@ -0,0 +1,91 @@
+"""
+Pool HTTP partagé vers le bridge MT5 (keep-alive) : un seul httpx.Client par process.
+Utilisé par RemoteMT5Provider, mt5_be_client, la sonde /health de /data-status et
+l'agent d'outcomes — évite un handshake TCP par appel bridge. Fermé dans le lifespan FastAPI.
+Boucle asyncio dédiée (thread daemon) pour le provider async appelé depuis le code synchrone.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+import httpx
+
+from app.config import get_settings
+
+# Timeouts (s) par endpoint bridge ; préfixe le plus long gagnant
+BRIDGE_TIMEOUTS = {
+    "/health": 3.0,
+    "/tick": 2.0,
+    "/spread": 2.0,
+    "/candles": 4.0,
+    "/snapshot": 5.0,
+    "/position": 5.0,
+}
+DEFAULT_TIMEOUT = 4.0
+CONNECT_TIMEOUT = 2.0
+
+_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def bridge_timeout(path: str) -> httpx.Timeout:
+    """Timeout pour un chemin bridge (/candles, /position/modify-sl...)."""
+    match = ""
+    for prefix in BRIDGE_TIMEOUTS:
+        if path.startswith(prefix) and len(prefix) > len(match):
+            match = prefix
+    read = BRIDGE_TIMEOUTS.get(match, DEFAULT_TIMEOUT)
+    return httpx.Timeout(read, connect=min(CONNECT_TIMEOUT, read))
+
+
+def bridge_limits() -> httpx.Limits:
+    pool_size = max(1, int(getattr(get_settings(), "mt5_bridge_pool_size", 8)))
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=30.0,
+    )
+
+
+def get_bridge_client() -> httpx.Client:
+    """Client bridge partagé, créé au premier appel (pool borné MT5_BRIDGE_POOL_SIZE)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(timeout=DEFAULT_TIMEOUT, limits=bridge_limits())
+    return _client
+
+
+def run_on_bridge_loop(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Exécute une coroutine sur la boucle bridge (thread daemon, créée au premier appel) et attend
+    son résultat. Un httpx.AsyncClient reste ainsi lié à une seule boucle entre les cycles.
+    """
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="bridge-loop", daemon=True).start()
+        loop = _loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def stop_bridge_loop() -> None:
+    global _loop
+    with _lock:
+        loop, _loop = _loop, None
+    if loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def close_bridge_client() -> None:
+    """Ferme le pool (shutdown FastAPI / fin de script). Un appel ultérieur en recrée un."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
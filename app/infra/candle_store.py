@@ -0,0 +1,185 @@
+"""
+Archive locale de bougies (et ticks) : fichiers binaires append-only, memory-mappables,
+partitionnés <racine>/<symbole>/<TF>/<AAAA-MM-JJ>.bin : jour du time de la barre tel que reçu de MT5,
+c.-à-d. le jour de l'heure serveur du broker (le time MT5 est l'heure serveur encodée en epoch, pas l'UTC).
+Un enregistrement = une ligne du structured array CANDLE_DTYPE (TICK_DTYPE pour les ticks), sans en-tête :
+np.memmap suffit à relire, sans parser ni copier. Base du replay, du labelling d'outcomes et des stats.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from app.config import get_settings
+from app.providers.candle_codec import candles_to_columns
+
+CANDLE_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<i8"),
+    ("spread", "<i4"),
+    ("real_volume", "<i8"),
+])
+TICK_DTYPE = np.dtype([
+    ("time_msc", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+])
+TICKS = "TICKS"
+
+TimeLike = Union[int, float, datetime]
+
+
+def _to_epoch(value: TimeLike) -> int:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def _day_of(epoch_sec: int) -> date:
+    """Jour calendaire d'un time MT5 (heure serveur broker, lue comme un epoch sans décalage)."""
+    return datetime.fromtimestamp(int(epoch_sec), tz=timezone.utc).date()
+
+
+def candles_to_records(candles: Union[List[Dict], Dict[str, np.ndarray]]) -> np.ndarray:
+    """Liste de dicts (API bridge) ou colonnes numpy → tableau CANDLE_DTYPE trié par time."""
+    columns = candles if isinstance(candles, dict) else candles_to_columns(candles)
+    out = np.zeros(len(columns.get("time", ())), dtype=CANDLE_DTYPE)
+    for name in CANDLE_DTYPE.names:
+        if name in columns:
+            out[name] = columns[name]
+    return out[np.argsort(out["time"], kind="stable")]
+
+
+class CandleStore:
+    def __init__(self, root: Optional[str] = None) -> None:
+        settings = get_settings()
+        self.root = Path(root or getattr(settings, "candle_store_path", "/data/candles"))
+        self._lock = threading.Lock()
+
+    # --- chemins ---
+
+    def _dir(self, symbol: str, tf: str) -> Path:
+        return self.root / symbol / tf.upper()
+
+    def _path(self, symbol: str, tf: str, day: date) -> Path:
+        return self._dir(symbol, tf) / f"{day.isoformat()}.bin"
+
+    @staticmethod
+    def _dtype(tf: str) -> np.dtype:
+        return TICK_DTYPE if tf.upper() == TICKS else CANDLE_DTYPE
+
+    @staticmethod
+    def _time_field(tf: str) -> str:
+        return "time_msc" if tf.upper() == TICKS else "time"
+
+    def days(self, symbol: str, tf: str) -> List[date]:
+        d = self._dir(symbol, tf)
+        if not d.is_dir():
+            return []
+        return sorted(date.fromisoformat(p.stem) for p in d.glob("*.bin"))
+
+    # --- lecture ---
+
+    def _map(self, path: Path, dtype: np.dtype) -> np.ndarray:
+        """memmap lecture seule ; ignore un enregistrement partiel en fin de fichier (écriture interrompue)."""
+        try:
+            n = os.path.getsize(path) // dtype.itemsize
+        except OSError:
+            n = 0
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def iter_chunks(self, symbol: str, tf: str, start: TimeLike, end: TimeLike) -> Iterator[np.ndarray]:
+        """Vues memmap (sans copie), une par jour, restreintes à [start, end[."""
+        dtype = self._dtype(tf)
+        field = self._time_field(tf)
+        scale = 1000 if field == "time_msc" else 1
+        t0, t1 = _to_epoch(start), _to_epoch(end)
+        day, last_day = _day_of(t0), _day_of(max(t0, t1 - 1))
+        while day <= last_day:
+            path = self._path(symbol, tf, day)
+            if path.exists():
+                arr = self._map(path, dtype)
+                times = arr[field]
+                lo = int(np.searchsorted(times, t0 * scale, side="left"))
+                hi = int(np.searchsorted(times, t1 * scale, side="left"))
+                if hi > lo:
+                    yield arr[lo:hi]
+            day += timedelta(days=1)
+
+    def read(self, symbol: str, tf: str, start: TimeLike, end: TimeLike) -> np.ndarray:
+        """
+        Barres de [start, end[ (epoch s ou datetime). Sans copie si la plage tient dans un fichier
+        (vue memmap) ; sur plusieurs jours, une seule concaténation.
+        """
+        chunks = list(self.iter_chunks(symbol, tf, start, end))
+        if not chunks:
+            return np.zeros(0, dtype=self._dtype(tf))
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.concatenate(chunks)
+
+    def last_time(self, symbol: str, tf: str) -> Optional[int]:
+        """time (ou time_msc pour les ticks) du dernier enregistrement archivé."""
+        dtype = self._dtype(tf)
+        for day in reversed(self.days(symbol, tf)):
+            arr = self._map(self._path(symbol, tf, day), dtype)
+            if len(arr):
+                return int(arr[self._time_field(tf)][-1])
+        return None
+
+    # --- écriture ---
+
+    def append(self, symbol: str, tf: str, records: np.ndarray) -> int:
+        """
+        Ajoute des barres clôturées (CANDLE_DTYPE) ou des ticks (tf=TICKS, TICK_DTYPE).
+        Idempotent : ce qui n'est pas strictement après le dernier enregistrement est ignoré.
+        Retourne le nombre d'enregistrements écrits.
+        """
+        dtype = self._dtype(tf)
+        field = self._time_field(tf)
+        records = np.asarray(records, dtype=dtype)
+        if len(records) == 0:
+            return 0
+        with self._lock:
+            last = self.last_time(symbol, tf)
+            if last is not None:
+                records = records[records[field] > last]
+            if len(records) == 0:
+                return 0
+            secs = records[field] // 1000 if field == "time_msc" else records[field]
+            days = secs // 86400
+            for day_idx in np.unique(days):
+                part = records[days == day_idx]
+                path = self._path(symbol, tf, _day_of(int(day_idx) * 86400))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _drop_partial_record(path, dtype)
+                with open(path, "ab") as fh:
+                    fh.write(np.ascontiguousarray(part).tobytes())
+        return len(records)
+
+
+def _drop_partial_record(path: Path, dtype: np.dtype) -> None:
+    """
+    Tronque un enregistrement partiel en fin de fichier (écriture interrompue) avant d'y ajouter :
+    sinon tout ce qui suit serait décalé à la relecture.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    extra = size % dtype.itemsize
+    if extra:
+        os.truncate(path, size - extra)
@@ -0,0 +1,102 @@
+"""
+Horloge injectable : toute lecture de « maintenant » du pipeline passe par un Clock (heure UTC aware).
+- SystemClock : datetime.now(timezone.utc) / time.sleep (production) ;
+- FixedClock : heure figée, sleep sans effet (tests) ;
+- SimulatedClock : heure avancée explicitement (replay, tests de concurrence), sleep = avance sans dormir.
+get_clock() renvoie l'horloge installée par set_clock, sinon l'horloge système : boucles, attentes et
+horodatages d'audit dorment et datent toujours pour de vrai. MOCK_SERVER_TIME_UTC ne fixe que l'heure
+serveur du MockDataProvider (app/providers/mock.py), pas celle du process.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, Protocol
+
+
+def _aware(when: datetime) -> datetime:
+    return when if when.tzinfo is not None else when.replace(tzinfo=timezone.utc)
+
+
+class Clock(Protocol):
+    def now(self) -> datetime:
+        ...
+
+    def sleep(self, seconds: float) -> None:
+        ...
+
+
+class SystemClock:
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class FixedClock:
+    def __init__(self, at: datetime) -> None:
+        self.at = _aware(at)
+
+    def now(self) -> datetime:
+        return self.at
+
+    def sleep(self, seconds: float) -> None:
+        return None
+
+
+class SimulatedClock:
+    """Heure avancée par set/advance (thread-safe) ; sleep avance l'heure au lieu de bloquer."""
+
+    def __init__(self, start: datetime) -> None:
+        self._now = _aware(start)
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        with self._lock:
+            return self._now
+
+    def set(self, when: datetime) -> None:
+        with self._lock:
+            self._now = _aware(when)
+
+    def advance(self, seconds: float = 0.0, **kwargs: float) -> datetime:
+        """advance(300) ou advance(minutes=5) ; renvoie la nouvelle heure."""
+        with self._lock:
+            self._now += timedelta(seconds=seconds, **kwargs)
+            return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+
+_SYSTEM_CLOCK = SystemClock()
+_clock: Optional[Clock] = None
+
+
+def get_clock() -> Clock:
+    return _clock if _clock is not None else _SYSTEM_CLOCK
+
+
+def installed_clock() -> Optional[Clock]:
+    """Horloge installée par set_clock / use_clock, None si le process est sur l'horloge système."""
+    return _clock
+
+
+def set_clock(clock: Optional[Clock]) -> None:
+    """Installe l'horloge du process (None : retour à l'horloge système)."""
+    global _clock
+    _clock = clock
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """Installe clock le temps du bloc puis restaure l'horloge précédente."""
+    previous = _clock
+    set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
@@ -1,10 +1,11 @@
 import json
 import os
 import sqlite3
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from app.config import get_settings
+from app.infra.clock import get_clock
 
 
 def get_conn() -> sqlite3.Connection:
@@ -180,6 +181,36 @@ def init_db() -> None:
         );
         """
     )
+    # Corriger les SL_HIT enregistrés avec un pnl positif (ancien agent) : un stop est toujours une perte
+    conn.execute("UPDATE signal_outcomes SET pnl_pts = -ABS(pnl_pts) WHERE outcome = 'SL_HIT' AND pnl_pts > 0")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS impulse_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            bar_ts_utc TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            range_pts REAL,
+            anchor_price REAL,
+            key_levels_json TEXT,
+            detected_ts_utc TEXT NOT NULL,
+            UNIQUE (symbol, timeframe, bar_ts_utc)
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS indicator_state (
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            last_bar_time INTEGER,
+            state_json TEXT NOT NULL,
+            updated_ts_utc TEXT NOT NULL,
+            PRIMARY KEY (symbol, timeframe)
+        );
+        """
+    )
     conn.commit()
     conn.close()
 
@@ -423,7 +454,7 @@ def update_active_trade_sl_to_be(
         new_sl = entry + offset_pts
     else:
         new_sl = entry - offset_pts
-    ts = be_ts_utc or datetime.now(timezone.utc).isoformat()
+    ts = be_ts_utc or get_clock().now().isoformat()
     partial_val = tp1_partial_pts if tp1_partial_pts is not None else 0.0
     conn = get_conn()
     cur = conn.execute(
@@ -816,13 +847,15 @@ def get_recent_signals(symbol: str, limit: int = 20) -> list:
         return []
 
 
-def get_analyst_signals(days: int = 7, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Signaux des N derniers jours pour l'agent analyste (GO/NO_GO, blocked_by, score, setup)."""
+def get_analyst_signals(
+    days: int = 7, symbol: Optional[str] = None, now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Signaux des N derniers jours (jusqu'à now, défaut horloge) pour l'agent analyste (GO/NO_GO, blocked_by, score, setup)."""
     try:
         from zoneinfo import ZoneInfo
         sym = symbol or get_settings().symbol_default
         tz = ZoneInfo("Europe/Paris")
-        end = datetime.now(tz).date()
+        end = (now or get_clock().now()).astimezone(tz).date()
         start = end - timedelta(days=days)
         conn = get_conn()
         rows = []
@@ -857,12 +890,12 @@ def get_analyst_signals(days: int = 7, symbol: Optional[str] = None) -> List[Dic
         return []
 
 
-def get_analyst_outcomes_by_day(days: int = 7) -> Dict[str, List[float]]:
-    """Outcomes (pips) par jour pour les N derniers jours."""
+def get_analyst_outcomes_by_day(days: int = 7, now: Optional[datetime] = None) -> Dict[str, List[float]]:
+    """Outcomes (pips) par jour pour les N derniers jours (jusqu'à now, défaut horloge)."""
     try:
         from zoneinfo import ZoneInfo
         tz = ZoneInfo("Europe/Paris")
-        end = datetime.now(tz).date()
+        end = (now or get_clock().now()).astimezone(tz).date()
         result: Dict[str, List[float]] = {}
         conn = get_conn()
         for i in range(days + 1):
@@ -882,7 +915,7 @@ def get_analyst_outcomes_by_day(days: int = 7) -> Dict[str, List[float]]:
 def save_analyst_report(report_json: str) -> None:
     """Sauvegarde le dernier rapport analyste."""
     conn = get_conn()
-    ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H%M%SZ")
+    ts = get_clock().now().strftime("%Y-%m-%dT%H%M%SZ")
     conn.execute(
         "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
         (f"ai_analyst_report_{ts}", report_json),
@@ -906,3 +939,138 @@ def insert_ai_message(ts_utc: str, symbol: str, decision: str, text: str, meta_j
     )
     conn.commit()
     conn.close()
+
+
+def get_indicator_state_json(symbol: str, timeframe: str) -> Optional[str]:
+    """État IndicatorState sérialisé pour (symbole, TF), None si absent."""
+    conn = get_conn()
+    try:
+        row = conn.execute(
+            "SELECT state_json FROM indicator_state WHERE symbol = ? AND timeframe = ?",
+            (symbol, timeframe),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # table pas encore créée (init_db non appelé)
+    conn.close()
+    return row["state_json"] if row else None
+
+
+def save_indicator_state_json(symbol: str, timeframe: str, state_json: str, last_bar_time: Optional[int]) -> None:
+    ts_utc = get_clock().now().isoformat()
+    conn = get_conn()
+    conn.execute(
+        """
+        INSERT INTO indicator_state (symbol, timeframe, last_bar_time, state_json, updated_ts_utc)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(symbol, timeframe) DO UPDATE SET
+            last_bar_time = excluded.last_bar_time,
+            state_json = excluded.state_json,
+            updated_ts_utc = excluded.updated_ts_utc
+        """,
+        (symbol, timeframe, last_bar_time, state_json, ts_utc),
+    )
+    conn.commit()
+    conn.close()
+
+
+def record_impulse(
+    symbol: str,
+    timeframe: str,
+    bar_ts_utc: str,
+    direction: str,
+    range_pts: float,
+    anchor_price: float,
+    key_levels: List[float],
+) -> bool:
+    """Enregistre une bougie d'impulsion détectée. False si déjà connue (même barre)."""
+    conn = get_conn()
+    cur = conn.execute(
+        """
+        INSERT INTO impulse_memory (
+            symbol, timeframe, bar_ts_utc, direction, range_pts, anchor_price, key_levels_json, detected_ts_utc
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(symbol, timeframe, bar_ts_utc) DO NOTHING
+        """,
+        (
+            symbol,
+            timeframe,
+            bar_ts_utc,
+            direction,
+            range_pts,
+            anchor_price,
+            json.dumps(key_levels),
+            get_clock().now().isoformat(),
+        ),
+    )
+    conn.commit()
+    inserted = cur.rowcount > 0
+    conn.close()
+    return inserted
+
+
+def get_recent_impulses(symbol: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Dernières impulsions enregistrées (plus récente d'abord), key_levels décodés."""
+    conn = get_conn()
+    query = """
+        SELECT symbol, timeframe, bar_ts_utc, direction, range_pts, anchor_price, key_levels_json, detected_ts_utc
+        FROM impulse_memory
+    """
+    params: list = []
+    if symbol:
+        query += " WHERE symbol = ?"
+        params.append(symbol)
+    query += " ORDER BY bar_ts_utc DESC LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    out = []
+    for row in rows:
+        item = dict(row)
+        item["key_levels"] = json.loads(item.pop("key_levels_json") or "[]")
+        out.append(item)
+    return out
+
+
+def get_pending_outcome_signals(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Signaux GO envoyés sans ligne signal_outcomes (plus récents d'abord), tous si limit=None."""
+    conn = get_conn()
+    query = """
+        SELECT s.id, s.ts_utc, s.symbol, s.direction, s.entry, s.sl, s.tp1, s.tp2
+        FROM signals s
+        LEFT JOIN signal_outcomes o ON o.signal_id = s.id
+        WHERE s.status = 'GO' AND s.telegram_sent = 1
+          AND s.entry IS NOT NULL AND s.sl IS NOT NULL
+          AND o.id IS NULL
+        ORDER BY s.ts_utc DESC
+    """
+    params: list = []
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def insert_signal_outcomes(rows: List[Dict[str, Any]]) -> int:
+    """Insère les outcomes d'un lot en une seule transaction (tout ou rien)."""
+    if not rows:
+        return 0
+    conn = get_conn()
+    try:
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO signal_outcomes (
+                    signal_id, ts_utc, symbol, direction, entry, sl, tp1, tp2, outcome, pnl_pts, outcome_ts_utc
+                )
+                VALUES (
+                    :signal_id, :ts_utc, :symbol, :direction, :entry, :sl, :tp1, :tp2, :outcome, :pnl_pts, :outcome_ts_utc
+                )
+                """,
+                rows,
+            )
+    finally:
+        conn.close()
+    return len(rows)
@@ -0,0 +1,30 @@
+"""
+Persistance des IndicatorState (table SQLite indicator_state) : écrits par le recorder et par le cycle
+/analyze (IndicatorTracker), relus au démarrage pour reprendre sans tout recalculer.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from app.engines.indicator_state import IndicatorState
+from app.infra.db import get_indicator_state_json, save_indicator_state_json
+
+
+def load_indicator_state(symbol: str, timeframe: str, **params: Any) -> IndicatorState:
+    """État persisté pour (symbole, TF), ou état vide si absent / paramètres différents (reconstruit au fil des barres)."""
+    fresh = IndicatorState(symbol, timeframe, **params)
+    raw = get_indicator_state_json(symbol, fresh.timeframe)
+    if not raw:
+        return fresh
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return fresh
+    if not fresh._same_params(data):
+        return fresh
+    return IndicatorState.from_dict(data)
+
+
+def save_indicator_state(state: IndicatorState) -> None:
+    save_indicator_state_json(state.symbol, state.timeframe, json.dumps(state.to_dict()), state.last_time)
@@ -6,9 +6,8 @@ from __future__ import annotations
 import logging
 from typing import Optional
 
-import httpx
-
 from app.config import get_settings
+from app.infra.bridge_http import bridge_timeout, get_bridge_client
 
 log = logging.getLogger(__name__)
 
@@ -26,14 +25,15 @@ def mt5_modify_sl_to_be(symbol: str, new_sl: float, direction: str) -> bool:
         return False
 
     sym = (getattr(settings, "mt5_position_symbol", "") or "").strip() or symbol
-    url = bridge_url.rstrip("/") + "/position/modify-sl"
+    path = "/position/modify-sl"
+    url = bridge_url.rstrip("/") + path
     payload = {
         "symbol": sym,
         "new_sl": new_sl,
         "direction": direction.upper(),
     }
     try:
-        resp = httpx.post(url, json=payload, timeout=5.0)
+        resp = get_bridge_client().post(url, json=payload, timeout=bridge_timeout(path))
         data = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
         if data.get("ok"):
             log.info("MT5 SL modifié à BE: %s %s new_sl=%.2f", sym, direction, new_sl)
@@ -57,14 +57,15 @@ def mt5_close_partial_at_tp1(symbol: str, direction: str, percent: float = 50.0)
         log.debug("MT5_BRIDGE_URL vide, skip clôture partielle")
         return False
 
-    url = bridge_url.rstrip("/") + "/position/close-partial"
+    path = "/position/close-partial"
+    url = bridge_url.rstrip("/") + path
     payload = {
         "symbol": symbol,
         "direction": direction.upper(),
         "percent": percent,
     }
     try:
-        resp = httpx.post(url, json=payload, timeout=5.0)
+        resp = get_bridge_client().post(url, json=payload, timeout=bridge_timeout(path))
         data = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
         if data.get("ok"):
             vol = data.get("volume_closed", 0)
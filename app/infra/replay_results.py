@@ -0,0 +1,183 @@
+"""
+Base SQLite des résultats de replay (séparée de la base de production) : un run = paramètres + résumé,
+décisions GO/NO_GO par cycle et trades simulés. Une connexion par run, écritures groupées
+(commit toutes les COMMIT_EVERY lignes) : des mois de M5 sans un commit par barre.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.engines.replay_engine import ReplayDecision, ReplaySummary, SimulatedTrade
+
+COMMIT_EVERY = 2000
+
+
+class ReplayResultsDB:
+    def __init__(self, path: str) -> None:
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.run_id: Optional[int] = None
+        self._pending = 0
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS replay_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_ts_utc TEXT NOT NULL,
+                finished_ts_utc TEXT,
+                symbol TEXT NOT NULL,
+                base_tf TEXT NOT NULL,
+                start_time INTEGER,
+                end_time INTEGER,
+                params_json TEXT,
+                summary_json TEXT
+            );
+            CREATE TABLE IF NOT EXISTS replay_decisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL,
+                ts_utc TEXT NOT NULL,
+                status TEXT NOT NULL,
+                blocked_by TEXT,
+                direction TEXT,
+                setup_type TEXT,
+                entry REAL,
+                sl REAL,
+                tp1 REAL,
+                tp2 REAL,
+                score_total INTEGER,
+                taken INTEGER,
+                why_json TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_replay_decisions_run ON replay_decisions(run_id, ts_utc);
+            CREATE TABLE IF NOT EXISTS replay_trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL,
+                direction TEXT,
+                setup_type TEXT,
+                entry REAL,
+                sl REAL,
+                tp1 REAL,
+                tp2 REAL,
+                opened_ts_utc TEXT,
+                closed_ts_utc TEXT,
+                exit_status TEXT,
+                outcome_pts REAL,
+                be_applied INTEGER,
+                bars INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_replay_trades_run ON replay_trades(run_id);
+            """
+        )
+        self.conn.commit()
+
+    def start_run(
+        self, symbol: str, base_tf: str, start_time: Optional[int], end_time: Optional[int], params: Dict[str, Any]
+    ) -> int:
+        cur = self.conn.execute(
+            "INSERT INTO replay_runs (started_ts_utc, symbol, base_tf, start_time, end_time, params_json) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (datetime.now(timezone.utc).isoformat(), symbol, base_tf, start_time, end_time, json.dumps(params, default=str)),
+        )
+        self.conn.commit()
+        self.run_id = int(cur.lastrowid)
+        return self.run_id
+
+    def _written(self) -> None:
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.conn.commit()
+            self._pending = 0
+
+    def add_decision(self, decision: ReplayDecision) -> None:
+        self.conn.execute(
+            "INSERT INTO replay_decisions (run_id, ts_utc, status, blocked_by, direction, setup_type, "
+            "entry, sl, tp1, tp2, score_total, taken, why_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.run_id, decision.ts_utc, decision.status, decision.blocked_by, decision.direction,
+                decision.setup_type, decision.entry, decision.sl, decision.tp1, decision.tp2,
+                decision.score_total, 1 if decision.taken else 0, json.dumps(list(decision.why), ensure_ascii=False),
+            ),
+        )
+        self._written()
+
+    def add_trade(self, trade: SimulatedTrade) -> None:
+        self.conn.execute(
+            "INSERT INTO replay_trades (run_id, direction, setup_type, entry, sl, tp1, tp2, opened_ts_utc, "
+            "closed_ts_utc, exit_status, outcome_pts, be_applied, bars) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.run_id, trade.direction, trade.setup_type, trade.entry, trade.initial_sl, trade.tp1, trade.tp2,
+                trade.opened_ts_utc, trade.closed_ts_utc, trade.exit_status, trade.outcome_pts,
+                1 if trade.be_applied else 0, trade.bars,
+            ),
+        )
+        self._written()
+
+    def finish_run(self, summary: ReplaySummary) -> None:
+        self.conn.execute(
+            "UPDATE replay_runs SET finished_ts_utc = ?, summary_json = ? WHERE id = ?",
+            (datetime.now(timezone.utc).isoformat(), json.dumps(summary.to_dict()), self.run_id),
+        )
+        self.conn.commit()
+        self._pending = 0
+
+    def get_trades(self, run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT * FROM replay_trades WHERE run_id = ? ORDER BY id", (run_id or self.run_id,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+class WalkForwardCache:
+    """
+    Résultats walk-forward par fenêtre (même fichier SQLite que les runs de replay), indexés par une clé
+    calculée par l'appelant (bornes, spec, données, settings) : une fenêtre déjà calculée n'est pas rejouée.
+    """
+
+    def __init__(self, path: str) -> None:
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS walkforward_windows (
+                cache_key TEXT PRIMARY KEY,
+                created_ts_utc TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                is_start INTEGER NOT NULL,
+                oos_end INTEGER NOT NULL,
+                result_json TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT result_json FROM walkforward_windows WHERE cache_key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, symbol: str, is_start: int, oos_end: int, result: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO walkforward_windows (cache_key, created_ts_utc, symbol, is_start, oos_end, result_json) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, datetime.now(timezone.utc).isoformat(), symbol, is_start, oos_end, json.dumps(result, default=str)),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
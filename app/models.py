@@ -3,7 +3,7 @@ from __future__ import annotations
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class DecisionStatus(str, Enum):
@@ -71,6 +71,8 @@ class DecisionPacket(BaseModel):
     state: Dict[str, Any]
     timestamps: Dict[str, Any]
     data_latency_ms: int
+    # Dernier ScoreTrace calculé (engines.scorer), hors sérialisation
+    _score_memo: Any = PrivateAttr(default=None)
 
 
 class DecisionAIOutput(BaseModel):
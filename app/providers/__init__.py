@@ -1,13 +1,67 @@
+from __future__ import annotations
+
 from app.config import get_settings
+from app.infra.bridge_http import close_bridge_client, run_on_bridge_loop, stop_bridge_loop
+from app.providers.async_remote_mt5_provider import AsyncRemoteMT5Provider
 from app.providers.market_data_provider import MarketDataProvider
+from app.providers.market_snapshot import MarketSnapshot, fetch_market_snapshot, fetch_market_snapshot_async
 from app.providers.mock import MockDataProvider
 from app.providers.remote_mt5_provider import RemoteMT5Provider
+from app.providers.resampler import AsyncResamplingProvider, ResamplingProvider
+
+
+_remote_provider: RemoteMT5Provider | ResamplingProvider | None = None
+_async_provider: AsyncRemoteMT5Provider | AsyncResamplingProvider | None = None
 
 
 def get_provider() -> MarketDataProvider:
+    global _remote_provider
     settings = get_settings()
     if settings.market_provider == "mock":
         return MockDataProvider()
     if settings.market_provider == "remote_mt5":
-        return RemoteMT5Provider()
+        # Longue durée : garde le pool keep-alive et l'état /snapshot entre les cycles
+        if _remote_provider is None:
+            _remote_provider = RemoteMT5Provider()
+            base_tf = getattr(settings, "market_resample_base_tf", "")
+            if base_tf:
+                # Un seul TF lu au bridge, les autres rééchantillonnés en mémoire
+                _remote_provider = ResamplingProvider(_remote_provider, base_tf)
+        return _remote_provider
     raise NotImplementedError("MARKET_PROVIDER non supporté")
+
+
+def get_async_provider() -> AsyncRemoteMT5Provider | AsyncResamplingProvider | None:
+    """Provider async longue durée si MARKET_PROVIDER=remote_mt5 et MT5_ASYNC_FETCH=true, sinon None."""
+    global _async_provider
+    settings = get_settings()
+    if settings.market_provider != "remote_mt5" or not getattr(settings, "mt5_async_fetch", False):
+        return None
+    if _async_provider is None:
+        _async_provider = AsyncRemoteMT5Provider()
+        base_tf = getattr(settings, "market_resample_base_tf", "")
+        if base_tf:
+            # Comme en sync : un seul TF lu au bridge, les autres rééchantillonnés en mémoire
+            _async_provider = AsyncResamplingProvider(_async_provider, base_tf)
+    return _async_provider
+
+
+def fetch_cycle_snapshot(provider: MarketDataProvider, symbol: str) -> MarketSnapshot:
+    """Snapshot du cycle : lectures parallèles (provider async) si activé, sinon séquentielles."""
+    async_provider = get_async_provider()
+    if async_provider is not None:
+        return run_on_bridge_loop(fetch_market_snapshot_async(async_provider, symbol))
+    return fetch_market_snapshot(provider, symbol)
+
+
+def close_provider() -> None:
+    """Libère les providers longue durée, le pool HTTP bridge et la boucle async — appelé au shutdown."""
+    global _remote_provider, _async_provider
+    if _remote_provider is not None:
+        _remote_provider.close()
+        _remote_provider = None
+    if _async_provider is not None:
+        run_on_bridge_loop(_async_provider.aclose())
+        _async_provider = None
+    stop_bridge_loop()
+    close_bridge_client()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Protocol, Tuple
+
+
+class AsyncMarketDataProvider(Protocol):
+    """Pendant async de MarketDataProvider : les lectures d'un cycle peuvent partir en parallèle."""
+
+    async def get_candles(self, symbol: str, timeframe: str, n: int) -> List[Dict[str, float]]:
+        ...
+
+    async def get_spread(self, symbol: str) -> float:
+        ...
+
+    async def get_symbol_specs(self, symbol: str) -> Dict[str, float]:
+        ...
+
+    async def get_server_time(self) -> datetime:
+        ...
+
+    async def get_tick(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """(bid, ask) ou None si indisponible."""
+        ...
@@ -0,0 +1,111 @@
+"""
+Provider MT5 distant asynchrone (httpx.AsyncClient) : mêmes endpoints que RemoteMT5Provider,
+mais les lectures d'un cycle (heure, spread, M15, H1, M5, tick) partent en parallèle.
+Le client async est lié à la boucle qui l'a créé : depuis du code synchrone, passer par
+run_on_bridge_loop (app.infra.bridge_http).
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import get_settings
+from app.infra.bridge_http import DEFAULT_TIMEOUT, bridge_limits, bridge_timeout
+from app.providers.candle_buffer import CandleRingBuffer
+from app.providers.candle_codec import columns_to_candles
+from app.providers.remote_mt5_provider import (
+    _candles_format,
+    _columns_from_response,
+    _columns_params,
+    _merge_snapshot_candles,
+    _server_time_from_payload,
+    _snapshot_params,
+    _snapshot_unsupported,
+    _tick_from_payload,
+)
+
+
+class AsyncRemoteMT5Provider:
+    def __init__(self, client: Optional[httpx.AsyncClient] = None) -> None:
+        self._client = client
+        self._snapshot_supported = True
+        self._candles = CandleRingBuffer()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=bridge_limits())
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, path: str, params: Dict[str, str], raw: bool = False):
+        settings = get_settings()
+        if not settings.mt5_bridge_url:
+            raise RuntimeError("MT5_BRIDGE_URL manquant")
+        url = settings.mt5_bridge_url.rstrip("/") + path
+        last_exc: Exception | None = None
+        for _ in range(2):
+            try:
+                resp = await self.client.get(url, params=params, timeout=bridge_timeout(path))
+                resp.raise_for_status()
+                return resp if raw else resp.json()
+            except Exception as exc:  # noqa: BLE001
+                last_exc = exc
+        raise RuntimeError(f"MT5 bridge error: {last_exc}") from last_exc
+
+    async def get_candles(self, symbol: str, timeframe: str, n: int) -> List[Dict[str, float]]:
+        since = self._candles.since(symbol, timeframe, n)
+        if _candles_format() != "json":
+            resp = await self._request("/candles", _columns_params(symbol, timeframe, n, since), raw=True)
+            candles = columns_to_candles(_columns_from_response(resp))
+        else:
+            params = {"symbol": symbol, "timeframe": timeframe, "count": str(n)}
+            if since is not None:
+                params["since"] = str(since)
+            candles = (await self._request("/candles", params)).get("candles", [])
+        if since is not None:
+            return self._candles.merge(symbol, timeframe, candles, n)
+        return self._candles.store(symbol, timeframe, candles, n)
+
+    async def get_spread(self, symbol: str) -> float:
+        payload = await self._request("/spread", {"symbol": symbol})
+        return float(payload.get("spread_points", 0.0))
+
+    async def get_symbol_specs(self, symbol: str) -> Dict[str, float]:
+        return {
+            "tick_value": 1.0,
+            "tick_size": 0.01,
+            "lot_min": 0.01,
+            "lot_step": 0.01,
+        }
+
+    async def get_server_time(self) -> datetime:
+        return _server_time_from_payload(await self._request("/tick", {"symbol": "XAUUSD"}))
+
+    async def get_tick(self, symbol: str) -> Optional[Tuple[float, float]]:
+        try:
+            return _tick_from_payload(await self._request("/tick", {"symbol": symbol}))
+        except Exception:  # noqa: BLE001
+            return None
+
+    async def get_snapshot(self, symbol: str, timeframes: Dict[str, int]) -> Optional[Dict]:
+        """Même contrat que RemoteMT5Provider.get_snapshot (None → lectures unitaires en parallèle)."""
+        if not self._snapshot_supported:
+            return None
+        params, sinces = _snapshot_params(self._candles, symbol, timeframes)
+        try:
+            payload = await self._request("/snapshot", params)
+        except RuntimeError as exc:
+            unsupported = _snapshot_unsupported(exc)
+            if unsupported is None:
+                raise
+            if unsupported:
+                self._snapshot_supported = False
+            return None
+        return _merge_snapshot_candles(self._candles, symbol, timeframes, sinces, payload)
@@ -0,0 +1,68 @@
+"""
+Ring buffer de bougies par (symbole, TF) côté provider.
+Après un premier chargement complet, on ne demande au bridge que les barres
+time >= dernière barre stockée (since=) : la barre en formation est toujours rafraîchie.
+"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+
+def _bar_time(candle: Dict) -> Optional[int]:
+    t = candle.get("time")
+    if t is None:
+        return None
+    try:
+        return int(t)
+    except (TypeError, ValueError):
+        return None
+
+
+class CandleRingBuffer:
+    def __init__(self) -> None:
+        self._buffers: Dict[Tuple[str, str], Deque[Dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str) -> Tuple[str, str]:
+        return (symbol, timeframe.upper())
+
+    def since(self, symbol: str, timeframe: str, n: int) -> Optional[int]:
+        """time de la dernière barre si le buffer couvre n barres, sinon None (rechargement complet)."""
+        with self._lock:
+            buf = self._buffers.get(self._key(symbol, timeframe))
+            if not buf or len(buf) < n:
+                return None
+            return _bar_time(buf[-1])
+
+    def store(self, symbol: str, timeframe: str, candles: Sequence[Dict], n: int) -> List[Dict]:
+        """Chargement complet : remplace le buffer (capacité n). Bougies sans time → non bufferisées."""
+        candles = list(candles or [])
+        key = self._key(symbol, timeframe)
+        with self._lock:
+            if not candles or any(_bar_time(c) is None for c in candles):
+                self._buffers.pop(key, None)
+                return candles[-n:]
+            self._buffers[key] = deque(candles, maxlen=max(n, len(candles)))
+        return candles[-n:]
+
+    def merge(self, symbol: str, timeframe: str, candles: Sequence[Dict], n: int) -> List[Dict]:
+        """Fusion incrémentale : les barres reçues remplacent celles de même time (forming bar) puis s'ajoutent."""
+        new = [c for c in (candles or []) if _bar_time(c) is not None]
+        key = self._key(symbol, timeframe)
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None:
+                return list(candles or [])[-n:]
+            if new:
+                first_t = _bar_time(new[0])
+                while buf and _bar_time(buf[-1]) >= first_t:
+                    buf.pop()
+                buf.extend(new)
+            return list(buf)[-n:]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffers.clear()
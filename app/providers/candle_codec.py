@@ -0,0 +1,43 @@
+"""
+Décodage des formats compacts de /candles (format=columnar, format=npy) en tableaux numpy.
+Les colonnes suivent le structured array MT5 : time, open, high, low, close, tick_volume, spread, real_volume.
+"""
+from __future__ import annotations
+
+import io
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+INT_FIELDS = ("time", "tick_volume", "spread", "real_volume")
+
+
+def decode_columnar(columns: Mapping[str, Sequence]) -> Dict[str, np.ndarray]:
+    """{"time": [...], "open": [...], ...} → un ndarray contigu par champ."""
+    out: Dict[str, np.ndarray] = {}
+    for name, values in columns.items():
+        dtype = np.float64 if name in PRICE_FIELDS else np.int64
+        out[name] = np.asarray(values, dtype=dtype)
+    return out
+
+
+def decode_npy(content: bytes) -> Dict[str, np.ndarray]:
+    """Corps application/x-npy (structured array MT5) → un ndarray contigu par champ."""
+    rates = np.load(io.BytesIO(content), allow_pickle=False)
+    if rates.dtype.names is None:
+        raise ValueError("npy candles: structured array attendu")
+    return {name: np.ascontiguousarray(rates[name]) for name in rates.dtype.names}
+
+
+def candles_to_columns(candles: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """Liste de dicts (format json) → colonnes, pour servir la même API tableau."""
+    fields = [f for f in INT_FIELDS + PRICE_FIELDS if candles and f in candles[0]]
+    return decode_columnar({f: [c.get(f) or 0 for c in candles] for f in fields})
+
+
+def columns_to_candles(columns: Mapping[str, np.ndarray]) -> List[Dict]:
+    """Adaptateur vers l'API dict des moteurs (clé time en secondes, pas de ts/time_msc redondants)."""
+    names = [n for n in INT_FIELDS + PRICE_FIELDS if n in columns]
+    lists = [columns[n].tolist() for n in names]
+    return [dict(zip(names, row)) for row in zip(*lists)]
@@ -0,0 +1,157 @@
+"""
+Snapshot marché d'un cycle /analyze — tick, spread, heure serveur, bougies M5/M15/H1.
+Lu une seule fois en début de cycle puis partagé par toutes les étapes (packet, suivi,
+phase marché, structure, room to target) : chaque moteur voit les mêmes barres.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.engines.candle_frame import CandleFrame
+from app.infra.clock import get_clock
+
+log = logging.getLogger(__name__)
+
+H1_FETCH_BARS = 100
+M5_FETCH_BARS = 48
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    symbol: str
+    server_time: datetime
+    spread: float
+    tick: Optional[Tuple[float, float]]  # (bid, ask) ou None si indisponible
+    candles_m5: Tuple[dict, ...]
+    candles_m15: Tuple[dict, ...]
+    candles_h1: Tuple[dict, ...]
+
+    @cached_property
+    def frame_m5(self) -> CandleFrame:
+        return CandleFrame.from_candles(self.candles_m5, self.symbol, "M5")
+
+    @cached_property
+    def frame_m15(self) -> CandleFrame:
+        return CandleFrame.from_candles(self.candles_m15, self.symbol, get_settings().tf_signal.upper())
+
+    @cached_property
+    def frame_h1(self) -> CandleFrame:
+        return CandleFrame.from_candles(self.candles_h1, self.symbol, get_settings().tf_context.upper())
+
+    @property
+    def bid(self) -> Optional[float]:
+        return float(self.tick[0]) if self.tick else None
+
+    @property
+    def ask(self) -> Optional[float]:
+        if not self.tick:
+            return None
+        return float(self.tick[1]) if len(self.tick) > 1 else float(self.tick[0])
+
+
+def _snapshot_from_payload(symbol: str, payload: Dict, tf_m15: str, tf_h1: str) -> MarketSnapshot:
+    """Construit le snapshot depuis la réponse /snapshot du bridge (un seul aller-retour)."""
+    ts = payload.get("ts")
+    server_time = datetime.fromisoformat(ts) if ts else get_clock().now()
+    bid = payload.get("bid")
+    ask = payload.get("ask")
+    tick = (float(bid), float(ask)) if bid is not None and ask is not None else None
+    candles = payload.get("candles") or {}
+    return MarketSnapshot(
+        symbol=symbol,
+        server_time=server_time,
+        spread=float(payload.get("spread_points", 0.0)),
+        tick=tick,
+        candles_m5=tuple(candles.get("M5") or ()),
+        candles_m15=tuple(candles.get(tf_m15.upper()) or ()),
+        candles_h1=tuple(candles.get(tf_h1.upper()) or ()),
+    )
+
+
+def fetch_market_snapshot(provider, symbol: str) -> MarketSnapshot:
+    """
+    Récupère toutes les données marché du cycle.
+    Bridge avec /snapshot : un seul appel. Sinon appels unitaires :
+    M15/H1/spread/heure obligatoires (exception → DATA_OFF côté appelant) ; M5 et tick tolérants.
+    """
+    settings = get_settings()
+    m15_bars = getattr(settings, "m15_fetch_bars", 80)
+    if hasattr(provider, "get_snapshot"):
+        payload = provider.get_snapshot(
+            symbol,
+            {"M5": M5_FETCH_BARS, settings.tf_signal.upper(): m15_bars, settings.tf_context.upper(): H1_FETCH_BARS},
+        )
+        if payload is not None:
+            snapshot = _snapshot_from_payload(symbol, payload, settings.tf_signal, settings.tf_context)
+            log.info("M15 candles fetched = %d (snapshot)", len(snapshot.candles_m15))
+            return snapshot
+    server_time = provider.get_server_time()
+    spread = provider.get_spread(symbol)
+    candles_m15 = provider.get_candles(symbol, settings.tf_signal, m15_bars)
+    log.info("M15 candles fetched = %d", len(candles_m15))
+    candles_h1 = provider.get_candles(symbol, settings.tf_context, H1_FETCH_BARS)
+    try:
+        candles_m5 = provider.get_candles(symbol, "M5", M5_FETCH_BARS) if hasattr(provider, "get_candles") else []
+    except Exception:  # noqa: BLE001
+        candles_m5 = []
+    tick = provider.get_tick(symbol) if hasattr(provider, "get_tick") else None
+    return MarketSnapshot(
+        symbol=symbol,
+        server_time=server_time,
+        spread=float(spread),
+        tick=tuple(tick) if tick else None,
+        candles_m5=tuple(candles_m5 or ()),
+        candles_m15=tuple(candles_m15 or ()),
+        candles_h1=tuple(candles_h1 or ()),
+    )
+
+
+async def fetch_market_snapshot_async(provider, symbol: str) -> MarketSnapshot:
+    """
+    Variante async (AsyncMarketDataProvider) : /snapshot si disponible, sinon heure, spread,
+    M15, H1, M5 et tick lancés ensemble (asyncio.gather) — un aller-retour de temps mur.
+    Mêmes règles que fetch_market_snapshot : M5 et tick tolérants, le reste lève.
+    """
+    settings = get_settings()
+    m15_bars = getattr(settings, "m15_fetch_bars", 80)
+    if hasattr(provider, "get_snapshot"):
+        payload = await provider.get_snapshot(
+            symbol,
+            {"M5": M5_FETCH_BARS, settings.tf_signal.upper(): m15_bars, settings.tf_context.upper(): H1_FETCH_BARS},
+        )
+        if payload is not None:
+            snapshot = _snapshot_from_payload(symbol, payload, settings.tf_signal, settings.tf_context)
+            log.info("M15 candles fetched = %d (snapshot)", len(snapshot.candles_m15))
+            return snapshot
+    server_time, spread, candles_m15, candles_h1, candles_m5, tick = await asyncio.gather(
+        provider.get_server_time(),
+        provider.get_spread(symbol),
+        provider.get_candles(symbol, settings.tf_signal, m15_bars),
+        provider.get_candles(symbol, settings.tf_context, H1_FETCH_BARS),
+        provider.get_candles(symbol, "M5", M5_FETCH_BARS),
+        provider.get_tick(symbol),
+        return_exceptions=True,
+    )
+    for required in (server_time, spread, candles_m15, candles_h1):
+        if isinstance(required, BaseException):
+            raise required
+    if isinstance(candles_m5, BaseException):
+        candles_m5 = []
+    if isinstance(tick, BaseException):
+        tick = None
+    log.info("M15 candles fetched = %d", len(candles_m15))
+    return MarketSnapshot(
+        symbol=symbol,
+        server_time=server_time,
+        spread=float(spread),
+        tick=tuple(tick) if tick else None,
+        candles_m5=tuple(candles_m5 or ()),
+        candles_m15=tuple(candles_m15 or ()),
+        candles_h1=tuple(candles_h1 or ()),
+    )
@@ -1,9 +1,16 @@
 import os
-from datetime import datetime, timezone
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.infra.clock import Clock, FixedClock, get_clock, installed_clock
 
 
 class MockDataProvider:
+    clock: Optional[Clock] = None  # heure serveur : server_clock() si non fournie
+
+    def __init__(self, clock: Optional[Clock] = None) -> None:
+        self.clock = clock
+
     def _maybe_fail(self) -> None:
         if os.environ.get("MOCK_PROVIDER_FAIL", "").lower() == "true":
             raise RuntimeError("Mock provider failure")
@@ -36,12 +43,21 @@ class MockDataProvider:
             "lot_step": 0.01,
         }
 
+    def server_clock(self) -> Clock:
+        """
+        Horloge serveur simulée : clock fournie, sinon horloge installée (set_clock), sinon heure figée
+        MOCK_SERVER_TIME_UTC (tests), sinon horloge système. Lecture de l'heure uniquement.
+        """
+        if self.clock is not None:
+            return self.clock
+        forced = os.environ.get("MOCK_SERVER_TIME_UTC")
+        if forced and installed_clock() is None:
+            return FixedClock(datetime.fromisoformat(forced))
+        return get_clock()
+
     def get_server_time(self) -> datetime:
         self._maybe_fail()
-        forced = os.environ.get("MOCK_SERVER_TIME_UTC")
-        if forced:
-            return datetime.fromisoformat(forced)
-        return datetime.now(timezone.utc)
+        return self.server_clock().now()
 
     def get_tick(self, symbol: str):
         self._maybe_fail()
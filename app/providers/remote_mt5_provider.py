@@ -1,15 +1,115 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 import httpx
+import numpy as np
 
 from app.config import get_settings
+from app.infra.bridge_http import bridge_timeout, close_bridge_client, get_bridge_client
+from app.infra.clock import get_clock
+from app.providers.candle_buffer import CandleRingBuffer
+from app.providers.candle_codec import candles_to_columns, columns_to_candles, decode_columnar, decode_npy
+
+
+def _candles_format() -> str:
+    """MT5_CANDLES_FORMAT : json (défaut), columnar ou npy."""
+    return (getattr(get_settings(), "mt5_candles_format", "json") or "json").lower()
+
+
+def _columns_params(symbol: str, timeframe: str, n: int, since: Optional[int]) -> Dict[str, str]:
+    fmt = "npy" if _candles_format() == "npy" else "columnar"
+    params = {"symbol": symbol, "timeframe": timeframe, "count": str(n), "format": fmt}
+    if since is not None:
+        params["since"] = str(since)
+    return params
+
+
+def _columns_from_response(resp: httpx.Response) -> Dict[str, np.ndarray]:
+    if resp.headers.get("content-type", "").startswith("application/x-npy"):
+        return decode_npy(resp.content)
+    payload = resp.json()
+    if "columns" in payload:
+        return decode_columnar(payload["columns"])
+    # Bridge sans format= : liste de dicts
+    return candles_to_columns(payload.get("candles", []))
+
+
+def _server_time_from_payload(payload: Dict) -> datetime:
+    ts = payload.get("ts")
+    if ts:
+        return datetime.fromisoformat(ts)
+    return get_clock().now()
+
+
+def _tick_from_payload(payload: Dict) -> Optional[Tuple[float, float]]:
+    bid = payload.get("bid")
+    ask = payload.get("ask")
+    if bid is not None and ask is not None:
+        return (float(bid), float(ask))
+    return None
+
+
+def _snapshot_params(buffer: CandleRingBuffer, symbol: str, timeframes: Dict[str, int]) -> Tuple[Dict, Dict]:
+    """Paramètres /snapshot (since par TF déjà bufferisée) + sinces utilisés pour la fusion."""
+    sinces = {tf: buffer.since(symbol, tf, n) for tf, n in timeframes.items()}
+    tfs = ",".join(
+        f"{tf}:{n}" if sinces[tf] is None else f"{tf}:{n}:{sinces[tf]}" for tf, n in timeframes.items()
+    )
+    params = {"symbol": symbol, "tfs": tfs}
+    if _candles_format() != "json":
+        params["format"] = "columnar"
+    return params, sinces
+
+
+def _snapshot_unsupported(exc: RuntimeError) -> Optional[bool]:
+    """None si erreur transport (à propager), sinon True si le bridge ne connaît pas /snapshot."""
+    cause = exc.__cause__
+    if not isinstance(cause, httpx.HTTPStatusError):
+        return None
+    status = getattr(getattr(cause, "response", None), "status_code", None)
+    return status in (404, 405)
+
+
+def _merge_snapshot_candles(
+    buffer: CandleRingBuffer, symbol: str, timeframes: Dict[str, int], sinces: Dict, payload: Dict
+) -> Dict:
+    received = payload.get("candles") or {}
+    candles: Dict[str, List[Dict]] = {}
+    for tf, n in timeframes.items():
+        bars = received.get(tf) or []
+        if isinstance(bars, dict):
+            bars = columns_to_candles(decode_columnar(bars))
+        if sinces[tf] is None:
+            candles[tf] = buffer.store(symbol, tf, bars, n)
+        else:
+            candles[tf] = buffer.merge(symbol, tf, bars, n)
+    payload["candles"] = candles
+    return payload
 
 
 class RemoteMT5Provider:
-    def _request(self, path: str, params: Dict[str, str]) -> Dict:
+    def __init__(self, client: Optional[httpx.Client] = None) -> None:
+        # Client injecté (tests) ou pool bridge partagé du process (keep-alive)
+        self._client = client
+        # Passe à False si le bridge ne connaît pas /snapshot (ancienne version) → appels unitaires
+        self._snapshot_supported = True
+        # Bougies déjà reçues par (symbole, TF) → sync incrémentale since=
+        self._candles = CandleRingBuffer()
+
+    @property
+    def client(self) -> httpx.Client:
+        return self._client if self._client is not None else get_bridge_client()
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        else:
+            close_bridge_client()
+
+    def _request(self, path: str, params: Dict[str, str], raw: bool = False):
         settings = get_settings()
         if not settings.mt5_bridge_url:
             raise RuntimeError("MT5_BRIDGE_URL manquant")
@@ -17,12 +117,12 @@ class RemoteMT5Provider:
         last_exc: Exception | None = None
         for _ in range(2):
             try:
-                resp = httpx.get(url, params=params, timeout=4.0)
+                resp = self.client.get(url, params=params, timeout=bridge_timeout(path))
                 resp.raise_for_status()
-                return resp.json()
+                return resp if raw else resp.json()
             except Exception as exc:  # noqa: BLE001
                 last_exc = exc
-        raise RuntimeError(f"MT5 bridge error: {last_exc}")
+        raise RuntimeError(f"MT5 bridge error: {last_exc}") from last_exc
 
     def _request_with_fallback(self, path: str, primary: Dict[str, str], fallback: Dict[str, str]) -> Dict:
         try:
@@ -31,12 +131,28 @@ class RemoteMT5Provider:
             return self._request(path, fallback)
 
     def get_candles(self, symbol: str, timeframe: str, n: int) -> List[Dict[str, float]]:
-        payload = self._request_with_fallback(
-            "/candles",
-            {"symbol": symbol, "timeframe": timeframe, "count": str(n)},
-            {"symbol": symbol, "tf": timeframe, "n": str(n)},
-        )
-        return payload.get("candles", [])
+        since = self._candles.since(symbol, timeframe, n)
+        if _candles_format() != "json":
+            resp = self._request("/candles", _columns_params(symbol, timeframe, n, since), raw=True)
+            candles = columns_to_candles(_columns_from_response(resp))
+        elif since is not None:
+            candles = self._request(
+                "/candles",
+                {"symbol": symbol, "timeframe": timeframe, "count": str(n), "since": str(since)},
+            ).get("candles", [])
+        else:
+            candles = self._request_with_fallback(
+                "/candles",
+                {"symbol": symbol, "timeframe": timeframe, "count": str(n)},
+                {"symbol": symbol, "tf": timeframe, "n": str(n)},
+            ).get("candles", [])
+        if since is not None:
+            return self._candles.merge(symbol, timeframe, candles, n)
+        return self._candles.store(symbol, timeframe, candles, n)
+
+    def get_candle_columns(self, symbol: str, timeframe: str, n: int) -> Dict[str, np.ndarray]:
+        """Fenêtre complète décodée directement en tableaux numpy (time, open, high, low, close...)."""
+        return _columns_from_response(self._request("/candles", _columns_params(symbol, timeframe, n, None), raw=True))
 
     def get_spread(self, symbol: str) -> float:
         payload = self._request("/spread", {"symbol": symbol})
@@ -51,19 +167,30 @@ class RemoteMT5Provider:
         }
 
     def get_server_time(self) -> datetime:
-        payload = self._request("/tick", {"symbol": "XAUUSD"})
-        ts = payload.get("ts")
-        if ts:
-            return datetime.fromisoformat(ts)
-        return datetime.now(timezone.utc)
+        return _server_time_from_payload(self._request("/tick", {"symbol": "XAUUSD"}))
 
     def get_tick(self, symbol: str) -> Optional[Tuple[float, float]]:
         try:
-            payload = self._request("/tick", {"symbol": symbol})
-            bid = payload.get("bid")
-            ask = payload.get("ask")
-            if bid is not None and ask is not None:
-                return (float(bid), float(ask))
+            return _tick_from_payload(self._request("/tick", {"symbol": symbol}))
         except Exception:
-            pass
-        return None
+            return None
+
+    def get_snapshot(self, symbol: str, timeframes: Dict[str, int]) -> Optional[Dict]:
+        """
+        Tick + spread + bougies de plusieurs TF en un seul aller-retour (/snapshot).
+        Retourne None si le bridge répond mais ne sait pas servir /snapshot (le core repasse
+        alors par /tick, /spread, /candles). Bridge injoignable → RuntimeError (DATA_OFF).
+        """
+        if not self._snapshot_supported:
+            return None
+        params, sinces = _snapshot_params(self._candles, symbol, timeframes)
+        try:
+            payload = self._request("/snapshot", params)
+        except RuntimeError as exc:
+            unsupported = _snapshot_unsupported(exc)
+            if unsupported is None:
+                raise
+            if unsupported:
+                self._snapshot_supported = False
+            return None
+        return _merge_snapshot_candles(self._candles, symbol, timeframes, sinces, payload)
@@ -0,0 +1,215 @@
+"""
+ReplayProvider : MarketDataProvider sur un historique (CandleStore du recorder ou bougies importées).
+Un curseur avance barre de base par barre de base (M5 par défaut) ; au curseur i l'heure serveur est
+l'ouverture de la barre i, comme un cycle /analyze qui tomberait juste après une clôture :
+barres de base clôturées jusqu'à i-1 + barre i en formation réduite à son open (O=H=L=C).
+Les TF supérieurs sont rééchantillonnés depuis la base (barres clôturées précalculées une fois,
+barre en formation agrégée à la volée) : aucune barre ne voit de prix postérieur au curseur.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.infra.candle_store import CandleStore, TimeLike, _to_epoch
+from app.providers.candle_codec import candles_to_columns, columns_to_candles, decode_npy
+from app.providers.resampler import can_resample, resample_columns, tf_seconds
+
+DEFAULT_SPECS: Dict[str, float] = {
+    "tick_value": 1.0,
+    "tick_size": 0.01,
+    "lot_min": 0.01,
+    "lot_step": 0.01,
+}
+
+
+def load_candles_file(path: str) -> Dict[str, np.ndarray]:
+    """Bougies importées : .npy (structured array MT5 copy_rates) ou .json (liste de dicts / colonnes)."""
+    p = Path(path)
+    if p.suffix.lower() == ".npy":
+        return decode_npy(p.read_bytes())
+    data = json.loads(p.read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("candles", data)
+    if isinstance(data, dict):
+        return {k: np.asarray(v) for k, v in data.items()}
+    return candles_to_columns(data)
+
+
+class ReplayProvider:
+    """
+    Historique base_tf en colonnes (time croissant, epoch serveur MT5). Le spread de la barre
+    (points) sert de spread courant et d'écart bid/ask ; specs comme MockDataProvider par défaut.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        columns: Mapping[str, np.ndarray],
+        base_tf: str = "M5",
+        *,
+        offset_sec: int = 0,
+        specs: Optional[Dict[str, float]] = None,
+        default_spread: float = 0.0,
+    ) -> None:
+        if not tf_seconds(base_tf):
+            raise ValueError(f"TF de base non supporté: {base_tf}")
+        self.symbol = symbol
+        self.base_tf = base_tf.upper()
+        self.base_sec = tf_seconds(self.base_tf)
+        self.offset_sec = offset_sec
+        self.specs = dict(specs or DEFAULT_SPECS)
+        self.default_spread = float(default_spread)
+        times = np.asarray(columns["time"])
+        if len(times) > 1 and bool(np.any(np.diff(times) < 0)):
+            order = np.argsort(times, kind="stable")
+            self._base: Dict[str, np.ndarray] = {name: np.asarray(values)[order] for name, values in columns.items()}
+        else:
+            # Déjà trié (cas normal) : vues sur les colonnes, sans copie (mémoire partagée du sweep)
+            self._base = {name: np.asarray(values) for name, values in columns.items()}
+        self.time = np.asarray(self._base["time"], dtype=np.int64)
+        self._derived: Dict[str, Dict[str, np.ndarray]] = {}
+        self._i = 0
+
+    @classmethod
+    def from_candles(cls, symbol: str, candles: List[Dict], base_tf: str = "M5", **kwargs) -> "ReplayProvider":
+        return cls(symbol, candles_to_columns(candles), base_tf, **kwargs)
+
+    @classmethod
+    def from_store(
+        cls,
+        symbol: str,
+        start: TimeLike,
+        end: TimeLike,
+        base_tf: str = "M5",
+        store: Optional[CandleStore] = None,
+        **kwargs,
+    ) -> "ReplayProvider":
+        """Barres archivées par le recorder sur [start, end[ (prévoir le warmup dans start)."""
+        records = (store or CandleStore()).read(symbol, base_tf, start, end)
+        return cls(symbol, {name: np.asarray(records[name]) for name in records.dtype.names}, base_tf, **kwargs)
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Colonnes de base triées (partagées telles quelles avec les workers du sweep)."""
+        return self._base
+
+    # --- curseur ---
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def cursor(self) -> int:
+        return self._i
+
+    def seek(self, index: int) -> None:
+        if not 0 <= index < len(self.time):
+            raise IndexError(f"curseur hors historique: {index}")
+        self._i = index
+
+    def index_at(self, when: TimeLike) -> int:
+        """Premier index dont la barre s'ouvre à when ou après."""
+        return int(np.searchsorted(self.time, _to_epoch(when), side="left"))
+
+    def steps(self, start: int = 0, stop: Optional[int] = None) -> Iterator[int]:
+        """Avance le curseur barre par barre sur [start, stop[."""
+        for i in range(start, len(self.time) if stop is None else min(stop, len(self.time))):
+            self._i = i
+            yield i
+
+    @property
+    def now_epoch(self) -> int:
+        return int(self.time[self._i])
+
+    def bar(self, index: int) -> Dict[str, float]:
+        """Barre de base complète (pour le suivi simulé une fois la barre clôturée)."""
+        return {name: values[index].item() for name, values in self._base.items()}
+
+    # --- fenêtres ---
+
+    def _stub(self, time_value: int) -> Dict[str, np.ndarray]:
+        """Barre i en formation au moment de son ouverture : un seul prix (open), pas de volume."""
+        i = self._i
+        out: Dict[str, np.ndarray] = {}
+        for name, values in self._base.items():
+            if name == "time":
+                out[name] = np.asarray([time_value], dtype=np.int64)
+            elif name in ("open", "high", "low", "close"):
+                out[name] = np.asarray([self._base["open"][i]], dtype=np.float64)
+            elif name == "spread":
+                out[name] = values[i:i + 1]
+            else:
+                out[name] = np.zeros(1, dtype=values.dtype)
+        return out
+
+    def _derived_closed(self, timeframe: str) -> Dict[str, np.ndarray]:
+        cached = self._derived.get(timeframe)
+        if cached is None:
+            cached = self._derived[timeframe] = resample_columns(self._base, timeframe, self.offset_sec)
+        return cached
+
+    def _window(self, timeframe: str, n: int) -> Dict[str, np.ndarray]:
+        i = self._i
+        tf = timeframe.upper()
+        if tf == self.base_tf:
+            lo = max(0, i - (n - 1))
+            closed = {name: values[lo:i] for name, values in self._base.items()}
+            return _concat(closed, self._stub(int(self.time[i])))
+        if not can_resample(self.base_tf, tf):
+            raise ValueError(f"TF {timeframe} non dérivable de {self.base_tf}")
+        sec = tf_seconds(tf)
+        period = (int(self.time[i]) - self.offset_sec) // sec * sec + self.offset_sec
+        full = self._derived_closed(tf)
+        k = int(np.searchsorted(full["time"], period, side="left"))
+        closed = {name: values[max(0, k - (n - 1)):k] for name, values in full.items()}
+        j = int(np.searchsorted(self.time, period, side="left"))
+        forming = _concat({name: values[j:i] for name, values in self._base.items()}, self._stub(int(self.time[i])))
+        return _concat(closed, _aggregate(forming, period))
+
+    # --- MarketDataProvider ---
+
+    def get_candles(self, symbol: str, timeframe: str, n: int) -> List[Dict[str, float]]:
+        return columns_to_candles(self._window(timeframe, n))
+
+    def get_spread(self, symbol: str) -> float:
+        if "spread" in self._base:
+            return float(self._base["spread"][self._i])
+        return self.default_spread
+
+    def get_symbol_specs(self, symbol: str) -> Dict[str, float]:
+        return dict(self.specs)
+
+    def get_server_time(self) -> datetime:
+        return datetime.fromtimestamp(self.now_epoch, tz=timezone.utc)
+
+    def get_tick(self, symbol: str) -> Optional[Tuple[float, float]]:
+        bid = float(self._base["open"][self._i])
+        return bid, bid + self.get_spread(symbol) * self.specs.get("tick_size", 0.01)
+
+
+def _aggregate(columns: Mapping[str, np.ndarray], period: int) -> Dict[str, np.ndarray]:
+    """Une barre à partir des barres de base de sa période (mêmes règles que resample_columns)."""
+    out: Dict[str, np.ndarray] = {}
+    for name, values in columns.items():
+        if name == "time":
+            out[name] = np.asarray([period], dtype=np.int64)
+        elif name == "open":
+            out[name] = values[:1]
+        elif name == "close":
+            out[name] = values[-1:]
+        elif name == "high":
+            out[name] = values.max(keepdims=True)
+        elif name in ("low", "spread"):
+            out[name] = values.min(keepdims=True)
+        else:
+            out[name] = values.sum(keepdims=True)
+    return out
+
+
+def _concat(a: Mapping[str, np.ndarray], b: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate((a[name], b[name])) for name in a}
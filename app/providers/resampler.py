@@ -0,0 +1,268 @@
+"""
+Rééchantillonnage multi-TF local : M15, H1, H4... construits à partir d'un seul TF de base (M1 ou M5).
+Les time MT5 sont l'heure serveur du broker (epoch décalé) : arrondir time au multiple du TF cible
+reproduit donc l'alignement de session du broker (H1 à l'heure pleine, H4/D1 sur minuit serveur).
+ResamplingProvider ne demande au bridge que le TF de base et sert les autres depuis la mémoire :
+moins d'appels bridge et des TF toujours synchronisés (mêmes barres de base).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.providers.candle_codec import candles_to_columns, columns_to_candles
+
+TF_SECONDS: Dict[str, int] = {
+    "M1": 60,
+    "M2": 120,
+    "M3": 180,
+    "M5": 300,
+    "M10": 600,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H2": 7200,
+    "H4": 14400,
+    "H6": 21600,
+    "H12": 43200,
+    "D1": 86400,
+}
+
+# Durée de réutilisation des barres de base entre les appels d'un même cycle (M5, M15, H1 lus à la suite)
+BASE_REUSE_SEC = 2.0
+
+
+def tf_seconds(timeframe: str) -> Optional[int]:
+    """Durée du TF en secondes ; None si inconnu ou de longueur variable (W1, MN1)."""
+    return TF_SECONDS.get((timeframe or "").upper())
+
+
+def can_resample(base_tf: str, target_tf: str) -> bool:
+    """target_tf est un multiple strict de base_tf."""
+    base, target = tf_seconds(base_tf), tf_seconds(target_tf)
+    return bool(base and target and target > base and target % base == 0)
+
+
+def resample_columns(
+    columns: Mapping[str, np.ndarray], target_tf: str, offset_sec: int = 0
+) -> Dict[str, np.ndarray]:
+    """
+    Agrège des colonnes de barres (time croissant) en barres target_tf :
+    time = début de période, open = premier, high = max, low = min, close = dernier,
+    volumes sommés, spread = min. Périodes sans barre de base absentes (week-end, pause), comme MT5.
+    La première période est écartée si la fenêtre de base commence après son ouverture (barre tronquée) ;
+    la dernière peut être en formation, comme la barre courante renvoyée par MT5.
+    offset_sec décale la grille (broker dont les H4/D1 ne s'ouvrent pas sur minuit serveur).
+    """
+    sec = tf_seconds(target_tf)
+    if not sec:
+        raise ValueError(f"TF non rééchantillonnable: {target_tf}")
+    t = np.asarray(columns["time"], dtype=np.int64)
+    if not len(t):
+        return {name: np.asarray(values)[:0] for name, values in columns.items()}
+    bucket = (t - offset_sec) // sec
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    if bucket[0] * sec + offset_sec < t[0]:
+        starts = starts[1:]
+    if not len(starts):
+        return {name: np.asarray(values)[:0] for name, values in columns.items()}
+    first = starts[0]
+    rel = starts - first
+    ends = np.append(starts[1:], len(t)) - 1
+    out: Dict[str, np.ndarray] = {"time": bucket[starts] * sec + offset_sec}
+    for name, values in columns.items():
+        if name == "time":
+            continue
+        arr = np.asarray(values)[first:]
+        if name == "open":
+            out[name] = arr[rel]
+        elif name == "close":
+            out[name] = np.asarray(values)[ends]
+        elif name == "high":
+            out[name] = np.maximum.reduceat(arr, rel)
+        elif name == "low":
+            out[name] = np.minimum.reduceat(arr, rel)
+        elif name == "spread":
+            out[name] = np.minimum.reduceat(arr, rel)
+        else:  # tick_volume, real_volume, volume
+            out[name] = np.add.reduceat(arr, rel)
+    return out
+
+
+def resample_candles(candles: Sequence[Dict], target_tf: str, offset_sec: int = 0) -> List[Dict]:
+    """Variante API dict (bougies bridge json) de resample_columns."""
+    candles = list(candles or [])
+    if not candles or any(c.get("time") is None for c in candles):
+        return []
+    columns = candles_to_columns(candles)
+    if "volume" in candles[0]:
+        columns["volume"] = np.asarray([c.get("volume") or 0 for c in candles], dtype=np.float64)
+    out = resample_columns(columns, target_tf, offset_sec)
+    bars = columns_to_candles(out)
+    if "volume" in out:
+        for bar, v in zip(bars, out["volume"].tolist()):
+            bar["volume"] = v
+    return bars
+
+
+class _Resampler:
+    """Règles communes aux providers sync et async : profondeur de base, cache de base, dérivation."""
+
+    def __init__(self, inner, base_tf: str = "M5", offset_sec: int = 0) -> None:
+        self.inner = inner
+        self.base_tf = base_tf.upper()
+        self.offset_sec = offset_sec
+        self._base_n: Dict[str, int] = {}
+        # symbole → (monotonic de lecture, nb demandé, barres de base)
+        self._base: Dict[str, Tuple[float, int, List[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def _base_count(self, timeframe: str, n: int) -> int:
+        ratio = tf_seconds(timeframe) // tf_seconds(self.base_tf)
+        # +1 période : la première, souvent tronquée, est écartée
+        return (n + 1) * ratio
+
+    def _base_request(self, symbol: str, needed: int) -> Tuple[int, Optional[List[Dict]]]:
+        """Profondeur de base à lire (max des besoins vus) et barres encore réutilisables, sinon None."""
+        with self._lock:
+            count = self._base_n[symbol] = max(needed, self._base_n.get(symbol, 0))
+            cached = self._base.get(symbol)
+        if cached is not None and cached[1] >= count and time.monotonic() - cached[0] < BASE_REUSE_SEC:
+            return count, cached[2]
+        return count, None
+
+    def _remember(self, symbol: str, count: int, candles: Sequence[Dict]) -> None:
+        with self._lock:
+            self._base[symbol] = (time.monotonic(), count, list(candles or []))
+
+    def _derive(self, timeframe: str, n: int, base: Sequence[Dict]) -> List[Dict[str, float]]:
+        if timeframe.upper() == self.base_tf:
+            return list(base)[-n:]
+        return resample_candles(base, timeframe, self.offset_sec)[-n:]
+
+    def _snapshot_request(self, symbol: str, timeframes: Dict[str, int]) -> Tuple[int, Dict[str, int]]:
+        """Profondeur de base et TF demandés au /snapshot sous-jacent (base + TF non dérivables)."""
+        derived = {tf: n for tf, n in timeframes.items() if can_resample(self.base_tf, tf)}
+        others = {tf: n for tf, n in timeframes.items() if tf not in derived and tf.upper() != self.base_tf}
+        needed = [self._base_count(tf, n) for tf, n in derived.items()]
+        needed += [n for tf, n in timeframes.items() if tf.upper() == self.base_tf]
+        with self._lock:
+            count = self._base_n[symbol] = max(needed + [self._base_n.get(symbol, 0)])
+        return count, {self.base_tf: count, **others}
+
+    def _snapshot_payload(self, symbol: str, timeframes: Dict[str, int], count: int, payload: Dict) -> Dict:
+        """TF de base et TF dérivés ajoutés au payload /snapshot du TF de base."""
+        candles = dict(payload.get("candles") or {})
+        base = list(candles.get(self.base_tf) or [])
+        self._remember(symbol, count, base)
+        for tf, n in timeframes.items():
+            if tf.upper() == self.base_tf or can_resample(self.base_tf, tf):
+                candles[tf] = self._derive(tf, n, base)
+        payload["candles"] = candles
+        return payload
+
+
+class ResamplingProvider(_Resampler):
+    """
+    MarketDataProvider qui ne lit au bridge que base_tf et dérive les TF supérieurs (multiples) localement.
+    Les TF non dérivables (plus fins, non multiples) passent directement au provider sous-jacent.
+    La profondeur de base demandée ne fait que croître (max des besoins vus) : le ring buffer since=
+    du provider reste incrémental et un cycle M5/M15/H1 ne coûte qu'une lecture de base.
+    """
+
+    def _base_candles(self, symbol: str, needed: int) -> List[Dict]:
+        count, cached = self._base_request(symbol, needed)
+        if cached is not None:
+            return cached
+        candles = self.inner.get_candles(symbol, self.base_tf, count)
+        self._remember(symbol, count, candles)
+        return candles
+
+    def get_candles(self, symbol: str, timeframe: str, n: int) -> List[Dict[str, float]]:
+        if timeframe.upper() == self.base_tf:
+            return self._derive(timeframe, n, self._base_candles(symbol, n))
+        if not can_resample(self.base_tf, timeframe):
+            return self.inner.get_candles(symbol, timeframe, n)
+        return self._derive(timeframe, n, self._base_candles(symbol, self._base_count(timeframe, n)))
+
+    def get_snapshot(self, symbol: str, timeframes: Dict[str, int]) -> Optional[Dict]:
+        """/snapshot du provider sous-jacent pour le seul TF de base, TF dérivés ajoutés au payload."""
+        if not hasattr(self.inner, "get_snapshot"):
+            return None
+        count, request = self._snapshot_request(symbol, timeframes)
+        payload = self.inner.get_snapshot(symbol, request)
+        if payload is None:
+            return None
+        return self._snapshot_payload(symbol, timeframes, count, payload)
+
+    def get_spread(self, symbol: str) -> float:
+        return self.inner.get_spread(symbol)
+
+    def get_symbol_specs(self, symbol: str) -> Dict[str, float]:
+        return self.inner.get_symbol_specs(symbol)
+
+    def get_server_time(self):
+        return self.inner.get_server_time()
+
+    def get_tick(self, symbol: str) -> Optional[Tuple[float, float]]:
+        return self.inner.get_tick(symbol)
+
+    def close(self) -> None:
+        if hasattr(self.inner, "close"):
+            self.inner.close()
+
+
+class AsyncResamplingProvider(_Resampler):
+    """
+    Variante async (AsyncRemoteMT5Provider, MT5_ASYNC_FETCH=true) : mêmes règles de dérivation.
+    Les lectures parallèles d'un cycle (M5, M15, H1 via asyncio.gather) attendent la même lecture
+    de base au lieu d'en lancer une chacune.
+    """
+
+    def __init__(self, inner, base_tf: str = "M5", offset_sec: int = 0) -> None:
+        super().__init__(inner, base_tf, offset_sec)
+        self._fetch_lock = asyncio.Lock()
+
+    async def _base_candles(self, symbol: str, needed: int) -> List[Dict]:
+        async with self._fetch_lock:
+            count, cached = self._base_request(symbol, needed)
+            if cached is not None:
+                return cached
+            candles = await self.inner.get_candles(symbol, self.base_tf, count)
+            self._remember(symbol, count, candles)
+            return candles
+
+    async def get_candles(self, symbol: str, timeframe: str, n: int) -> List[Dict[str, float]]:
+        if timeframe.upper() == self.base_tf:
+            return self._derive(timeframe, n, await self._base_candles(symbol, n))
+        if not can_resample(self.base_tf, timeframe):
+            return await self.inner.get_candles(symbol, timeframe, n)
+        return self._derive(timeframe, n, await self._base_candles(symbol, self._base_count(timeframe, n)))
+
+    async def get_snapshot(self, symbol: str, timeframes: Dict[str, int]) -> Optional[Dict]:
+        if not hasattr(self.inner, "get_snapshot"):
+            return None
+        count, request = self._snapshot_request(symbol, timeframes)
+        payload = await self.inner.get_snapshot(symbol, request)
+        if payload is None:
+            return None
+        return self._snapshot_payload(symbol, timeframes, count, payload)
+
+    async def get_spread(self, symbol: str) -> float:
+        return await self.inner.get_spread(symbol)
+
+    async def get_symbol_specs(self, symbol: str) -> Dict[str, float]:
+        return await self.inner.get_symbol_specs(symbol)
+
+    async def get_server_time(self):
+        return await self.inner.get_server_time()
+
+    async def get_tick(self, symbol: str) -> Optional[Tuple[float, float]]:
+        return await self.inner.get_tick(symbol)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
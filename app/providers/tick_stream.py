@@ -0,0 +1,178 @@
+"""
+Abonné au flux de ticks du bridge (/ticks/stream, SSE).
+Garde en mémoire le dernier bid/ask et les extrêmes bid/ask depuis la dernière évaluation :
+le suivi voit un TP/SL touché entre deux /analyze au lieu du seul prix au moment du poll.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import get_settings
+from app.infra.bridge_http import get_bridge_client
+
+log = logging.getLogger(__name__)
+
+TickCallback = Callable[[str, float, float], None]
+
+RECONNECT_MIN_SEC = 1.0
+RECONNECT_MAX_SEC = 30.0
+# Au-delà sans tick reçu, latest() ne fait plus foi (flux coupé, marché fermé)
+LATEST_MAX_AGE_SEC = 10.0
+
+
+@dataclass(frozen=True)
+class TickRange:
+    """Extrêmes bid/ask vus depuis la dernière évaluation."""
+    bid_low: float
+    bid_high: float
+    ask_low: float
+    ask_high: float
+    ticks: int
+    first_msc: int
+    last_msc: int
+
+
+class TickStreamSubscriber:
+    def __init__(self, symbol: str, on_tick: Optional[TickCallback] = None) -> None:
+        self.symbol = symbol
+        self._on_tick = on_tick
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_msc: Optional[int] = None
+        self._latest: Optional[Tuple[float, float]] = None
+        self._latest_at = 0.0
+        self._range: Optional[Dict[str, float]] = None
+
+    # --- état ---
+
+    def handle_tick(self, payload: Dict) -> bool:
+        """Intègre un tick du flux ; False si doublon (même time_msc) ou incomplet."""
+        bid = payload.get("bid")
+        ask = payload.get("ask")
+        msc = payload.get("time_msc")
+        if bid is None or ask is None or msc is None:
+            return False
+        bid, ask, msc = float(bid), float(ask), int(msc)
+        with self._lock:
+            if self._last_msc is not None and msc <= self._last_msc:
+                return False
+            self._last_msc = msc
+            self._latest = (bid, ask)
+            self._latest_at = time.monotonic()
+            r = self._range
+            if r is None:
+                self._range = {
+                    "bid_low": bid, "bid_high": bid, "ask_low": ask, "ask_high": ask,
+                    "ticks": 1, "first_msc": msc, "last_msc": msc,
+                }
+            else:
+                r["bid_low"] = min(r["bid_low"], bid)
+                r["bid_high"] = max(r["bid_high"], bid)
+                r["ask_low"] = min(r["ask_low"], ask)
+                r["ask_high"] = max(r["ask_high"], ask)
+                r["ticks"] += 1
+                r["last_msc"] = msc
+        if self._on_tick is not None:
+            try:
+                self._on_tick(self.symbol, bid, ask)
+            except Exception:  # noqa: BLE001
+                log.exception("Tick stream callback")
+        return True
+
+    def latest(self, max_age_sec: float = LATEST_MAX_AGE_SEC) -> Optional[Tuple[float, float]]:
+        """(bid, ask) du dernier tick, None si aucun tick récent."""
+        with self._lock:
+            if self._latest is None or time.monotonic() - self._latest_at > max_age_sec:
+                return None
+            return self._latest
+
+    def take_range(self) -> Optional[TickRange]:
+        """Extrêmes depuis le dernier appel, puis repart du dernier tick (fenêtre suivante)."""
+        with self._lock:
+            r = self._range
+            if r is None:
+                return None
+            self._range = None
+            if self._latest is not None:
+                bid, ask = self._latest
+                self._range = {
+                    "bid_low": bid, "bid_high": bid, "ask_low": ask, "ask_high": ask,
+                    "ticks": 0, "first_msc": r["last_msc"], "last_msc": r["last_msc"],
+                }
+        return TickRange(**r)
+
+    # --- connexion ---
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"tick-stream-{self.symbol}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def consume(self, lines) -> None:
+        """Lit un flux SSE ligne à ligne (lignes "data: {...}", commentaires ignorés)."""
+        for line in lines:
+            if self._stop.is_set():
+                return
+            if not line.startswith("data:"):
+                continue
+            try:
+                self.handle_tick(json.loads(line[5:].strip()))
+            except ValueError:
+                log.debug("Tick stream: ligne invalide %r", line)
+
+    def _run(self) -> None:
+        delay = RECONNECT_MIN_SEC
+        while not self._stop.is_set():
+            settings = get_settings()
+            url = (settings.mt5_bridge_url or "").rstrip("/") + "/ticks/stream"
+            params = {"symbol": self.symbol, "interval_ms": str(getattr(settings, "tick_stream_interval_ms", 100))}
+            try:
+                with get_bridge_client().stream(
+                    "GET", url, params=params, timeout=httpx.Timeout(30.0, connect=2.0)
+                ) as resp:
+                    resp.raise_for_status()
+                    delay = RECONNECT_MIN_SEC
+                    self.consume(resp.iter_lines())
+            except Exception as exc:  # noqa: BLE001
+                log.warning("Tick stream %s: %s (reconnexion dans %.0fs)", self.symbol, exc, delay)
+            self._stop.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SEC)
+
+
+_subscribers: Dict[str, TickStreamSubscriber] = {}
+
+
+def start_tick_stream(symbol: str, on_tick: Optional[TickCallback] = None) -> TickStreamSubscriber:
+    sub = _subscribers.get(symbol)
+    if sub is None:
+        sub = TickStreamSubscriber(symbol, on_tick=on_tick)
+        _subscribers[symbol] = sub
+    sub.start()
+    return sub
+
+
+def get_tick_subscriber(symbol: str) -> Optional[TickStreamSubscriber]:
+    return _subscribers.get(symbol)
+
+
+def stop_tick_streams() -> None:
+    for sub in _subscribers.values():
+        sub.stop()
+    _subscribers.clear()
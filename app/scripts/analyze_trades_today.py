@@ -9,7 +9,6 @@ from __future__ import annotations
 
 import json
 import sys
-from datetime import datetime
 from pathlib import Path
 
 _REPO_ROOT = Path(__file__).resolve().parents[2]
@@ -25,6 +24,7 @@ if _env_local.exists():
 from zoneinfo import ZoneInfo
 
 from app.config import get_settings
+from app.infra.clock import get_clock
 from app.infra.db import get_conn, init_db, get_trade_outcomes_today
 from app.scripts.signal_outcome_agent import run_once
 
@@ -38,7 +38,7 @@ def _rr_tp1(entry: float, sl: float, tp1: float, direction: str) -> float:
 def analyze_today(day_paris: str | None = None) -> dict:
     """Analyse les trades du jour et retourne un rapport."""
     tz = ZoneInfo("Europe/Paris")
-    day = day_paris or datetime.now(tz).strftime("%Y-%m-%d")
+    day = day_paris or get_clock().now().astimezone(tz).strftime("%Y-%m-%d")
     prefix = f"{day}%"
 
     init_db()
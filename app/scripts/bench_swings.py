@@ -0,0 +1,94 @@
+"""
+Benchmark detect_swings : boucle fractale d'origine vs version vectorisée (swing_masks numpy),
+sur des fenêtres de la taille des historiques de replay. Rapporte les temps et le gain, sans seuil :
+le noyau numpy gagne largement, detect_swings complet est dominé par la création des SwingPoint.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(_REPO_ROOT))
+
+from app.engines.candle_frame import CandleFrame
+from app.engines.structure_engine import SwingPoint, detect_swings, swing_masks
+
+
+def _swing_masks_loop(highs: List[float], lows: List[float], lookback: int) -> Tuple[List[bool], List[bool]]:
+    n = len(highs)
+    is_high, is_low = [], []
+    for i in range(lookback, n - lookback):
+        window = range(i - lookback, i + lookback + 1)
+        is_high.append(all(highs[j] <= highs[i] for j in window if j != i))
+        is_low.append(all(lows[j] >= lows[i] for j in window if j != i))
+    return is_high, is_low
+
+
+def _detect_swings_loop(candles: List[Dict[str, float]], lookback: int) -> List[SwingPoint]:
+    highs = [float(c["high"]) for c in candles]
+    lows = [float(c["low"]) for c in candles]
+    is_high, is_low = _swing_masks_loop(highs, lows, lookback)
+    swings = []
+    for k, (hi, lo) in enumerate(zip(is_high, is_low)):
+        i = k + lookback
+        if hi:
+            swings.append(SwingPoint(idx=i, typ="high", price=highs[i]))
+        if lo:
+            swings.append(SwingPoint(idx=i, typ="low", price=lows[i]))
+    return swings
+
+
+def _candles(n: int, seed: int) -> List[Dict[str, float]]:
+    rng = np.random.default_rng(seed)
+    close = 2650.0 + np.cumsum(rng.normal(0, 2, n))
+    high = np.round((close + np.abs(rng.normal(0, 1.5, n))) * 2) / 2
+    low = np.round((close - np.abs(rng.normal(0, 1.5, n))) * 2) / 2
+    return [{"high": float(h), "low": float(l), "close": float(c)} for h, l, c in zip(high, low, close)]
+
+
+def _best_of(fn: Callable, repeat: int) -> Tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark detect_swings (boucle vs numpy)")
+    parser.add_argument("--bars", type=int, default=5000, help="Taille de la fenêtre")
+    parser.add_argument("--lookback", type=int, default=2, help="Barres de chaque côté du swing")
+    parser.add_argument("--repeat", type=int, default=20, help="Répétitions (meilleur temps retenu)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    candles = _candles(args.bars, args.seed)
+    frame = CandleFrame.from_candles(candles)
+    highs, lows = frame.high.tolist(), frame.low.tolist()
+
+    loop_s, expected_masks = _best_of(lambda: _swing_masks_loop(highs, lows, args.lookback), max(1, args.repeat // 5))
+    vec_s, masks = _best_of(lambda: swing_masks(frame.high, frame.low, args.lookback), args.repeat)
+    full_loop_s, expected = _best_of(lambda: _detect_swings_loop(candles, args.lookback), max(1, args.repeat // 5))
+    full_vec_s, got = _best_of(lambda: detect_swings(frame, args.lookback), args.repeat)
+    parity = [m.tolist() for m in masks] == list(expected_masks) and got == expected
+
+    print(f"swings {args.bars} barres (lookback {args.lookback}), parité {'OK' if parity else 'KO'}")
+    print(f"  noyau         boucle {loop_s * 1e3:8.2f} ms   numpy {vec_s * 1e3:8.3f} ms   x{loop_s / vec_s:.1f}")
+    print(
+        f"  detect_swings boucle {full_loop_s * 1e3:8.2f} ms   numpy {full_vec_s * 1e3:8.3f} ms   "
+        f"x{full_loop_s / full_vec_s:.1f} ({len(got)} SwingPoint)"
+    )
+    if not parity:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
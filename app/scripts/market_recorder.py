@@ -0,0 +1,198 @@
+"""
+Recorder de marché : archive les bougies clôturées (M1/M5/M15/H1 par défaut) et, en option,
+les ticks du flux /ticks/stream dans le CandleStore (fichiers append-only par symbole/TF/jour).
+Reprise incrémentale : chaque passe ne demande au bridge que les barres après la dernière archivée.
+Les mêmes barres alimentent les IndicatorState (ATR, swings, S/R, impulsion) persistés en SQLite.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Charger .env.local
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+_env_local = _REPO_ROOT / ".env.local"
+if _env_local.exists():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_env_local, override=True)
+    except ImportError:
+        pass
+
+sys.path.insert(0, str(_REPO_ROOT))
+
+import numpy as np
+
+from app.config import get_settings
+from app.engines.candle_frame import CandleFrame
+from app.engines.indicator_state import DEFAULT_WINDOW, IndicatorState
+from app.infra.bridge_http import bridge_timeout, close_bridge_client, get_bridge_client
+from app.infra.candle_store import TICK_DTYPE, TICKS, CandleStore, candles_to_records
+from app.infra.db import init_db
+from app.infra.indicator_store import load_indicator_state, save_indicator_state
+from app.providers.market_snapshot import H1_FETCH_BARS
+from app.providers.remote_mt5_provider import _columns_from_response
+from app.providers.tick_stream import TickStreamSubscriber
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger(__name__)
+
+# Première passe sur un symbole/TF vide : profondeur d'historique demandée au bridge
+BOOTSTRAP_BARS = 5000
+
+
+def _split(value: str) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def fetch_closed_bars(symbol: str, tf: str, since: Optional[int]) -> np.ndarray:
+    """Barres du bridge depuis since (toutes si None), sans la barre en formation (la dernière)."""
+    settings = get_settings()
+    if not settings.mt5_bridge_url:
+        raise RuntimeError("MT5_BRIDGE_URL manquant")
+    url = settings.mt5_bridge_url.rstrip("/") + "/candles"
+    params = {"symbol": symbol, "timeframe": tf, "count": str(BOOTSTRAP_BARS), "format": "columnar"}
+    if since is not None:
+        params["since"] = str(since)
+    resp = get_bridge_client().get(url, params=params, timeout=bridge_timeout("/candles"))
+    resp.raise_for_status()
+    records = candles_to_records(_columns_from_response(resp))
+    return records[:-1]
+
+
+def record_once(
+    store: CandleStore,
+    symbols: List[str],
+    timeframes: List[str],
+    indicator_states: Optional[Dict[Tuple[str, str], IndicatorState]] = None,
+) -> int:
+    """
+    Une passe : archive les nouvelles barres clôturées de chaque symbole/TF. Retourne le nombre écrit.
+    Si indicator_states est fourni, chaque IndicatorState (chargé depuis SQLite au besoin) intègre ces
+    mêmes barres clôturées puis est re-persisté.
+    """
+    written = 0
+    for symbol in symbols:
+        for tf in timeframes:
+            try:
+                bars = fetch_closed_bars(symbol, tf, store.last_time(symbol, tf))
+                n = store.append(symbol, tf, bars)
+            except Exception as exc:  # noqa: BLE001
+                log.warning("Recorder %s %s: %s", symbol, tf, exc)
+                continue
+            if n:
+                log.info("Recorder %s %s: +%d barres", symbol, tf, n)
+            written += n
+            if indicator_states is not None and len(bars):
+                _update_indicator_state(indicator_states, symbol, tf, bars)
+    return written
+
+
+def _state_window(tf: str) -> int:
+    """Fenêtre des séries du cycle /analyze pour ce TF : l'état persisté est repris tel quel par le core."""
+    settings = get_settings()
+    if tf.upper() == settings.tf_signal.upper():
+        return int(getattr(settings, "m15_fetch_bars", 80))
+    if tf.upper() == settings.tf_context.upper():
+        return H1_FETCH_BARS
+    return DEFAULT_WINDOW
+
+
+def _update_indicator_state(
+    states: Dict[Tuple[str, str], IndicatorState], symbol: str, tf: str, bars: np.ndarray
+) -> None:
+    try:
+        state = states.get((symbol, tf))
+        if state is None:
+            state = states[(symbol, tf)] = load_indicator_state(
+                symbol,
+                tf,
+                window=_state_window(tf),
+                impulse_atr_mult=float(getattr(get_settings(), "impulse_atr_mult", 1.8)),
+            )
+        frame = CandleFrame.from_columns({name: bars[name] for name in bars.dtype.names}, symbol, tf)
+        if state.update_candles(frame):
+            save_indicator_state(state)
+    except Exception as exc:  # noqa: BLE001
+        log.warning("IndicatorState %s %s: %s", symbol, tf, exc)
+
+
+class TickRecorder(TickStreamSubscriber):
+    """Abonné au flux de ticks qui bufferise (time_msc, bid, ask) pour écriture groupée dans le store."""
+
+    def __init__(self, symbol: str, store: CandleStore) -> None:
+        super().__init__(symbol)
+        self.store = store
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+
+    def handle_tick(self, payload: Dict) -> bool:
+        if not super().handle_tick(payload):
+            return False
+        with self._pending_lock:
+            self._pending.append((int(payload["time_msc"]), float(payload["bid"]), float(payload["ask"])))
+        return True
+
+    def flush(self) -> int:
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        return self.store.append(self.symbol, TICKS, np.array(pending, dtype=TICK_DTYPE))
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Market Recorder - archive bougies clôturées et ticks")
+    parser.add_argument("--symbols", default=settings.recorder_symbols, help="Symboles (séparés par des virgules)")
+    parser.add_argument("--timeframes", default=settings.recorder_timeframes, help="TF (ex: M1,M5,M15,H1)")
+    parser.add_argument("--ticks", action="store_true", default=settings.recorder_ticks, help="Archiver aussi les ticks")
+    parser.add_argument("--root", default=settings.candle_store_path, help="Racine du CandleStore")
+    parser.add_argument("--once", action="store_true", help="Exécution unique (pas de boucle)")
+    parser.add_argument("--interval", type=int, default=60, help="Intervalle en secondes (défaut: 60)")
+    args = parser.parse_args()
+
+    store = CandleStore(args.root)
+    init_db()
+    indicator_states: Dict[Tuple[str, str], IndicatorState] = {}
+    symbols = _split(args.symbols)
+    timeframes = [tf.upper() for tf in _split(args.timeframes)]
+
+    if args.once:
+        try:
+            n = record_once(store, symbols, timeframes, indicator_states)
+            log.info("Archivé %d barres", n)
+        finally:
+            close_bridge_client()
+        return
+
+    tick_recorders = [TickRecorder(s, store) for s in symbols] if args.ticks else []
+    for rec in tick_recorders:
+        rec.start()
+    try:
+        while True:
+            try:
+                record_once(store, symbols, timeframes, indicator_states)
+                for rec in tick_recorders:
+                    rec.flush()
+            except Exception as e:
+                log.exception("Erreur: %s", e)
+            time.sleep(args.interval)
+    finally:
+        for rec in tick_recorders:
+            rec.stop()
+            rec.flush()
+        close_bridge_client()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Sweep de paramètres : rejoue l'historique pour chaque jeu de paramètres Settings d'une spec JSON
+(grille ou aléatoire), en parallèle sur les cœurs, et affiche le tableau classé.
+Spec : {"mode": "grid", "params": {"GO_MIN_SCORE": [75, 80, 85], "room_to_target_mult": {"min": 1.0, "max": 1.6, "step": 0.2}}}
+       {"mode": "random", "samples": 50, "seed": 1, "params": {"entry_zone_atr_mult": {"min": 0.2, "max": 0.5}}}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+# Charger .env.local
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+_env_local = _REPO_ROOT / ".env.local"
+if _env_local.exists():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_env_local, override=True)
+    except ImportError:
+        pass
+
+sys.path.insert(0, str(_REPO_ROOT))
+
+from app.config import get_settings
+from app.engines.replay_engine import DEFAULT_WARMUP_DAYS
+from app.engines.sweep_engine import RANK_KEYS, SweepSpec, format_table, rank_results, run_sweep
+from app.infra.candle_store import CandleStore
+from app.providers.replay import ReplayProvider, load_candles_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+# Logs par cycle du pipeline (snapshot, fibo...) coupés : seule la progression du sweep reste
+logging.getLogger("app").setLevel(logging.WARNING)
+logging.getLogger("app.engines.sweep_engine").setLevel(logging.INFO)
+log = logging.getLogger(__name__)
+
+
+def _parse_day(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Param sweep - replay parallèle d'une grille de paramètres Settings")
+    parser.add_argument("--spec", required=True, help="Spec JSON du sweep (fichier)")
+    parser.add_argument("--symbol", default=settings.symbol_default, help="Symbole")
+    parser.add_argument("--base-tf", default="M5", help="TF de base rejoué (M15/H1 rééchantillonnés)")
+    parser.add_argument("--start", help="Début du replay (ISO, UTC)")
+    parser.add_argument("--end", help="Fin du replay exclue (ISO, UTC)")
+    parser.add_argument("--file", help="Bougies importées (.npy MT5 ou .json) au lieu du CandleStore")
+    parser.add_argument("--root", default=settings.candle_store_path, help="Racine du CandleStore")
+    parser.add_argument("--warmup-days", type=int, default=DEFAULT_WARMUP_DAYS, help="Historique chargé avant --start")
+    parser.add_argument("--workers", type=int, default=None, help="Process workers (défaut: nombre de cœurs)")
+    parser.add_argument("--rank-by", choices=RANK_KEYS, default="points", help="Critère de classement")
+    parser.add_argument("--min-trades", type=int, default=0, help="Exclure les jeux avec moins de trades")
+    parser.add_argument("--top", type=int, default=20, help="Lignes affichées")
+    parser.add_argument("--out", help="Écrire tous les résultats classés en JSON")
+    args = parser.parse_args()
+
+    spec = SweepSpec.from_dict(json.loads(Path(args.spec).read_text(encoding="utf-8")))
+    start, end = _parse_day(args.start), _parse_day(args.end)
+    if args.file:
+        provider = ReplayProvider(args.symbol, load_candles_file(args.file), args.base_tf)
+    else:
+        if start is None:
+            parser.error("--start requis sans --file")
+        provider = ReplayProvider.from_store(
+            args.symbol,
+            start - timedelta(days=args.warmup_days),
+            end or datetime.now(timezone.utc),
+            args.base_tf,
+            store=CandleStore(args.root),
+        )
+    if not len(provider):
+        log.error("Aucune barre %s %s à rejouer", args.symbol, args.base_tf)
+        sys.exit(1)
+
+    t0 = time.monotonic()
+    results = run_sweep(provider, spec, start, end, workers=args.workers, warmup_days=args.warmup_days)
+    ranked = rank_results(results, args.rank_by, args.min_trades)
+    log.info("Sweep terminé : %d jeux en %.1fs", len(results), time.monotonic() - t0)
+    print(format_table(ranked[: args.top]))
+    if args.out:
+        Path(args.out).write_text(json.dumps([r.to_dict() for r in ranked], indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
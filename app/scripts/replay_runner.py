@@ -0,0 +1,118 @@
+"""
+Replay / backtest : rejoue l'historique M5 (CandleStore du recorder ou fichier importé) à travers le
+pipeline de décision (ReplayRunner) et écrit décisions + trades simulés dans REPLAY_RESULTS_DB_PATH.
+À lancer hors du process API : le run redirige DATABASE_PATH vers une base de travail temporaire.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+# Charger .env.local
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+_env_local = _REPO_ROOT / ".env.local"
+if _env_local.exists():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_env_local, override=True)
+    except ImportError:
+        pass
+
+sys.path.insert(0, str(_REPO_ROOT))
+
+from app.config import get_settings
+from app.engines.replay_engine import (
+    DEFAULT_WARMUP_DAYS,
+    ReplayRunner,
+    ReplaySummary,
+    replay_bounds,
+    replay_environment,
+)
+from app.infra.candle_store import CandleStore
+from app.infra.replay_results import ReplayResultsDB
+from app.providers.replay import ReplayProvider, load_candles_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+
+def _parse_day(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def run_replay(
+    provider: ReplayProvider,
+    results_db: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    params: Optional[dict] = None,
+) -> ReplaySummary:
+    """Rejoue [start, end[ (par défaut : tout l'historique après le warmup) et enregistre le run."""
+    start_idx, stop_idx = replay_bounds(provider, start, end)
+    results = ReplayResultsDB(results_db)
+    try:
+        with replay_environment():
+            results.start_run(
+                provider.symbol,
+                provider.base_tf,
+                int(provider.time[start_idx]) if start_idx < len(provider) else None,
+                int(provider.time[stop_idx - 1]) if stop_idx > 0 else None,
+                params or {},
+            )
+            summary = ReplayRunner(provider, sink=results).run(start_idx, stop_idx)
+            results.finish_run(summary)
+    finally:
+        results.close()
+    return summary
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Replay - rejoue l'historique à travers le pipeline de décision")
+    parser.add_argument("--symbol", default=settings.symbol_default, help="Symbole")
+    parser.add_argument("--base-tf", default="M5", help="TF de base rejoué (M15/H1 rééchantillonnés)")
+    parser.add_argument("--start", help="Début du replay (ISO, UTC)")
+    parser.add_argument("--end", help="Fin du replay exclue (ISO, UTC)")
+    parser.add_argument("--file", help="Bougies importées (.npy MT5 ou .json) au lieu du CandleStore")
+    parser.add_argument("--root", default=settings.candle_store_path, help="Racine du CandleStore")
+    parser.add_argument("--results-db", default=settings.replay_results_db_path, help="Base SQLite des résultats")
+    parser.add_argument("--warmup-days", type=int, default=DEFAULT_WARMUP_DAYS, help="Historique chargé avant --start")
+    args = parser.parse_args()
+
+    start, end = _parse_day(args.start), _parse_day(args.end)
+    if args.file:
+        provider = ReplayProvider(args.symbol, load_candles_file(args.file), args.base_tf)
+    else:
+        if start is None:
+            parser.error("--start requis sans --file")
+        provider = ReplayProvider.from_store(
+            args.symbol,
+            start - timedelta(days=args.warmup_days),
+            end or datetime.now(timezone.utc),
+            args.base_tf,
+            store=CandleStore(args.root),
+        )
+    if not len(provider):
+        log.error("Aucune barre %s %s à rejouer", args.symbol, args.base_tf)
+        sys.exit(1)
+
+    t0 = time.monotonic()
+    summary = run_replay(provider, args.results_db, start, end, params={"file": args.file, "warmup_days": args.warmup_days})
+    log.info("Replay terminé en %.1fs", time.monotonic() - t0)
+    print(json.dumps(summary.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """
 Agent de fond : évalue les signaux passés (TP/SL touchés, PnL en pts).
 S'exécute périodiquement (ex: nuit) sans impacter /analyze.
+--batch : tous les signaux en attente d'un coup — une plage de bougies par symbole (CandleStore du
+recorder, sinon bridge since=), étiquetage vectorisé (outcome_engine), une seule transaction.
 """
 from __future__ import annotations
 
@@ -10,8 +12,11 @@ import logging
 import os
 import sys
 from pathlib import Path
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
 # Charger .env.local
 _REPO_ROOT = Path(__file__).resolve().parents[2]
 _env_local = _REPO_ROOT / ".env.local"
@@ -24,9 +29,14 @@ if _env_local.exists():
 
 sys.path.insert(0, str(_REPO_ROOT))
 
-import httpx
 from app.config import get_settings
-from app.infra.db import get_conn, init_db
+from app.engines.outcome_engine import OPEN, UNKNOWN, label_outcomes
+from app.infra.bridge_http import close_bridge_client, get_bridge_client
+from app.infra.candle_store import CandleStore
+from app.infra.clock import get_clock
+from app.infra.db import get_conn, get_pending_outcome_signals, init_db, insert_signal_outcomes
+from app.providers.remote_mt5_provider import _columns_from_response, _columns_params
+from app.providers.resampler import tf_seconds
 
 logging.basicConfig(
     level=logging.INFO,
@@ -43,7 +53,7 @@ def _fetch_candles_after(symbol: str, tf: str, ts_utc: str, count: int = 200) ->
         return []
     url = settings.mt5_bridge_url.rstrip("/") + "/candles"
     try:
-        resp = httpx.get(
+        resp = get_bridge_client().get(
             url,
             params={"symbol": symbol, "timeframe": tf, "count": str(count)},
             timeout=10.0,
@@ -113,14 +123,14 @@ def _check_outcome(
 
         if direction == "BUY":
             if l <= sl:
-                return ("SL_HIT", entry - sl, ts_str)
+                return ("SL_HIT", sl - entry, ts_str)
             if h >= tp2:
                 return ("TP2_HIT", tp2 - entry, ts_str)
             if h >= tp1:
                 return ("TP1_HIT", tp1 - entry, ts_str)
         else:
             if h >= sl:
-                return ("SL_HIT", sl - entry, ts_str)
+                return ("SL_HIT", entry - sl, ts_str)
             if l <= tp2:
                 return ("TP2_HIT", entry - tp2, ts_str)
             if l <= tp1:
@@ -131,22 +141,8 @@ def _check_outcome(
 def run_once(symbol: str = "XAUUSD", limit: int = 50) -> int:
     """Évalue les signaux GO récents non encore évalués."""
     init_db()
-    conn = get_conn()
     # Signaux GO envoyés, pas encore dans signal_outcomes
-    rows = conn.execute(
-        """
-        SELECT s.id, s.ts_utc, s.symbol, s.direction, s.entry, s.sl, s.tp1, s.tp2
-        FROM signals s
-        LEFT JOIN signal_outcomes o ON o.signal_id = s.id
-        WHERE s.status = 'GO' AND s.telegram_sent = 1
-          AND s.entry IS NOT NULL AND s.sl IS NOT NULL
-          AND o.id IS NULL
-        ORDER BY s.ts_utc DESC
-        LIMIT ?
-        """,
-        (limit,),
-    ).fetchall()
-    conn.close()
+    rows = get_pending_outcome_signals(limit)
 
     settings = get_settings()
     tf = getattr(settings, "tf_signal", "M15") or "M15"
@@ -179,29 +175,134 @@ def run_once(symbol: str = "XAUUSD", limit: int = 50) -> int:
     return evaluated
 
 
+# Plafond de barres du bridge pour /candles
+BRIDGE_MAX_COUNT = 5000
+
+
+def _ts_epoch(ts_utc: str) -> int:
+    try:
+        dt = datetime.fromisoformat(ts_utc.replace("Z", "+00:00"))
+    except ValueError:
+        dt = datetime.fromisoformat(ts_utc[:19])
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _fetch_columns_since(symbol: str, tf: str, since: int) -> Dict[str, np.ndarray]:
+    """Bougies time >= since en un appel bridge (format columnar/npy, au plus BRIDGE_MAX_COUNT)."""
+    settings = get_settings()
+    if not settings.mt5_bridge_url:
+        return {}
+    url = settings.mt5_bridge_url.rstrip("/") + "/candles"
+    try:
+        resp = get_bridge_client().get(url, params=_columns_params(symbol, tf, BRIDGE_MAX_COUNT, since), timeout=30.0)
+        if resp.status_code != 200:
+            return {}
+        return _columns_from_response(resp)
+    except Exception as e:
+        log.warning("Bridge candles: %s", e)
+        return {}
+
+
+def _covering_columns(symbol: str, tf: str, since: int, store: Optional[CandleStore] = None) -> Dict[str, np.ndarray]:
+    """
+    Une plage de bougies depuis since : CandleStore du recorder s'il a la barre de since,
+    sinon le bridge (le store partiel reste le repli si le bridge ne répond pas).
+    """
+    sec = tf_seconds(tf) or 900
+    store = store or CandleStore(get_settings().candle_store_path)
+    records = store.read(symbol, tf, since - sec, int(get_clock().now().timestamp()) + sec)
+    stored = {name: np.asarray(records[name]) for name in records.dtype.names} if len(records) else {}
+    if stored and int(stored["time"][0]) <= since:
+        return stored
+    return _fetch_columns_since(symbol, tf, since - sec) or stored
+
+
+def run_batch(symbol: Optional[str] = None, limit: Optional[int] = None, store: Optional[CandleStore] = None) -> int:
+    """
+    Évalue tous les signaux en attente (limit=None) : une plage de bougies par symbole, étiquetage
+    vectorisé, écriture en une transaction. OPEN / UNKNOWN ne sont pas écrits (réévalués au passage suivant).
+    """
+    init_db()
+    pending = [r for r in get_pending_outcome_signals(limit) if float(r["entry"] or 0) > 0 and float(r["sl"] or 0) > 0]
+    settings = get_settings()
+    tf = getattr(settings, "tf_signal", "M15") or "M15"
+    sec = tf_seconds(tf) or 900
+    by_symbol: Dict[str, List[Dict[str, Any]]] = {}
+    for row in pending:
+        by_symbol.setdefault(row["symbol"] or symbol or settings.symbol_default, []).append(row)
+
+    outcomes: List[Dict[str, Any]] = []
+    for sym, rows in by_symbol.items():
+        sig_time = np.array([_ts_epoch(r["ts_utc"]) for r in rows], dtype=np.int64)
+        columns = _covering_columns(sym, tf, int(sig_time.min()), store)
+        if not columns or not len(columns.get("time", ())):
+            log.warning("Aucune bougie %s %s pour %d signaux", sym, tf, len(rows))
+            continue
+        labels = label_outcomes(
+            columns["time"],
+            columns["high"],
+            columns["low"],
+            sig_time,
+            np.array([(r["direction"] or "BUY").upper() == "BUY" for r in rows]),
+            np.array([float(r["entry"]) for r in rows]),
+            np.array([float(r["sl"]) for r in rows]),
+            np.array([float(r["tp1"] or 0) for r in rows]),
+            np.array([float(r["tp2"] or 0) for r in rows]),
+        )
+        # Signal antérieur à la plage (bridge plafonné) : pas de verdict sur des barres plus tardives
+        covered = sig_time >= int(columns["time"][0]) - sec
+        for k, row in enumerate(rows):
+            outcome = labels.outcome[k]
+            if not covered[k] or outcome in (OPEN, UNKNOWN):
+                continue
+            outcomes.append({
+                "signal_id": row["id"],
+                "ts_utc": row["ts_utc"],
+                "symbol": sym,
+                "direction": row["direction"] or "BUY",
+                "entry": float(row["entry"]),
+                "sl": float(row["sl"]),
+                "tp1": float(row["tp1"] or 0),
+                "tp2": float(row["tp2"] or 0),
+                "outcome": outcome,
+                "pnl_pts": round(float(labels.pnl_pts[k]), 2),
+                "outcome_ts_utc": datetime.fromtimestamp(int(labels.hit_time[k]), tz=timezone.utc).isoformat(),
+            })
+    written = insert_signal_outcomes(outcomes)
+    log.info("Batch : %d signaux en attente, %d étiquetés", len(pending), written)
+    return written
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Signal Outcome Agent - évalue les signaux passés")
     parser.add_argument("--symbol", default="XAUUSD", help="Symbole")
     parser.add_argument("--limit", type=int, default=50, help="Nombre max de signaux à traiter")
     parser.add_argument("--once", action="store_true", help="Exécution unique (pas de boucle)")
     parser.add_argument("--interval", type=int, default=86400, help="Intervalle en secondes (défaut: 24h)")
+    parser.add_argument("--batch", action="store_true", help="Tous les signaux en attente (plage unique par symbole, vectorisé)")
     args = parser.parse_args()
+    evaluate = (lambda: run_batch(args.symbol)) if args.batch else (lambda: run_once(args.symbol, args.limit))
 
     if args.once:
-        n = run_once(args.symbol, args.limit)
-        log.info("Évalué %d signaux", n)
+        try:
+            n = evaluate()
+            log.info("Évalué %d signaux", n)
+        finally:
+            close_bridge_client()
         return
 
-    import time
+    clock = get_clock()
     while True:
         try:
-            n = run_once(args.symbol, args.limit)
+            n = evaluate()
             if n > 0:
                 log.info("Évalué %d signaux", n)
         except Exception as e:
             log.exception("Erreur: %s", e)
         log.info("Prochaine exécution dans %ds", args.interval)
-        time.sleep(args.interval)
+        clock.sleep(args.interval)
 
 
 if __name__ == "__main__":
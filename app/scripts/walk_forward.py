@@ -0,0 +1,110 @@
+"""
+Walk-forward : fenêtres glissantes in-sample / out-of-sample sur l'historique archivé. Les paramètres
+Settings de la spec sont optimisés in-sample (replay parallèle), le meilleur jeu est évalué out-of-sample.
+Fenêtres déjà calculées relues du cache (REPLAY_RESULTS_DB_PATH, table walkforward_windows).
+Spec : {"in_sample_days": 28, "out_of_sample_days": 7, "step_days": 7, "rank_by": "points", "min_trades": 10,
+        "mode": "grid", "params": {"GO_MIN_SCORE": [75, 80, 85], "room_to_target_mult": [1.0, 1.2, 1.4]}}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+# Charger .env.local
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+_env_local = _REPO_ROOT / ".env.local"
+if _env_local.exists():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_env_local, override=True)
+    except ImportError:
+        pass
+
+sys.path.insert(0, str(_REPO_ROOT))
+
+from app.config import get_settings
+from app.engines.replay_engine import DEFAULT_WARMUP_DAYS
+from app.engines.walkforward_engine import WalkForwardSpec, format_report, run_walkforward, walkforward_report
+from app.infra.candle_store import CandleStore
+from app.infra.replay_results import WalkForwardCache
+from app.providers.replay import ReplayProvider, load_candles_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+# Logs par cycle du pipeline coupés : seule la progression du walk-forward reste
+logging.getLogger("app").setLevel(logging.WARNING)
+logging.getLogger("app.engines.sweep_engine").setLevel(logging.INFO)
+logging.getLogger("app.engines.walkforward_engine").setLevel(logging.INFO)
+log = logging.getLogger(__name__)
+
+
+def _parse_day(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Walk-forward - optimisation in-sample, évaluation out-of-sample")
+    parser.add_argument("--spec", required=True, help="Spec JSON (fenêtres + paramètres du sweep)")
+    parser.add_argument("--symbol", default=settings.symbol_default, help="Symbole")
+    parser.add_argument("--base-tf", default="M5", help="TF de base rejoué (M15/H1 rééchantillonnés)")
+    parser.add_argument("--start", help="Origine des fenêtres (ISO, UTC)")
+    parser.add_argument("--end", help="Fin de l'historique exclue (ISO, UTC)")
+    parser.add_argument("--file", help="Bougies importées (.npy MT5 ou .json) au lieu du CandleStore")
+    parser.add_argument("--root", default=settings.candle_store_path, help="Racine du CandleStore")
+    parser.add_argument("--warmup-days", type=int, default=DEFAULT_WARMUP_DAYS, help="Historique chargé avant --start")
+    parser.add_argument("--workers", type=int, default=None, help="Process workers (défaut: nombre de cœurs)")
+    parser.add_argument("--cache", default=settings.replay_results_db_path, help="Base SQLite du cache par fenêtre")
+    parser.add_argument("--no-cache", action="store_true", help="Recalculer toutes les fenêtres")
+    parser.add_argument("--out", help="Écrire le rapport complet en JSON")
+    args = parser.parse_args()
+
+    spec = WalkForwardSpec.from_dict(json.loads(Path(args.spec).read_text(encoding="utf-8")))
+    start, end = _parse_day(args.start), _parse_day(args.end)
+    if args.file:
+        provider = ReplayProvider(args.symbol, load_candles_file(args.file), args.base_tf)
+    else:
+        if start is None:
+            parser.error("--start requis sans --file")
+        provider = ReplayProvider.from_store(
+            args.symbol,
+            start - timedelta(days=args.warmup_days),
+            end or datetime.now(timezone.utc),
+            args.base_tf,
+            store=CandleStore(args.root),
+        )
+    if not len(provider):
+        log.error("Aucune barre %s %s à rejouer", args.symbol, args.base_tf)
+        sys.exit(1)
+
+    cache = None if args.no_cache else WalkForwardCache(args.cache)
+    t0 = time.monotonic()
+    try:
+        results = run_walkforward(
+            provider, spec, start, end, workers=args.workers, warmup_days=args.warmup_days, cache=cache
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    if not results:
+        log.error("Historique trop court pour une fenêtre de %d + %d jours", spec.in_sample_days, spec.out_of_sample_days)
+        sys.exit(1)
+    log.info("Walk-forward terminé : %d fenêtres en %.1fs", len(results), time.monotonic() - t0)
+    print(format_report(results, spec))
+    if args.out:
+        Path(args.out).write_text(json.dumps(walkforward_report(results, spec), indent=2, default=str), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,27 @@
 """
 Bridge MT5 — connexion à MetaTrader 5 pour données réelles (prix, bougies).
-Remplace l'ancien stub. Expose /health, /tick, /spread, /candles sur le port 8080.
+Remplace l'ancien stub. Expose /health, /tick, /spread, /candles, /snapshot, /ticks/stream (SSE), /cache/stats,
+/executor/stats sur le port 8080.
 MT5 doit être installé et ouvert (terminal lancé) pour que le bridge fonctionne.
+Tous les appels MetaTrader5 passent par un thread unique (_MT5Executor) : ordres > ticks > bougies.
 """
 from __future__ import annotations
 
+import asyncio
+import io
+import itertools
+import json
+import queue
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
-
-_HEALTH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health")
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
 try:
     import MetaTrader5 as mt5
@@ -39,6 +46,162 @@ if MT5_AVAILABLE:
         "MN1": mt5.TIMEFRAME_MN1,
     }
 
+# Durée d'une barre (s) : borne le nombre de barres à relire en mode since=
+TF_SECONDS: Dict[str, int] = {
+    "M1": 60,
+    "M5": 300,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H4": 14400,
+    "D1": 86400,
+    "W1": 604800,
+    "MN1": 2592000,
+}
+
+
+# Priorités de la file MT5 (plus petit = servi d'abord) et timeout d'attente par défaut (s)
+PRIO_ORDER = 0
+PRIO_TICK = 1
+PRIO_CANDLES = 2
+_PRIO_NAMES = {PRIO_ORDER: "order", PRIO_TICK: "tick", PRIO_CANDLES: "candles"}
+MT5_CALL_TIMEOUTS = {PRIO_ORDER: 15.0, PRIO_TICK: 5.0, PRIO_CANDLES: 10.0}
+
+
+class _MT5Executor:
+    """
+    Thread unique propriétaire de la lib MetaTrader5 : les handlers soumettent des jobs dans une
+    file à priorité (ordres, puis ticks, puis bougies). Deux lectures identiques en vol (même key)
+    partagent le même appel MT5. Compteurs par priorité pour /executor/stats.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Any, Future] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {
+                "queued": 0, "max_queued": 0, "submitted": 0, "coalesced": 0,
+                "executed": 0, "errors": 0, "timeouts": 0, "busy_ms": 0.0, "max_ms": 0.0,
+            }
+            for name in _PRIO_NAMES.values()
+        }
+
+    def submit(self, priority: int, fn: Callable, *args: Any, key: Any = None) -> Future:
+        with self._lock:
+            st = self._stats[_PRIO_NAMES[priority]]
+            st["submitted"] += 1
+            if key is not None:
+                fut = self._inflight.get(key)
+                if fut is not None and not fut.done():
+                    st["coalesced"] += 1
+                    return fut
+            fut = Future()
+            if key is not None:
+                self._inflight[key] = fut
+            st["queued"] += 1
+            st["max_queued"] = max(st["max_queued"], st["queued"])
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="mt5-worker", daemon=True)
+                self._thread.start()
+        self._queue.put((priority, next(self._seq), fut, key, fn, args))
+        return fut
+
+    def run(self, priority: int, fn: Callable, *args: Any, key: Any = None, timeout: Optional[float] = None) -> Any:
+        """Soumet puis attend ; FuturesTimeoutError si le job n'a pas fini dans le délai."""
+        fut = self.submit(priority, fn, *args, key=key)
+        try:
+            return fut.result(timeout=timeout or MT5_CALL_TIMEOUTS[priority])
+        except FuturesTimeoutError:
+            self.abandon(priority, fut, key)
+            raise
+
+    def abandon(self, priority: int, fut: Future, key: Any) -> None:
+        """
+        Timeout côté appelant : compté ; job sans key annulé (pas encore démarré → jamais exécuté).
+        Un job coalescé (key) est partagé avec d'autres appelants : il continue.
+        """
+        with self._lock:
+            self._stats[_PRIO_NAMES[priority]]["timeouts"] += 1
+        if key is None:
+            fut.cancel()
+
+    def _worker(self) -> None:
+        while True:
+            priority, _, fut, key, fn, args = self._queue.get()
+            name = _PRIO_NAMES[priority]
+            with self._lock:
+                self._stats[name]["queued"] -= 1
+            if not fut.set_running_or_notify_cancel():
+                with self._lock:
+                    if key is not None and self._inflight.get(key) is fut:
+                        del self._inflight[key]
+                continue
+            t0 = time.monotonic()
+            failed = False
+            try:
+                result = fn(*args)
+            except BaseException as exc:  # noqa: BLE001 - propagé à l'appelant via le Future
+                failed = True
+                fut.set_exception(exc)
+            else:
+                fut.set_result(result)
+            elapsed_ms = (time.monotonic() - t0) * 1000.0
+            with self._lock:
+                st = self._stats[name]
+                st["executed"] += 1
+                st["errors"] += int(failed)
+                st["busy_ms"] += elapsed_ms
+                st["max_ms"] = max(st["max_ms"], elapsed_ms)
+                if key is not None and self._inflight.get(key) is fut:
+                    del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_priority = {name: dict(st) for name, st in self._stats.items()}
+            inflight = len(self._inflight)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "inflight_keys": inflight,
+            "worker_alive": bool(self._thread and self._thread.is_alive()),
+            "by_priority": per_priority,
+        }
+
+
+_MT5_EXECUTOR = _MT5Executor()
+
+
+def _mt5_call(priority: int, fn: Callable, *args: Any, key: Any = None, timeout: Optional[float] = None) -> Any:
+    """Exécute fn sur le thread MT5 ; timeout → 503 (le handler ne reste pas bloqué)."""
+    try:
+        return _MT5_EXECUTOR.run(priority, fn, *args, key=key, timeout=timeout)
+    except FuturesTimeoutError:
+        wait = timeout or MT5_CALL_TIMEOUTS[priority]
+        raise HTTPException(
+            status_code=503,
+            detail=f"MT5 timeout ({wait:.0f}s, file {_PRIO_NAMES[priority]})",
+        )
+
+
+async def _mt5_call_async(priority: int, fn: Callable, *args: Any, key: Any = None) -> Any:
+    """
+    Version asyncio de _mt5_call ; asyncio.TimeoutError si le job n'a pas fini dans le délai.
+    shield : le timeout d'un appelant n'annule pas le Future partagé par les autres (jobs coalescés).
+    """
+    fut = _MT5_EXECUTOR.submit(priority, fn, *args, key=key)
+    try:
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), timeout=MT5_CALL_TIMEOUTS[priority])
+    except asyncio.TimeoutError:
+        _MT5_EXECUTOR.abandon(priority, fut, key)
+        raise
+    except asyncio.CancelledError:
+        if fut.cancelled():
+            # Job partagé annulé ailleurs : même traitement qu'un timeout pour cet appelant
+            raise asyncio.TimeoutError() from None
+        raise
+
 
 def _ensure_mt5_initialized() -> None:
     """Vérifie que MT5 est connecté (initialize fait au startup)."""
@@ -56,10 +219,186 @@ def _ensure_symbol(symbol: str) -> None:
         raise HTTPException(status_code=400, detail=f"Symbol not available: {symbol}")
 
 
+def _ensure_ready(symbol: str) -> None:
+    _ensure_mt5_initialized()
+    _ensure_symbol(symbol)
+
+
+def _tick_job(symbol: str, with_point: bool = False):
+    """Job MT5 : connexion + symbole + dernier tick (+ point du symbole si demandé)."""
+    _ensure_ready(symbol)
+    t = mt5.symbol_info_tick(symbol)
+    if t is None:
+        raise HTTPException(status_code=503, detail="No tick data")
+    return (t, _symbol_point(symbol)) if with_point else t
+
+
+def _rates_job(symbol: str, name: str, count: int, since: Optional[int]):
+    """Job MT5 : fenêtre de bougies (cache barres clôturées) ou mode incrémental since=."""
+    _ensure_ready(symbol)
+    if since is not None:
+        rates = _rates_since(symbol, name, since, count)
+    else:
+        rates = _BAR_CACHE.rates(symbol, name, count)
+    if rates is None:
+        raise HTTPException(status_code=503, detail=f"copy_rates failed ({name}): {mt5.last_error()}")
+    return rates
+
+
 def _time_msc_to_iso(time_msc: int) -> str:
     return datetime.fromtimestamp(time_msc / 1000.0, tz=timezone.utc).isoformat()
 
 
+def _symbol_point(symbol: str) -> float:
+    info = mt5.symbol_info(symbol)
+    return float(info.point) if info and info.point else 0.01
+
+
+def _candles_from_rates(rates) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for r in rates:
+        out.append({
+            "time": int(r["time"]),
+            "time_msc": int(r["time"]) * 1000,
+            "ts": datetime.fromtimestamp(int(r["time"]), tz=timezone.utc).isoformat(),
+            "open": float(r["open"]),
+            "high": float(r["high"]),
+            "low": float(r["low"]),
+            "close": float(r["close"]),
+            "tick_volume": int(r["tick_volume"]),
+            "spread": int(r["spread"]),
+            "real_volume": int(r["real_volume"]),
+        })
+    return out
+
+
+def _parse_tfs(tfs: str) -> List[Tuple[str, int, Optional[int]]]:
+    """
+    Parse tfs : M5:48,M15:80,H1:100 -> [("M5", 48, None), ("M15", 80, None), ("H1", 100, None)].
+    Un 3e champ optionnel (M15:80:1700000000) = since (mode incrémental, cf. _rates_since).
+    """
+    out: List[Tuple[str, int, Optional[int]]] = []
+    for item in (tfs or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, rest = item.partition(":")
+        raw_count, _, raw_since = rest.partition(":")
+        name = name.strip().upper()
+        if name not in TF_MAP:
+            raise HTTPException(status_code=400, detail=f"Invalid timeframe: {name}")
+        try:
+            count = int(raw_count) if raw_count.strip() else 200
+            since = int(raw_since) if raw_since.strip() else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid count/since for {name}: {rest}")
+        if count <= 0:
+            raise HTTPException(status_code=400, detail=f"count must be > 0 ({name})")
+        out.append((name, min(count, 5000), since))
+    if not out:
+        raise HTTPException(status_code=422, detail="tfs is required (ex: M5:48,M15:80,H1:100)")
+    return out
+
+
+def _rates_since(symbol: str, name: str, since: int, count: int):
+    """
+    Barres dont time >= since via copy_rates_from (since = dernière barre connue du client,
+    renvoyée à nouveau pour rafraîchir la barre en formation). Au plus count barres.
+    Les time MT5 sont en heure serveur : on se cale sur le dernier tick, pas sur l'horloge locale.
+    """
+    tf_sec = TF_SECONDS.get(name, 60)
+    t = mt5.symbol_info_tick(symbol)
+    now = int(t.time) if t is not None else int(time.time())
+    needed = max(1, min(count, (now - since) // tf_sec + 2))
+    date_from = datetime.fromtimestamp(now + tf_sec, tz=timezone.utc)
+    rates = mt5.copy_rates_from(symbol, TF_MAP[name], date_from, needed)
+    if rates is None:
+        return None
+    return rates[rates["time"] >= since]
+
+
+class _BarCache:
+    """
+    Cache des barres clôturées par (symbole, TF). Chaque lecture ne demande à MT5 que la barre
+    en formation (copy_rates_from_pos(..., 0, 1)) ; quand son time change (nouvelle barre ouverte),
+    l'entrée est invalidée et la fenêtre complète est relue.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def rates(self, symbol: str, name: str, count: int):
+        tf_const = TF_MAP[name]
+        key = (symbol, name)
+        forming = mt5.copy_rates_from_pos(symbol, tf_const, 0, 1)
+        if forming is None or len(forming) == 0:
+            return forming
+        forming_time = int(forming["time"][-1])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["forming_time"] != forming_time:
+                self.invalidations += 1
+                entry = None
+                self._entries.pop(key, None)
+            if entry is not None and len(entry["closed"]) >= count - 1:
+                self.hits += 1
+                closed = entry["closed"]
+                return np.concatenate([closed[len(closed) - (count - 1):], forming])
+            self.misses += 1
+        rates = mt5.copy_rates_from_pos(symbol, tf_const, 0, count)
+        if rates is None or len(rates) == 0:
+            return rates
+        with self._lock:
+            self._entries[key] = {
+                "forming_time": int(rates["time"][-1]),
+                "closed": np.ascontiguousarray(rates[:-1]),
+            }
+        return rates
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+                "entries": {
+                    f"{sym}:{name}": {"closed_bars": len(e["closed"]), "forming_time": e["forming_time"]}
+                    for (sym, name), e in self._entries.items()
+                },
+            }
+
+
+_BAR_CACHE = _BarCache()
+
+
+CANDLE_FORMATS = ("json", "columnar", "npy")
+
+
+def _check_format(fmt: str, allowed: Tuple[str, ...] = CANDLE_FORMATS) -> str:
+    fmt = (fmt or "json").lower()
+    if fmt not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {fmt} ({', '.join(allowed)})")
+    return fmt
+
+
+def _columns_from_rates(rates) -> Dict[str, List[Any]]:
+    """format=columnar : une liste par champ du structured array (tolist en C, pas de boucle par barre)."""
+    return {name: rates[name].tolist() for name in rates.dtype.names}
+
+
+def _npy_bytes(rates) -> bytes:
+    """format=npy : structured array sérialisé tel quel (np.save, sans pickle)."""
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(rates), allow_pickle=False)
+    return buf.getvalue()
+
+
 def _init_mt5_background() -> None:
     """En Session 0 / NSSM, la lib doit appeler initialize() pour voir le terminal."""
     if not MT5_AVAILABLE:
@@ -82,7 +421,7 @@ def on_startup() -> None:
 def on_shutdown() -> None:
     if MT5_AVAILABLE:
         try:
-            mt5.shutdown()
+            _MT5_EXECUTOR.run(PRIO_ORDER, mt5.shutdown, timeout=5.0)
         except Exception:
             pass
 
@@ -106,8 +445,7 @@ def health() -> Dict[str, Any]:
     if not MT5_AVAILABLE:
         raise HTTPException(status_code=503, detail="MetaTrader5 package not installed")
     try:
-        fut = _HEALTH_EXECUTOR.submit(_health_check_mt5)
-        info = fut.result(timeout=20.0)
+        info = _MT5_EXECUTOR.run(PRIO_TICK, _health_check_mt5, key=("health",), timeout=20.0)
     except FuturesTimeoutError:
         raise HTTPException(
             status_code=503,
@@ -123,12 +461,7 @@ def health() -> Dict[str, Any]:
 
 @app.get("/tick")
 def tick(symbol: str) -> Dict[str, Any]:
-    _ensure_mt5_initialized()
-    _ensure_symbol(symbol)
-
-    t = mt5.symbol_info_tick(symbol)
-    if t is None:
-        raise HTTPException(status_code=503, detail="No tick data")
+    t = _mt5_call(PRIO_TICK, _tick_job, symbol, key=("tick", symbol))
 
     ts_iso = _time_msc_to_iso(int(t.time_msc))
     return {
@@ -142,16 +475,9 @@ def tick(symbol: str) -> Dict[str, Any]:
 
 @app.get("/spread")
 def spread(symbol: str) -> Dict[str, Any]:
-    _ensure_mt5_initialized()
-    _ensure_symbol(symbol)
-
-    t = mt5.symbol_info_tick(symbol)
-    if t is None:
-        raise HTTPException(status_code=503, detail="No tick data")
+    t, point = _mt5_call(PRIO_TICK, _tick_job, symbol, True, key=("tick+point", symbol))
 
     spread_price = float(t.ask) - float(t.bid)
-    info = mt5.symbol_info(symbol)
-    point = float(info.point) if info and info.point else 0.01
     spread_points = (spread_price / point) if point else spread_price * 100
 
     return {
@@ -171,7 +497,17 @@ def candles(
     count: int = 200,
     tf: Optional[str] = None,
     n: Optional[int] = None,
-) -> Dict[str, Any]:
+    since: Optional[int] = None,
+    format: str = "json",
+) -> Any:
+    """
+    Dernières bougies (copy_rates_from_pos). Avec since=<time unix de la dernière barre connue> :
+    uniquement les barres time >= since (copy_rates_from) — 1 à 2 barres par cycle au lieu de count.
+    - format=json (défaut) : une liste de dicts par barre
+    - format=columnar : {"columns": {"time": [...], "open": [...], ...}}
+    - format=npy : corps binaire application/x-npy (structured array MT5), méta en en-têtes X-*
+    """
+    fmt = _check_format(format)
     if timeframe is None:
         timeframe = tf
     if n is not None:
@@ -189,41 +525,138 @@ def candles(
     if count > 5000:
         count = 5000
 
-    _ensure_mt5_initialized()
-    _ensure_symbol(symbol)
-
-    rates = mt5.copy_rates_from_pos(symbol, tf_const, 0, count)
-    if rates is None:
-        raise HTTPException(status_code=503, detail=f"copy_rates failed: {mt5.last_error()}")
-    if len(rates) == 0:
+    name = timeframe.upper()
+    rates = _mt5_call(PRIO_CANDLES, _rates_job, symbol, name, count, since, key=("rates", symbol, name, count, since))
+    if len(rates) == 0 and since is None:
         raise HTTPException(status_code=503, detail="No candles returned")
 
-    out: List[Dict[str, Any]] = []
-    for r in rates:
-        out.append({
-            "time": int(r["time"]),
-            "time_msc": int(r["time"]) * 1000,
-            "ts": datetime.fromtimestamp(int(r["time"]), tz=timezone.utc).isoformat(),
-            "open": float(r["open"]),
-            "high": float(r["high"]),
-            "low": float(r["low"]),
-            "close": float(r["close"]),
-            "tick_volume": int(r["tick_volume"]),
-            "spread": int(r["spread"]),
-            "real_volume": int(r["real_volume"]),
-        })
+    if fmt == "npy":
+        return Response(
+            content=_npy_bytes(rates),
+            media_type="application/x-npy",
+            headers={"X-Symbol": symbol, "X-Timeframe": timeframe.upper(), "X-Count": str(len(rates))},
+        )
+    if fmt == "columnar":
+        return {
+            "symbol": symbol,
+            "timeframe": timeframe.upper(),
+            "n": len(rates),
+            "since": since,
+            "format": "columnar",
+            "columns": _columns_from_rates(rates),
+        }
+
+    out = _candles_from_rates(rates)
 
     return {
         "symbol": symbol,
         "timeframe": timeframe.upper(),
         "n": len(out),
+        "since": since,
         "candles": out,
     }
 
 
+@app.get("/executor/stats")
+def executor_stats() -> Dict[str, Any]:
+    """File MT5 : profondeur, requêtes fusionnées, timeouts et durée d'exécution par priorité."""
+    return _MT5_EXECUTOR.stats()
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    """Compteurs du cache de barres (hits, misses, invalidations sur nouvelle barre)."""
+    return _BAR_CACHE.stats()
+
+
+TICK_STREAM_HEARTBEAT_SEC = 15.0
+
+
+@app.get("/ticks/stream")
+async def ticks_stream(request: Request, symbol: str, interval_ms: int = 100) -> StreamingResponse:
+    """
+    Flux SSE des ticks (symbol_info_tick) : un événement "data: {...}" par nouveau time_msc,
+    commentaire ": keepalive" toutes les 15s sans tick. Le core garde bid/ask et high/low intra-cycle.
+    """
+    try:
+        await _mt5_call_async(PRIO_TICK, _ensure_ready, symbol)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="MT5 timeout (ticks stream)")
+    interval = max(20, int(interval_ms)) / 1000.0
+
+    async def events():
+        last_msc = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            try:
+                # Même key pour tous les abonnés : un seul symbol_info_tick par intervalle
+                t = await _mt5_call_async(PRIO_TICK, mt5.symbol_info_tick, symbol, key=("stream_tick", symbol))
+            except asyncio.TimeoutError:
+                t = None
+            if t is not None and int(t.time_msc) != last_msc:
+                last_msc = int(t.time_msc)
+                last_sent = time.monotonic()
+                payload = {
+                    "symbol": symbol,
+                    "bid": float(t.bid),
+                    "ask": float(t.ask),
+                    "time_msc": last_msc,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            elif time.monotonic() - last_sent >= TICK_STREAM_HEARTBEAT_SEC:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/snapshot")
+def snapshot(symbol: str, tfs: str = "M5:48,M15:80,H1:100", format: str = "json") -> Dict[str, Any]:
+    """
+    Tick + spread + point + plusieurs fenêtres de bougies en un seul appel.
+    - tfs: liste "TF:count[:since]" séparée par des virgules (ex. M5:48,M15:80,H1:100)
+    - format=columnar : chaque TF est un dict de colonnes au lieu d'une liste de barres
+    Une TF sans bougie renvoie une liste vide (le core décide si c'est bloquant).
+    """
+    fmt = _check_format(format, ("json", "columnar"))
+    requested = _parse_tfs(tfs)
+
+    t, point = _mt5_call(PRIO_TICK, _tick_job, symbol, True, key=("tick+point", symbol))
+
+    spread_price = float(t.ask) - float(t.bid)
+    spread_points = (spread_price / point) if point else spread_price * 100
+
+    candles_by_tf: Dict[str, Any] = {}
+    for name, count, since in requested:
+        rates = _mt5_call(PRIO_CANDLES, _rates_job, symbol, name, count, since, key=("rates", symbol, name, count, since))
+        candles_by_tf[name] = _columns_from_rates(rates) if fmt == "columnar" else _candles_from_rates(rates)
+
+    return {
+        "symbol": symbol,
+        "bid": float(t.bid),
+        "ask": float(t.ask),
+        "time_msc": int(t.time_msc),
+        "ts": _time_msc_to_iso(int(t.time_msc)),
+        "point": point,
+        "spread_price": float(spread_price),
+        "spread_points": float(spread_points),
+        "format": fmt,
+        "candles": candles_by_tf,
+    }
+
+
 @app.get("/positions")
 def positions(symbol: Optional[str] = None) -> Dict[str, Any]:
     """Liste les positions ouvertes. Si symbol fourni, filtre par symbole."""
+    return _mt5_call(PRIO_ORDER, _positions_job, symbol, key=("positions", symbol))
+
+
+def _positions_job(symbol: Optional[str]) -> Dict[str, Any]:
     _ensure_mt5_initialized()
     positions_list = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
     if positions_list is None:
@@ -293,6 +726,10 @@ def position_modify_sl(body: ModifySLRequest) -> Dict[str, Any]:
     - ticket: numéro de ticket (optionnel)
     - direction: BUY ou SELL (requis si ticket absent)
     """
+    return _mt5_call(PRIO_ORDER, _modify_sl_job, body)
+
+
+def _modify_sl_job(body: ModifySLRequest) -> Dict[str, Any]:
     symbol = body.symbol
     new_sl = body.new_sl
     ticket = body.ticket
@@ -342,6 +779,10 @@ def position_close_partial(body: ClosePartialRequest) -> Dict[str, Any]:
     - direction: BUY ou SELL (type de la position à réduire)
     - percent: 50 = fermer 50% du volume
     """
+    return _mt5_call(PRIO_ORDER, _close_partial_job, body)
+
+
+def _close_partial_job(body: ClosePartialRequest) -> Dict[str, Any]:
     _ensure_mt5_initialized()
     _ensure_symbol(body.symbol)
 
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import httpx
+
+
+def _setup_env(extra=None):
+    os.environ["MARKET_PROVIDER"] = "remote_mt5"
+    os.environ["MT5_BRIDGE_URL"] = "http://bridge"
+    for key, value in (extra or {}).items():
+        os.environ[key] = value
+    from app.config import get_settings
+    get_settings.cache_clear()
+
+
+def _teardown_env():
+    for key in ["MARKET_PROVIDER", "MT5_BRIDGE_URL", "MT5_ASYNC_FETCH"]:
+        os.environ.pop(key, None)
+    from app.config import get_settings
+    get_settings.cache_clear()
+
+
+def _bridge_transport(state):
+    """Bridge factice sans /snapshot ; chaque requête dort un peu pour mesurer le parallélisme."""
+    fresh_ts = datetime.now(timezone.utc).isoformat()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        state["paths"].append(path)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            state["in_flight"] -= 1
+        if path == "/tick":
+            return httpx.Response(200, json={"bid": 4671.5, "ask": 4672.0, "ts": fresh_ts})
+        if path == "/spread":
+            return httpx.Response(200, json={"spread_points": 12})
+        if path == "/candles":
+            tf = request.url.params["timeframe"]
+            n = int(request.url.params["count"])
+            bars = [{"time": 1_700_000_000 + i * 60, "close": 4670.0} for i in range(n)]
+            return httpx.Response(200, json={"timeframe": tf, "candles": bars})
+        return httpx.Response(404, json={"detail": "Not Found"})
+
+    return httpx.MockTransport(handler)
+
+
+def _new_state():
+    return {"paths": [], "in_flight": 0, "max_in_flight": 0}
+
+
+def test_async_snapshot_fetches_in_parallel():
+    _setup_env()
+    try:
+        from app.providers.async_remote_mt5_provider import AsyncRemoteMT5Provider
+        from app.providers.market_snapshot import fetch_market_snapshot_async
+
+        state = _new_state()
+
+        async def run():
+            provider = AsyncRemoteMT5Provider(client=httpx.AsyncClient(transport=_bridge_transport(state)))
+            try:
+                return await fetch_market_snapshot_async(provider, "XAUUSD")
+            finally:
+                await provider.aclose()
+
+        snap = asyncio.run(run())
+        assert snap.tick == (4671.5, 4672.0)
+        assert snap.spread == 12.0
+        assert len(snap.candles_m15) == 80 and len(snap.candles_h1) == 100 and len(snap.candles_m5) == 48
+        # /snapshot (404) puis 6 lectures unitaires lancées ensemble
+        assert state["paths"][0] == "/snapshot"
+        assert sorted(p for p in state["paths"] if p != "/snapshot") == ["/candles", "/candles", "/candles", "/spread", "/tick", "/tick"]
+        assert state["max_in_flight"] == 6
+    finally:
+        _teardown_env()
+
+
+def test_async_snapshot_required_failure_raises():
+    _setup_env()
+    try:
+        from app.providers.async_remote_mt5_provider import AsyncRemoteMT5Provider
+        from app.providers.market_snapshot import fetch_market_snapshot_async
+
+        def handler(request):
+            raise httpx.ConnectError("down")
+
+        async def run():
+            provider = AsyncRemoteMT5Provider(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+            try:
+                await fetch_market_snapshot_async(provider, "XAUUSD")
+            finally:
+                await provider.aclose()
+
+        try:
+            asyncio.run(run())
+            assert False, "bridge injoignable → RuntimeError attendu"
+        except RuntimeError as exc:
+            assert "MT5 bridge error" in str(exc)
+    finally:
+        _teardown_env()
+
+
+def test_fetch_cycle_snapshot_uses_async_provider(monkeypatch):
+    _setup_env({"MT5_ASYNC_FETCH": "true"})
+    try:
+        import app.providers as providers
+        from app.providers.async_remote_mt5_provider import AsyncRemoteMT5Provider
+
+        state = _new_state()
+
+        class MockedBridgeProvider(AsyncRemoteMT5Provider):
+            @property
+            def client(self):
+                # Créé au premier appel, donc sur la boucle bridge
+                if self._client is None:
+                    self._client = httpx.AsyncClient(transport=_bridge_transport(state))
+                return self._client
+
+        monkeypatch.setattr(providers, "_async_provider", MockedBridgeProvider())
+        snap = providers.fetch_cycle_snapshot(providers.get_provider(), "XAUUSD")
+        assert len(snap.candles_m15) == 80
+        assert state["max_in_flight"] == 6
+        providers.close_provider()
+    finally:
+        _teardown_env()
@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+
+from app.engines.candle_frame import CandleFrame, as_frame
+from app.engines.entry_timing_engine import evaluate_entry_timing, get_m5_trend
+from app.engines.impulse_memory_engine import compute_impulse_memory
+from app.engines.market_phase_engine import get_market_phase
+from app.engines.range_engine import evaluate_range_indicators
+from app.engines.setup_engine import _compute_atr, detect_setups
+from app.engines.structure_engine import analyze_structure, detect_strong_trend_m15
+
+
+def _candles(n: int = 80, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    close = 2650.0 + np.cumsum(rng.normal(0, 4, n))
+    out = []
+    for i, c in enumerate(close):
+        o = c + rng.normal(0, 2)
+        out.append({
+            "time": 1_700_000_000 + i * 900,
+            "open": round(float(o), 2),
+            "high": round(float(max(o, c) + abs(rng.normal(0, 3))), 2),
+            "low": round(float(min(o, c) - abs(rng.normal(0, 3))), 2),
+            "close": round(float(c), 2),
+            "tick_volume": int(rng.integers(100, 2000)),
+        })
+    return out
+
+
+def _atr_dicts(candles, period=14):
+    """ATR de référence (ancien calcul sur liste de dicts)."""
+    highs = [float(c["high"]) for c in candles]
+    lows = [float(c["low"]) for c in candles]
+    closes = [float(c["close"]) for c in candles]
+    tr = [
+        max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1]))
+        for i in range(1, len(highs))
+    ]
+    return sum(tr[-period:]) / period
+
+
+def test_from_candles_columns_and_dict_adapter():
+    candles = _candles(20)
+    frame = CandleFrame.from_candles(candles)
+    assert len(frame) == 20
+    assert frame.close.dtype == np.float64 and frame.time.dtype == np.int64
+    assert frame.close.flags.c_contiguous
+    assert frame.volume.tolist() == [float(c["tick_volume"]) for c in candles]
+    assert frame[-1] is candles[-1]
+    assert len(frame[-5:]) == 5 and frame[-5:][0] is candles[-5]
+    assert as_frame(frame) is frame
+
+
+def test_from_columns_and_iso_time():
+    frame = CandleFrame.from_columns({
+        "time": np.array([1, 2]), "open": np.array([1.0, 2.0]), "high": np.array([2.0, 3.0]),
+        "low": np.array([0.5, 1.5]), "close": np.array([1.5, 2.5]),
+    })
+    assert frame[-1] == {"time": 2, "open": 2.0, "high": 3.0, "low": 1.5, "close": 2.5, "volume": 0.0}
+    iso = CandleFrame.from_candles([{"ts": "2026-03-02T00:00:00+00:00", "close": 1}])
+    assert iso.time[0] == 1772409600
+    assert math.isnan(iso.open[0])
+
+
+def test_atr_matches_dict_computation():
+    candles = _candles()
+    assert _compute_atr(candles) == _atr_dicts(candles)
+    assert _compute_atr(CandleFrame.from_candles(candles)) == _atr_dicts(candles)
+
+
+def test_engines_same_result_for_dicts_and_frame():
+    m15, h1, m5 = _candles(80, 1), _candles(100, 2), _candles(48, 3)
+    f15, fh1, f5 = (CandleFrame.from_candles(c) for c in (m15, h1, m5))
+    price = m15[-1]["close"]
+    assert analyze_structure(m15) == analyze_structure(f15)
+    assert detect_strong_trend_m15(m15) == detect_strong_trend_m15(f15)
+    assert get_market_phase(m15, h1) == get_market_phase(f15, fh1)
+    assert compute_impulse_memory(m15, 1.2) == compute_impulse_memory(f15, 1.2)
+    assert get_m5_trend(m5, "BUY") == get_m5_trend(f5, "BUY")
+    for direction in ("BUY", "SELL"):
+        assert detect_setups(m15, h1, price, direction, m5) == detect_setups(f15, fh1, price, direction, f5)
+        timing = dict(direction=direction, entry_nominal=price, swing_low=price - 30, swing_high=price + 30,
+                      current_price=price, atr=12.0, entry_timing_mode="pullback_m5")
+        assert evaluate_entry_timing(m15, candles_m5=m5, **timing) == evaluate_entry_timing(f15, candles_m5=f5, **timing)
+        args = (direction, price, price - 20, price + 20, 12.0, False, "ZONE_CONFIRMATION")
+        assert evaluate_range_indicators(m15, *args) == evaluate_range_indicators(f15, *args)
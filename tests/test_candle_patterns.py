@@ -0,0 +1,87 @@
+"""
+Masques de patterns vectorisés : parité avec les évaluations bougie par bougie d'origine
+(rejet / pin bar, engulfing, sweep, rejet en zone) et branchement suivi / range.
+"""
+import numpy as np
+
+from app.engines.candle_frame import CandleFrame
+from app.engines.candle_patterns import sweep_mask, zone_rejection_mask
+from app.engines.range_engine import evaluate_range_indicators
+from app.engines.suivi_engine import _check_engulfing_against, _check_pin_bar_against
+
+
+def _rejection_ref(c, bullish):
+    o, h, l, cl = c["open"], c["high"], c["low"], c["close"]
+    body, total = abs(cl - o), h - l
+    wick = (min(o, cl) - l) if bullish else (h - max(o, cl))
+    return total > 0 and wick > body * 1.5 and wick > total * 0.4
+
+
+def _engulfing_ref(prev, curr, bullish):
+    po, pc, co, cc = prev["open"], prev["close"], curr["open"], curr["close"]
+    if bullish:
+        return po >= pc and co <= cc and co <= pc and cc >= po
+    return po <= pc and co >= cc and co >= pc and cc <= po
+
+
+def _candles(n, seed, tick=0.5):
+    """Prix au demi-point : corps nuls, mèches égales et englobements exacts fréquents."""
+    rng = np.random.default_rng(seed)
+    o = np.round((2650 + np.cumsum(rng.normal(0, 2, n))) / tick) * tick
+    c = np.round((o + rng.normal(0, 2, n)) / tick) * tick
+    h = np.maximum(o, c) + np.round(np.abs(rng.normal(0, 2, n)) / tick) * tick
+    l = np.minimum(o, c) - np.round(np.abs(rng.normal(0, 2, n)) / tick) * tick
+    return [{"open": float(a), "high": float(b), "low": float(x), "close": float(y)} for a, b, x, y in zip(o, h, l, c)]
+
+
+def test_masks_match_per_candle_checks():
+    for seed in range(10):
+        candles = _candles(300, seed)
+        masks = CandleFrame.from_candles(candles).patterns
+        assert masks.rejection_bullish.tolist() == [_rejection_ref(c, True) for c in candles]
+        assert masks.rejection_bearish.tolist() == [_rejection_ref(c, False) for c in candles]
+        assert masks.engulfing_bullish.tolist() == [False] + [
+            _engulfing_ref(p, c, True) for p, c in zip(candles, candles[1:])
+        ]
+        assert masks.engulfing_bearish.tolist() == [False] + [
+            _engulfing_ref(p, c, False) for p, c in zip(candles, candles[1:])
+        ]
+        assert masks.engulfing_bullish.any() and masks.rejection_bearish.any()
+
+
+def test_masks_computed_once_per_frame():
+    frame = CandleFrame.from_candles(_candles(20, 0))
+    assert frame.patterns is frame.patterns
+    assert len(frame.patterns.rejection("NONE")) == 20 and not frame.patterns.rejection("NONE").any()
+
+
+def test_level_patterns():
+    frame = CandleFrame.from_candles(_candles(200, 3))
+    level = float(np.median(frame.close))
+    for direction in ("BUY", "SELL"):
+        swept = sweep_mask(frame.high, frame.low, frame.close, direction, level, 1.0)
+        expected = [
+            (h > level + 1.0 and c < level) if direction == "SELL" else (l < level - 1.0 and c > level)
+            for h, l, c in zip(frame.high, frame.low, frame.close)
+        ]
+        assert swept.tolist() == expected
+        zone = zone_rejection_mask(frame.high, frame.low, frame.close, direction, level - 3, level + 3)
+        expected = [
+            (level - 3 <= c <= level + 3) and (l <= level - 1 if direction == "BUY" else h >= level + 1)
+            for h, l, c in zip(frame.high, frame.low, frame.close)
+        ]
+        assert zone.tolist() == expected
+
+
+def test_suivi_and_range_query_masks():
+    # Pin bar vendeuse puis engulfing baissier : signaux contre un BUY, pas contre un SELL
+    candles = [{"open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5}] * 5 + [
+        {"open": 100.0, "high": 104.0, "low": 99.8, "close": 100.2},
+        {"open": 100.0, "high": 101.0, "low": 99.5, "close": 100.8},
+        {"open": 101.0, "high": 101.2, "low": 98.0, "close": 99.5},
+    ]
+    assert _check_pin_bar_against(candles, "BUY") and not _check_pin_bar_against(candles, "SELL")
+    assert _check_engulfing_against(candles, "BUY") and not _check_engulfing_against(candles, "SELL")
+    out = evaluate_range_indicators(candles, "BUY", 99.0, 98.8, 104.0, 2.0, False, "ZONE_CONFIRMATION")
+    assert out["range_sweep"]  # low 98.0 < 98.8 - 0.2 puis close 99.5 au-dessus
+    assert not evaluate_range_indicators(candles, "SELL", 104.0, 98.8, 104.5, 2.0, False, "ZONE_CONFIRMATION")["range_sweep"]
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.infra.candle_store import CANDLE_DTYPE, TICK_DTYPE, TICKS, CandleStore, candles_to_records
+
+DAY = 86400
+T0 = int(datetime(2026, 3, 2, tzinfo=timezone.utc).timestamp())
+
+
+def _bars(start: int, n: int, step: int = 60) -> np.ndarray:
+    out = np.zeros(n, dtype=CANDLE_DTYPE)
+    out["time"] = start + np.arange(n) * step
+    out["close"] = 2000.0 + np.arange(n)
+    out["open"] = out["close"] - 0.5
+    out["high"] = out["close"] + 1.0
+    out["low"] = out["close"] - 1.0
+    return out
+
+
+def test_append_partitions_by_day_and_dedups(tmp_path):
+    store = CandleStore(str(tmp_path))
+    bars = _bars(T0 + DAY - 120, 4)  # 2 barres le 2 mars, 2 le 3 mars
+    assert store.append("XAUUSD", "M1", bars) == 4
+    assert [d.isoformat() for d in store.days("XAUUSD", "M1")] == ["2026-03-02", "2026-03-03"]
+    # Rejouer la même fenêtre + 1 barre : seule la nouvelle est écrite
+    assert store.append("XAUUSD", "M1", _bars(T0 + DAY - 120, 5)) == 1
+    assert store.last_time("XAUUSD", "M1") == T0 + DAY + 120
+
+
+def test_read_single_day_is_zero_copy(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append("XAUUSD", "M5", _bars(T0, 100, step=300))
+    out = store.read("XAUUSD", "M5", T0 + 300 * 10, T0 + 300 * 20)
+    assert len(out) == 10
+    assert out["time"][0] == T0 + 300 * 10
+    assert isinstance(out.base, np.memmap) or isinstance(out, np.memmap)
+    assert not out.flags.writeable
+
+
+def test_read_across_days_and_datetime_bounds(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append("XAUUSD", "H1", _bars(T0, 72, step=3600))
+    start = datetime(2026, 3, 2, 12, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 4, 12, tzinfo=timezone.utc)
+    out = store.read("XAUUSD", "H1", start, end)
+    assert len(out) == 48
+    assert np.all(np.diff(out["time"]) == 3600)
+    assert len(store.read("XAUUSD", "H1", T0 - DAY, T0)) == 0
+
+
+def test_partial_trailing_record_ignored(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append("XAUUSD", "M1", _bars(T0, 3))
+    path = tmp_path / "XAUUSD" / "M1" / "2026-03-02.bin"
+    with open(path, "ab") as fh:
+        fh.write(b"\x00" * 7)
+    assert len(store.read("XAUUSD", "M1", T0, T0 + DAY)) == 3
+    # Ajout suivant : l'enregistrement partiel est tronqué, rien n'est décalé
+    assert store.append("XAUUSD", "M1", _bars(T0, 5)) == 2
+    out = store.read("XAUUSD", "M1", T0, T0 + DAY)
+    assert np.array_equal(out, _bars(T0, 5))
+    assert path.stat().st_size == 5 * CANDLE_DTYPE.itemsize
+
+
+def test_ticks_and_dict_candles(tmp_path):
+    store = CandleStore(str(tmp_path))
+    ticks = np.array([(T0 * 1000 + 5, 2000.1, 2000.3), (T0 * 1000 + 9, 2000.2, 2000.4)], dtype=TICK_DTYPE)
+    assert store.append("XAUUSD", TICKS, ticks) == 2
+    assert store.read("XAUUSD", TICKS, T0, T0 + 1)["bid"].tolist() == [2000.1, 2000.2]
+    records = candles_to_records([
+        {"time": T0 + 60, "open": 1, "high": 2, "low": 0.5, "close": 1.5},
+        {"time": T0, "open": 1, "high": 2, "low": 0.5, "close": 1.2},
+    ])
+    assert records["time"].tolist() == [T0, T0 + 60]
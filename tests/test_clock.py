@@ -0,0 +1,67 @@
+"""
+Horloge injectable : fixe / simulée / système, MOCK_SERVER_TIME_UTC limité au MockDataProvider
+(set_clock prioritaire) et session de build_decision_packet pilotée par l'horloge passée.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.agents import build_decision_packet
+from app.config import get_settings
+from app.infra.clock import FixedClock, SimulatedClock, SystemClock, get_clock, use_clock
+from app.providers.mock import MockDataProvider
+
+T0 = datetime(2026, 1, 21, 9, 0, tzinfo=timezone.utc)
+
+
+def test_fixed_and_simulated_clocks():
+    fixed = FixedClock(datetime(2026, 1, 21, 9, 0))  # naïf → UTC
+    fixed.sleep(3600)
+    assert fixed.now() == T0
+
+    clock = SimulatedClock(T0)
+    clock.sleep(300)
+    assert clock.advance(minutes=5) == T0 + timedelta(minutes=10)
+    clock.set(T0)
+    assert clock.now() == T0
+
+    # Avances concurrentes : aucune perdue
+    threads = [threading.Thread(target=lambda: [clock.advance(1) for _ in range(1000)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert clock.now() == T0 + timedelta(seconds=4000)
+
+
+def test_get_clock_precedence(monkeypatch):
+    monkeypatch.delenv("MOCK_SERVER_TIME_UTC", raising=False)
+    assert isinstance(get_clock(), SystemClock)
+    monkeypatch.setenv("MOCK_SERVER_TIME_UTC", "2026-01-21T14:45:00+00:00")
+    # Heure forcée par l'environnement : heure serveur du mock seulement, le process dort et date pour de vrai
+    assert isinstance(get_clock(), SystemClock)
+    assert MockDataProvider().get_server_time() == datetime(2026, 1, 21, 14, 45, tzinfo=timezone.utc)
+    with use_clock(FixedClock(T0)):
+        assert get_clock().now() == T0
+        assert MockDataProvider().get_server_time() == T0
+    assert MockDataProvider().get_server_time().hour == 14
+    assert isinstance(get_clock(), SystemClock)
+
+
+def test_session_follows_injected_clock(monkeypatch):
+    monkeypatch.delenv("MOCK_SERVER_TIME_UTC", raising=False)
+    monkeypatch.delenv("MOCK_PROVIDER_FAIL", raising=False)
+    monkeypatch.setenv("ALWAYS_IN_SESSION", "false")
+    monkeypatch.setenv("TRADING_SESSION_MODE", "market_close")
+    monkeypatch.setenv("MARKET_CLOSE_START", "23:00")
+    monkeypatch.setenv("MARKET_CLOSE_END", "00:05")
+    get_settings.cache_clear()
+    try:
+        clock = SimulatedClock(T0)  # 10:00 Paris : session ouverte
+        provider = MockDataProvider(clock=clock)
+        assert build_decision_packet(provider, "XAUUSD", clock=clock).session_ok
+        clock.advance(hours=13)  # 23:00 Paris : fermeture marché
+        packet = build_decision_packet(provider, "XAUUSD", clock=clock)
+        assert not packet.session_ok
+        assert packet.timestamps["ts_utc"] == clock.now().isoformat()
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,69 @@
+"""
+Décision GO / NO_GO partagée par /analyze et le replay : confirmation du setup, chaîne de blocages
+et garde-fous d'un GO envoyé (A+, cooldown après trade clôturé, même GO dans l'heure).
+"""
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from app.config import get_settings
+from app.engines.decision_engine import decide_cycle, go_send_allowed, setup_confirmation
+from app.models import BlockedBy, DecisionStatus
+from app.state_repo import StateRow
+from tests.test_scorer import _base_packet
+
+NOW = datetime(2026, 1, 21, 10, 0, tzinfo=timezone.utc)
+
+
+def _state(**overrides) -> StateRow:
+    data = dict(
+        day_paris="2026-01-21",
+        daily_loss_amount=0.0,
+        daily_budget_amount=20.0,
+        last_signal_key=None,
+        last_ts=None,
+        consecutive_losses=0,
+        last_setup_direction=None,
+        last_setup_entry=None,
+        last_setup_bar_ts=None,
+        setup_confirm_count=0,
+    )
+    data.update(overrides)
+    return StateRow(**data)
+
+
+def test_setup_confirmation():
+    packet = _base_packet(state={"setup_direction": "BUY", "setup_bar_ts": "b2"})
+    assert setup_confirmation(packet, _state()) == (1, True)
+    same = _state(last_setup_direction="BUY", last_setup_entry=100.0, last_setup_bar_ts="b1", setup_confirm_count=1)
+    assert setup_confirmation(packet, same) == (min(2, get_settings().setup_confirm_min_bars), True)
+    # Même barre de setup : compteur inchangé, rien à enregistrer
+    assert setup_confirmation(packet, replace(same, last_setup_bar_ts="b2")) == (1, False)
+    assert setup_confirmation(packet, same, data_off=True) == (1, False)
+
+
+def test_decide_cycle_data_off_and_low_score():
+    packet = _base_packet()
+    cycle = decide_cycle(packet, _state(), "k", NOW, 1, [], [], None, data_off=True, data_off_reason="Data trop ancienne")
+    assert cycle.status == DecisionStatus.no_go and cycle.blocked_by == BlockedBy.data_off
+    assert cycle.why == ("Data trop ancienne",) and packet.reasons_rules == ["Data trop ancienne"]
+
+    packet = _base_packet(setups_detected=[], rr_tp1=0.1)
+    cycle = decide_cycle(packet, _state(), "k", NOW, 1, [], [], None)
+    assert cycle.status == DecisionStatus.no_go and cycle.blocked_by is not None
+    assert packet.score_rules == cycle.score_total
+
+
+def test_go_send_allowed():
+    a_plus = get_settings().a_plus_min_score
+    packet = _base_packet()
+    state = _state()
+    assert go_send_allowed(packet, a_plus, state, None, NOW)
+    assert not go_send_allowed(packet, a_plus - 1, state, None, NOW)
+    # Trade clôturé il y a 1 minute : cooldown
+    closed = replace(state, last_trade_closed_ts=(NOW - timedelta(minutes=1)).isoformat())
+    assert not go_send_allowed(packet, a_plus, closed, None, NOW)
+    # Même GO (mêmes niveaux) dans l'heure : pas renvoyé ; niveaux différents ou plus ancien : envoyé
+    last_go = {"ts_utc": (NOW - timedelta(minutes=30)).isoformat(), "entry": 100.0, "sl": 99.0, "tp1": 100.5, "tp2": 101.0}
+    assert not go_send_allowed(packet, a_plus, state, None, NOW, last_go=last_go)
+    assert go_send_allowed(packet, a_plus, state, None, NOW, last_go={**last_go, "entry": 100.5})
+    assert go_send_allowed(packet, a_plus, state, None, NOW + timedelta(hours=1), last_go=last_go)
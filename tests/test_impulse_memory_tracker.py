@@ -0,0 +1,81 @@
+"""
+Mémoire d'impulsion : recalcul seulement à la clôture d'une barre, impulsion nouvelle signalée
+à l'appelant, enregistrée par /analyze et listée par GET /impulses/recent.
+"""
+import os
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.engines.candle_frame import CandleFrame
+from app.engines.impulse_memory_engine import compute_impulse_memory
+from app.engines.indicator_state import IndicatorTracker
+from app.infra.db import get_recent_impulses, init_db
+
+
+def _candles(n, forming_range=1.0):
+    out = [
+        {"time": 1_700_000_000 + i * 900, "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5}
+        for i in range(n)
+    ]
+    out[n - 6] = {**out[n - 6], "open": 100.0, "high": 110.0, "low": 99.0, "close": 109.0}  # impulsion haussière
+    out[-1] = {**out[-1], "high": 100.0 + forming_range, "low": 100.0 - forming_range}
+    return out
+
+
+def _setup_db(tmp_path):
+    os.environ["DATABASE_PATH"] = str(tmp_path / "impulses.db")
+    get_settings.cache_clear()
+    init_db()
+
+
+def test_recomputed_only_on_bar_close():
+    tracker = IndicatorTracker()
+
+    first = tracker.sync(CandleFrame.from_candles(_candles(40), "XAUUSD", "M15"))
+    memory = first.impulse
+    assert first.impulse_new and memory.last_impulse_dir == "BUY" and memory.impulse_anchor_price == 99.0
+    assert memory == compute_impulse_memory(_candles(40)[:-1])
+    # Barre en formation qui grossit (mêmes barres clôturées) : rien d'intégré, même impulsion
+    again = tracker.sync(CandleFrame.from_candles(_candles(40, forming_range=30.0), "XAUUSD", "M15"))
+    assert again.bars_added == 0 and again.impulse == memory and not again.impulse_new
+    # Barre clôturée de plus (série plus longue : état reconstruit) ; barre d'impulsion différente (n - 6) → nouvelle
+    moved = tracker.sync(CandleFrame.from_candles(_candles(41), "XAUUSD", "M15"))
+    assert moved.impulse_new
+    assert moved.impulse.last_impulse_ts_utc != memory.last_impulse_ts_utc
+    # Barre clôturée sans nouvelle impulsion : même impulsion → pas nouvelle
+    candles = _candles(42)
+    candles[35], candles[36] = {**candles[36], "time": candles[35]["time"]}, {**candles[35], "time": candles[36]["time"]}
+    same = tracker.sync(CandleFrame.from_candles(candles, "XAUUSD", "M15"))
+    assert not same.impulse_new and same.impulse == moved.impulse
+
+
+def test_new_impulse_recorded_by_analyze_and_listed(tmp_path):
+    _setup_db(tmp_path)
+    from app.api.main import _record_new_impulse, app
+    from app.agents.decision_packet import build_fallback_packet
+
+    tracker = IndicatorTracker()
+    packet = build_fallback_packet("XAUUSD", datetime(2024, 1, 2, tzinfo=timezone.utc))
+    for n in (40, 40, 41):
+        live = tracker.sync(CandleFrame.from_candles(_candles(n), "XAUUSD", "M15"))
+        memory, new = live.impulse, live.impulse_new
+        packet.state["impulse_memory"] = {
+            "last_impulse_dir": memory.last_impulse_dir,
+            "last_impulse_ts_utc": memory.last_impulse_ts_utc,
+            "impulse_range_pts": memory.impulse_range_pts,
+            "impulse_anchor_price": memory.impulse_anchor_price,
+            "key_levels": memory.key_levels,
+        }
+        packet.state["impulse_memory_new"] = new
+        _record_new_impulse("XAUUSD", packet)
+    rows = get_recent_impulses("XAUUSD")
+    assert len(rows) == 2
+    assert rows[0]["key_levels"] == [99.0, 110.0] and rows[0]["timeframe"] == "M15"
+
+    resp = TestClient(app).get("/impulses/recent", params={"symbol": "XAUUSD", "limit": 5})
+    assert resp.status_code == 200
+    impulses = resp.json()["impulses"]
+    assert len(impulses) == 2
+    assert impulses[0]["direction"] == "BUY" and impulses[0]["anchor_price"] == 99.0
@@ -0,0 +1,148 @@
+"""
+IndicatorState incrémental : cohérence barre par barre avec les fonctions batch sur la même fenêtre,
+persistance SQLite (reprise après redémarrage) et IndicatorTracker du cycle /analyze.
+"""
+import os
+
+import numpy as np
+
+from app.config import get_settings
+from app.engines.candle_frame import CandleFrame
+from app.engines.impulse_memory_engine import compute_impulse_memory
+from app.engines.indicator_state import IndicatorState, IndicatorTracker
+from app.engines.structure_engine import _analyze_structure, analyze_structure, detect_swings
+from app.infra.db import init_db
+from app.infra.indicator_store import load_indicator_state, save_indicator_state
+
+
+def _candles(n, seed=0, tick=0.5):
+    """Prix arrondis au demi-point (égalités fréquentes) avec quelques grosses bougies d'impulsion."""
+    rng = np.random.default_rng(seed)
+    close = 2650.0 + np.cumsum(rng.normal(0, 2, n))
+    spread = np.abs(rng.normal(0, 1.5, n)) * np.where(rng.random(n) < 0.05, 6.0, 1.0)
+    high = np.round((close + spread) / tick) * tick
+    low = np.round((close - np.abs(rng.normal(0, 1.5, n))) / tick) * tick
+    open_ = np.round((low + (high - low) * rng.random(n)) / tick) * tick
+    return [
+        {"time": 1_700_000_000 + i * 900, "open": float(o), "high": float(h), "low": float(l), "close": float(c)}
+        for i, (o, h, l, c) in enumerate(zip(open_, high, low, close))
+    ]
+
+
+def _assert_matches_batch(state, window):
+    frame = CandleFrame.from_candles(window)
+    assert state.atr == frame.atr(14)
+    assert state.swings == detect_swings(window)
+    assert state.structure() == _analyze_structure(frame)
+    assert state.impulse() == compute_impulse_memory(window, impulse_atr_mult=state.impulse_atr_mult)
+
+
+def test_incremental_matches_batch_bar_by_bar():
+    for seed in range(4):
+        candles = _candles(260, seed)
+        state = IndicatorState("XAUUSD", "M15", window=120)
+        for i, c in enumerate(candles):
+            assert state.update(c["time"], c["open"], c["high"], c["low"], c["close"])
+            # Fenêtre en remplissage (< 15 barres, replis ATR) puis glissante (barres sorties de la fenêtre)
+            _assert_matches_batch(state, candles[max(0, i + 1 - 120):i + 1])
+
+
+def test_update_candles_skips_seen_bars():
+    candles = _candles(80)
+    state = IndicatorState("XAUUSD", "M15", window=50)
+    assert state.update_candles(candles[:60]) == 60
+    # Recouvrement (même fetch relu au cycle suivant) : seules les barres nouvelles sont intégrées
+    assert state.update_candles(CandleFrame.from_candles(candles[40:])) == 20
+    assert state.update(candles[-1]["time"], 0.0, 0.0, 0.0, 0.0) is False
+    assert len(state) == 50 and state.count == 80
+    _assert_matches_batch(state, candles[-50:])
+
+
+def test_sqlite_round_trip(tmp_path):
+    os.environ["DATABASE_PATH"] = str(tmp_path / "indicators.db")
+    get_settings.cache_clear()
+    init_db()
+    candles = _candles(150, seed=7)
+
+    assert load_indicator_state("XAUUSD", "M15", window=100).count == 0
+    state = IndicatorState("XAUUSD", "M15", window=100)
+    state.update_candles(candles[:120])
+    save_indicator_state(state)
+
+    # "Redémarrage" : l'état rechargé reprend là où il s'était arrêté
+    restored = load_indicator_state("XAUUSD", "m15", window=100)
+    assert restored.to_dict() == state.to_dict()
+    restored.update_candles(candles)
+    _assert_matches_batch(restored, candles[-100:])
+
+    # Paramètres différents : l'état persisté n'est pas réutilisé
+    assert load_indicator_state("XAUUSD", "M15", window=60).count == 0
+
+
+def _snapshot(candles, end, n=80):
+    """Série d'un cycle : n barres jusqu'à end, la dernière encore en formation (range partiel)."""
+    window = [dict(c) for c in candles[max(0, end - n):end]]
+    last = window[-1]
+    window[-1] = {**last, "high": (last["high"] + last["open"]) / 2, "close": last["open"]}
+    return CandleFrame.from_candles(window, "XAUUSD", "M15")
+
+
+def test_tracker_matches_batch_on_cycle_series():
+    candles = _candles(220, seed=3)
+    tracker = IndicatorTracker()
+    for end in range(60, 220, 3):
+        frame = _snapshot(candles, end)
+        live = tracker.sync(frame)
+        assert live is not None
+        assert live.atr == frame.atr(14)
+        assert live.structure == _analyze_structure(frame)
+        assert analyze_structure(frame) is live.structure  # servie par le StructureCache
+        assert live.impulse == compute_impulse_memory(frame[:-1])
+    # Barre en formation qui évolue, mêmes barres clôturées : rien de nouveau à intégrer
+    again = tracker.sync(_snapshot(candles, 219))
+    assert again.bars_added == 0 and not again.rebuilt and not again.impulse_new
+
+
+def test_tracker_rebuilds_on_gap_and_uses_store():
+    candles = _candles(400, seed=5)
+    saved = []
+    seed = IndicatorState("XAUUSD", "M15", window=80)
+    seed.update_candles(candles[:99])
+    tracker = IndicatorTracker(loader=lambda *a, **k: seed.copy(), saver=saved.append)
+
+    live = tracker.sync(_snapshot(candles, 101))
+    assert live.bars_added == 1 and not live.rebuilt and len(saved) == 1
+    assert saved[0].last_time == candles[99]["time"]
+
+    # Trou plus long que la fenêtre (coupure) : la série entière est intégrée, toujours cohérente
+    frame = _snapshot(candles, 300)
+    live = tracker.sync(frame)
+    assert live.bars_added == 79 and not live.rebuilt and live.structure == _analyze_structure(frame)
+    # Série qui ne prolonge pas l'état (historique antérieur, replay relancé) : état reconstruit
+    frame = _snapshot(candles, 150)
+    live = tracker.sync(frame)
+    assert live.rebuilt and live.structure == _analyze_structure(frame)
+    assert live.impulse == compute_impulse_memory(frame[:-1])
+
+    # Série non identifiée (pas de time) : None, l'appelant calcule en batch
+    assert tracker.sync([{k: v for k, v in c.items() if k != "time"} for c in candles[:80]]) is None
+
+
+def test_tracker_rebuilds_when_prices_differ_at_same_times():
+    series_a = _candles(120, seed=11)
+    series_b = [
+        {**c, "open": b["open"], "high": b["high"], "low": b["low"], "close": b["close"]}
+        for c, b in zip(series_a, _candles(120, seed=12))
+    ]
+    tracker = IndicatorTracker()
+    tracker.sync(_snapshot(series_a, 120))
+    frame = _snapshot(series_b, 120)
+    live = tracker.sync(frame)
+    assert live.rebuilt
+    assert live.atr == frame.atr(14) == IndicatorTracker().sync(frame).atr
+    assert live.structure == _analyze_structure(frame)
+    assert live.impulse == compute_impulse_memory(frame[:-1])
+    # Une seule barre révisée (historique broker) suffit à reconstruire
+    revised = [dict(c) for c in series_b]
+    revised[100] = {**revised[100], "high": revised[100]["high"] + 5.0}
+    assert tracker.sync(_snapshot(revised, 120)).rebuilt
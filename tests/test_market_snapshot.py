@@ -0,0 +1,89 @@
+"""Tests du snapshot marché par cycle : une seule lecture des bougies par /analyze."""
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+
+from app.providers.market_snapshot import fetch_market_snapshot
+from app.providers.mock import MockDataProvider
+
+
+class CountingProvider(MockDataProvider):
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+
+    def get_candles(self, symbol, timeframe, n):
+        self.calls[f"candles:{timeframe}"] += 1
+        return super().get_candles(symbol, timeframe, n)
+
+    def get_tick(self, symbol):
+        self.calls["tick"] += 1
+        return super().get_tick(symbol)
+
+    def get_spread(self, symbol):
+        self.calls["spread"] += 1
+        return super().get_spread(symbol)
+
+
+def _setup_env(tmp_path):
+    os.environ["DATABASE_PATH"] = str(tmp_path / "test_snapshot.db")
+    for key in ["MOCK_SERVER_TIME_UTC", "MOCK_PROVIDER_FAIL", "TELEGRAM_ENABLED", "MT5_BRIDGE_URL"]:
+        os.environ.pop(key, None)
+    os.environ["MARKET_PROVIDER"] = "mock"
+    os.environ["ALWAYS_IN_SESSION"] = "true"
+    os.environ["STATE_MACHINE_ENABLED"] = "true"
+    os.environ["ROOM_TO_TARGET_ENABLED"] = "true"
+    from app.config import get_settings
+    get_settings.cache_clear()
+
+
+def _teardown_env():
+    for key in ["STATE_MACHINE_ENABLED", "ROOM_TO_TARGET_ENABLED"]:
+        os.environ.pop(key, None)
+    from app.config import get_settings
+    get_settings.cache_clear()
+
+
+def test_fetch_market_snapshot_is_immutable():
+    os.environ.pop("MOCK_PROVIDER_FAIL", None)
+    snap = fetch_market_snapshot(MockDataProvider(), "XAUUSD")
+    assert snap.symbol == "XAUUSD"
+    assert snap.bid == 4671.5 and snap.ask == 4672.0
+    assert isinstance(snap.candles_m15, tuple) and len(snap.candles_m15) > 0
+    assert len(snap.candles_m5) == 48 and len(snap.candles_h1) == 100
+    try:
+        snap.spread = 0.0  # type: ignore[misc]
+        assert False, "MarketSnapshot doit être immuable"
+    except AttributeError:
+        pass
+
+
+def test_analyze_fetches_each_timeframe_once(tmp_path, monkeypatch):
+    """Trade actif + state machine + room to target : chaque TF n'est lu qu'une fois par cycle."""
+    _setup_env(tmp_path)
+    try:
+        from app.api import main as api_main
+        from app.infra.db import init_db, set_active_trade
+        from app.state_repo import get_today_state
+
+        init_db()
+        day_paris = datetime.now(timezone.utc).astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+        get_today_state(day_paris)
+        set_active_trade(
+            day_paris, 4670.0, 4640.0, 4700.0, 4720.0, "BUY",
+            started_ts=datetime.now(timezone.utc).isoformat(),
+        )
+        provider = CountingProvider()
+        monkeypatch.setattr(api_main, "get_provider", lambda: provider)
+        client = TestClient(api_main.app)
+        resp = client.post("/analyze", json={"symbol": "XAUUSD"})
+        assert resp.status_code == 200
+        assert provider.calls["candles:M15"] == 1
+        assert provider.calls["candles:H1"] == 1
+        assert provider.calls["candles:M5"] == 1
+        assert provider.calls["tick"] == 1
+        assert provider.calls["spread"] == 1
+    finally:
+        _teardown_env()
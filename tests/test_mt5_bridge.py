@@ -0,0 +1,155 @@
+"""Bridge MT5 : cache de barres et exécuteur MT5 (MetaTrader5 simulé : module non installable hors Windows)."""
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+
+_BRIDGE_PATH = Path(__file__).resolve().parents[1] / "services" / "mt5_bridge" / "main.py"
+_DTYPE = [
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+]
+
+
+def _load_bridge():
+    spec = importlib.util.spec_from_file_location("mt5_bridge_main", _BRIDGE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # annotations pydantic résolues via le module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeMT5:
+    TIMEFRAME_M15 = 15
+
+    def __init__(self, n_bars):
+        self.calls = []
+        self.set_bars(n_bars)
+
+    def set_bars(self, n_bars):
+        self.rates = np.zeros(n_bars, dtype=_DTYPE)
+        self.rates["time"] = 1_700_000_000 + np.arange(n_bars) * 900
+        self.rates["close"] = np.arange(n_bars, dtype=float)
+
+    def copy_rates_from_pos(self, symbol, tf, start, count):
+        self.calls.append(count)
+        return self.rates[len(self.rates) - count:].copy()
+
+
+def test_bar_cache_serves_closed_bars_and_invalidates_on_new_bar(monkeypatch):
+    bridge = _load_bridge()
+    fake = FakeMT5(200)
+    monkeypatch.setattr(bridge, "mt5", fake)
+    monkeypatch.setitem(bridge.TF_MAP, "M15", fake.TIMEFRAME_M15)
+    cache = bridge._BarCache()
+
+    first = cache.rates("XAUUSD", "M15", 80)
+    assert fake.calls == [1, 80] and cache.misses == 1
+    # Même barre en formation (close mis à jour) : seule la barre courante est relue
+    fake.rates["close"][-1] = 999.0
+    second = cache.rates("XAUUSD", "M15", 50)
+    assert fake.calls[-1] == 1 and cache.hits == 1
+    assert len(second) == 50 and second["close"][-1] == 999.0
+    assert np.array_equal(second["time"], first["time"][-50:])
+
+    # Nouvelle barre ouverte → invalidation + relecture complète
+    fake.set_bars(201)
+    third = cache.rates("XAUUSD", "M15", 80)
+    assert fake.calls[-2:] == [1, 80] and cache.invalidations == 1
+    assert third["time"][-1] == fake.rates["time"][-1]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"]["XAUUSD:M15"]["closed_bars"] == 79
+
+
+def test_mt5_executor_priority_and_coalescing():
+    import threading
+
+    bridge = _load_bridge()
+    executor = bridge._MT5Executor()
+    gate = threading.Event()
+    started = threading.Event()
+    order = []
+    calls = {"candles": 0}
+
+    def blocker():
+        started.set()
+        gate.wait(2.0)
+        order.append("blocker")
+
+    def candles():
+        calls["candles"] += 1
+        order.append("candles")
+        return calls["candles"]
+
+    def modify_sl():
+        order.append("order")
+        return "ok"
+
+    first = executor.submit(bridge.PRIO_CANDLES, blocker)
+    assert started.wait(2.0)  # le thread MT5 est occupé
+    c1 = executor.submit(bridge.PRIO_CANDLES, candles, key=("rates", "XAUUSD", "M15", 80, None))
+    c2 = executor.submit(bridge.PRIO_CANDLES, candles, key=("rates", "XAUUSD", "M15", 80, None))
+    o = executor.submit(bridge.PRIO_ORDER, modify_sl)
+    assert c1 is c2  # lecture identique en vol : un seul appel MT5
+    assert executor.stats()["by_priority"]["candles"]["queued"] >= 1
+    gate.set()
+    assert o.result(2.0) == "ok" and c1.result(2.0) == 1 and first.result(2.0) is None
+    # L'ordre passe devant les bougies déjà en file
+    assert order == ["blocker", "order", "candles"]
+    stats = executor.stats()["by_priority"]
+    assert stats["candles"]["coalesced"] == 1 and stats["order"]["executed"] == 1
+    assert stats["candles"]["queued"] == 0
+
+
+def test_mt5_executor_timeout_maps_to_503():
+    import threading
+
+    import pytest
+    from fastapi import HTTPException
+
+    bridge = _load_bridge()
+    gate = threading.Event()
+    started = threading.Event()
+    bridge._MT5_EXECUTOR.submit(bridge.PRIO_CANDLES, lambda: (started.set(), gate.wait(2.0)))
+    assert started.wait(2.0)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            bridge._mt5_call(bridge.PRIO_ORDER, lambda: "late", timeout=0.05)
+        assert exc.value.status_code == 503
+        assert bridge._MT5_EXECUTOR.stats()["by_priority"]["order"]["timeouts"] == 1
+    finally:
+        gate.set()
+
+
+def test_async_timeout_keeps_shared_job_for_other_waiters(monkeypatch):
+    import asyncio
+    import threading
+
+    bridge = _load_bridge()
+    gate = threading.Event()
+    started = threading.Event()
+    bridge._MT5_EXECUTOR.submit(bridge.PRIO_CANDLES, lambda: (started.set(), gate.wait(2.0)))
+    assert started.wait(2.0)
+    key = ("stream_tick", "XAUUSD")
+
+    async def scenario():
+        monkeypatch.setitem(bridge.MT5_CALL_TIMEOUTS, bridge.PRIO_TICK, 0.05)
+        impatient = asyncio.create_task(bridge._mt5_call_async(bridge.PRIO_TICK, lambda: "tick", key=key))
+        await asyncio.sleep(0)
+        monkeypatch.setitem(bridge.MT5_CALL_TIMEOUTS, bridge.PRIO_TICK, 2.0)
+        patient = asyncio.create_task(bridge._mt5_call_async(bridge.PRIO_TICK, lambda: "other", key=key))
+        try:
+            await impatient
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("timeout attendu")
+        gate.set()
+        return await patient
+
+    try:
+        assert asyncio.run(scenario()) == "tick"  # même key : job coalescé, non annulé par le timeout
+        assert bridge._MT5_EXECUTOR.stats()["by_priority"]["tick"]["timeouts"] == 1
+    finally:
+        gate.set()
@@ -0,0 +1,121 @@
+"""
+Étiquetage vectorisé des outcomes : parité avec l'évaluation barre par barre (SL puis TP2 puis TP1
+sur une même barre), départ searchsorted, horizons, écriture du lot en une transaction et correction
+du signe des SL_HIT déjà enregistrés.
+"""
+import numpy as np
+
+from app.config import get_settings
+from app.engines.outcome_engine import label_outcomes
+from app.infra.db import get_conn, get_pending_outcome_signals, init_db, insert_signal_outcomes
+
+T0 = 1_768_982_400
+
+
+def _reference(bar_time, high, low, t, buy, entry, sl, tp1, tp2):
+    for bt, h, l in zip(bar_time, high, low):
+        if bt < t:
+            continue
+        if buy:
+            if l <= sl:
+                return "SL_HIT", sl - entry, bt
+            if tp2 > 0 and h >= tp2:
+                return "TP2_HIT", tp2 - entry, bt
+            if tp1 > 0 and h >= tp1:
+                return "TP1_HIT", tp1 - entry, bt
+        else:
+            if h >= sl:
+                return "SL_HIT", entry - sl, bt
+            if tp2 > 0 and l <= tp2:
+                return "TP2_HIT", entry - tp2, bt
+            if tp1 > 0 and l <= tp1:
+                return "TP1_HIT", entry - tp1, bt
+    return ("OPEN", None, None) if any(bt >= t for bt in bar_time) else ("UNKNOWN", None, None)
+
+
+def test_labels_match_bar_by_bar():
+    rng = np.random.default_rng(7)
+    m = 600
+    bar_time = T0 + 900 * np.arange(m)
+    close = 2650 + np.cumsum(rng.normal(0, 3, m))
+    high = close + np.abs(rng.normal(0, 2, m))
+    low = close - np.abs(rng.normal(0, 2, m))
+
+    n = 300
+    sig_time = T0 + rng.integers(-2, m + 5, n) * 900 + rng.integers(0, 900, n)
+    buy = rng.random(n) < 0.5
+    entry = close[np.clip((sig_time - T0) // 900, 0, m - 1)]
+    risk = rng.uniform(5, 25, n)
+    sl = np.where(buy, entry - risk, entry + risk)
+    tp1 = np.where(buy, entry + risk * 0.4, entry - risk * 0.4)
+    tp2 = np.where(rng.random(n) < 0.2, 0.0, np.where(buy, entry + risk, entry - risk))
+
+    labels = label_outcomes(bar_time, high, low, sig_time, buy, entry, sl, tp1, tp2)
+    for k in range(n):
+        outcome, pnl, at = _reference(bar_time, high, low, sig_time[k], buy[k], entry[k], sl[k], tp1[k], tp2[k])
+        assert labels.outcome[k] == outcome
+        if pnl is None:
+            assert np.isnan(labels.pnl_pts[k]) and labels.hit_time[k] == -1
+        else:
+            assert np.isclose(labels.pnl_pts[k], pnl) and labels.hit_time[k] == at
+    assert {"SL_HIT", "TP1_HIT", "TP2_HIT", "UNKNOWN"} <= set(labels.outcome)
+    assert (labels.pnl_pts[labels.outcome == "SL_HIT"] < 0).all()
+
+
+def test_same_bar_priority_and_horizon():
+    bar_time = np.array([T0, T0 + 900, T0 + 1800])
+    high = np.array([101.0, 112.0, 130.0])
+    low = np.array([99.0, 89.0, 99.0])
+    # BUY : la barre 2 touche TP2 et SL → SL ; SELL au même prix : SL (high 112) avant TP
+    labels = label_outcomes(bar_time, high, low, [T0, T0], [True, False], [100.0, 100.0], [90.0, 111.0], [105.0, 95.0], [110.0, 88.0])
+    assert labels.outcome.tolist() == ["SL_HIT", "SL_HIT"]
+    assert labels.pnl_pts.tolist() == [-10.0, -11.0]
+    assert labels.hit_time.tolist() == [T0 + 900, T0 + 900]
+    # Horizon d'une barre : rien touché → OPEN
+    short = label_outcomes(bar_time, high, low, [T0], [True], [100.0], [90.0], [105.0], [110.0], max_bars=1)
+    assert short.outcome.tolist() == ["OPEN"]
+
+
+def test_pending_and_batch_insert(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "outcomes.db"))
+    get_settings.cache_clear()
+    try:
+        init_db()
+        conn = get_conn()
+        conn.executemany(
+            "INSERT INTO signals (ts_utc, symbol, tf_signal, tf_context, status, direction, entry, sl, tp1, tp2, telegram_sent) "
+            "VALUES (?, 'XAUUSD', 'M15', 'H1', ?, 'BUY', 2650.0, 2630.0, 2657.0, 2664.0, 1)",
+            [("2026-01-21T08:00:00+00:00", "GO"), ("2026-01-21T09:00:00+00:00", "GO"), ("2026-01-21T10:00:00+00:00", "NO_GO")],
+        )
+        conn.commit()
+        conn.close()
+        pending = get_pending_outcome_signals()
+        assert len(pending) == 2
+        row = dict(pending[0], signal_id=pending[0]["id"], outcome="TP1_HIT", pnl_pts=7.0, outcome_ts_utc=None)
+        row.pop("id")
+        assert insert_signal_outcomes([row]) == 1
+        assert [p["id"] for p in get_pending_outcome_signals()] == [pending[1]["id"]]
+    finally:
+        get_settings.cache_clear()
+
+
+def test_init_db_fixes_sl_hit_sign(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "outcomes.db"))
+    get_settings.cache_clear()
+    try:
+        init_db()
+        base = {"signal_id": None, "ts_utc": "2026-01-21T08:00:00+00:00", "symbol": "XAUUSD", "direction": "BUY",
+                "entry": 2650.0, "sl": 2630.0, "tp1": 2657.0, "tp2": 2664.0, "outcome_ts_utc": None}
+        insert_signal_outcomes([
+            dict(base, outcome="SL_HIT", pnl_pts=20.0),  # signe erroné (ancien agent)
+            dict(base, outcome="SL_HIT", pnl_pts=-20.0),
+            dict(base, outcome="TP1_HIT", pnl_pts=7.0),
+        ])
+        init_db()
+        init_db()  # idempotent
+        conn = get_conn()
+        rows = conn.execute("SELECT outcome, pnl_pts FROM signal_outcomes ORDER BY id").fetchall()
+        conn.close()
+        assert [tuple(r) for r in rows] == [("SL_HIT", -20.0), ("SL_HIT", -20.0), ("TP1_HIT", 7.0)]
+    finally:
+        get_settings.cache_clear()
@@ -39,11 +39,42 @@ class FakeResponse:
         return self._payload
 
 
+class FakeBridgeClient:
+    """Remplace le pool httpx partagé du bridge : route les GET vers fake_get."""
+
+    def __init__(self, fake_get):
+        self._fake_get = fake_get
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        self.timeouts.append(timeout)
+        return self._fake_get(url, params=params, timeout=timeout)
+
+    def close(self):
+        pass
+
+
+def _patch_bridge(monkeypatch, fake_get):
+    from app.infra import bridge_http
+
+    client = FakeBridgeClient(fake_get)
+    monkeypatch.setattr(bridge_http, "_client", client)
+    return client
+
+
+class NotFoundResponse(FakeResponse):
+    def __init__(self):
+        super().__init__({}, status_code=404)
+
+    def raise_for_status(self):
+        raise httpx.HTTPStatusError("not found", request=None, response=httpx.Response(404))
+
+
 def test_remote_bridge_down(monkeypatch, tmp_path):
     def fake_get(*args, **kwargs):
         raise httpx.ConnectError("down")
 
-    monkeypatch.setattr(httpx, "get", fake_get)
+    _patch_bridge(monkeypatch, fake_get)
     client = _make_client(
         tmp_path,
         {
@@ -69,7 +100,7 @@ def test_remote_stale_candles(monkeypatch, tmp_path):
             return FakeResponse({"bid": 1, "ask": 1, "ts": fresh_ts})
         return FakeResponse({}, status_code=404)
 
-    monkeypatch.setattr(httpx, "get", fake_get)
+    _patch_bridge(monkeypatch, fake_get)
     client = _make_client(
         tmp_path,
         {
@@ -95,7 +126,7 @@ def test_remote_ok(monkeypatch, tmp_path):
             return FakeResponse({"bid": 4671.5, "ask": 4672.0, "ts": fresh_ts})
         return FakeResponse({}, status_code=404)
 
-    monkeypatch.setattr(httpx, "get", fake_get)
+    _patch_bridge(monkeypatch, fake_get)
     client = _make_client(
         tmp_path,
         {
@@ -107,3 +138,212 @@ def test_remote_ok(monkeypatch, tmp_path):
     resp = client.post("/analyze", json={"symbol": "XAUUSD"})
     assert resp.status_code == 200
     assert resp.json()["decision"]["blocked_by"] != "DATA_OFF"
+
+
+def test_remote_snapshot_single_call(monkeypatch, tmp_path):
+    fresh_ts = datetime.now(timezone.utc).isoformat()
+    calls = []
+
+    def fake_get(url, params=None, timeout=4.0, headers=None):
+        calls.append(url.rsplit("/", 1)[-1])
+        if url.endswith("/snapshot"):
+            assert params["tfs"] == "M5:48,M15:80,H1:100"
+            bar = {"ts": fresh_ts, "open": 4660, "high": 4685, "low": 4645, "close": 4672}
+            return FakeResponse({
+                "symbol": "XAUUSD", "bid": 4671.5, "ask": 4672.0, "ts": fresh_ts, "spread_points": 12,
+                "candles": {"M5": [bar], "M15": [bar], "H1": [bar]},
+            })
+        return FakeResponse({}, status_code=404)
+
+    _patch_bridge(monkeypatch, fake_get)
+    _make_client(tmp_path, {"MARKET_PROVIDER": "remote_mt5", "MT5_BRIDGE_URL": "http://bridge"})
+    from app.providers.market_snapshot import fetch_market_snapshot
+    from app.providers.remote_mt5_provider import RemoteMT5Provider
+
+    snap = fetch_market_snapshot(RemoteMT5Provider(), "XAUUSD")
+    assert calls == ["snapshot"]
+    assert snap.tick == (4671.5, 4672.0)
+    assert snap.spread == 12.0
+    assert len(snap.candles_m15) == 1 and len(snap.candles_h1) == 1 and len(snap.candles_m5) == 1
+
+
+def test_remote_snapshot_unsupported_falls_back(monkeypatch, tmp_path):
+    fresh_ts = datetime.now(timezone.utc).isoformat()
+    calls = []
+
+    def fake_get(url, params=None, timeout=4.0, headers=None):
+        calls.append(url.rsplit("/", 1)[-1])
+        if url.endswith("/candles"):
+            return FakeResponse({"candles": [{"ts": fresh_ts, "open": 4660, "high": 4685, "low": 4645, "close": 4672}]})
+        if url.endswith("/spread"):
+            return FakeResponse({"spread_points": 12, "bid": 4671.5, "ask": 4672.0, "ts": fresh_ts})
+        if url.endswith("/tick"):
+            return FakeResponse({"bid": 4671.5, "ask": 4672.0, "ts": fresh_ts})
+        return NotFoundResponse()
+
+    _patch_bridge(monkeypatch, fake_get)
+    _make_client(tmp_path, {"MARKET_PROVIDER": "remote_mt5", "MT5_BRIDGE_URL": "http://bridge"})
+    from app.providers.market_snapshot import fetch_market_snapshot
+    from app.providers.remote_mt5_provider import RemoteMT5Provider
+
+    provider = RemoteMT5Provider()
+    snap = fetch_market_snapshot(provider, "XAUUSD")
+    assert "candles" in calls and len(snap.candles_m15) == 1
+    calls.clear()
+    fetch_market_snapshot(provider, "XAUUSD")
+    assert "snapshot" not in calls
+
+
+def test_remote_provider_reuses_pooled_client(monkeypatch, tmp_path):
+    fresh_ts = datetime.now(timezone.utc).isoformat()
+
+    def fake_get(url, params=None, timeout=4.0, headers=None):
+        return FakeResponse({"bid": 4671.5, "ask": 4672.0, "ts": fresh_ts, "spread_points": 12})
+
+    client = _patch_bridge(monkeypatch, fake_get)
+    _make_client(tmp_path, {"MARKET_PROVIDER": "remote_mt5", "MT5_BRIDGE_URL": "http://bridge"})
+    from app.infra.bridge_http import get_bridge_client
+    from app.providers import get_provider
+
+    provider = get_provider()
+    assert get_provider() is provider
+    assert provider.client is client and get_bridge_client() is client
+    assert provider.get_tick("XAUUSD") == (4671.5, 4672.0)
+    provider.get_spread("XAUUSD")
+    assert [t.read for t in client.timeouts] == [2.0, 2.0]
+
+
+def test_bridge_client_pool_is_bounded(monkeypatch):
+    from app.infra import bridge_http
+
+    monkeypatch.setenv("MT5_BRIDGE_POOL_SIZE", "3")
+    monkeypatch.setattr(bridge_http, "_client", None)
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    try:
+        first = bridge_http.get_bridge_client()
+        assert bridge_http.get_bridge_client() is first
+        pool = first._transport._pool
+        assert pool._max_connections == 3 and pool._max_keepalive_connections == 3
+        assert bridge_http.bridge_timeout("/position/modify-sl").read == 5.0
+        bridge_http.close_bridge_client()
+        assert first.is_closed and bridge_http._client is None
+    finally:
+        get_settings.cache_clear()
+
+
+def test_remote_candles_incremental_since(monkeypatch, tmp_path):
+    base = 1_700_000_100 - (1_700_000_100 % 900)
+    bars = [
+        {"time": base + i * 900, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5}
+        for i in range(80)
+    ]
+    requests = []
+
+    def fake_get(url, params=None, timeout=4.0, headers=None):
+        requests.append(dict(params or {}))
+        since = params.get("since")
+        if since is None:
+            return FakeResponse({"candles": bars})
+        assert int(since) == bars[-1]["time"]
+        forming = dict(bars[-1], close=1.9)
+        new_bar = {"time": bars[-1]["time"] + 900, "open": 1.9, "high": 2.1, "low": 1.8, "close": 2.0}
+        return FakeResponse({"candles": [forming, new_bar]})
+
+    _patch_bridge(monkeypatch, fake_get)
+    _make_client(tmp_path, {"MARKET_PROVIDER": "remote_mt5", "MT5_BRIDGE_URL": "http://bridge"})
+    from app.providers.remote_mt5_provider import RemoteMT5Provider
+
+    provider = RemoteMT5Provider()
+    first = provider.get_candles("XAUUSD", "M15", 80)
+    assert len(first) == 80 and "since" not in requests[0]
+    second = provider.get_candles("XAUUSD", "M15", 80)
+    assert requests[1]["since"] == str(bars[-1]["time"])
+    assert len(second) == 80
+    assert second[0]["time"] == bars[1]["time"]
+    assert second[-2]["close"] == 1.9  # barre en formation rafraîchie
+    assert second[-1]["time"] == bars[-1]["time"] + 900
+
+
+def _mt5_rates(n, start=1_700_000_000):
+    import numpy as np
+
+    dtype = [
+        ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+        ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+    ]
+    rates = np.zeros(n, dtype=dtype)
+    rates["time"] = start + np.arange(n) * 900
+    rates["open"] = 4660.0 + np.arange(n)
+    rates["high"] = rates["open"] + 5
+    rates["low"] = rates["open"] - 5
+    rates["close"] = rates["open"] + 1
+    rates["tick_volume"] = 100
+    return rates
+
+
+def test_remote_candles_npy_format(monkeypatch, tmp_path):
+    import io
+
+    import numpy as np
+
+    rates = _mt5_rates(80)
+    seen = []
+
+    def fake_get(url, params=None, timeout=4.0, headers=None):
+        seen.append(params.get("format"))
+        buf = io.BytesIO()
+        np.save(buf, rates, allow_pickle=False)
+        return httpx.Response(
+            200, content=buf.getvalue(), headers={"content-type": "application/x-npy"},
+            request=httpx.Request("GET", url),
+        )
+
+    _patch_bridge(monkeypatch, fake_get)
+    _make_client(tmp_path, {
+        "MARKET_PROVIDER": "remote_mt5", "MT5_BRIDGE_URL": "http://bridge", "MT5_CANDLES_FORMAT": "npy",
+    })
+    try:
+        from app.providers.remote_mt5_provider import RemoteMT5Provider
+
+        provider = RemoteMT5Provider()
+        cols = provider.get_candle_columns("XAUUSD", "M15", 80)
+        assert cols["close"].dtype == np.float64 and cols["close"].flags["C_CONTIGUOUS"]
+        assert np.array_equal(cols["time"], rates["time"])
+        candles = provider.get_candles("XAUUSD", "M15", 80)
+        assert seen == ["npy", "npy"]
+        assert candles[-1] == {
+            "time": int(rates["time"][-1]), "tick_volume": 100, "spread": 0, "real_volume": 0,
+            "open": 4739.0, "high": 4744.0, "low": 4734.0, "close": 4740.0,
+        }
+    finally:
+        import os
+
+        os.environ.pop("MT5_CANDLES_FORMAT", None)
+
+
+def test_remote_candles_columnar_format(monkeypatch, tmp_path):
+    rates = _mt5_rates(3)
+    columns = {name: rates[name].tolist() for name in rates.dtype.names}
+
+    def fake_get(url, params=None, timeout=4.0, headers=None):
+        assert params["format"] == "columnar"
+        return httpx.Response(
+            200, json={"format": "columnar", "columns": columns}, request=httpx.Request("GET", url),
+        )
+
+    _patch_bridge(monkeypatch, fake_get)
+    _make_client(tmp_path, {
+        "MARKET_PROVIDER": "remote_mt5", "MT5_BRIDGE_URL": "http://bridge", "MT5_CANDLES_FORMAT": "columnar",
+    })
+    try:
+        from app.providers.remote_mt5_provider import RemoteMT5Provider
+
+        candles = RemoteMT5Provider().get_candles("XAUUSD", "M15", 3)
+        assert [c["time"] for c in candles] == columns["time"]
+        assert [c["close"] for c in candles] == columns["close"]
+    finally:
+        import os
+
+        os.environ.pop("MT5_CANDLES_FORMAT", None)
@@ -0,0 +1,92 @@
+"""
+Replay : fenêtres du ReplayProvider sans lookahead (barres clôturées + barre en formation à l'open),
+run complet à travers le pipeline de décision vers la base de résultats, drawdown du résumé.
+"""
+import numpy as np
+
+from app.config import get_settings
+from app.engines.replay_engine import ReplayRunner, SimulatedTrade, replay_environment, summarize_trades
+from app.infra.replay_results import ReplayResultsDB
+from app.providers.replay import ReplayProvider
+from app.providers.resampler import resample_columns
+
+# Lundi 00:00 heure serveur (epoch décalé tel que MT5 le rapporte)
+MONDAY = 1_704_672_000
+
+
+def _columns(days, seed=1):
+    times = [MONDAY + d * 86400 + i * 300 for d in range(days) if d % 7 < 5 for i in range(288)]
+    rng = np.random.default_rng(seed)
+    n = len(times)
+    close = 2050.0 + np.cumsum(rng.normal(0, 1.5, n))
+    open_ = np.r_[close[0], close[:-1]]
+    return {
+        "time": np.asarray(times, dtype=np.int64),
+        "open": open_,
+        "high": np.maximum(open_, close) + np.abs(rng.normal(0, 1, n)),
+        "low": np.minimum(open_, close) - np.abs(rng.normal(0, 1, n)),
+        "close": close,
+        "tick_volume": rng.integers(10, 100, n),
+        "spread": np.full(n, 15),
+    }
+
+
+def test_windows_see_nothing_after_cursor():
+    columns = _columns(3)
+    provider = ReplayProvider("XAUUSD", columns)
+    i = 288 + 7  # mardi 00:35 : H1 en formation = 7 barres M5 clôturées + barre ouverte
+    provider.seek(i)
+    m5 = provider.get_candles("XAUUSD", "M5", 10)
+    assert [c["time"] for c in m5] == columns["time"][i - 9:i + 1].tolist()
+    assert m5[-1]["open"] == m5[-1]["high"] == m5[-1]["low"] == m5[-1]["close"] == columns["open"][i]
+    assert m5[-1]["tick_volume"] == 0
+
+    h1 = provider.get_candles("XAUUSD", "H1", 5)
+    full = resample_columns(columns, "H1")
+    k = int(np.searchsorted(full["time"], MONDAY + 86400))
+    assert [c["time"] for c in h1[:-1]] == full["time"][k - 4:k].tolist()
+    forming = h1[-1]
+    assert forming["time"] == MONDAY + 86400
+    assert forming["open"] == columns["open"][288]
+    assert forming["high"] == max(columns["high"][288:i].max(), columns["open"][i])
+    assert forming["low"] == min(columns["low"][288:i].min(), columns["open"][i])
+    assert forming["close"] == columns["open"][i]
+    assert provider.get_server_time().timestamp() == columns["time"][i]
+
+
+def test_summary_drawdown_and_setups():
+    trades = [
+        SimulatedTrade("BUY", "PULLBACK_SR", 0, 0, 0, 0, "t", outcome_pts=pts)
+        for pts in (7.0, -20.0, 7.0, -5.0, 14.0)
+    ]
+    trades[-1].setup_type = "BREAKOUT_RETEST"
+    summary = summarize_trades(trades, decisions=10, go=5)
+    assert (summary.trades, summary.wins, summary.losses) == (5, 3, 2)
+    assert summary.points == 3.0
+    assert summary.max_drawdown == 20.0  # pic +7 → creux -13
+    assert summary.points_by_setup == {"PULLBACK_SR": -11.0, "BREAKOUT_RETEST": 14.0}
+
+
+def test_replay_run_writes_results(tmp_path, monkeypatch):
+    # Données aléatoires : plafond ATR levé pour que des setups passent jusqu'aux trades simulés
+    monkeypatch.setenv("ATR_MAX", "1000")
+    monkeypatch.setenv("ALWAYS_IN_SESSION", "true")
+    get_settings.cache_clear()
+    provider = ReplayProvider("XAUUSD", _columns(12))
+    db = ReplayResultsDB(str(tmp_path / "replay_results.db"))
+    try:
+        with replay_environment():
+            db.start_run("XAUUSD", "M5", None, None, {})
+            summary = ReplayRunner(provider, sink=db).run(provider.index_at(MONDAY + 8 * 86400))
+            db.finish_run(summary)
+        trades = db.get_trades(1)
+        run = db.conn.execute("SELECT summary_json FROM replay_runs WHERE id = 1").fetchone()
+        decisions = db.conn.execute("SELECT COUNT(*) FROM replay_decisions WHERE run_id = 1").fetchone()[0]
+    finally:
+        db.close()
+        get_settings.cache_clear()
+    assert summary.decisions > 0 and summary.trades > 0
+    assert len(trades) == summary.trades and run["summary_json"]
+    assert decisions == summary.decisions
+    assert all(t["exit_status"] in {"SL", "TP1", "TP2", "BE", "OPEN"} for t in trades)
+    assert round(sum(t["outcome_pts"] or 0.0 for t in trades), 2) == round(summary.points, 2)
@@ -0,0 +1,170 @@
+"""
+Rééchantillonnage local M5 → M15/H1/H4 : alignement sur les time MT5 (heure serveur broker),
+trous de marché, première période tronquée, et provider (sync et async) qui ne lit que le TF de base.
+"""
+import asyncio
+
+import numpy as np
+
+from app.config import get_settings
+from app.providers.resampler import (
+    AsyncResamplingProvider,
+    ResamplingProvider,
+    can_resample,
+    resample_candles,
+    resample_columns,
+)
+
+# Lundi 00:00 heure serveur (epoch décalé tel que MT5 le rapporte)
+MONDAY = 1_704_672_000
+
+
+def _m5(start, n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 2050.0 + np.cumsum(rng.normal(0, 1, n))
+    return [
+        {
+            "time": start + i * 300,
+            "open": float(c - 0.3),
+            "high": float(c + abs(h)),
+            "low": float(c - abs(l)),
+            "close": float(c),
+            "tick_volume": int(v),
+            "spread": int(s),
+        }
+        for i, (c, h, l, v, s) in enumerate(zip(
+            close, rng.normal(0, 1, n), rng.normal(0, 1, n), rng.integers(1, 100, n), rng.integers(10, 30, n),
+        ))
+    ]
+
+
+def _reference(candles, sec):
+    """Agrégation de référence en boucle (groupes par time // sec)."""
+    groups = {}
+    for c in candles:
+        groups.setdefault(c["time"] // sec * sec, []).append(c)
+    return [
+        {
+            "time": t,
+            "open": g[0]["open"],
+            "high": max(c["high"] for c in g),
+            "low": min(c["low"] for c in g),
+            "close": g[-1]["close"],
+            "tick_volume": sum(c["tick_volume"] for c in g),
+            "spread": min(c["spread"] for c in g),
+        }
+        for t, g in sorted(groups.items())
+    ]
+
+
+def test_matches_reference_with_market_gap():
+    # Vendredi soir puis reprise lundi : pas de barres H1/H4 inventées pendant la fermeture
+    friday = _m5(MONDAY - 3 * 86400 + 20 * 3600, 36, seed=1)
+    monday = _m5(MONDAY + 3600, 60, seed=2)  # ouverture 01:00 serveur
+    candles = friday + monday
+    for tf, sec in (("M15", 900), ("H1", 3600), ("H4", 14400)):
+        got = resample_candles(candles, tf)
+        expected = _reference(candles, sec)
+        if tf == "H4":
+            # 20:00 vendredi est aligné H4 ; la période lundi 00:00 commence à 01:00 (trou), conservée
+            assert [b["time"] for b in got] == [b["time"] for b in expected]
+        assert got == expected
+    assert [b["time"] for b in resample_candles(candles, "H1")][2:4] == [MONDAY - 3 * 86400 + 22 * 3600, MONDAY + 3600]
+
+
+def test_truncated_first_period_dropped_forming_last_kept():
+    candles = _m5(MONDAY + 600, 27)  # commence à 00:10, finit à 02:20 (H1 02:00 en formation)
+    h1 = resample_candles(candles, "H1")
+    assert [b["time"] for b in h1] == [MONDAY + 3600, MONDAY + 7200]
+    assert h1[-1]["close"] == candles[-1]["close"]
+    assert h1[0] == _reference(candles[10:22], 3600)[0]
+
+
+def test_columns_and_broker_offset():
+    candles = _m5(MONDAY, 96)
+    columns = {k: np.array([c[k] for c in candles]) for k in candles[0]}
+    h4 = resample_columns(columns, "H4", offset_sec=3600)  # grille H4 décalée d'une heure
+    assert h4["time"].tolist() == [MONDAY + 3600, MONDAY + 5 * 3600]
+    assert h4["high"][0] == max(c["high"] for c in candles[12:60])
+    assert can_resample("M5", "H1") and not can_resample("M15", "M5") and not can_resample("M10", "M15")
+
+
+class _FakeInner:
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = []
+
+    def get_candles(self, symbol, timeframe, n):
+        self.calls.append((timeframe, n))
+        return self.candles[-n:]
+
+    def get_snapshot(self, symbol, timeframes):
+        self.calls.append(("snapshot", dict(timeframes)))
+        return {"bid": 1.0, "ask": 1.1, "candles": {tf: self.candles[-n:] for tf, n in timeframes.items()}}
+
+
+def test_provider_fetches_base_only():
+    candles = _m5(MONDAY, 1500)
+    inner = _FakeInner(candles)
+    provider = ResamplingProvider(inner, "M5")
+    m15 = provider.get_candles("XAUUSD", "M15", 80)
+    h1 = provider.get_candles("XAUUSD", "H1", 100)
+    m5 = provider.get_candles("XAUUSD", "M5", 48)
+    assert len(m15) == 80 and len(h1) == 100 and m5 == candles[-48:]
+    assert h1 == _reference(candles, 3600)[-100:]
+    assert [tf for tf, _ in inner.calls] == ["M5", "M5"]  # H1 plus profond → une relecture, puis mémoire
+
+    payload = provider.get_snapshot("XAUUSD", {"M5": 48, "M15": 80, "H1": 100})
+    assert inner.calls[-1] == ("snapshot", {"M5": 1212})
+    assert payload["candles"]["M15"] == _reference(candles, 900)[-80:]
+    assert payload["candles"]["M5"] == candles[-48:]
+
+
+class _AsyncFakeInner:
+    def __init__(self, candles):
+        self.inner = _FakeInner(candles)
+        self.calls = self.inner.calls
+
+    async def get_candles(self, symbol, timeframe, n):
+        await asyncio.sleep(0)
+        return self.inner.get_candles(symbol, timeframe, n)
+
+    async def get_snapshot(self, symbol, timeframes):
+        return self.inner.get_snapshot(symbol, timeframes)
+
+
+def test_async_provider_fetches_base_only():
+    candles = _m5(MONDAY, 1500)
+    inner = _AsyncFakeInner(candles)
+    provider = AsyncResamplingProvider(inner, "M5")
+
+    async def cycle():
+        # Lectures parallèles du cycle (asyncio.gather) : elles partagent les lectures de base
+        return await asyncio.gather(
+            provider.get_candles("XAUUSD", "M15", 80),
+            provider.get_candles("XAUUSD", "H1", 100),
+            provider.get_candles("XAUUSD", "M5", 48),
+        )
+
+    m15, h1, m5 = asyncio.run(cycle())
+    assert m15 == _reference(candles, 900)[-80:] and h1 == _reference(candles, 3600)[-100:]
+    assert m5 == candles[-48:]
+    assert [tf for tf, _ in inner.calls] == ["M5", "M5"]
+
+    payload = asyncio.run(provider.get_snapshot("XAUUSD", {"M5": 48, "M15": 80, "H1": 100}))
+    assert inner.calls[-1] == ("snapshot", {"M5": 1212})
+    assert payload["candles"]["H1"] == _reference(candles, 3600)[-100:]
+
+
+def test_async_cycle_provider_resamples(monkeypatch):
+    import app.providers as providers
+
+    for key, value in {"MARKET_PROVIDER": "remote_mt5", "MT5_ASYNC_FETCH": "true", "MARKET_RESAMPLE_BASE_TF": "M5"}.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(providers, "_async_provider", None)
+    get_settings.cache_clear()
+    try:
+        provider = providers.get_async_provider()
+        assert isinstance(provider, AsyncResamplingProvider) and provider.base_tf == "M5"
+    finally:
+        get_settings.cache_clear()
@@ -89,3 +89,46 @@ def test_range_mode_uses_range_edge_criteria():
     assert "Market Phase" not in edge_section or "Mode RANGE" in edge_section
     assert "Momentum M15" not in edge_section
 
+
+
+def test_score_input_scores_like_packet():
+    """ScoreInput (comparaison BUY/SELL sans DecisionPacket) donne le même score que le packet."""
+    from app.engines.scorer import ScoreInput
+
+    state = {"setup_direction": "SELL", "setup_type": "PULLBACK_SR", "timing_ready": True, "recent_m15_trend": "down"}
+    packet = _base_packet(bias_h1=Bias.down, setups_detected=["PULLBACK_SR"], sl=122.0, state=state)
+    light = ScoreInput(
+        state=state, bias_h1=Bias.down, setups_detected=["PULLBACK_SR"], proposed_entry=100.0, sl=122.0,
+        rr_tp1=0.3, atr=1.0, atr_max=50.0, spread=10.0, spread_max=25.0,
+    )
+    assert score_packet(light) == score_packet(packet)
+
+
+def test_score_trace_rescore_is_incremental(monkeypatch):
+    """Trace mémoïsé sur le packet : changer room / extension / phase ne réévalue que ces règles."""
+    from app.engines import scorer
+    from app.engines.scorer import score_trace
+
+    state = {"setup_direction": "BUY", "setup_type": "PULLBACK_SR", "recent_m15_trend": "up",
+             "last_swing_low": 90.0, "last_swing_high": 110.0}
+    packet = _base_packet(setups_detected=["PULLBACK_SR"], atr=10.0, state=state)
+    calls = []
+    real_fibo = scorer.evaluate_fibo
+    monkeypatch.setattr(scorer, "evaluate_fibo", lambda *a, **k: calls.append(a) or real_fibo(*a, **k))
+    monkeypatch.setattr(scorer.get_settings(), "fibo_enabled", True)
+
+    base = score_trace(packet)
+    assert "reasons" not in base.__dict__  # raisons non rendues tant qu'elles ne sont pas lues
+    kw = dict(market_phase="CONSOLIDATION", room_to_target_ok=False, extension_distance_pts=12.0)
+    trace = score_trace(packet, **kw)
+    assert len(calls) == 1
+    assert {"EDGE_PHASE_CONSOLIDATION", "EDGE_ROOM_KO", "ENTRY_EXTENSION_EXCESSIVE"} <= set(trace.rule_ids)
+    assert trace.edge[1:3] == base.edge[1:3] and trace.risk == base.risk
+
+    fresh = _base_packet(setups_detected=["PULLBACK_SR"], atr=10.0, state=dict(state))
+    assert (trace.total, trace.reasons) == score_packet(fresh, **kw)
+    assert len(calls) == 2
+
+    # Entrée du scoring modifiée → recalcul complet
+    packet.rr_tp1 = 0.0
+    assert "RISK_RR_KO" in score_trace(packet, **kw).rule_ids and len(calls) == 3
@@ -137,3 +137,19 @@ def test_rr_tp1_not_tp2(monkeypatch):
     rr_reason = [r for r in reasons if "RR" in r]
     assert not any("TP2" in r for r in rr_reason), "Score ne doit pas mentionner RR TP2"
     get_settings.cache_clear()
+
+
+def test_detect_setups_both_matches_single_direction_calls():
+    """detect_setups_both = detect_setups BUY puis SELL (contexte commun calculé une fois)."""
+    from app.engines.setup_engine import detect_setups, detect_setups_both
+
+    candles = [
+        {"time": 1_700_000_000 + i * 900, "open": 4940 + (i % 6) * 3, "high": 4948 + (i % 6) * 3,
+         "low": 4933 + (i % 4) * 2, "close": 4943 + (i % 6) * 3}
+        for i in range(40)
+    ]
+    h1 = candles[::4]
+    buy, sell = detect_setups_both(candles, h1, 4950.0, candles_m5=candles[-12:])
+    assert buy == detect_setups(candles, h1, 4950.0, direction_override="BUY", candles_m5=candles[-12:])
+    assert sell == detect_setups(candles, h1, 4950.0, direction_override="SELL", candles_m5=candles[-12:])
+    assert detect_setups_both([]) == (detect_setups([]), detect_setups([]))
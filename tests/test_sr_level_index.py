@@ -0,0 +1,66 @@
+"""
+SRLevelIndex : requêtes par bisection identiques aux parcours de liste d'origine,
+touches / dernière touche, et consommation par room to target et suivi.
+"""
+import numpy as np
+
+from app.engines.room_to_target_engine import evaluate_room_to_target
+from app.engines.structure_engine import SRLevelIndex, SwingPoint, analyze_structure
+from app.engines.suivi_engine import _check_sr_too_close, _check_stagnation_near_key_zone
+
+
+def test_queries_match_linear_scans():
+    rng = np.random.default_rng(0)
+    levels = np.round(rng.uniform(2500, 2800, 3000), 1).tolist()  # doublons et égalités exactes inclus
+    index = SRLevelIndex.from_levels(levels)
+    for price in np.round(rng.uniform(2490, 2810, 500), 1).tolist() + levels[:50]:
+        above = [l for l in levels if l > price]
+        below = [l for l in levels if l < price]
+        assert index.next_above(price) == (min(above) if above else None)
+        assert index.next_below(price) == (max(below) if below else None)
+        assert index.within(price, 1.5) == sorted(l for l in levels if abs(l - price) <= 1.5)
+
+
+def test_touch_counts_and_last_touch():
+    swings = [
+        SwingPoint(idx=3, typ="high", price=2650.0),
+        SwingPoint(idx=9, typ="high", price=2651.5),
+        SwingPoint(idx=12, typ="low", price=2600.2),
+        SwingPoint(idx=15, typ="low", price=2500.0),  # trop loin de tout niveau
+    ]
+    times = [1_700_000_000 + i * 900 for i in range(20)]
+    index = SRLevelIndex.from_levels([2650.8, 2600.0], swings, times)
+    assert index.levels == [2600.0, 2650.8]
+    assert index.touch_info(2650.8) == (2, 9, times[9])
+    assert index.touch_info(2600.0) == (1, 12, times[12])
+    assert index.touch_info(2700.0) == (0, -1, 0)
+
+
+def test_structure_result_carries_index():
+    rng = np.random.default_rng(5)
+    close = 2650 + np.cumsum(rng.normal(0, 2, 120))
+    candles = [
+        {"time": 1_700_000_000 + i * 900, "open": c, "high": c + 1.5, "low": c - 1.5, "close": c}
+        for i, c in enumerate(close.tolist())
+    ]
+    struct = analyze_structure(candles)
+    assert struct.sr_index.levels == sorted(struct.sr_levels)
+    assert sum(struct.sr_index.touches) > 0
+    assert struct == analyze_structure(candles)  # index hors égalité
+
+
+def test_engines_accept_index_or_list():
+    levels = [2610.0, 2640.0, 2655.0, 2700.0]
+    index = SRLevelIndex.from_levels(levels)
+    for direction in ("BUY", "SELL"):
+        for entry in (2600.0, 2638.5, 2650.0, 2720.0):
+            assert evaluate_room_to_target(direction, entry, entry + 5, index, 10.0) == evaluate_room_to_target(
+                direction, entry, entry + 5, levels, 10.0
+            )
+            assert _check_sr_too_close(direction, entry, entry, entry, index, 6.0) == _check_sr_too_close(
+                direction, entry, entry, entry, levels, 6.0
+            )
+    assert _check_sr_too_close("BUY", 2650.0, 0, 0, index, 6.0)
+    assert not _check_sr_too_close("SELL", 2650.0, 0, 0, index, 6.0)
+    assert _check_stagnation_near_key_zone([{}] * 3, 2652.0, index, 3.0)
+    assert not _check_stagnation_near_key_zone([{}] * 3, 2670.0, index, 3.0)
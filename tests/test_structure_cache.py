@@ -0,0 +1,57 @@
+import pytest
+
+from app.engines.candle_frame import CandleFrame
+from app.engines.structure_engine import StructureCache, analyze_structure, get_structure_cache
+
+
+def _candles(n=40, last_close=None):
+    out = [
+        {"time": 1_700_000_000 + i * 900, "open": 100.0 + i % 7, "high": 103.0 + i % 7,
+         "low": 98.0 + i % 5, "close": 101.0 + i % 7}
+        for i in range(n)
+    ]
+    if last_close is not None:
+        out[-1]["close"] = last_close
+    return out
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    get_structure_cache().clear()
+    yield
+    get_structure_cache().clear()
+
+
+def test_same_series_hits_cache():
+    frame = CandleFrame.from_candles(_candles(), "XAUUSD", "M15")
+    first = analyze_structure(frame)
+    # Nouveau frame, mêmes barres (cycle suivant sans nouvelle bougie) : même empreinte
+    again = analyze_structure(CandleFrame.from_candles(_candles(), "XAUUSD", "M15"))
+    assert again is first
+    stats = get_structure_cache().stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_fingerprint_changes_miss():
+    base = analyze_structure(CandleFrame.from_candles(_candles(), "XAUUSD", "M15"))
+    assert analyze_structure(CandleFrame.from_candles(_candles(last_close=104.5), "XAUUSD", "M15")) is not base
+    assert analyze_structure(CandleFrame.from_candles(_candles(), "XAUUSD", "H1")) is not base
+    assert analyze_structure(CandleFrame.from_candles(_candles(41), "XAUUSD", "M15")) is not base
+    assert get_structure_cache().stats()["hits"] == 0
+
+
+def test_unidentified_series_not_cached():
+    candles = _candles()
+    assert analyze_structure(candles) == analyze_structure(CandleFrame.from_candles(candles, "XAUUSD", "M15"))
+    assert get_structure_cache().stats()["size"] == 1
+
+
+def test_lru_eviction():
+    cache = StructureCache(max_size=2)
+    result = analyze_structure(_candles())
+    cache.put(("a",), result)
+    cache.put(("b",), result)
+    assert cache.get(("a",)) is result  # "a" devient le plus récent
+    cache.put(("c",), result)
+    assert cache.get(("b",)) is None
+    assert cache.stats()["size"] == 2
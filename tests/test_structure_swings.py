@@ -0,0 +1,67 @@
+"""
+detect_swings vectorisé : parité avec la boucle fractale d'origine (égalités <= / >= incluses)
+y compris sur fenêtres de 5 000 barres (historiques de replay). Benchmark : app/scripts/bench_swings.py.
+"""
+import numpy as np
+
+from app.engines.candle_frame import CandleFrame
+from app.engines.structure_engine import SwingPoint, detect_swings, swing_masks
+
+
+def _detect_swings_loop(candles, lookback=2):
+    """Implémentation de référence (boucle Python d'origine)."""
+    highs = [float(c["high"]) for c in candles]
+    lows = [float(c["low"]) for c in candles]
+    swings = []
+    n = len(highs)
+    if n < 2 * lookback + 1:
+        return swings
+    for i in range(lookback, n - lookback):
+        h = highs[i]
+        if all(highs[j] <= h for j in range(i - lookback, i + lookback + 1) if j != i):
+            swings.append(SwingPoint(idx=i, typ="high", price=h))
+        l = lows[i]
+        if all(lows[j] >= l for j in range(i - lookback, i + lookback + 1) if j != i):
+            swings.append(SwingPoint(idx=i, typ="low", price=l))
+    return swings
+
+
+def _candles(n, seed=0, tick=0.5):
+    """Prix arrondis au demi-point : beaucoup d'égalités entre barres voisines."""
+    rng = np.random.default_rng(seed)
+    close = 2650.0 + np.cumsum(rng.normal(0, 2, n))
+    high = np.round((close + np.abs(rng.normal(0, 1.5, n))) / tick) * tick
+    low = np.round((close - np.abs(rng.normal(0, 1.5, n))) / tick) * tick
+    return [{"high": float(h), "low": float(l), "close": float(c)} for h, l, c in zip(high, low, close)]
+
+
+def test_parity_with_loop_including_ties():
+    for seed in range(20):
+        candles = _candles(300, seed)
+        for lookback in (1, 2, 3, 5):
+            assert detect_swings(candles, lookback) == _detect_swings_loop(candles, lookback)
+
+
+def test_flat_and_short_series():
+    flat = [{"high": 10.0, "low": 9.0, "close": 9.5}] * 7
+    assert detect_swings(flat) == _detect_swings_loop(flat)
+    assert detect_swings(flat[:4]) == []
+
+
+def _swing_masks_loop(highs, lows, lookback=2):
+    n = len(highs)
+    is_high, is_low = [], []
+    for i in range(lookback, n - lookback):
+        window = range(i - lookback, i + lookback + 1)
+        is_high.append(all(highs[j] <= highs[i] for j in window if j != i))
+        is_low.append(all(lows[j] >= lows[i] for j in window if j != i))
+    return is_high, is_low
+
+
+def test_parity_5000_bars():
+    candles = _candles(5000, seed=42)
+    frame = CandleFrame.from_candles(candles)
+    exp_high, exp_low = _swing_masks_loop(frame.high.tolist(), frame.low.tolist())
+    is_high, is_low = swing_masks(frame.high, frame.low)
+    assert is_high.tolist() == exp_high and is_low.tolist() == exp_low
+    assert detect_swings(frame) == _detect_swings_loop(candles)
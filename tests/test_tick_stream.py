@@ -0,0 +1,125 @@
+"""Flux de ticks : dédup time_msc, extrêmes intra-cycle, suivi sur touche entre deux polls."""
+import os
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+
+from app.engines.suivi_engine import price_with_touches
+from app.providers.tick_stream import TickRange, TickStreamSubscriber
+
+
+def _tick(bid, ask, msc):
+    return {"symbol": "XAUUSD", "bid": bid, "ask": ask, "time_msc": msc}
+
+
+def test_subscriber_dedups_and_tracks_range():
+    seen = []
+    sub = TickStreamSubscriber("XAUUSD", on_tick=lambda s, b, a: seen.append(b))
+    assert sub.handle_tick(_tick(4670.0, 4670.5, 1000))
+    assert not sub.handle_tick(_tick(4671.0, 4671.5, 1000))  # même time_msc
+    assert sub.handle_tick(_tick(4660.0, 4660.5, 1100))
+    assert sub.handle_tick(_tick(4665.0, 4665.5, 1200))
+    assert seen == [4670.0, 4660.0, 4665.0]
+    assert sub.latest() == (4665.0, 4665.5)
+    r = sub.take_range()
+    assert (r.bid_low, r.bid_high, r.ask_high, r.ticks) == (4660.0, 4670.0, 4670.5, 3)
+    # Fenêtre suivante : repart du dernier tick
+    r2 = sub.take_range()
+    assert (r2.bid_low, r2.bid_high, r2.ticks) == (4665.0, 4665.0, 0)
+
+
+def test_subscriber_consumes_sse_lines():
+    sub = TickStreamSubscriber("XAUUSD")
+    sub.consume([
+        ": keepalive",
+        'data: {"bid": 1.0, "ask": 1.5, "time_msc": 1}',
+        "",
+        "data: not-json",
+        'data: {"bid": 2.0, "ask": 2.5, "time_msc": 2}',
+    ])
+    assert sub.latest() == (2.0, 2.5)
+    assert sub.take_range().ticks == 2
+
+
+def test_price_with_touches():
+    rng = TickRange(bid_low=4638.0, bid_high=4702.0, ask_low=4638.5, ask_high=4702.5, ticks=5, first_msc=1, last_msc=5)
+    # BUY : SL touché dans la fenêtre → prioritaire
+    assert price_with_touches(4670.0, "BUY", 4640.0, 4700.0, 4720.0, rng) == 4638.0
+    # BUY sans SL touché : TP1 touché
+    assert price_with_touches(4670.0, "BUY", 4630.0, 4700.0, 4720.0, rng) == 4702.0
+    # BE appliqué : TP1 ignoré, TP2 non touché → prix courant
+    assert price_with_touches(4670.0, "BUY", 4630.0, 4700.0, 4720.0, rng, be_applied=True) == 4670.0
+    # SELL : TP1 touché par l'ask bas
+    assert price_with_touches(4670.0, "SELL", 4710.0, 4640.0, 4620.0, rng) == 4638.5
+    assert price_with_touches(4670.0, "BUY", 4640.0, 4700.0, 4720.0, None) == 4670.0
+
+
+def test_analyze_closes_trade_on_stream_touch(tmp_path, monkeypatch):
+    os.environ["DATABASE_PATH"] = str(tmp_path / "test_tick_stream.db")
+    for key in ["MOCK_SERVER_TIME_UTC", "MOCK_PROVIDER_FAIL", "TELEGRAM_ENABLED", "MT5_BRIDGE_URL"]:
+        os.environ.pop(key, None)
+    os.environ["MARKET_PROVIDER"] = "mock"
+    from app.config import get_settings
+    get_settings.cache_clear()
+
+    from app.api import main as api_main
+    from app.infra.db import get_active_trade, init_db, set_active_trade
+    from app.providers import tick_stream
+    from app.state_repo import get_today_state
+
+    init_db()
+    day_paris = datetime.now(timezone.utc).astimezone(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+    get_today_state(day_paris)
+    # Mock : bid 4671.5 (entre SL et TP1) ; le flux a vu 4639.0 entre deux polls
+    set_active_trade(
+        day_paris, 4670.0, 4640.0, 4700.0, 4720.0, "BUY",
+        started_ts=datetime.now(timezone.utc).isoformat(),
+    )
+    sub = TickStreamSubscriber("XAUUSD")
+    sub.handle_tick(_tick(4639.0, 4639.5, 1))
+    sub.handle_tick(_tick(4671.5, 4672.0, 2))
+    monkeypatch.setitem(tick_stream._subscribers, "XAUUSD", sub)
+
+    resp = TestClient(api_main.app).post("/analyze", json={"symbol": "XAUUSD"})
+    assert resp.status_code == 200
+    assert get_active_trade(day_paris) is None
+
+
+def test_stream_level_touched():
+    from app.api.main import _stream_level_touched
+
+    levels = ("BUY", 4640.0, 4700.0, 4720.0, False)
+    assert _stream_level_touched(levels, 4639.9, 4640.4)
+    assert _stream_level_touched(levels, 4700.0, 4700.5)
+    assert not _stream_level_touched(levels, 4670.0, 4670.5)
+    assert not _stream_level_touched(("BUY", 4670.0, 4700.0, 4720.0, True), 4705.0, 4705.5)
+    assert _stream_level_touched(("SELL", 4700.0, 4640.0, 4620.0, False), 4639.0, 4639.5)
+
+
+def test_stream_trigger_and_post_analyze_do_not_overlap(monkeypatch):
+    import threading
+    import time
+
+    import app.api.main as main
+    from app.models import AnalyzeRequest
+
+    running, overlaps = [], []
+
+    def slow_analyze(payload):
+        if running:
+            overlaps.append(payload.symbol)
+        running.append(payload.symbol)
+        time.sleep(0.05)
+        running.pop()
+
+    monkeypatch.setattr(main, "_analyze", slow_analyze)
+    monkeypatch.setattr(main, "_stream_active_levels", lambda: ("BUY", 4640.0, 4700.0, 4720.0, False))
+    monkeypatch.setitem(main._stream_levels, "triggered_at", 0.0)
+    poll = threading.Thread(target=main.analyze, args=(AnalyzeRequest(symbol="XAUUSD"),))
+    poll.start()
+    main._on_stream_tick("XAUUSD", 4639.0, 4639.5)  # SL touché pendant le cycle du runner
+    poll.join()
+    with main._stream_analyze_lock:  # attend la fin du cycle déclenché par le flux
+        pass
+    assert overlaps == []
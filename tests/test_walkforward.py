@@ -0,0 +1,100 @@
+"""
+Walk-forward : découpage en fenêtres ancrées (stable quand l'historique s'allonge), rapport de stabilité
+et points out-of-sample par setup, cache par fenêtre (seules les nouvelles fenêtres sont rejouées).
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.engines.replay_engine import ReplaySummary
+from app.engines.walkforward_engine import (
+    WalkForwardSpec,
+    WalkForwardWindow,
+    WindowResult,
+    combine_summaries,
+    format_report,
+    parameter_stability,
+    run_walkforward,
+    setup_breakdown,
+    walkforward_windows,
+)
+from app.infra.replay_results import WalkForwardCache
+from app.providers.replay import ReplayProvider
+from tests.test_replay import MONDAY, _columns
+
+DAY = 86400
+
+
+def test_windows_anchored_and_complete():
+    spec = WalkForwardSpec.from_dict({"in_sample_days": 7, "out_of_sample_days": 2, "params": {"GO_MIN_SCORE": [75, 80]}})
+    assert spec.step == 2
+    short = walkforward_windows(ReplayProvider("XAUUSD", _columns(26)), spec, warmup_days=8)
+    longer = walkforward_windows(ReplayProvider("XAUUSD", _columns(33)), spec, warmup_days=8)
+    origin = MONDAY + 8 * DAY
+    assert short[0] == WalkForwardWindow(0, origin, origin + 7 * DAY, origin + 9 * DAY)
+    assert all(w.oos_end <= MONDAY + 26 * DAY for w in short)
+    assert longer[: len(short)] == short  # prolonger l'historique ajoute des fenêtres
+    assert len(longer) > len(short)
+
+    with pytest.raises(ValueError):
+        WalkForwardSpec.from_dict({"rank_by": "sharpe", "params": {"GO_MIN_SCORE": [75]}})
+    with pytest.raises(ValueError):
+        WalkForwardSpec.from_dict({"out_of_sample_days": 0, "params": {"GO_MIN_SCORE": [75]}})
+
+
+def test_stability_and_setup_breakdown():
+    def result(index, score, points_by_setup):
+        window = WalkForwardWindow(index, MONDAY + index * DAY, MONDAY + (index + 7) * DAY, MONDAY + (index + 9) * DAY)
+        oos = ReplaySummary(
+            trades=len(points_by_setup),
+            wins=sum(1 for p in points_by_setup.values() if p > 0),
+            points=sum(points_by_setup.values()),
+            points_by_setup=points_by_setup,
+            trades_by_setup={k: 1 for k in points_by_setup},
+        )
+        params = {"GO_MIN_SCORE": score, "entry_timing_mode": "pullback_m5"} if score else None
+        return WindowResult(window, params, ReplaySummary(points=40.0) if score else None, oos if score else None, 2)
+
+    results = [
+        result(0, 80, {"BREAKOUT_RETEST": 12.0, "PULLBACK_SR": -5.0}),
+        result(1, 80, {"BREAKOUT_RETEST": -4.0}),
+        result(2, 75, {"UNKNOWN": 3.0}),
+        result(3, None, {}),
+    ]
+    score, timing = parameter_stability(results)
+    assert score.values == (80, 80, 75) and score.mode == 80 and score.distinct == 2
+    assert score.mode_share == pytest.approx(2 / 3) and score.mean == pytest.approx(235 / 3)
+    assert timing.mean is None and timing.mode_share == 1.0
+
+    total = combine_summaries([r.out_of_sample for r in results if r.out_of_sample])
+    assert total.points == 6.0 and total.trades == 4
+    assert total.max_drawdown == 4.0  # courbe fin de fenêtre : 7 → 3 → 6
+    assert setup_breakdown(total) == {
+        "BREAKOUT_RETEST": (8.0, 2),
+        "PULLBACK_SR": (-5.0, 1),
+        "ZONE_CONFIRMATION": (0.0, 0),
+        "UNKNOWN": (3.0, 1),
+    }
+    spec = WalkForwardSpec.from_dict({"in_sample_days": 7, "out_of_sample_days": 2, "params": {"GO_MIN_SCORE": [75, 80]}})
+    report = format_report(results, spec)
+    assert "ZONE_CONFIRMATION" in report and "(aucun jeu retenu)" in report
+
+
+def test_cache_only_runs_new_windows(tmp_path, monkeypatch):
+    monkeypatch.setenv("ALWAYS_IN_SESSION", "true")
+    provider = ReplayProvider("XAUUSD", _columns(12))
+    spec = WalkForwardSpec.from_dict({"in_sample_days": 1, "out_of_sample_days": 1, "params": {"ATR_MAX": [2.0, 1000.0]}})
+    cache = WalkForwardCache(str(tmp_path / "wf.db"))
+    try:
+        first = run_walkforward(provider, spec, end=datetime.fromtimestamp(MONDAY + 11 * DAY, tz=timezone.utc), workers=1, cache=cache)
+        assert [r.window.index for r in first] == [0, 1]
+        assert not any(r.cached for r in first)
+        assert all(r.best_params == {"ATR_MAX": 1000.0} or r.in_sample.points == 0 for r in first)
+
+        extended = run_walkforward(provider, spec, workers=1, cache=cache)
+        assert [r.window.index for r in extended] == [0, 1, 2]
+        assert [r.cached for r in extended] == [True, True, False]
+        assert [r.out_of_sample for r in extended[:2]] == [r.out_of_sample for r in first]
+        assert extended[2].out_of_sample is not None
+    finally:
+        cache.close()